@@ -14,6 +14,7 @@ Yenilikler v2.0:
 
 Kullanim:
   python ayt_fizik_bot.py --mode batch --count 1
+  python ayt_fizik_bot.py --mode batch --count 2 --workers 6
   python ayt_fizik_bot.py --mode topic --topic elektrostatik --count 5
   python ayt_fizik_bot.py --mode single --konu hareket_ve_kuvvet --bloom Analiz --zorluk 4
 """
@@ -27,11 +28,18 @@ import base64
 import random
 import logging
 import argparse
-import requests
-from datetime import datetime
-from typing import Optional, Dict, Any, List, Tuple
+import threading
+from datetime import datetime, timedelta, timezone
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Optional, Dict, Any, List, Tuple, Union
 from dataclasses import dataclass, asdict, field
 
+import rate_limiter
+from image_pipeline import ImageWorkerPool
+from bulk_writer import BulkInsertBuffer, PendingInsert, on_resolved, resolve_id
+from http_session import get_session
+from vector_index import NearDuplicateIndex
+
 # Google GenAI SDK
 try:
     from google import genai
@@ -78,6 +86,14 @@ class Config:
     RETRY_DELAY = 5
     REQUEST_TIMEOUT = 90
     RATE_LIMIT_DELAY = 3
+    BATCH_WORKERS = int(os.environ.get("AYT_BATCH_WORKERS", "4"))
+    IMAGE_WORKERS = int(os.environ.get("AYT_IMAGE_WORKERS", "2"))
+    BULK_INSERT_SIZE = int(os.environ.get("AYT_BULK_INSERT_SIZE", "10"))
+    BULK_INSERT_WAIT = float(os.environ.get("AYT_BULK_INSERT_WAIT", "5"))
+    # Gorseli bekleyen (is_active=false) satir bu kadar dakika sonra hala gorselsizse
+    # gorsel isi kaybolmus sayilir ve acilista yayinlanir; daha eski satirlara dokunulmaz
+    STALE_INACTIVE_MINUTES = int(os.environ.get("AYT_STALE_INACTIVE_MINUTES", "60"))
+    STALE_INACTIVE_MAX_HOURS = int(os.environ.get("AYT_STALE_INACTIVE_MAX_HOURS", "168"))
     DEFAULT_GRADE_LEVEL = 12
     DEFAULT_SUBJECT = "Fizik"
     DEFAULT_TOPIC_GROUP = "AYT"
@@ -1324,27 +1340,11 @@ class GeminiAPI:
         else:
             self.client = None
         self.text_url = f"{GEMINI_TEXT_URL}?key={api_key}"
-        self.request_count = 0
-        self.last_request_time = 0
+        self.session = get_session()
     
-    def _rate_limit(self):
-        current_time = time.time()
-        if current_time - self.last_request_time > 60:
-            self.request_count = 0
-            self.last_request_time = current_time
-        
-        if self.request_count >= 4:
-            wait_time = 65 - (current_time - self.last_request_time)
-            if wait_time > 0:
-                logger.info(f"Rate limit - {wait_time:.0f}s bekleniyor...")
-                time.sleep(wait_time)
-                self.request_count = 0
-                self.last_request_time = time.time()
-        
-        if self.request_count > 0:
-            time.sleep(3)
-        
-        self.request_count += 1
+    def _rate_limit(self, kind: str = "text"):
+        """Paylasilan token-bucket limiter (rate_limiter.py)"""
+        rate_limiter.acquire(kind, self.api_key)
     
     def generate_question(self, params: QuestionParams) -> Dict[str, Any]:
         konu_data = AYT_FIZIK_KONULAR.get(params.konu, {})
@@ -1491,7 +1491,7 @@ YASAK: Onculleri yazmadan "Yalniz I" gibi siklar olusturmak KESINLIKLE YASAKTIR!
                         }
                     }
                     
-                    response = requests.post(
+                    response = self.session.post(
                         self.text_url,
                         headers={"Content-Type": "application/json"},
                         json=payload,
@@ -1547,7 +1547,7 @@ YASAK: Onculleri yazmadan "Yalniz I" gibi siklar olusturmak KESINLIKLE YASAKTIR!
         full_detay = f"{detay}\n\nGorselde gorunecek ogeler: {', '.join(ogeler) if ogeler else 'Belirtilmemis'}{renk_talimati}"
         prompt = IMAGE_PROMPT_TEMPLATE.format(tip=tip, detay=full_detay)
         
-        self._rate_limit()
+        self._rate_limit("image")
         
         for attempt in range(Config.MAX_RETRIES):
             try:
@@ -1594,6 +1594,9 @@ class SupabaseClient:
             "Prefer": "return=representation"
         }
         self._curriculum_cache = None
+        self.writer = None
+        self.dedup: Optional[NearDuplicateIndex] = None
+        self.session = get_session()
     
     def get_curriculum_for_grade(self, grade_level: int = 12, lesson_name: str = "Fizik") -> List[Dict]:
         if self._curriculum_cache is not None:
@@ -1602,7 +1605,7 @@ class SupabaseClient:
         query_url = f"{self.url}/rest/v1/curriculum?grade_level=eq.{grade_level}&lesson_name=eq.{lesson_name}&select=id,topic_code,topic_name,sub_topic,learning_outcome_code,learning_outcome_description,bloom_level"
         
         try:
-            response = requests.get(query_url, headers=self.headers, timeout=30)
+            response = self.session.get(query_url, headers=self.headers, timeout=30)
             response.raise_for_status()
             self._curriculum_cache = response.json()
             logger.info(f"  Curriculum'dan {len(self._curriculum_cache)} kazanim yuklendi")
@@ -1621,7 +1624,7 @@ class SupabaseClient:
             else:
                 image_bytes = image_data
             
-            response = requests.post(
+            response = self.session.post(
                 upload_url,
                 headers={
                     "apikey": self.key,
@@ -1641,7 +1644,7 @@ class SupabaseClient:
             logger.error(f"  Storage upload hatasi: {e}")
             return None
     
-    def insert_question(self, question: GeneratedQuestion, kazanim_id: int = None) -> Optional[int]:
+    def insert_question(self, question: GeneratedQuestion, kazanim_id: int = None) -> Optional[Union[int, PendingInsert]]:
         insert_url = f"{self.url}/rest/v1/question_bank"
         
         options_json = {
@@ -1677,8 +1680,25 @@ class SupabaseClient:
             "exam_type": "AYT_AI_BOT_V2"
         }
         
+        # Yerel vektor indeksinde cok benzer soru varsa kaydetme
+        confirm = None
+        if self.dedup:
+            match, confirm = self.dedup.check_and_reserve(data)
+            if match:
+                logger.warning(f"  Benzer soru zaten var (ID {match[0]}, benzerlik {match[1]:.3f}), kaydedilmedi")
+                return None
+        
+        # Toplu yazma aktifse satir tampona eklenir, id flush sonrasi gelir
+        question_id = self.writer.add(data) if self.writer else self._post_question(insert_url, data)
+        # Vektor indekse ancak kayit kesinlesince girer; basarisiz kayit rezervasyonu siler
+        if confirm:
+            on_resolved(question_id, confirm)
+        return question_id
+    
+    def _post_question(self, insert_url: str, data: Dict[str, Any]) -> Optional[int]:
+        """Satiri dogrudan kaydet (toplu yazma kapaliyken)"""
         try:
-            response = requests.post(insert_url, headers=self.headers, json=data, timeout=30)
+            response = self.session.post(insert_url, headers=self.headers, json=data, timeout=30)
             response.raise_for_status()
             
             result = response.json()
@@ -1692,6 +1712,66 @@ class SupabaseClient:
         except Exception as e:
             logger.error(f"  Supabase insert hatasi: {e}")
             return None
+    
+    def update_question(self, question_id: int, fields: Dict[str, Any]) -> bool:
+        update_url = f"{self.url}/rest/v1/question_bank?id=eq.{question_id}"
+        
+        try:
+            response = self.session.patch(update_url, headers=self.headers, json=fields, timeout=30)
+            response.raise_for_status()
+            return True
+        except Exception as e:
+            logger.error(f"  Supabase update hatasi (ID {question_id}): {e}")
+            return False
+    
+    def activate_stale_questions(self) -> int:
+        """Gorsel isi yarim kalmis (surec oldu, update basarisiz) eski satirlari gorselsiz yayinla"""
+        now = datetime.now(timezone.utc)
+        newer_than = (now - timedelta(hours=Config.STALE_INACTIVE_MAX_HOURS)).strftime("%Y-%m-%dT%H:%M:%SZ")
+        older_than = (now - timedelta(minutes=Config.STALE_INACTIVE_MINUTES)).strftime("%Y-%m-%dT%H:%M:%SZ")
+        params = {
+            "exam_type": "eq.AYT_AI_BOT_V2",
+            "is_active": "eq.false",
+            "image_url": "is.null",
+            "and": f"(created_at.gt.{newer_than},created_at.lt.{older_than})",
+            "select": "id"
+        }
+        try:
+            response = self.session.patch(f"{self.url}/rest/v1/question_bank", params=params,
+                                          headers=self.headers, json={"is_active": True}, timeout=30)
+            response.raise_for_status()
+            activated = len(response.json())
+        except Exception as e:
+            logger.error(f"  Bekleyen gorselsiz sorular yayinlanamadi: {e}")
+            return 0
+        if activated:
+            logger.warning(f"  Gorsel isi yarim kalmis {activated} soru gorselsiz yayinlandi")
+        return activated
+    
+    def _insert_rows(self, rows: List[Dict]) -> List[Dict]:
+        """Cok satirli insert - PostgREST satirlari gonderim sirasiyla dondurur"""
+        response = self.session.post(f"{self.url}/rest/v1/question_bank", headers=self.headers, json=rows, timeout=60)
+        response.raise_for_status()
+        return response.json()
+    
+    def start_bulk_insert(self):
+        """question_bank insert'lerini toplu yazma tamponuna yonlendir"""
+        if self.writer is None:
+            self.writer = BulkInsertBuffer(
+                "question_bank", self._insert_rows,
+                max_rows=Config.BULK_INSERT_SIZE, max_wait=Config.BULK_INSERT_WAIT
+            )
+            # Journal'dan gelen satirin gorsel isi bu calistirmada yok: gorselsiz yayinlanir
+            self.writer.replay_journal(prepare=lambda row: dict(row, is_active=True))
+            self.activate_stale_questions()
+    
+    def finish_bulk_insert(self):
+        """Tampondaki satirlari gonder ve tamponu kapat"""
+        if self.writer is None:
+            return
+        writer_stats = self.writer.close()
+        self.writer = None
+        logger.info(f"  Toplu kayit: {writer_stats['inserted']}/{writer_stats['rows']} satir, {writer_stats['requests']} istek")
 
 
 # ============================================================================
@@ -1745,6 +1825,7 @@ Hedeflenmesi gereken kavram yanilgilari:
 JSON formatinda dondur:
 {{"is_physically_correct": true/false, "is_mathematically_correct": true/false, "osym_format_ok": true/false, "distractors_quality": 1-10, "difficulty_match": true/false, "overall_score": 1-10, "pass": true/false, "problems": ["problem1", "problem2"]}}"""
             
+            rate_limiter.acquire("text", self.api_key)
             response = self.client.models.generate_content(
                 model=GEMINI_TEXT_MODEL,
                 contents=prompt,
@@ -1769,6 +1850,7 @@ JSON formatinda dondur:
             expected_elements = gorsel_betimleme.get("ogeler", []) if gorsel_betimleme else []
             expected_colors = gorsel_betimleme.get("renkler", {}) if gorsel_betimleme else {}
             
+            rate_limiter.acquire("vision", self.api_key)
             response = self.client.models.generate_content(
                 model=GEMINI_TEXT_MODEL,
                 contents=[
@@ -1826,6 +1908,11 @@ class AYTFizikGenerator:
         
         self.gemini = GeminiAPI(GEMINI_API_KEY)
         self.supabase = SupabaseClient(SUPABASE_URL, SUPABASE_KEY)
+        self.supabase.dedup = NearDuplicateIndex(
+            SUPABASE_URL, SUPABASE_KEY, GEMINI_API_KEY,
+            filters={"subject": f"eq.{Config.DEFAULT_SUBJECT}", "grade_level": f"eq.{Config.DEFAULT_GRADE_LEVEL}"},
+            name="ayt_fizik"
+        )
         self.validator = QualityValidator(GEMINI_API_KEY)
         self.stats = {
             "total_attempts": 0,
@@ -1837,6 +1924,17 @@ class AYTFizikGenerator:
             "quality_retries": 0,
             "by_difficulty": {1: 0, 2: 0, 3: 0, 4: 0, 5: 0}
         }
+        self._stats_lock = threading.Lock()
+        self.image_pool = None
+        self.image_workers = Config.IMAGE_WORKERS
+    
+    def _inc_stat(self, key: str, sub_key: int = None):
+        """Thread-safe istatistik sayaci (paralel batch modu icin)"""
+        with self._stats_lock:
+            if sub_key is None:
+                self.stats[key] += 1
+            else:
+                self.stats[key][sub_key] += 1
     
     def _select_difficulty(self) -> int:
         """Psikometrik dagilima gore zorluk sec"""
@@ -1859,8 +1957,8 @@ class AYTFizikGenerator:
         else:
             return random.choice(available_types)
     
-    def generate_single_question(self, params: QuestionParams, kazanim_from_db: Dict = None) -> Optional[int]:
-        self.stats["total_attempts"] += 1
+    def generate_single_question(self, params: QuestionParams, kazanim_from_db: Dict = None) -> Optional[Union[int, PendingInsert]]:
+        self._inc_stat("total_attempts")
         konu_data = AYT_FIZIK_KONULAR.get(params.konu, {})
         konu_display = konu_data.get("display_name", params.konu)
         
@@ -1878,7 +1976,6 @@ class AYTFizikGenerator:
         logger.info(f"{'='*70}")
         
         max_question_retries = 3
-        max_image_retries = 3
         
         try:
             # ADIM 1: SORU URETIMI
@@ -1895,7 +1992,7 @@ class AYTFizikGenerator:
                 missing = [f for f in required_fields if f not in question_data]
                 if missing:
                     logger.warning(f"  Eksik alanlar: {missing}")
-                    self.stats["quality_retries"] += 1
+                    self._inc_stat("quality_retries")
                     continue
                 
                 # 5 sik kontrolu - AYT'de 5 sik ZORUNLU
@@ -1904,7 +2001,7 @@ class AYTFizikGenerator:
                 
                 if sik_count < 4:
                     logger.warning(f"  Cok az sik var: {sik_count}")
-                    self.stats["quality_retries"] += 1
+                    self._inc_stat("quality_retries")
                     continue
                 
                 # 4 sik varsa, 5. sikki otomatik ekle
@@ -1938,14 +2035,14 @@ class AYTFizikGenerator:
                 # Tekrar kontrol
                 if len(question_data.get("siklar", {})) < 5:
                     logger.warning("  5 sik saglanamadi")
-                    self.stats["quality_retries"] += 1
+                    self._inc_stat("quality_retries")
                     continue
                 
                 # Dogru cevap kontrolu - E sikki yokken E cevabi verilmis mi?
                 dogru_cevap = question_data.get("dogru_cevap", "A")
                 if dogru_cevap not in question_data.get("siklar", {}):
                     logger.warning(f"  Dogru cevap ({dogru_cevap}) siklarda yok!")
-                    self.stats["quality_retries"] += 1
+                    self._inc_stat("quality_retries")
                     continue
                 
                 # ONCULU SORU KONTROLU - CATI SIKI
@@ -1980,8 +2077,8 @@ class AYTFizikGenerator:
                 if siklar_onculu_formatinda and not has_oncul_in_text and not has_oncul_field:
                     logger.warning("  ❌ KRITIK: Siklar onculu formatinda ama I, II, III ifadeleri YOK!")
                     logger.warning("  Soru REDDEDILIYOR ve yeniden uretilecek...")
-                    self.stats["quality_retries"] += 1
-                    self.stats["questions_rejected"] += 1
+                    self._inc_stat("quality_retries")
+                    self._inc_stat("questions_rejected")
                     continue
                 
                 # Onculler field'da var ama metinde yoksa, metne MUTLAKA ekle
@@ -2005,7 +2102,7 @@ class AYTFizikGenerator:
                     
                     if not has_oncul_in_text:
                         logger.warning("  ❌ Onculler eklenemedi, soru reddediliyor")
-                        self.stats["quality_retries"] += 1
+                        self._inc_stat("quality_retries")
                         continue
                 
                 # Eger hala onculler yoksa ve siklar onculu formatindaysa, son kontrol
@@ -2013,7 +2110,7 @@ class AYTFizikGenerator:
                     final_check = question_data.get("soru_metni", "")
                     if not ("I." in final_check and "II." in final_check):
                         logger.warning("  ❌ SON KONTROL: Onculler hala yok, REDDEDILIYOR")
-                        self.stats["quality_retries"] += 1
+                        self._inc_stat("quality_retries")
                         continue
                     else:
                         logger.info("  ✓ Onculu soru formati dogru")
@@ -2034,18 +2131,17 @@ class AYTFizikGenerator:
                     break
                 else:
                     problems = q_validation.get("problems", ["Kalite yetersiz"])
-                    self.stats["quality_retries"] += 1
-                    self.stats["questions_rejected"] += 1
+                    self._inc_stat("quality_retries")
+                    self._inc_stat("questions_rejected")
                     logger.warning(f"  Soru reddedildi: {problems}")
             
             if not question_data:
-                self.stats["failed"] += 1
+                self._inc_stat("failed")
                 logger.error("  Tum soru denemeleri basarisiz")
                 return None
             
             # ADIM 2: GORSEL URETIMI - GUCLENDIRILMIS
             image_url = None
-            image_bytes = None
             gorsel_betimleme = question_data.get("gorsel_betimleme", {})
             
             # Gorsel uretme karari - DAHA AGRESIF
@@ -2098,29 +2194,15 @@ class AYTFizikGenerator:
                     gorsel_uret = True
                     gorsel_neden = "Zor soru - gorsel yardimci"
             
+            deferred_image = None
             if gorsel_uret and gorsel_betimleme:
-                logger.info(f"\n[2/5] Renkli gorsel uretiliyor... ({gorsel_neden})")
-                
-                for img_attempt in range(max_image_retries):
-                    image_bytes = self.gemini.generate_image(gorsel_betimleme, params.konu)
-                    
-                    if image_bytes:
-                        logger.info("  Gorsel kalite kontrolu yapiliyor...")
-                        img_validation = self.validator.validate_image(image_bytes, gorsel_betimleme)
-                        
-                        if img_validation.get("pass", False):
-                            logger.info("  Gorsel kalite kontrolunu gecti")
-                            break
-                        else:
-                            self.stats["images_rejected"] += 1
-                            logger.warning(f"  Gorsel reddedildi: {img_validation.get('problems', [])}")
-                            image_bytes = None
-                
-                if image_bytes:
-                    filename = f"ayt_fizik_v2_{uuid.uuid4().hex[:12]}.png"
-                    image_url = self.supabase.upload_image(image_bytes, filename)
-                    if image_url:
-                        self.stats["with_image"] += 1
+                if self.image_pool:
+                    # Soru hemen kaydedilir, gorsel arka planda uretilip satira eklenir
+                    logger.info(f"\n[2/5] Gorsel arka plan kuyruguna birakiliyor... ({gorsel_neden})")
+                    deferred_image = gorsel_betimleme
+                else:
+                    logger.info(f"\n[2/5] Renkli gorsel uretiliyor... ({gorsel_neden})")
+                    image_url = self._produce_image(gorsel_betimleme, params.konu)
             else:
                 if gorsel_uret and not gorsel_betimleme:
                     logger.info("\n[2/5] Gorsel istendi ama betimleme yok, atlaniyor...")
@@ -2190,7 +2272,9 @@ class AYTFizikGenerator:
                 pisa_context=question_data.get("pisa_baglam", "Bilimsel"),
                 scenario_text=soru_metni,
                 distractor_explanations=question_data.get("celdirici_analizi", {}),
-                image_url=image_url
+                image_url=image_url,
+                # Gorseli bekleyen soru, gorsel eklenene kadar yayinlanmaz
+                is_active=deferred_image is None
             )
             
             # ADIM 4: OZET
@@ -2202,76 +2286,205 @@ class AYTFizikGenerator:
             logger.info("\n[5/5] Veritabanina kaydediliyor...")
             question_id = self.supabase.insert_question(generated, kazanim_id=kazanim_id)
             
-            if question_id:
-                self.stats["successful"] += 1
-                self.stats["by_difficulty"][params.zorluk] += 1
-                logger.info(f"\nBASARILI! Soru ID: {question_id}")
-                return question_id
-            else:
-                self.stats["failed"] += 1
+            if question_id is None:
+                self._inc_stat("failed")
                 logger.error("\nVeritabani kaydi basarisiz")
                 return None
+            
+            # Toplu yazmada id flush sonrasi gelir; basari sayaci kayit kesinlesince artar
+            on_resolved(question_id, lambda saved_id: self._count_saved(saved_id, params.zorluk))
+            if deferred_image:
+                self.image_pool.submit({
+                    "question_id": question_id,
+                    "gorsel_betimleme": deferred_image,
+                    "konu": params.konu
+                })
+            logger.info(f"\nBASARILI! Soru kayda alindi (ID: {question_id})")
+            return question_id
                 
         except Exception as e:
-            self.stats["failed"] += 1
+            self._inc_stat("failed")
             logger.error(f"\nHATA: {str(e)}")
             import traceback
             logger.debug(traceback.format_exc())
             return None
     
-    def generate_batch(self, count_per_topic: int = 1) -> Dict[str, Any]:
+    def _count_saved(self, saved_id: Optional[int], zorluk: int):
+        """Kayit sonucu kesinlesince istatistikleri guncelle"""
+        if saved_id is None:
+            self._inc_stat("failed")
+            logger.error("  Veritabani kaydi basarisiz (journal'a alindi)")
+            return
+        self._inc_stat("successful")
+        self._inc_stat("by_difficulty", zorluk)
+    
+    def _produce_image(self, gorsel_betimleme: Dict, konu: str, max_image_retries: int = 3) -> Optional[str]:
+        """Gorsel uret, kalite kontrolunden gecir ve Storage'a yukle"""
+        image_bytes = None
+        for img_attempt in range(max_image_retries):
+            image_bytes = self.gemini.generate_image(gorsel_betimleme, konu)
+            
+            if image_bytes:
+                logger.info("  Gorsel kalite kontrolu yapiliyor...")
+                img_validation = self.validator.validate_image(image_bytes, gorsel_betimleme)
+                
+                if img_validation.get("pass", False):
+                    logger.info("  Gorsel kalite kontrolunu gecti")
+                    break
+                else:
+                    self._inc_stat("images_rejected")
+                    logger.warning(f"  Gorsel reddedildi: {img_validation.get('problems', [])}")
+                    image_bytes = None
+        
+        if not image_bytes:
+            return None
+        
+        filename = f"ayt_fizik_v2_{uuid.uuid4().hex[:12]}.png"
+        image_url = self.supabase.upload_image(image_bytes, filename)
+        if image_url:
+            self._inc_stat("with_image")
+        return image_url
+    
+    def _fill_image(self, job: Dict) -> bool:
+        """Gorsel worker'i: kaydedilmis sorunun gorselini uret ve satiri guncelle"""
+        question_id = resolve_id(job["question_id"])
+        if question_id is None:
+            logger.error("  [Gorsel] Soru kaydedilemedigi icin gorsel atlandi")
+            return False
+        logger.info(f"  [Gorsel] Soru {question_id} icin gorsel uretiliyor...")
+        try:
+            image_url = self._produce_image(job["gorsel_betimleme"], job["konu"])
+        except Exception as e:
+            logger.error(f"  [Gorsel] Soru {question_id} gorsel hatasi: {e}")
+            image_url = None
+        
+        # Gorsel uretilemese de soru (eski davranista oldugu gibi) gorselsiz yayinlanir;
+        # update de basarisiz olursa satiri sonraki acilista activate_stale_questions yayinlar
+        fields = {"is_active": True}
+        if image_url:
+            fields["image_url"] = image_url
+        updated = self.supabase.update_question(question_id, fields)
+        if updated and image_url:
+            logger.info(f"  [Gorsel] Soru {question_id} gorseli eklendi")
+        return updated and bool(image_url)
+    
+    def _resolve_ids(self, ids: List) -> List[int]:
+        """Toplu kayit sonrasi bekleyen id'leri gercek id'lere cevir"""
+        resolved = [resolve_id(i) for i in ids]
+        lost = resolved.count(None)
+        if lost:
+            logger.warning(f"  {lost} soru veritabanina yazilamadi (journal'a alindi)")
+        return [i for i in resolved if i is not None]
+    
+    def start_image_pool(self, workers: int = None):
+        """Arka plan gorsel worker havuzunu baslat (0 = gorseller satir ici uretilir)"""
+        workers = self.image_workers if workers is None else workers
+        if workers > 0 and self.image_pool is None:
+            self.image_pool = ImageWorkerPool(self._fill_image, workers=workers, name="ayt-image")
+    
+    def finish_image_pool(self):
+        """Kuyruktaki gorsel isleri bitene kadar bekle"""
+        if self.image_pool is None:
+            return
+        pool_stats = self.image_pool.close()
+        self.image_pool = None
+        logger.info(f"  Gorsel kuyrugu tamamlandi: {pool_stats['completed']}/{pool_stats['submitted']} gorsel eklendi")
+    
+    def _build_batch_params(self, konu_key: str, konu_data: Dict, curriculum: List[Dict]) -> Tuple[QuestionParams, Optional[Dict]]:
+        """Batch modu icin rastgele soru parametreleri ve eslesen kazanimi sec"""
+        kazanim_from_db = None
+        if curriculum:
+            matching = [k for k in curriculum if self._match_curriculum_topic(k, konu_key)]
+            if matching:
+                kazanim_from_db = random.choice(matching)
+        
+        # Psikometrik zorluk secimi
+        zorluk = self._select_difficulty()
+        
+        alt_konu = random.choice(konu_data.get("alt_konular", ["genel"]))
+        kazanim_kodu = kazanim_from_db.get("learning_outcome_code") if kazanim_from_db else konu_data.get("kazanimlar", ["F.12.1.1.1"])[0]
+        bloom = random.choice(list(BLOOM_SEVIYELERI.keys()))
+        baglam = random.choice(konu_data.get("ornek_baglamlar", ["genel"]))
+        gorsel_tipi = random.choice(konu_data.get("gorsel_tipleri", ["kuvvet_diyagrami"]))
+        soru_tipi = self._select_question_type(konu_data, zorluk)
+        
+        params = QuestionParams(
+            konu=konu_key,
+            alt_konu=alt_konu,
+            kazanim_kodu=kazanim_kodu,
+            bloom_seviyesi=bloom,
+            zorluk=zorluk,
+            baglam=baglam,
+            gorsel_tipi=gorsel_tipi,
+            soru_tipi=soru_tipi
+        )
+        return params, kazanim_from_db
+    
+    def generate_batch(self, count_per_topic: int = 1, workers: int = None) -> Dict[str, Any]:
+        workers = Config.BATCH_WORKERS if workers is None else workers
+        
         logger.info(f"\n{'#'*70}")
         logger.info(f"TOPLU SORU URETIMI BASLIYOR (v2.0)")
         logger.info(f"   Her konu icin {count_per_topic} soru")
         logger.info(f"   Psikometrik zorluk dagilimi aktif")
+        logger.info(f"   Paralel worker sayisi: {workers}")
         logger.info(f"{'#'*70}\n")
         
         curriculum = self.supabase.get_curriculum_for_grade(grade_level=12, lesson_name="Fizik")
         
         results = {"generated_ids": [], "failed_topics": [], "stats": {}}
         
+        jobs = []
         for konu_key, konu_data in AYT_FIZIK_KONULAR.items():
-            logger.info(f"\nKonu: {konu_data['display_name']}")
-            
             for i in range(count_per_topic):
-                kazanim_from_db = None
-                if curriculum:
-                    matching = [k for k in curriculum if self._match_curriculum_topic(k, konu_key)]
-                    if matching:
-                        kazanim_from_db = random.choice(matching)
-                
-                # Psikometrik zorluk secimi
-                zorluk = self._select_difficulty()
-                
-                alt_konu = random.choice(konu_data.get("alt_konular", ["genel"]))
-                kazanim_kodu = kazanim_from_db.get("learning_outcome_code") if kazanim_from_db else konu_data.get("kazanimlar", ["F.12.1.1.1"])[0]
-                bloom = random.choice(list(BLOOM_SEVIYELERI.keys()))
-                baglam = random.choice(konu_data.get("ornek_baglamlar", ["genel"]))
-                gorsel_tipi = random.choice(konu_data.get("gorsel_tipleri", ["kuvvet_diyagrami"]))
-                soru_tipi = self._select_question_type(konu_data, zorluk)
-                
-                params = QuestionParams(
-                    konu=konu_key,
-                    alt_konu=alt_konu,
-                    kazanim_kodu=kazanim_kodu,
-                    bloom_seviyesi=bloom,
-                    zorluk=zorluk,
-                    baglam=baglam,
-                    gorsel_tipi=gorsel_tipi,
-                    soru_tipi=soru_tipi
-                )
-                
+                params, kazanim_from_db = self._build_batch_params(konu_key, konu_data, curriculum)
+                jobs.append((f"{konu_key}_{i+1}", params, kazanim_from_db))
+        
+        self.supabase.start_bulk_insert()
+        self.start_image_pool()
+        try:
+            self._run_batch_jobs(jobs, workers, results)
+        finally:
+            self.finish_image_pool()
+            self.supabase.finish_bulk_insert()
+        
+        results["generated_ids"] = self._resolve_ids(results["generated_ids"])
+        results["stats"] = self.stats
+        return results
+    
+    def _run_batch_jobs(self, jobs: List[Tuple[str, QuestionParams, Optional[Dict]]], workers: int, results: Dict[str, Any]):
+        """Batch islerini sirali (workers=1) veya paralel calistir"""
+        if workers <= 1:
+            for job_name, params, kazanim_from_db in jobs:
+                logger.info(f"\nKonu: {AYT_FIZIK_KONULAR[params.konu]['display_name']}")
                 question_id = self.generate_single_question(params, kazanim_from_db=kazanim_from_db)
                 
                 if question_id:
                     results["generated_ids"].append(question_id)
                 else:
-                    results["failed_topics"].append(f"{konu_key}_{i+1}")
+                    results["failed_topics"].append(job_name)
                 
                 time.sleep(Config.RATE_LIMIT_DELAY)
-        
-        results["stats"] = self.stats
-        return results
+        else:
+            # N soru ayni anda farkli asamalarda ilerler; API hizini
+            # rate_limiter'daki paylasilan kovalar sinirlar
+            with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="ayt") as executor:
+                futures = {
+                    executor.submit(self.generate_single_question, params, kazanim_from_db): job_name
+                    for job_name, params, kazanim_from_db in jobs
+                }
+                for future in as_completed(futures):
+                    job_name = futures[future]
+                    try:
+                        question_id = future.result()
+                    except Exception as e:
+                        logger.error(f"  {job_name} worker hatasi: {e}")
+                        question_id = None
+                    
+                    if question_id:
+                        results["generated_ids"].append(question_id)
+                    else:
+                        results["failed_topics"].append(job_name)
     
     def _match_curriculum_topic(self, curriculum_item: Dict, konu_key: str) -> bool:
         topic_name = curriculum_item.get("topic_name", "").lower()
@@ -2310,39 +2523,22 @@ class AYTFizikGenerator:
         
         logger.info(f"\n{konu_data['display_name']} icin {count} soru uretilecek")
         
-        for i in range(count):
-            kazanim_from_db = None
-            if curriculum:
-                matching = [k for k in curriculum if self._match_curriculum_topic(k, konu)]
-                if matching:
-                    kazanim_from_db = random.choice(matching)
-            
-            zorluk = self._select_difficulty()
-            alt_konu = random.choice(konu_data.get("alt_konular", ["genel"]))
-            kazanim_kodu = kazanim_from_db.get("learning_outcome_code") if kazanim_from_db else konu_data.get("kazanimlar", ["F.12.1.1.1"])[0]
-            bloom = random.choice(list(BLOOM_SEVIYELERI.keys()))
-            baglam = random.choice(konu_data.get("ornek_baglamlar", ["genel"]))
-            gorsel_tipi = random.choice(konu_data.get("gorsel_tipleri", ["kuvvet_diyagrami"]))
-            soru_tipi = self._select_question_type(konu_data, zorluk)
-            
-            params = QuestionParams(
-                konu=konu,
-                alt_konu=alt_konu,
-                kazanim_kodu=kazanim_kodu,
-                bloom_seviyesi=bloom,
-                zorluk=zorluk,
-                baglam=baglam,
-                gorsel_tipi=gorsel_tipi,
-                soru_tipi=soru_tipi
-            )
-            
-            question_id = self.generate_single_question(params, kazanim_from_db=kazanim_from_db)
-            if question_id:
-                generated_ids.append(question_id)
-            
-            time.sleep(Config.RATE_LIMIT_DELAY)
+        self.supabase.start_bulk_insert()
+        self.start_image_pool()
+        try:
+            for i in range(count):
+                params, kazanim_from_db = self._build_batch_params(konu, konu_data, curriculum)
+                
+                question_id = self.generate_single_question(params, kazanim_from_db=kazanim_from_db)
+                if question_id:
+                    generated_ids.append(question_id)
+                
+                time.sleep(Config.RATE_LIMIT_DELAY)
+        finally:
+            self.finish_image_pool()
+            self.supabase.finish_bulk_insert()
         
-        return generated_ids
+        return self._resolve_ids(generated_ids)
     
     def print_stats(self):
         logger.info(f"\n{'='*70}")
@@ -2382,6 +2578,7 @@ Yenilikler v2.0:
 
 Ornekler:
   python ayt_fizik_bot.py --mode batch --count 1
+  python ayt_fizik_bot.py --mode batch --count 2 --workers 6
   python ayt_fizik_bot.py --mode topic --topic elektrostatik --count 5
   python ayt_fizik_bot.py --mode single --konu hareket_ve_kuvvet --bloom Analiz --zorluk 4 --tip hikayeli
 
@@ -2418,6 +2615,10 @@ Soru Tipleri:
     parser.add_argument('--tip', type=str, default='hikayeli',
                        choices=['hikayeli', 'grafik', 'onculu', 'deney', 'eslestirme'],
                        help='Soru tipi')
+    parser.add_argument('--workers', type=int, default=Config.BATCH_WORKERS,
+                       help='Batch modunda ayni anda islenen soru sayisi (1 = sirali)')
+    parser.add_argument('--image-workers', type=int, default=Config.IMAGE_WORKERS,
+                       help='Arka plan gorsel worker sayisi (0 = gorsel soruyla birlikte uretilir)')
     
     args = parser.parse_args()
     
@@ -2439,11 +2640,12 @@ Soru Tipleri:
     
     try:
         generator = AYTFizikGenerator()
+        generator.image_workers = args.image_workers
         
         if args.mode == 'batch':
             logger.info(f"Batch modu - Her konu icin {args.count} soru")
             logger.info("Psikometrik zorluk dagilimi: %10 Kolay, %55 Orta, %25 Zor, %10 Secici")
-            results = generator.generate_batch(count_per_topic=args.count)
+            results = generator.generate_batch(count_per_topic=args.count, workers=args.workers)
             logger.info(f"\nUretilen soru sayisi: {len(results['generated_ids'])}")
             if results['failed_topics']:
                 logger.info(f"Basarisiz: {results['failed_topics']}")
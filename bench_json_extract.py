@@ -0,0 +1,226 @@
+"""
+json_extract Olcumu
+===================
+Model yaniti korpusu uzerinde extract_json'un parse oranini, dogruluk
+oranini (parse edilen deger beklenen degere esit mi) ve yanit basina
+suresini (mikrosaniye) olcer. Karsilastirma icin ayni korpusta botlarin
+extract_json'dan onceki temizleme kaskadlarini (pisa_bot json_temizle,
+curriculum_pisa_bot json_parse, question_improver_bot json_temizle) ve
+sadece ```json bloklarini soyup json.loads yapan basit yontemi de
+calistirip yan yana raporlar.
+
+Eski kaskadlar kopyalanmaz; json_extract.py'yi ekleyen commit'in bir
+oncesinden (git show) okunup calistirilir. Git gecmisi yoksa (sig klon)
+sadece extract_json ve basit_parse olculur.
+
+Korpus:
+- Asagidaki ORNEKLER sentetiktir: Gemini/DeepSeek yanitlarinda gorulen
+  tipik hatalari (LaTeX, kesilmis yanit, fazla virgul...) taklit etmek icin
+  elle yazilmistir, gercek model ciktisi degildir. Her ornegin beklenen
+  degeri vardir; "parse" olup yanlis deger donduren yontem "dogru"
+  sayilmaz ve uyumsuzluklar ayrica listelenir
+- --cache: LLM onbellegindeki (llm_cache, .llm_cache/responses.sqlite3)
+  kayitli gercek yanitlar da korpusa eklenir; bunlarin beklenen degeri
+  olmadigi icin sadece parse oranina katilirlar
+
+Kullanim:
+  python bench_json_extract.py [--cache] [--tekrar 2000]
+"""
+
+import os
+import re
+import ast
+import sys
+import json
+import time
+import sqlite3
+import argparse
+import contextlib
+import subprocess
+
+from json_extract import extract_json
+
+# (yanit metni, beklenen deger)
+ORNEKLER = [
+    # Temiz, code block icinde
+    ('```json\n{"soru_metni": "Bir araç 3 saatte 240 km yol alıyor.", "secenekler": '
+     '{"A": "60", "B": "70", "C": "80", "D": "90", "E": "100"}, "dogru_cevap": "C"}\n```',
+     {"soru_metni": "Bir araç 3 saatte 240 km yol alıyor.",
+      "secenekler": {"A": "60", "B": "70", "C": "80", "D": "90", "E": "100"}, "dogru_cevap": "C"}),
+    # JSON oncesi/sonrasi aciklama
+    ('İşte istediğiniz soru:\n\n{"soru_metni": "Kenar uzunluğu 4 cm olan karenin alanı kaçtır?", '
+     '"dogru_cevap": "B", "secenekler": {"A": "8", "B": "16", "C": "12", "D": "20"}}\n\n'
+     'Bu soru geometri kazanımına uygundur.',
+     {"soru_metni": "Kenar uzunluğu 4 cm olan karenin alanı kaçtır?", "dogru_cevap": "B",
+      "secenekler": {"A": "8", "B": "16", "C": "12", "D": "20"}}),
+    # LaTeX - gecersiz escape'ler
+    ('{"soru_metni": "$\\sqrt{16} + \\alpha$ ifadesinin değeri nedir?", '
+     '"cozum": "$\\sqrt{16} = 4$ olduğundan sonuç $4 + \\alpha$ olur.", "dogru_cevap": "A"}',
+     {"soru_metni": "$\\sqrt{16} + \\alpha$ ifadesinin değeri nedir?",
+      "cozum": "$\\sqrt{16} = 4$ olduğundan sonuç $4 + \\alpha$ olur.", "dogru_cevap": "A"}),
+    # LaTeX - gecerli escape gibi gorunen komutlar (\frac, \times, \nu, \beta, \right)
+    ('{"soru_metni": "$\\frac{3}{4} \\times 8$ işleminin sonucu kaçtır?", '
+     '"cozum_adimlari": "$\\left(\\frac{a}{b}\\right)$ ve $\\beta = \\nu \\cdot t$", '
+     '"dogru_cevap": "D"}',
+     {"soru_metni": "$\\frac{3}{4} \\times 8$ işleminin sonucu kaçtır?",
+      "cozum_adimlari": "$\\left(\\frac{a}{b}\\right)$ ve $\\beta = \\nu \\cdot t$",
+      "dogru_cevap": "D"}),
+    # LaTeX - \to ve \ne (tab / satir sonu sanilmamali)
+    ('{"cozum": "$\\lim_{x \\to 0} \\frac{\\sin x}{x} = 1$ ve $x \\ne 0$"}',
+     {"cozum": "$\\lim_{x \\to 0} \\frac{\\sin x}{x} = 1$ ve $x \\ne 0$"}),
+    # LaTeX - \neq, \nleq, \boxed, \textdegree
+    ('{"cozum": "$a \\neq b$, $b \\nleq c$ olduğundan $\\boxed{5}$", '
+     '"aci": "$30\\textdegree$ lik açı"}',
+     {"cozum": "$a \\neq b$, $b \\nleq c$ olduğundan $\\boxed{5}$",
+      "aci": "$30\\textdegree$ lik açı"}),
+    # Ham satir sonu ve tab string icinde
+    ('{"soru_metni": "Aşağıdaki tabloyu inceleyiniz.\nAy\tSatış\nOcak\t120\nŞubat\t150", '
+     '"dogru_cevap": "E"}',
+     {"soru_metni": "Aşağıdaki tabloyu inceleyiniz.\nAy\tSatış\nOcak\t120\nŞubat\t150",
+      "dogru_cevap": "E"}),
+    # Fazla virgul
+    ('{\n  "soru_metni": "Bir sınıfta 12 kız 18 erkek öğrenci vardır.",\n'
+     '  "secenekler": {"A": "2/5", "B": "3/5", "C": "1/2",},\n  "dogru_cevap": "A",\n}',
+     {"soru_metni": "Bir sınıfta 12 kız 18 erkek öğrenci vardır.",
+      "secenekler": {"A": "2/5", "B": "3/5", "C": "1/2"}, "dogru_cevap": "A"}),
+    # Kesilmis yanit (max_output_tokens)
+    ('```json\n{"senaryo": "Ali bisikletiyle okula gidiyor.", "soru_metni": "Ali\'nin hızı',
+     {"senaryo": "Ali bisikletiyle okula gidiyor.", "soru_metni": "Ali'nin hızı"}),
+    # Kacirilmamis ic tirnak
+    ('{"soru_metni": "Öğretmen "Bu soruyu çözünüz" dedi. Buna göre hangisi doğrudur?", '
+     '"dogru_cevap": "C"}',
+     {"soru_metni": 'Öğretmen "Bu soruyu çözünüz" dedi. Buna göre hangisi doğrudur?',
+      "dogru_cevap": "C"}),
+    # Satirlar arasi eksik virgul
+    ('{\n  "gecerli": true\n  "puan": 8,\n  "sorunlar": []\n}',
+     {"gecerli": True, "puan": 8, "sorunlar": []}),
+    # DeepSeek dogrulama yaniti, \' kacisi
+    ('```json\n{"gecerli": false, "puan": 4, "sorunlar": ["Seçenek C\'nin değeri hatalı"], '
+     '"aciklama": "Çözümde $2 \\times 3$ yerine $2 + 3$ alınmış."}\n```',
+     {"gecerli": False, "puan": 4, "sorunlar": ["Seçenek C'nin değeri hatalı"],
+      "aciklama": "Çözümde $2 \\times 3$ yerine $2 + 3$ alınmış."}),
+    # Ic ice yapilar ve liste
+    ('{"adimlar": [{"no": 1, "islem": "$x^2 - 4 = 0$"}, {"no": 2, "islem": "$x = \\pm 2$"}], '
+     '"sonuc": {"deger": -2, "birim": null}}',
+     {"adimlar": [{"no": 1, "islem": "$x^2 - 4 = 0$"}, {"no": 2, "islem": "$x = \\pm 2$"}],
+      "sonuc": {"deger": -2, "birim": None}}),
+    # Vision analiz yaniti
+    ('```json\n{"soru_tipi": "coktan_secmeli", "konu": "Üslü sayılar", "zorluk": 3, '
+     '"gorsel_var": true, "metin": "$2^{3} \\cdot 2^{4}$ işleminin sonucu"}\n```',
+     {"soru_tipi": "coktan_secmeli", "konu": "Üslü sayılar", "zorluk": 3,
+      "gorsel_var": True, "metin": "$2^{3} \\cdot 2^{4}$ işleminin sonucu"}),
+    # Satir sonu + Turkce kelime (\n escape'i LaTeX sanilmamali)
+    ('{"cozum_adimlari": "Adım 1: Verilenleri yaz.\\nne kadar yol alındığını bul.\\nAdım 2: Böl.", '
+     '"dogru_cevap": "B"}',
+     {"cozum_adimlari": "Adım 1: Verilenleri yaz.\nne kadar yol alındığını bul.\nAdım 2: Böl.",
+      "dogru_cevap": "B"}),
+    # JSON yok
+    ('Üzgünüm, bu isteği yerine getiremiyorum.', None),
+]
+
+# (rapor adi, dosya, giris fonksiyonu, ayni dosyadan gereken yardimcilar)
+ESKI_KASKADLAR = (
+    ("pisa_eski", "pisa_bot.py", "json_temizle", ()),
+    ("curriculum_eski", "curriculum_pisa_bot.py", "json_parse", ()),
+    ("improver_eski", "question_improver_bot.py", "json_temizle",
+     ("fix_latex_escapes", "extract_json_from_text", "regex_json_fallback")),
+)
+
+
+def basit_parse(text):
+    """Karsilastirma: sadece code block soy ve json.loads dene"""
+    text = (text or "").strip()
+    if text.startswith('```'):
+        lines = text.split('\n')
+        text = '\n'.join(lines[1:-1])
+        if text.startswith('json'):
+            text = text[4:].strip()
+    try:
+        return json.loads(text)
+    except ValueError:
+        return None
+
+
+def _git(*args):
+    return subprocess.run(("git",) + args, capture_output=True, text=True, check=True).stdout
+
+
+def eski_kaskadlar():
+    """Eski temizleme fonksiyonlarini extract_json oncesi revizyondan yukle"""
+    try:
+        rev = _git("log", "-1", "--format=%H", "--diff-filter=A", "--", "json_extract.py").strip()
+        if not rev:
+            raise ValueError("json_extract.py'yi ekleyen commit bulunamadi")
+        yontemler = []
+        for ad, dosya, giris, yardimcilar in ESKI_KASKADLAR:
+            tree = ast.parse(_git("show", f"{rev}^:{dosya}"))
+            adlar = {giris, *yardimcilar}
+            defs = [node for node in tree.body if isinstance(node, ast.FunctionDef) and node.name in adlar]
+            ns = {"re": re, "json": json}
+            exec(compile(ast.Module(body=defs, type_ignores=[]), f"{rev[:7]}^:{dosya}", "exec"), ns)
+            yontemler.append((ad, ns[giris]))
+        return yontemler
+    except (OSError, ValueError, KeyError, SyntaxError, subprocess.CalledProcessError) as e:
+        print(f"Eski kaskadlar git gecmisinden yuklenemedi, atlaniyor: {e}")
+        return []
+
+
+def onbellek_yanitlari(path):
+    if not os.path.exists(path):
+        print(f"Onbellek bulunamadi: {path}")
+        return []
+    conn = sqlite3.connect(path)
+    try:
+        return [row[0] for row in conn.execute("SELECT response FROM responses")]
+    finally:
+        conn.close()
+
+
+def olc(fn, korpus, beklenenler, tekrar):
+    """(parse sayisi, dogru sayisi, uyumsuz ornek indeksleri, us/yanit)"""
+    # Eski kaskadlarin uyari print'leri olcumu kirletmesin
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        sonuclar = [fn(text) for text in korpus]
+        start = time.perf_counter()
+        for _ in range(tekrar):
+            for text in korpus:
+                fn(text)
+        sure = time.perf_counter() - start
+    basarili = sum(1 for sonuc in sonuclar if sonuc)
+    uyumsuz = [i for i, beklenen in enumerate(beklenenler) if sonuclar[i] != beklenen]
+    return basarili, len(beklenenler) - len(uyumsuz), uyumsuz, sure / (tekrar * len(korpus)) * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--cache", action="store_true", help="LLM onbellegindeki yanitlari da ekle")
+    parser.add_argument("--cache-path", default=os.path.join(".llm_cache", "responses.sqlite3"))
+    parser.add_argument("--tekrar", type=int, default=2000)
+    args = parser.parse_args()
+
+    korpus = [text for text, _ in ORNEKLER]
+    beklenenler = [beklenen for _, beklenen in ORNEKLER]
+    if args.cache:
+        korpus += onbellek_yanitlari(args.cache_path)
+
+    yontemler = [("extract_json", extract_json)] + eski_kaskadlar() + [("basit_parse", basit_parse)]
+
+    kaynak = "sentetik ornekler" + (" + LLM onbellegi" if args.cache else "")
+    print(f"Korpus: {len(korpus)} yanit ({kaynak}), {len(beklenenler)} beklenen degerli, {args.tekrar} tekrar")
+    print(f"{'yontem':<16}{'parse':>10}{'dogru':>10}{'us/yanit':>12}")
+    uyumsuzluklar = []
+    for ad, fn in yontemler:
+        basarili, dogru, uyumsuz, us = olc(fn, korpus, beklenenler, args.tekrar)
+        print(f"{ad:<16}{basarili:>6}/{len(korpus):<3}{dogru:>6}/{len(beklenenler):<3}{us:>12.1f}")
+        if uyumsuz:
+            uyumsuzluklar.append((ad, uyumsuz))
+
+    if uyumsuzluklar:
+        print("\nBeklenen degerle uyusmayan ornekler (ORNEKLER indeksi):")
+        for ad, uyumsuz in uyumsuzluklar:
+            print(f"  {ad:<16}{', '.join(map(str, uyumsuz))}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
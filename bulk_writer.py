@@ -0,0 +1,257 @@
+"""
+Toplu Insert Tamponu (PostgREST)
+================================
+Soru botlarinin her soru icin ayri HTTP POST atmasi yerine satirlari
+biriktirip tek istekte cok satirli insert yapmasini saglar.
+
+- Tampon max_rows satira ulasinca veya en eski satir max_wait saniye
+  bekleyince otomatik flush edilir
+- add() hemen bir PendingInsert (Future) dondurur; flush sonrasi donen
+  satirlarin id'leri sirasiyla ilgili Future'lara yazilir
+- Toplu istek basarisiz olursa satirlar tek tek denenir; yine basarisiz
+  olanlar yerel journal dosyasina (JSONL) yazilir ve bir sonraki
+  calistirmada replay_journal() ile tekrar gonderilebilir
+- max_attempts denemede de yazilamayan satir journal'dan cikarilip
+  <tablo>.dead.jsonl dosyasina tasinir (kalici hatali satirlar sonsuza
+  dek tekrar denenmez)
+
+Kullanim:
+  writer = BulkInsertBuffer("question_bank", insert_rows_fn)
+  pending = writer.add(row)     # hemen doner
+  ...
+  writer.close()                # kalanlari flush eder
+  question_id = resolve_id(pending)
+
+  # Sadece kayit kesinlesince yapilacak isler (istatistik, indeks...)
+  on_resolved(pending, lambda qid: print("kaydedildi" if qid else "basarisiz"))
+"""
+
+import os
+import json
+import time
+import logging
+import threading
+from datetime import datetime
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_JOURNAL_DIR = os.environ.get("INSERT_JOURNAL_DIR", ".insert_journal")
+DEFAULT_MAX_ATTEMPTS = int(os.environ.get("INSERT_MAX_ATTEMPTS", "3"))
+
+
+class PendingInsert(Future):
+    """Toplu insert sonucunu bekleyen id - flush sonrasi result() id'yi dondurur"""
+
+    # Satirin onceki calistirmalarda kac kez basarisiz oldugu (journal replay)
+    attempts = 0
+
+    def __str__(self):
+        if self.done() and not self.cancelled() and self.exception() is None:
+            return str(self.result())
+        return "beklemede"
+
+    def __format__(self, spec):
+        return format(str(self), spec)
+
+
+def resolve_id(value: Any, timeout: float = None) -> Any:
+    """PendingInsert ise sonucunu bekle, degilse degeri aynen dondur"""
+    if isinstance(value, Future):
+        try:
+            return value.result(timeout=timeout)
+        except Exception:
+            return None
+    return value
+
+
+def on_resolved(value: Any, callback: Callable[[Any], None]):
+    """Id kesinlesince callback(id) cagir - kayit basarisizsa id None gelir
+
+    PendingInsert her zaman truthy oldugu icin basari kontrolu Future'in
+    kendisiyle degil, bu callback'e gelen id ile yapilmalidir. Callback
+    flush'i yapan thread'de calisir.
+    """
+    if isinstance(value, Future):
+        value.add_done_callback(lambda f: callback(resolve_id(f)))
+    else:
+        callback(value)
+
+
+class BulkInsertBuffer:
+    """Satirlari biriktirip cok satirli insert yapan thread-safe tampon"""
+
+    def __init__(self, table: str, insert_rows: Callable[[List[Dict]], List[Dict]],
+                 max_rows: int = 25, max_wait: float = 5.0, journal_path: str = None,
+                 max_attempts: int = DEFAULT_MAX_ATTEMPTS):
+        self.table = table
+        self.insert_rows = insert_rows
+        self.max_rows = max(1, max_rows)
+        self.max_wait = max_wait
+        self.journal_path = journal_path or os.path.join(DEFAULT_JOURNAL_DIR, f"{table}.jsonl")
+        self.dead_letter_path = os.path.splitext(self.journal_path)[0] + ".dead.jsonl"
+        self.max_attempts = max(1, max_attempts)
+        self.stats = {"rows": 0, "requests": 0, "inserted": 0, "journaled": 0, "dead": 0}
+
+        self._pending: List[tuple] = []
+        self._oldest_at: Optional[float] = None
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wakeup = threading.Condition(self._lock)
+        self._closed = False
+        self._timer = threading.Thread(target=self._timer_loop, name=f"bulk-{table}", daemon=True)
+        self._timer.start()
+
+    # ------------------------------------------------------------------
+    # Public API
+    # ------------------------------------------------------------------
+
+    def add(self, row: Dict) -> PendingInsert:
+        """Satiri tampona ekle, id'yi tasiyacak Future'i dondur"""
+        return self._add(row, 0)
+
+    def flush(self) -> int:
+        """Tampondaki tum satirlari gonder, kaydedilen satir sayisini dondur"""
+        with self._flush_lock:
+            with self._lock:
+                batch = self._pending
+                self._pending = []
+                self._oldest_at = None
+            if not batch:
+                return 0
+            return self._send(batch)
+
+    def close(self) -> Dict[str, int]:
+        """Kalan satirlari flush et ve zamanlayiciyi durdur"""
+        with self._lock:
+            self._closed = True
+            self._wakeup.notify()
+        self.flush()
+        self._timer.join(timeout=1)
+        if self.stats["journaled"]:
+            logger.warning(f"  {self.stats['journaled']} satir journal'a yazildi: {self.journal_path}")
+        if self.stats["dead"]:
+            logger.error(f"  {self.stats['dead']} satir {self.max_attempts} denemede yazilamadi: {self.dead_letter_path}")
+        return dict(self.stats)
+
+    def replay_journal(self, prepare: Callable[[Dict], Dict] = None) -> int:
+        """Onceki calistirmalardan kalan journal satirlarini tekrar gonder
+
+        prepare verilirse her satir gonderilmeden once ondan gecirilir (or.
+        satira bagli gorsel isi bu calistirmada olmadigi icin is_active=True).
+        """
+        if not os.path.exists(self.journal_path):
+            return 0
+        try:
+            with open(self.journal_path, encoding="utf-8") as f:
+                entries = [json.loads(line) for line in f if line.strip()]
+            rows = [(entry["row"], int(entry.get("attempts", 1))) for entry in entries]
+            if prepare:
+                rows = [(prepare(row), attempts) for row, attempts in rows]
+        except (OSError, ValueError, KeyError) as e:
+            logger.error(f"  Journal okunamadi ({self.journal_path}): {e}")
+            return 0
+        if not rows:
+            return 0
+
+        # Journal'i bosalt; tekrar basarisiz olanlar yeniden yazilir
+        os.replace(self.journal_path, self.journal_path + ".replay")
+        logger.info(f"  {len(rows)} journal satiri tekrar gonderiliyor ({self.table})...")
+        futures = [self._add(row, attempts) for row, attempts in rows]
+        self.flush()
+        os.remove(self.journal_path + ".replay")
+        return sum(1 for f in futures if resolve_id(f) is not None)
+
+    # ------------------------------------------------------------------
+    # Internal
+    # ------------------------------------------------------------------
+
+    def _add(self, row: Dict, attempts: int) -> PendingInsert:
+        future = PendingInsert()
+        future.attempts = attempts
+        flush_now = False
+        with self._lock:
+            if self._closed:
+                raise RuntimeError(f"{self.table} tamponu kapatildi")
+            self._pending.append((row, future))
+            self.stats["rows"] += 1
+            if self._oldest_at is None:
+                self._oldest_at = time.monotonic()
+                self._wakeup.notify()
+            flush_now = len(self._pending) >= self.max_rows
+        if flush_now:
+            self.flush()
+        return future
+
+    def _timer_loop(self):
+        while True:
+            with self._lock:
+                while not self._closed and self._oldest_at is None:
+                    self._wakeup.wait()
+                if self._closed:
+                    return
+                remaining = self.max_wait - (time.monotonic() - self._oldest_at)
+                if remaining > 0:
+                    self._wakeup.wait(remaining)
+                    continue
+            self.flush()
+
+    def _send(self, batch: List[tuple]) -> int:
+        # PostgREST cok satirli insert'te tum satirlarin ayni kolonlara sahip
+        # olmasini bekler; farkli kolon setleri ayri istek olarak gonderilir
+        groups: Dict[tuple, List[tuple]] = {}
+        for row, future in batch:
+            groups.setdefault(tuple(sorted(row.keys())), []).append((row, future))
+
+        saved = 0
+        for group in groups.values():
+            rows = [row for row, _ in group]
+            try:
+                self.stats["requests"] += 1
+                returned = self.insert_rows(rows) or []
+                if len(returned) != len(rows):
+                    raise ValueError(f"{len(rows)} satir gonderildi, {len(returned)} satir dondu")
+                for (_, future), result in zip(group, returned):
+                    future.set_result(result.get("id"))
+                saved += len(rows)
+                logger.info(f"  Toplu insert: {len(rows)} satir {self.table} tablosuna kaydedildi")
+            except Exception as e:
+                logger.error(f"  Toplu insert hatasi ({self.table}, {len(rows)} satir): {e}")
+                saved += self._send_one_by_one(group)
+        self.stats["inserted"] += saved
+        return saved
+
+    def _send_one_by_one(self, group: List[tuple]) -> int:
+        """Toplu istek basarisizsa hatali satiri ayiklamak icin tek tek dene"""
+        saved = 0
+        for row, future in group:
+            try:
+                self.stats["requests"] += 1
+                returned = self.insert_rows([row]) or []
+                if not returned:
+                    raise ValueError("bos yanit")
+                future.set_result(returned[0].get("id"))
+                saved += 1
+            except Exception as e:
+                self._journal(row, e, future.attempts + 1)
+                future.set_result(None)
+        return saved
+
+    def _journal(self, row: Dict, error: Exception, attempts: int):
+        # Deneme hakki biten satir tekrar denenmez, dead-letter dosyasina tasinir
+        dead = attempts >= self.max_attempts
+        path = self.dead_letter_path if dead else self.journal_path
+        try:
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+            with open(path, "a", encoding="utf-8") as f:
+                f.write(json.dumps({
+                    "table": self.table,
+                    "ts": datetime.now().isoformat(),
+                    "attempts": attempts,
+                    "error": str(error)[:300],
+                    "row": row
+                }, ensure_ascii=False, default=str) + "\n")
+            self.stats["dead" if dead else "journaled"] += 1
+        except OSError as e:
+            logger.error(f"  Journal yazilamadi ({path}): {e}")
@@ -1,7 +1,78 @@
 """
 Soru bankası istatistiklerini kontrol et ve progress tablosunu temizle
+
+Tüm sayılar tek bir RPC çağrısıyla, gruplu materialized view'dan gelir
+(Supabase'de tanımlı olmalı; yoksa tek tek count sorgularına düşülür).
+yenilenme kolonu olmayan eski view'ı önce drop materialized view ile kaldırın:
+
+  create materialized view if not exists question_bank_stats as
+  select q.subject,
+         coalesce(q.exam_type, '-') as exam_type,
+         q.created_at::date as gun,
+         q.image_url is not null as gorselli,
+         q.verified,
+         p.status as progress_status,
+         count(*) as adet,
+         max(q.id) as max_id,
+         now() as yenilenme  -- her refresh'te yeniden hesaplanir
+    from question_bank q
+    left join question_improver_progress p on p.question_id = q.id
+   group by 1, 2, 3, 4, 5, 6;
+
+  create unique index if not exists question_bank_stats_key
+      on question_bank_stats (subject, exam_type, gun, gorselli, verified, progress_status)
+      nulls not distinct;
+
+  create or replace function question_bank_stats_refresh()
+  returns void language plpgsql security definer as $$
+  begin
+    refresh materialized view concurrently question_bank_stats;
+  end;
+  $$;
+
+  create or replace function question_bank_stats_summary(p_subjects text[])
+  returns jsonb language sql stable as $$
+    with s as (select * from question_bank_stats where subject = any(p_subjects))
+    select jsonb_build_object(
+      'total', coalesce(sum(adet), 0),
+      'max_id', max(max_id),
+      'yenilenme', (select max(yenilenme) from question_bank_stats),
+      'gorselli', coalesce(sum(adet) filter (where gorselli), 0),
+      'gorselsiz', coalesce(sum(adet) filter (where not gorselli), 0),
+      'verified_true', coalesce(sum(adet) filter (where verified), 0),
+      'verified_null', coalesce(sum(adet) filter (where verified is null), 0),
+      'progress', (select coalesce(jsonb_object_agg(progress_status, n), '{}') from
+                     (select progress_status, sum(adet) n from s
+                       where progress_status is not null group by 1) x),
+      'ders', (select coalesce(jsonb_object_agg(subject, n), '{}') from
+                 (select subject, sum(adet) n from s group by 1) x),
+      'bot', (select coalesce(jsonb_object_agg(exam_type, n), '{}') from
+                (select exam_type, sum(adet) n from s group by 1) x),
+      'gun', (select coalesce(jsonb_object_agg(gun, n), '{}') from
+                (select gun, sum(adet) n from s
+                  where gun >= current_date - 13 group by 1) x))
+    from s;
+  $$;
+
+View'ı yenilemek CONCURRENTLY olduğu için okumaları bloklamaz; panolar
+özeti sık sık okuyabilir, yenileme ise --yenile ile veya pg_cron'la
+(ör. her 15 dakikada bir) yapılır. Özet view'ın son yenilenme zamanını
+('yenilenme') da döndürür; rapor bunu yazdırır ve özet YENI_KABUL_DK
+dakikadan eskiyse uyarır:
+
+  select cron.schedule('question_bank_stats', '*/15 * * * *',
+                       'refresh materialized view concurrently question_bank_stats');
+
+Kullanım:
+  python check_stats.py [--yenile]
+
+  from check_stats import ozet_getir
+  ozet = ozet_getir(supabase)   # dict: total, max_id, yenilenme, gorselli, progress, ders, bot, gun ...
 """
 import os
+import sys
+import argparse
+from datetime import datetime, timezone
 
 # Supabase import
 try:
@@ -13,50 +84,125 @@ except ImportError:
 SUPABASE_URL = os.environ.get('SUPABASE_URL')
 SUPABASE_KEY = os.environ.get('SUPABASE_KEY')
 
-supabase = create_client(SUPABASE_URL, SUPABASE_KEY)
+HEDEF_DERSLER = ['Matematik', 'Geometri']
+YENI_KABUL_DK = int(os.environ.get('STATS_MAX_AGE_MINUTES', '60'))
 
-print('=' * 60)
-print('📊 SORU BANKASI İSTATİSTİKLERİ')
-print('=' * 60)
 
-# Toplam soru sayısı (Matematik ve Geometri)
-total = supabase.table('question_bank').select('id', count='exact').in_('subject', ['Matematik', 'Geometri']).execute()
-print(f'\n📚 Toplam Matematik/Geometri sorusu: {total.count}')
+def ozet_getir(supabase, dersler=HEDEF_DERSLER, yenile=False):
+    """İstatistik özetini tek RPC ile getir; RPC yoksa count sorgularıyla hesapla"""
+    try:
+        if yenile:
+            supabase.rpc('question_bank_stats_refresh', {}).execute()
+        result = supabase.rpc('question_bank_stats_summary', {'p_subjects': dersler}).execute()
+        if result.data:
+            return result.data
+    except Exception as e:
+        print(f'ℹ️ question_bank_stats_summary RPC kullanılamadı, count sorgularına geçiliyor: {str(e)[:80]}')
+    return _ozet_count_sorgulariyla(supabase, dersler)
 
-# Matematik ve Geometri MAX ID
-max_math = supabase.table('question_bank').select('id').in_('subject', ['Matematik', 'Geometri']).order('id', desc=True).limit(1).execute()
-max_id = max_math.data[0]['id'] if max_math.data else 'N/A'
-print(f'📍 Matematik/Geometri MAX ID: {max_id}')
 
-# Görselli soru sayısı
-gorselli_result = supabase.table('question_bank').select('id', count='exact').in_('subject', ['Matematik', 'Geometri']).not_.is_('image_url', 'null').execute()
-print(f'🖼️  Görselli sorular: {gorselli_result.count}')
+def _ozet_count_sorgulariyla(supabase, dersler):
+    """Yedek: her sayı için ayrı count='exact' sorgusu (bot/gün kırılımı yok)"""
+    def say(sorgu):
+        return sorgu.execute().count or 0
 
-# Görselsiz soru sayısı
-gorselsiz_result = supabase.table('question_bank').select('id', count='exact').in_('subject', ['Matematik', 'Geometri']).is_('image_url', 'null').execute()
-print(f'📝 Görselsiz sorular: {gorselsiz_result.count}')
+    def bank():
+        return supabase.table('question_bank').select('id', count='exact').in_('subject', dersler)
 
-# Verified durumu
-verified_true = supabase.table('question_bank').select('id', count='exact').in_('subject', ['Matematik', 'Geometri']).eq('verified', True).execute()
-verified_null = supabase.table('question_bank').select('id', count='exact').in_('subject', ['Matematik', 'Geometri']).is_('verified', 'null').execute()
+    max_math = supabase.table('question_bank').select('id').in_('subject', dersler).order('id', desc=True).limit(1).execute()
+    ozet = {
+        'total': say(bank()),
+        'max_id': max_math.data[0]['id'] if max_math.data else None,
+        'yenilenme': None,  # canlı sayım
+        'gorselli': say(bank().not_.is_('image_url', 'null')),
+        'gorselsiz': say(bank().is_('image_url', 'null')),
+        'verified_true': say(bank().eq('verified', True)),
+        'verified_null': say(bank().is_('verified', 'null')),
+        'progress': {},
+        'ders': {},
+        'bot': {},
+        'gun': {},
+    }
+    try:
+        for status in ('success', 'failed', 'pending_retry', 'in_progress'):
+            ozet['progress'][status] = say(
+                supabase.table('question_improver_progress').select('question_id', count='exact').eq('status', status)
+            )
+    except Exception as e:
+        print(f'\n📋 Progress tablosu hatası: {e}')
+    return ozet
 
-print(f'\n✅ Verified TRUE: {verified_true.count}')
-print(f'⏳ Verified NULL: {verified_null.count}')
 
-# Progress tablosu durumu
-try:
-    progress = supabase.table('question_improver_progress').select('status', count='exact').execute()
-    print(f'\n📋 Progress tablosunda: {progress.count} kayıt')
-
-    success = supabase.table('question_improver_progress').select('question_id', count='exact').eq('status', 'success').execute()
-    failed = supabase.table('question_improver_progress').select('question_id', count='exact').eq('status', 'failed').execute()
-    print(f'   - Success: {success.count}')
-    print(f'   - Failed: {failed.count}')
-except Exception as e:
-    print(f'\n📋 Progress tablosu hatası: {e}')
-
-print('\n' + '=' * 60)
-print('\n🔧 BAŞTAN BAŞLAMAK İÇİN:')
-print('   1. Progress tablosunu temizle (DELETE FROM question_improver_progress)')
-print('   2. Verified sütununu NULL yap (UPDATE question_bank SET verified = NULL)')
-print('=' * 60)
+def yenilenme_yazdir(yenilenme):
+    """Özetin ne kadar güncel olduğunu yaz; view eskiyse uyar"""
+    if not yenilenme:
+        print('🕒 Sayılar canlı (count sorguları)')
+        return
+    try:
+        zaman = datetime.fromisoformat(str(yenilenme).replace('Z', '+00:00'))
+    except ValueError:
+        print(f'🕒 View yenilenme zamanı: {yenilenme}')
+        return
+    if zaman.tzinfo is None:
+        zaman = zaman.replace(tzinfo=timezone.utc)
+    dakika = int((datetime.now(timezone.utc) - zaman).total_seconds() // 60)
+    print(f"🕒 View yenilenme zamanı: {zaman.strftime('%Y-%m-%d %H:%M')} UTC ({dakika} dk önce)")
+    if dakika > YENI_KABUL_DK:
+        print(f'⚠️  Sayılar {YENI_KABUL_DK} dakikadan eski; güncel sayılar için --yenile ile çalıştırın')
+
+
+def rapor_yazdir(ozet):
+    print('=' * 60)
+    print('📊 SORU BANKASI İSTATİSTİKLERİ')
+    print('=' * 60)
+
+    yenilenme_yazdir(ozet.get('yenilenme'))
+
+    print(f"\n📚 Toplam Matematik/Geometri sorusu: {ozet['total']}")
+    print(f"📍 Matematik/Geometri MAX ID: {ozet.get('max_id') or 'N/A'}")
+    print(f"🖼️  Görselli sorular: {ozet['gorselli']}")
+    print(f"📝 Görselsiz sorular: {ozet['gorselsiz']}")
+
+    print(f"\n✅ Verified TRUE: {ozet['verified_true']}")
+    print(f"⏳ Verified NULL: {ozet['verified_null']}")
+
+    progress = ozet.get('progress') or {}
+    print(f'\n📋 Progress tablosunda: {sum(progress.values())} kayıt')
+    print(f"   - Success: {progress.get('success', 0)}")
+    print(f"   - Failed: {progress.get('failed', 0)}")
+    for status, adet in sorted(progress.items()):
+        if status not in ('success', 'failed'):
+            print(f'   - {status}: {adet}')
+
+    if ozet.get('ders'):
+        print('\n📚 Derse göre:')
+        for ders, adet in sorted(ozet['ders'].items()):
+            print(f'   - {ders}: {adet}')
+    if ozet.get('bot'):
+        print('\n🤖 Bota göre (exam_type):')
+        for bot, adet in sorted(ozet['bot'].items(), key=lambda x: -x[1]):
+            print(f'   - {bot}: {adet}')
+    if ozet.get('gun'):
+        print('\n📅 Son 14 gün:')
+        for gun, adet in sorted(ozet['gun'].items()):
+            print(f'   - {gun}: {adet}')
+
+    print('\n' + '=' * 60)
+    print('\n🔧 BAŞTAN BAŞLAMAK İÇİN:')
+    print('   1. Progress tablosunu temizle (DELETE FROM question_improver_progress)')
+    print('   2. Verified sütununu NULL yap (UPDATE question_bank SET verified = NULL)')
+    print('=' * 60)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--yenile', action='store_true', help='Önce question_bank_stats view\'ını yenile')
+    args = parser.parse_args()
+
+    supabase = create_client(SUPABASE_URL, SUPABASE_KEY)
+    rapor_yazdir(ozet_getir(supabase, yenile=args.yenile))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
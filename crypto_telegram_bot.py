@@ -12,6 +12,12 @@ OZELLIKLER:
 - Hacim Analizi
 - Fibonacci Seviyeleri
 - Otomatik 4 saatlik bildirimler
+- Yerel mum deposu (.crypto_cache): her calistirmada sadece yeni mumlar
+  indirilir, indikatorler kayitli son degerlerden devam ettirilir
+- Coklu sembol: tum coinler es zamanli analiz edilir, CoinGecko istekleri
+  ortak bir token bucket ile sinirlanir, 24s fiyatlar tek istekte gelir
+- Geriye donuk test: depodaki tum mumlar vektorel skorlanir; sembol basina
+  isabet orani, getiri ve maksimum dusus raporlanir (BACKTEST=true)
 
 KULLANIM:
 1. TELEGRAM_TOKEN environment variable'i ayarla (egitim botu ile ayni)
@@ -25,7 +31,8 @@ import os
 import json
 import logging
 import asyncio
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, timezone
+from email.utils import parsedate_to_datetime
 from typing import Dict, List, Tuple, Optional
 from dataclasses import dataclass
 from enum import Enum
@@ -33,6 +40,8 @@ from enum import Enum
 import requests
 import numpy as np
 import pandas as pd
+from http_session import get_session
+from rate_limiter import TokenBucket
 from apscheduler.schedulers.asyncio import AsyncIOScheduler
 from apscheduler.triggers.cron import CronTrigger
 
@@ -58,6 +67,11 @@ class Config:
     # Analiz edilecek coinler
     SYMBOLS = ['BTCUSDT', 'ETHUSDT']
 
+    # CoinGecko kotasi (ucretsiz plan ~30 istek/dk) ve es zamanli sembol sayisi
+    COINGECKO_RPM = float(os.environ.get('COINGECKO_RPM', '30'))
+    COINGECKO_BURST = float(os.environ.get('COINGECKO_BURST', '10'))
+    MAX_CONCURRENT_SYMBOLS = int(os.environ.get('CRYPTO_MAX_CONCURRENT', '8'))
+
     # Zaman dilimi
     TIMEFRAME = '4h'
     KLINE_LIMIT = 200  # Son 200 mum (yeterli veri icin)
@@ -77,6 +91,10 @@ class Config:
     EMA_50 = 50
     EMA_200 = 200
 
+    # Yerel OHLCV deposu (sembol basina .npz, kolon bazli NumPy dizileri)
+    CACHE_DIR = os.environ.get('CRYPTO_CACHE_DIR', '.crypto_cache')
+    MAX_STORED_CANDLES = 3000  # ~500 gun 4 saatlik mum
+
     # Scheduler - Her 4 saatte bir (00:00, 04:00, 08:00, 12:00, 16:00, 20:00 UTC)
     SCHEDULE_HOURS = [0, 4, 8, 12, 16, 20]
 
@@ -162,22 +180,65 @@ class CoinGeckoAPI:
             'BTCUSDT': 'bitcoin',
             'ETHUSDT': 'ethereum'
         }
+        # Tum thread'ler ayni kovadan harcar; 429'da kova bosaltilir
+        self.limiter = TokenBucket(Config.COINGECKO_RPM, Config.COINGECKO_BURST, name="coingecko")
+
+    def _coin_id(self, symbol: str) -> str:
+        return self.coin_ids.get(symbol, symbol.lower().replace('usdt', ''))
 
-    def get_klines(self, symbol: str, interval: str = '4h', limit: int = 200) -> pd.DataFrame:
-        """OHLCV verilerini cek - CoinGecko OHLC endpoint"""
-        coin_id = self.coin_ids.get(symbol, symbol.lower().replace('usdt', ''))
+    def _get(self, url: str, params: Dict) -> requests.Response:
+        """Kota dahilinde GET (5xx oturumda tekrar denenir, 429 beklemesi limiter'da)"""
+        self.limiter.acquire()
+        response = get_session(retry_429=False).get(url, params=params, timeout=30)
+        if response.status_code == 429:
+            self.limiter.penalize(self._retry_after(response))
+        response.raise_for_status()
+        return response
+
+    @staticmethod
+    def _retry_after(response: requests.Response, default: float = 60.0) -> float:
+        """Retry-After basligini saniyeye cevir (saniye veya HTTP-date; okunamazsa default)"""
+        value = (response.headers.get('Retry-After') or '').strip()
+        if not value:
+            return default
+        try:
+            return max(0.0, float(value))
+        except ValueError:
+            pass
+        try:
+            until = parsedate_to_datetime(value)
+            if until.tzinfo is None:
+                until = until.replace(tzinfo=timezone.utc)
+            return max(0.0, (until - datetime.now(timezone.utc)).total_seconds())
+        except (TypeError, ValueError, IndexError):
+            return default
 
-        # CoinGecko OHLC endpoint - days=30 4 saatlik mumlar verir
+    @staticmethod
+    def _days_for(since: Optional[pd.Timestamp]) -> int:
+        """Son kayitli mumdan bu yana gereken gun sayisi (4 saatlik mum veren 7/14/30)"""
+        if since is None:
+            return 30
+        gap_days = (pd.Timestamp.utcnow().tz_localize(None) - since).total_seconds() / 86400 + 1
+        for days in (7, 14):
+            if gap_days <= days:
+                return days
+        return 30
+
+    def get_klines(self, symbol: str, interval: str = '4h', limit: int = 200,
+                   since: Optional[pd.Timestamp] = None) -> pd.DataFrame:
+        """OHLCV verilerini cek - CoinGecko OHLC endpoint (since: sadece bu mumdan sonrasi)"""
+        coin_id = self._coin_id(symbol)
+        days = self._days_for(since)
+
+        # CoinGecko OHLC endpoint - days 3-30 arasi 4 saatlik mumlar verir
         url = f"{self.base_url}/coins/{coin_id}/ohlc"
         params = {
             'vs_currency': 'usd',
-            'days': '30'  # 30 gun = 4 saatlik mumlar
+            'days': str(days)
         }
 
         try:
-            response = requests.get(url, params=params, timeout=30)
-            response.raise_for_status()
-            data = response.json()
+            data = self._get(url, params).json()
 
             # CoinGecko format: [[timestamp, open, high, low, close], ...]
             df = pd.DataFrame(data, columns=['timestamp', 'open', 'high', 'low', 'close'])
@@ -188,74 +249,127 @@ class CoinGeckoAPI:
 
             df['timestamp'] = pd.to_datetime(df['timestamp'], unit='ms')
             df.set_index('timestamp', inplace=True)
+            if since is not None:
+                df = df[df.index >= since]
 
             # Hacim verisi icin ayri endpoint (market_chart)
-            df['volume'] = self._get_volume_data(coin_id, len(df))
+            df['volume'] = self._get_volume_data(coin_id, df.index, days)
 
-            logger.info(f"CoinGecko'dan {len(df)} mum verisi alindi: {symbol}")
+            logger.info(f"CoinGecko'dan {len(df)} mum verisi alindi: {symbol} ({days} gun)")
             return df
 
         except Exception as e:
             logger.error(f"CoinGecko API hatasi ({symbol}): {e}")
             raise
 
-    def _get_volume_data(self, coin_id: str, length: int) -> pd.Series:
-        """Hacim verilerini cek"""
+    def _get_volume_data(self, coin_id: str, index: pd.DatetimeIndex, days: int = 30) -> np.ndarray:
+        """Hacim verilerini cek - her mum icin o ana kadarki son hacim degeri"""
         url = f"{self.base_url}/coins/{coin_id}/market_chart"
         params = {
             'vs_currency': 'usd',
-            'days': '30'
+            'days': str(days)
         }
 
         try:
-            response = requests.get(url, params=params, timeout=30)
-            response.raise_for_status()
-            data = response.json()
+            data = self._get(url, params).json()
 
-            volumes = [v[1] for v in data.get('total_volumes', [])]
+            points = np.array(data.get('total_volumes', []), dtype=float).reshape(-1, 2)
+            if not len(points):
+                return np.zeros(len(index))
 
-            # OHLC ile ayni uzunluga getir
-            if len(volumes) > length:
-                # Her N. eleman al
-                step = len(volumes) // length
-                volumes = volumes[::step][:length]
-            elif len(volumes) < length:
-                # Eksik olanlari son degerle doldur
-                volumes.extend([volumes[-1]] * (length - len(volumes)))
-
-            return pd.Series(volumes[:length])
+            # Mum zamanina gore hizala (once gelen ilk mumlar ilk hacim degerini alir)
+            candle_ms = index.to_numpy(dtype='datetime64[ms]').astype(np.int64)
+            pos = np.searchsorted(points[:, 0], candle_ms, side='right') - 1
+            return points[np.clip(pos, 0, len(points) - 1), 1]
 
         except Exception as e:
             logger.warning(f"Hacim verisi alinamadi: {e}")
-            return pd.Series([0] * length)
+            return np.zeros(len(index))
 
     def get_24h_ticker(self, symbol: str) -> Dict:
         """24 saatlik fiyat degisimi"""
-        coin_id = self.coin_ids.get(symbol, symbol.lower().replace('usdt', ''))
+        return self.get_24h_tickers([symbol])[symbol]
+
+    def get_24h_tickers(self, symbols: List[str]) -> Dict[str, Dict]:
+        """Tum semboller icin 24 saatlik fiyat degisimi - tek simple/price istegi"""
+        coin_ids = {symbol: self._coin_id(symbol) for symbol in symbols}
 
         url = f"{self.base_url}/simple/price"
         params = {
-            'ids': coin_id,
+            'ids': ','.join(sorted(set(coin_ids.values()))),
             'vs_currencies': 'usd',
             'include_24hr_change': 'true',
             'include_24hr_vol': 'true'
         }
 
         try:
-            response = requests.get(url, params=params, timeout=30)
-            response.raise_for_status()
-            data = response.json()
-
-            coin_data = data.get(coin_id, {})
-            return {
+            data = self._get(url, params).json()
+        except Exception as e:
+            logger.error(f"24h ticker hatasi ({', '.join(symbols)}): {e}")
+            data = {}
+
+        tickers = {}
+        for symbol, coin_id in coin_ids.items():
+            coin_data = data.get(coin_id)
+            if not coin_data:
+                tickers[symbol] = {'priceChangePercent': 0}
+                continue
+            tickers[symbol] = {
                 'priceChangePercent': coin_data.get('usd_24h_change', 0),
                 'lastPrice': coin_data.get('usd', 0),
                 'volume': coin_data.get('usd_24h_vol', 0)
             }
+        return tickers
 
-        except Exception as e:
-            logger.error(f"24h ticker hatasi ({symbol}): {e}")
-            return {'priceChangePercent': 0}
+
+# ============== OHLCV DEPOSU ==============
+
+class CandleStore:
+    """Sembol basina mum + indikator gecmisi (.npz, kolon bazli)"""
+
+    def __init__(self, directory: str = None, max_candles: int = None):
+        self.directory = directory or Config.CACHE_DIR
+        self.max_candles = max_candles or Config.MAX_STORED_CANDLES
+
+    def _path(self, symbol: str) -> str:
+        return os.path.join(self.directory, f"{symbol}.npz")
+
+    def load(self, symbol: str) -> Optional[pd.DataFrame]:
+        """Kayitli gecmis (indikatorleriyle); yoksa veya okunamazsa None"""
+        path = self._path(symbol)
+        if not os.path.exists(path):
+            return None
+        try:
+            with np.load(path) as data:
+                columns = {name: data[name] for name in data.files if name != 'timestamp'}
+                index = pd.DatetimeIndex(data['timestamp'], name='timestamp')
+            return pd.DataFrame(columns, index=index)
+        except (OSError, ValueError, KeyError) as e:
+            logger.warning(f"Mum deposu okunamadi ({symbol}): {e}")
+            return None
+
+    def save(self, symbol: str, df: pd.DataFrame):
+        """Son max_candles mumu yaz (gecici dosya + yer degistirme)"""
+        df = df.tail(self.max_candles)
+        os.makedirs(self.directory, exist_ok=True)
+        tmp = self._path(symbol) + '.tmp.npz'
+        arrays = {col: df[col].to_numpy(dtype=float) for col in df.columns}
+        np.savez(tmp, timestamp=df.index.to_numpy(dtype='datetime64[ns]'), **arrays)
+        os.replace(tmp, self._path(symbol))
+
+    @staticmethod
+    def merge(history: Optional[pd.DataFrame], new: pd.DataFrame) -> Tuple[pd.DataFrame, int]:
+        """Gecmise yeni mumlari ekle; (birlesik df, indikatorleri hazir satir sayisi)"""
+        if history is None or history.empty:
+            return new, 0
+        if new.empty:
+            return history, len(history)
+        # Arada eksik mum varsa gecmis kullanilmaz, her sey yeniden hesaplanir
+        if new.index[0] - history.index[-1] > pd.Timedelta(hours=8):
+            return new, 0
+        # Son kayitli mum kapanmamis olabilir: yeni veride varsa o da yenilenir
+        kept = history[history.index < new.index[0]]
+        return pd.concat([kept, new]), len(kept)
 
 
 # ============== TEKNIK ANALIZ ==============
@@ -263,54 +377,102 @@ class CoinGeckoAPI:
 class TechnicalAnalyzer:
     """Teknik analiz hesaplayicisi"""
 
-    def __init__(self, df: pd.DataFrame):
-        self.df = df.copy()
-        self._calculate_all()
+    # Ustel ortalamalar (kolon, kaynak kolon, span) - onceki degerden devam eder
+    EMA_COLUMNS = [
+        ('ema_12', 'close', 12), ('ema_26', 'close', 26),
+        ('ema_9', 'close', 9), ('ema_21', 'close', 21),
+        ('ema_50', 'close', 50), ('ema_200', 'close', 200),
+    ]
+    # Kayan pencereli indikatorlerin ihtiyac duydugu en fazla gecmis mum
+    # (stochastic: 14 + 3 + 3, bollinger/hacim: 20, rsi: 14 + 1)
+    WINDOW_LOOKBACK = 20
+
+    def __init__(self, df: pd.DataFrame, computed: int = 0):
+        """computed: ilk `computed` satirin indikatorleri hazir (depodan geldi)"""
+        if computed and 'ema_200' in df:
+            self.df = df
+            if computed < len(df):
+                self._update_from(computed)
+        else:
+            self.df = df.copy()
+            self._calculate_all()
 
     def _calculate_all(self):
         """Tum indikatorleri hesapla"""
-        self._calculate_rsi()
+        self._calculate_rsi(self.df)
         self._calculate_macd()
-        self._calculate_bollinger()
-        self._calculate_stochastic()
+        self._calculate_bollinger(self.df)
+        self._calculate_stochastic(self.df)
         self._calculate_emas()
-        self._calculate_volume_ma()
+        self._calculate_volume_ma(self.df)
+
+    def _update_from(self, start: int):
+        """Sadece yeni satirlari hesapla: EMA'lar son degerden, pencereler kisa kuyruktan"""
+        tail = self.df.iloc[max(0, start - self.WINDOW_LOOKBACK):].copy()
+        last = self.df.iloc[start - 1]
+        k = len(self.df) - start
+
+        for col, source, span in self.EMA_COLUMNS:
+            tail.iloc[-k:, tail.columns.get_loc(col)] = self._continue_ema(last[col], tail[source].iloc[-k:], span)
+        tail['macd'] = tail['ema_12'] - tail['ema_26']
+        tail.iloc[-k:, tail.columns.get_loc('macd_signal')] = self._continue_ema(
+            last['macd_signal'], tail['macd'].iloc[-k:], 9)
+        tail['macd_histogram'] = tail['macd'] - tail['macd_signal']
+
+        self._calculate_rsi(tail)
+        self._calculate_bollinger(tail)
+        self._calculate_stochastic(tail)
+        self._calculate_volume_ma(tail)
+
+        columns = list(tail.columns)
+        self.df = self.df.reindex(columns=columns)
+        self.df.iloc[start:] = tail.iloc[-k:].to_numpy()
 
-    def _calculate_rsi(self, period: int = 14):
+    @staticmethod
+    def _continue_ema(prev: float, values: pd.Series, span: int) -> np.ndarray:
+        """ewm(adjust=False) ozyinelemesini kayitli son degerden surdur"""
+        alpha = 2 / (span + 1)
+        out = np.empty(len(values))
+        for i, value in enumerate(values.to_numpy(dtype=float)):
+            prev = alpha * value + (1 - alpha) * prev
+            out[i] = prev
+        return out
+
+    def _calculate_rsi(self, df: pd.DataFrame, period: int = 14):
         """RSI hesapla"""
-        delta = self.df['close'].diff()
+        delta = df['close'].diff()
         gain = (delta.where(delta > 0, 0)).rolling(window=period).mean()
         loss = (-delta.where(delta < 0, 0)).rolling(window=period).mean()
 
         rs = gain / loss
-        self.df['rsi'] = 100 - (100 / (1 + rs))
+        df['rsi'] = 100 - (100 / (1 + rs))
 
     def _calculate_macd(self, fast: int = 12, slow: int = 26, signal: int = 9):
         """MACD hesapla"""
-        ema_fast = self.df['close'].ewm(span=fast, adjust=False).mean()
-        ema_slow = self.df['close'].ewm(span=slow, adjust=False).mean()
+        self.df['ema_12'] = self.df['close'].ewm(span=fast, adjust=False).mean()
+        self.df['ema_26'] = self.df['close'].ewm(span=slow, adjust=False).mean()
 
-        self.df['macd'] = ema_fast - ema_slow
+        self.df['macd'] = self.df['ema_12'] - self.df['ema_26']
         self.df['macd_signal'] = self.df['macd'].ewm(span=signal, adjust=False).mean()
         self.df['macd_histogram'] = self.df['macd'] - self.df['macd_signal']
 
-    def _calculate_bollinger(self, period: int = 20, std: int = 2):
+    def _calculate_bollinger(self, df: pd.DataFrame, period: int = 20, std: int = 2):
         """Bollinger Bands hesapla"""
-        self.df['bb_middle'] = self.df['close'].rolling(window=period).mean()
-        bb_std = self.df['close'].rolling(window=period).std()
+        df['bb_middle'] = df['close'].rolling(window=period).mean()
+        bb_std = df['close'].rolling(window=period).std()
 
-        self.df['bb_upper'] = self.df['bb_middle'] + (bb_std * std)
-        self.df['bb_lower'] = self.df['bb_middle'] - (bb_std * std)
-        self.df['bb_bandwidth'] = (self.df['bb_upper'] - self.df['bb_lower']) / self.df['bb_middle'] * 100
+        df['bb_upper'] = df['bb_middle'] + (bb_std * std)
+        df['bb_lower'] = df['bb_middle'] - (bb_std * std)
+        df['bb_bandwidth'] = (df['bb_upper'] - df['bb_lower']) / df['bb_middle'] * 100
 
-    def _calculate_stochastic(self, k_period: int = 14, d_period: int = 3, smooth: int = 3):
+    def _calculate_stochastic(self, df: pd.DataFrame, k_period: int = 14, d_period: int = 3, smooth: int = 3):
         """Stochastic Oscillator hesapla"""
-        low_min = self.df['low'].rolling(window=k_period).min()
-        high_max = self.df['high'].rolling(window=k_period).max()
+        low_min = df['low'].rolling(window=k_period).min()
+        high_max = df['high'].rolling(window=k_period).max()
 
-        self.df['stoch_k'] = ((self.df['close'] - low_min) / (high_max - low_min)) * 100
-        self.df['stoch_k'] = self.df['stoch_k'].rolling(window=smooth).mean()
-        self.df['stoch_d'] = self.df['stoch_k'].rolling(window=d_period).mean()
+        df['stoch_k'] = ((df['close'] - low_min) / (high_max - low_min)) * 100
+        df['stoch_k'] = df['stoch_k'].rolling(window=smooth).mean()
+        df['stoch_d'] = df['stoch_k'].rolling(window=d_period).mean()
 
     def _calculate_emas(self):
         """EMA'lari hesapla"""
@@ -319,9 +481,9 @@ class TechnicalAnalyzer:
         self.df['ema_50'] = self.df['close'].ewm(span=50, adjust=False).mean()
         self.df['ema_200'] = self.df['close'].ewm(span=200, adjust=False).mean()
 
-    def _calculate_volume_ma(self, period: int = 20):
+    def _calculate_volume_ma(self, df: pd.DataFrame, period: int = 20):
         """Hacim hareketli ortalamasi"""
-        self.df['volume_ma'] = self.df['volume'].rolling(window=period).mean()
+        df['volume_ma'] = df['volume'].rolling(window=period).mean()
 
     def get_fibonacci_levels(self, lookback: int = 50) -> Dict[str, float]:
         """Fibonacci geri cekilme seviyelerini hesapla"""
@@ -614,6 +776,158 @@ class SignalGenerator:
         return signal, confidence, recommendation
 
 
+    # Sinyal kodlari (score_frame 'signal' kolonu): -2..2
+    SIGNAL_CODES = {
+        2: SignalType.STRONG_BUY, 1: SignalType.BUY, 0: SignalType.NEUTRAL,
+        -1: SignalType.SELL, -2: SignalType.STRONG_SELL
+    }
+
+    @staticmethod
+    def score_frame(df: pd.DataFrame) -> pd.DataFrame:
+        """generate_signal + get_indicators kurallarini tum satirlara birlikte uygula
+
+        Son satirin sonucu generate_signal(get_indicators()) ile aynidir.
+        """
+        close = df['close'].to_numpy(dtype=float)
+        col = {name: df[name].to_numpy(dtype=float) for name in (
+            'rsi', 'macd', 'macd_signal', 'macd_histogram', 'bb_upper', 'bb_lower',
+            'stoch_k', 'stoch_d', 'ema_50', 'ema_200', 'volume', 'volume_ma')}
+
+        def prev(values: np.ndarray) -> np.ndarray:
+            return np.concatenate(([np.nan], values[:-1]))
+
+        buy = np.zeros(len(df))
+        sell = np.zeros(len(df))
+
+        with np.errstate(invalid='ignore', divide='ignore'):
+            # RSI
+            rsi = col['rsi']
+            buy += np.select([rsi < 30, rsi < 40], [2, 1], 0)
+            sell += np.select([rsi > 70, rsi > 60], [2, 1], 0)
+
+            # MACD
+            macd, signal = col['macd'], col['macd_signal']
+            bull = (macd > signal) & (prev(macd) <= prev(signal))
+            bear = ~bull & (macd < signal) & (prev(macd) >= prev(signal))
+            rest = ~bull & ~bear
+            buy += np.where(bull, 2, 0) + np.where(rest & (col['macd_histogram'] > 0), 1, 0)
+            sell += np.where(bear, 2, 0) + np.where(rest & ~(col['macd_histogram'] > 0), 1, 0)
+
+            # Bollinger
+            upper_band = close >= col['bb_upper']
+            lower_band = ~upper_band & (close <= col['bb_lower'])
+            buy += np.where(lower_band, 2, 0)
+            sell += np.where(upper_band, 2, 0)
+
+            # Stochastic
+            k, d = col['stoch_k'], col['stoch_d']
+            oversold = (k < 20) & (d < 20)
+            overbought = ~oversold & (k > 80) & (d > 80)
+            bull_cross = oversold & (k > d) & (prev(k) <= prev(d))
+            bear_cross = overbought & (k < d) & (prev(k) >= prev(d))
+            rest = ~bull_cross & ~bear_cross
+            buy += np.where(bull_cross, 2, 0) + np.where(rest & (k < 20), 1, 0)
+            sell += np.where(bear_cross, 2, 0) + np.where(rest & ~(k < 20) & (k > 80), 1, 0)
+
+            # EMA trend
+            e50, e200 = col['ema_50'], col['ema_200']
+            above, below = close > e200, close < e200
+            buy += np.select([above & (e50 > e200), above], [2, 1], 0)
+            sell += np.select([below & (e50 < e200), below], [2, 1], 0)
+
+            # Golden/Death Cross - son 5 mumdaki gecisler
+            cross_up = (e50 > e200) & (prev(e50) <= prev(e200))
+            cross_down = (e50 < e200) & (prev(e50) >= prev(e200))
+            window = lambda flags: pd.Series(flags).rolling(4, min_periods=1).max().to_numpy() > 0
+            buy += np.where(window(cross_up), 2, 0)
+            sell += np.where(window(cross_down), 2, 0)
+
+            # Hacim onayi
+            volume_change = (col['volume'] - col['volume_ma']) / col['volume_ma'] * 100
+            high_volume = volume_change > 25
+            buy, sell = (buy + np.where(high_volume & (buy > sell), 1, 0),
+                         sell + np.where(high_volume & (sell > buy), 1, 0))
+
+        total = buy + sell
+        net = buy - sell
+        confidence = np.where(total == 0, 0.5, np.maximum(buy, sell) / np.where(total == 0, 1, total))
+        code = np.select([net >= 5, net >= 2, net <= -5, net <= -2], [2, 1, -2, -1], 0)
+
+        return pd.DataFrame({
+            'buy_score': buy, 'sell_score': sell, 'net_score': net,
+            'confidence': confidence, 'signal': code
+        }, index=df.index)
+
+
+# ============== GERIYE DONUK TEST ==============
+
+class SignalBacktester:
+    """Depodaki mum gecmisi uzerinde sinyallerin geriye donuk testi"""
+
+    def __init__(self, horizon: int = 6):
+        # horizon: isabet icin bakilan ileri mum sayisi (6 x 4s = 24 saat)
+        self.horizon = horizon
+
+    def run(self, df: pd.DataFrame, scores: pd.DataFrame = None) -> Dict[str, float]:
+        """Tum satirlari skorla; isabet orani, getiri ve maksimum dususu hesapla"""
+        if scores is None:
+            scores = SignalGenerator.score_frame(df)
+        close = df['close'].to_numpy(dtype=float)
+        position = np.sign(scores['signal'].to_numpy())  # +1 alis, -1 satis, 0 notr
+
+        # Isabet: sinyal yonunde horizon mum sonraki fiyat degisimi
+        forward = np.full(len(close), np.nan)
+        forward[:-self.horizon] = close[self.horizon:] / close[:-self.horizon] - 1
+        active = (position != 0) & ~np.isnan(forward)
+        directional = position[active] * forward[active]
+
+        # Strateji: her mumda sinyal yonunde bir sonraki muma kadar pozisyon
+        step = np.zeros(len(close))
+        step[:-1] = close[1:] / close[:-1] - 1
+        equity = np.cumprod(1 + position * step)
+        drawdown = equity / np.maximum.accumulate(equity) - 1
+
+        return {
+            'candles': len(df),
+            'signals': int(active.sum()),
+            'hit_rate': float((directional > 0).mean()) if len(directional) else 0.0,
+            'avg_return': float(directional.mean()) if len(directional) else 0.0,
+            'strategy_return': float(equity[-1] - 1) if len(equity) else 0.0,
+            'buy_hold_return': float(close[-1] / close[0] - 1) if len(close) else 0.0,
+            'max_drawdown': float(drawdown.min()) if len(drawdown) else 0.0,
+        }
+
+    def run_store(self, store: CandleStore, symbols: List[str]) -> Dict[str, Dict[str, float]]:
+        """Depodaki her sembol icin testi calistir"""
+        results = {}
+        for symbol in symbols:
+            history = store.load(symbol)
+            if history is None or len(history) <= self.horizon:
+                logger.warning(f"Geriye donuk test icin yeterli mum yok: {symbol}")
+                continue
+            analyzer = TechnicalAnalyzer(history, computed=len(history))
+            scores = SignalGenerator.score_frame(analyzer.df)
+            results[symbol] = self.run(analyzer.df, scores)
+
+            # Son mum skaler sinyal ile ayni olmali
+            scalar, _, _ = SignalGenerator.generate_signal(analyzer.get_indicators())
+            vector = SignalGenerator.SIGNAL_CODES[int(scores['signal'].iloc[-1])]
+            if scalar != vector:
+                logger.warning(f"Vektorel sinyal skalerden farkli ({symbol}): {vector.value} / {scalar.value}")
+        return results
+
+    @staticmethod
+    def format_report(results: Dict[str, Dict[str, float]], horizon: int) -> str:
+        lines = [f"GERIYE DONUK TEST (isabet: {horizon} mum sonrasi)",
+                 f"{'sembol':<10}{'mum':>6}{'sinyal':>8}{'isabet':>8}{'ort.':>8}"
+                 f"{'strateji':>10}{'al-tut':>9}{'max dusus':>11}"]
+        for symbol, r in results.items():
+            lines.append(f"{symbol:<10}{r['candles']:>6}{r['signals']:>8}{r['hit_rate']:>8.0%}"
+                         f"{r['avg_return']:>+8.2%}{r['strategy_return']:>+10.1%}"
+                         f"{r['buy_hold_return']:>+9.1%}{r['max_drawdown']:>11.1%}")
+        return '\n'.join(lines)
+
+
 # ============== MESAJ FORMATLAYICI ==============
 
 class MessageFormatter:
@@ -625,7 +939,8 @@ class MessageFormatter:
         ind = result.indicators
 
         # Sembol adi
-        symbol_name = "BITCOIN (BTC)" if "BTC" in result.symbol else "ETHEREUM (ETH)"
+        base = result.symbol.replace('USDT', '')
+        symbol_name = {'BTC': "BITCOIN (BTC)", 'ETH': "ETHEREUM (ETH)"}.get(base, base)
 
         # Sinyal emojisi
         signal_emoji = {
@@ -722,7 +1037,7 @@ Kripto piyasalari yuksek risk icerir. DYOR!
 
 """
         for result in results:
-            symbol = "BTC" if "BTC" in result.symbol else "ETH"
+            symbol = result.symbol.replace('USDT', '')
             signal_emoji = {
                 SignalType.STRONG_BUY: "🟢🟢",
                 SignalType.BUY: "🟢",
@@ -750,21 +1065,36 @@ class CryptoAnalysisBot:
 
     def __init__(self):
         self.api = CoinGeckoAPI()
+        self.store = CandleStore()
         self.scheduler = None
-
-    async def analyze_symbol(self, symbol: str) -> Optional[AnalysisResult]:
+        self._semaphore = asyncio.Semaphore(Config.MAX_CONCURRENT_SYMBOLS)
+
+    def _analyze_candles(self, symbol: str, price_change: float) -> TechnicalIndicators:
+        """Mumlari guncelle ve indikatorleri hesapla (bloklayan kisim, thread'de calisir)"""
+        # Veri cek - depoda gecmis varsa sadece son mumdan sonrasi
+        history = self.store.load(symbol)
+        since = history.index[-1] if history is not None and len(history) else None
+        new_candles = self.api.get_klines(symbol, Config.TIMEFRAME, Config.KLINE_LIMIT, since=since)
+        df, computed = CandleStore.merge(history, new_candles)
+
+        # Teknik analiz - kayitli indikatorler yeni mumlar icin devam ettirilir
+        analyzer = TechnicalAnalyzer(df, computed=computed)
+        indicators = analyzer.get_indicators(price_change)
+        self.store.save(symbol, analyzer.df)
+        return indicators
+
+    async def analyze_symbol(self, symbol: str, ticker: Dict = None) -> Optional[AnalysisResult]:
         """Tek bir sembol icin analiz yap"""
         try:
             logger.info(f"Analiz basliyor: {symbol}")
 
-            # Veri cek
-            df = self.api.get_klines(symbol, Config.TIMEFRAME, Config.KLINE_LIMIT)
-            ticker = self.api.get_24h_ticker(symbol)
+            if ticker is None:
+                ticker = await asyncio.to_thread(self.api.get_24h_ticker, symbol)
             price_change = float(ticker.get('priceChangePercent', 0))
 
-            # Teknik analiz
-            analyzer = TechnicalAnalyzer(df)
-            indicators = analyzer.get_indicators(price_change)
+            # HTTP ve hesaplama event loop'u bloklamasin
+            async with self._semaphore:
+                indicators = await asyncio.to_thread(self._analyze_candles, symbol, price_change)
 
             # Sinyal uret
             signal, confidence, recommendation = SignalGenerator.generate_signal(indicators)
@@ -852,12 +1182,13 @@ class CryptoAnalysisBot:
         logger.info("4 Saatlik Analiz Basladi")
         logger.info("=" * 50)
 
-        results = []
-
-        for symbol in Config.SYMBOLS:
-            result = await self.analyze_symbol(symbol)
-            if result:
-                results.append(result)
+        # 24s fiyatlar tek istekte, semboller es zamanli (CoinGecko kotasi
+        # paylasilan token bucket ile korunur)
+        tickers = await asyncio.to_thread(self.api.get_24h_tickers, Config.SYMBOLS)
+        analyses = await asyncio.gather(
+            *(self.analyze_symbol(symbol, tickers.get(symbol)) for symbol in Config.SYMBOLS)
+        )
+        results = [result for result in analyses if result]
 
         if not results:
             logger.error("Hicbir analiz sonucu alinamadi")
@@ -934,6 +1265,14 @@ def main():
     if not Config.TELEGRAM_CHAT_ID:
         logger.warning("TELEGRAM_CHAT_ID ayarlanmamis - Mesajlar konsola yazdirilacak")
 
+    # Geriye donuk test modu - sadece yerel mum deposu kullanilir
+    if os.environ.get('BACKTEST', 'false').lower() == 'true':
+        horizon = int(os.environ.get('BACKTEST_HORIZON', '6'))
+        backtester = SignalBacktester(horizon=horizon)
+        results = backtester.run_store(CandleStore(), Config.SYMBOLS)
+        print(SignalBacktester.format_report(results, horizon))
+        return
+
     # Calistirma modu
     run_once = os.environ.get('RUN_ONCE', 'false').lower() == 'true'
 
@@ -20,13 +20,18 @@ import time
 import hashlib
 import base64
 import uuid
-import requests
 from datetime import datetime
 from openai import OpenAI
 from google import genai
 from google.genai import types
 from supabase import create_client
 
+import rate_limiter
+from bulk_writer import BulkInsertBuffer, on_resolved
+from http_session import get_session
+from json_extract import extract_json
+import llm_cache
+
 # ═══════════════════════════════════════════════════════════════════════════════
 # YAPILANDIRMA
 # ═══════════════════════════════════════════════════════════════════════════════
@@ -38,7 +43,6 @@ DEEPSEEK_API_KEY = os.environ.get('DEEPSEEK_API_KEY', '')
 
 SORU_PER_KAZANIM = int(os.environ.get('SORU_PER_KAZANIM', '3'))
 MAX_KAZANIM = int(os.environ.get('MAX_ISLEM_PER_RUN', '10'))
-BEKLEME = 2.0
 
 # Sınıf filtresi (boş = tüm sınıflar)
 SINIF_FILTRE = os.environ.get('SINIF_SEVIYESI', '').strip()
@@ -193,6 +197,14 @@ Aşağıdaki betimlemelere uygun, profesyonel bir matematik sorusu görseli olu
 print("🔌 API bağlantıları kuruluyor...")
 
 supabase = create_client(SUPABASE_URL, SUPABASE_KEY)
+
+# Sorular tek tek değil, tamponlanıp çok satırlı insert ile yazılır
+kayit_tamponu = BulkInsertBuffer(
+    'question_bank',
+    lambda rows: supabase.table('question_bank').insert(rows).execute().data,
+    max_rows=int(os.environ.get('BULK_INSERT_SIZE', '10')),
+    max_wait=float(os.environ.get('BULK_INSERT_WAIT', '5'))
+)
 gemini = genai.Client(api_key=GEMINI_API_KEY)
 
 deepseek = None
@@ -217,54 +229,21 @@ print("✅ API bağlantıları hazır!")
 # ═══════════════════════════════════════════════════════════════════════════════
 
 def json_parse(text):
-    """JSON çıkar ve parse et"""
-    if not text:
-        return None
-    
-    text = text.strip()
-    
-    # ```json ... ``` bloğunu çıkar
-    if '```' in text:
-        import re
-        pattern = r'```(?:json)?\s*([\s\S]*?)```'
-        matches = re.findall(pattern, text)
-        if matches:
-            for match in matches:
-                if '{' in match and '}' in match:
-                    text = match.strip()
-                    break
-    
-    # JSON objesini bul
-    start = text.find('{')
-    end = text.rfind('}')
-    
-    if start < 0 or end <= start:
-        return None
-    
-    json_text = text[start:end+1]
-    
-    # Parse dene
-    try:
-        return json.loads(json_text)
-    except json.JSONDecodeError:
-        pass
-    
-    # Temizle
-    import re
-    json_text = re.sub(r'[\x00-\x1f\x7f]', ' ', json_text)
-    json_text = re.sub(r',(\s*[}\]])', r'\1', json_text)
-    
-    try:
-        return json.loads(json_text)
-    except json.JSONDecodeError:
-        pass
-    
-    # Satırları birleştir
+    """JSON çıkar ve tek geçişte onararak parse et (json_extract)"""
+    return extract_json(text)
+
+def gemini_uret(prompt, model='gemini-3-flash-preview', tur='text', **ayarlar):
+    """Paylaşılan token-bucket kovasından (rate_limiter) izin alıp Gemini'ye sor"""
+    rate_limiter.acquire(tur, GEMINI_API_KEY)
     try:
-        lines = [l.strip() for l in json_text.split('\n') if l.strip()]
-        return json.loads(' '.join(lines))
-    except:
-        return None
+        return gemini.models.generate_content(
+            model=model,
+            contents=prompt,
+            config=types.GenerateContentConfig(**ayarlar)
+        )
+    except Exception as e:
+        rate_limiter.penalize_on_quota(tur, GEMINI_API_KEY, e)
+        raise
 
 def gorsel_tipi_sec(topic_name, baglam_id):
     """Konuya ve bağlama göre uygun görsel tipi seç"""
@@ -306,13 +285,8 @@ def gorsel_uret(gorsel_betimleme):
         try:
             print(f"      🎨 Görsel üretiliyor (deneme {attempt + 1}/3)...")
             
-            response = gemini.models.generate_content(
-                model=GEMINI_IMAGE_MODEL,
-                contents=prompt,
-                config=types.GenerateContentConfig(
-                    response_modalities=["IMAGE", "TEXT"],
-                )
-            )
+            response = gemini_uret(prompt, model=GEMINI_IMAGE_MODEL, tur='image',
+                                   response_modalities=["IMAGE", "TEXT"])
             
             # Response'dan görsel çıkar
             if response.candidates:
@@ -331,8 +305,8 @@ def gorsel_uret(gorsel_betimleme):
             print("      ⚠️ Görsel response'da bulunamadı")
             
         except Exception as e:
+            # Bekleme rate_limiter'da: 429'da kova cezalandırıldı, sonraki deneme kovayı bekler
             print(f"      ⚠️ Görsel hatası (deneme {attempt + 1}): {str(e)[:100]}")
-            time.sleep(2)
     
     print("      ❌ Görsel üretimi başarısız")
     return None
@@ -352,7 +326,7 @@ def storage_yukle(image_data, filename):
         
         upload_url = f"{SUPABASE_URL}/storage/v1/object/{STORAGE_BUCKET}/{filename}"
         
-        response = requests.post(
+        response = get_session().post(
             upload_url,
             headers={
                 "apikey": SUPABASE_KEY,
@@ -457,8 +431,8 @@ def soru_kaydet(soru, curriculum_row, puan, image_url=None):
         if image_url:
             kayit['image_url'] = image_url
         
-        result = supabase.table('question_bank').insert(kayit).execute()
-        return result.data[0].get('id') if result.data else None
+        # Tampona ekle - id flush sonrası PendingInsert üzerinden çözülür
+        return kayit_tamponu.add(kayit)
     except Exception as e:
         print(f"   ❌ Kayıt hatası: {e}")
         return None
@@ -543,22 +517,12 @@ JSON:
 {{"senaryo":"hikaye", "soru_metni":"soru", "secenekler":{{"A":"doğru","B":"çeldirici1","C":"çeldirici2","D":"çeldirici3"{', "E":"çeldirici4"' if secenek_sayisi == 5 else ''}}}, "dogru_cevap":"A", "cozum":"Adım adım çözüm"{', "gorsel_betimleme":{{"tip":"...", "detay":"...", "gorunen_veriler":"..."}}' if gorsel_gerekli else ''}}}'''
 
     try:
-        response = gemini.models.generate_content(
-            model='gemini-3-flash-preview',
-            contents=prompt,
-            config=types.GenerateContentConfig(
-                temperature=0.5,
-                max_output_tokens=8096
-            )
+        soru = llm_cache.cached_call(
+            'gemini-3-flash-preview', prompt, {'temperature': 0.5, 'max_output_tokens': 8096},
+            lambda: gemini_uret(prompt, temperature=0.5, max_output_tokens=8096).text or "",
+            parse=json_parse
         )
         
-        raw_text = response.text if response.text else ""
-        
-        if not raw_text:
-            return None
-        
-        soru = json_parse(raw_text)
-        
         if soru:
             soru['sinif'] = sinif
             soru['curriculum_id'] = curriculum_row.get('id')
@@ -605,13 +569,15 @@ def deepseek_dogrula(soru):
 JSON yanıt:
 {{"gecerli": true/false, "puan": 0-100, "geri_bildirim": "varsa sorun"}}'''
 
-        response = deepseek.chat.completions.create(
-            model='deepseek-chat',
-            messages=[{'role': 'user', 'content': prompt}],
-            max_tokens=500
+        result = llm_cache.cached_call(
+            'deepseek-chat', prompt, {'max_tokens': 500},
+            lambda: deepseek.chat.completions.create(
+                model='deepseek-chat',
+                messages=[{'role': 'user', 'content': prompt}],
+                max_tokens=500
+            ).choices[0].message.content,
+            parse=json_parse
         )
-        
-        result = json_parse(response.choices[0].message.content)
         return result if result else None
         
     except Exception as e:
@@ -642,16 +608,11 @@ KONTROL:
 JSON yanıt:
 {{"gecerli": true/false, "puan": 0-100, "geri_bildirim": "Eğer çözüm sonucu şıkla uyuşmuyorsa veya hata varsa açıkla, yoksa null"}}'''
 
-        response = gemini.models.generate_content(
-            model='gemini-3-flash-preview',
-            contents=prompt,
-            config=types.GenerateContentConfig(
-                temperature=0.2,
-                max_output_tokens=2500
-            )
+        result = llm_cache.cached_call(
+            'gemini-3-flash-preview', prompt, {'temperature': 0.2, 'max_output_tokens': 2500},
+            lambda: gemini_uret(prompt, temperature=0.2, max_output_tokens=2500).text,
+            parse=json_parse
         )
-        
-        result = json_parse(response.text)
         return result if result else {"gecerli": True, "puan": 70, "geri_bildirim": None}
         
     except Exception as e:
@@ -688,8 +649,8 @@ def tek_soru_uret(curriculum_row, bloom_seviye, baglam):
         print(f"      🎨 Görsel ÜRETİLECEK")
     
     for deneme in range(MAX_DENEME):
-        time.sleep(0.5)
-        
+        # Reddedilen veya kabul edilen denemenin LLM yanıtları önbellekten silinir
+        llm_cache.begin_attempt()
         soru = gemini_soru_uret(curriculum_row, bloom_seviye, baglam, geri_bildirim, gorsel_gerekli)
         
         if not soru:
@@ -699,12 +660,16 @@ def tek_soru_uret(curriculum_row, bloom_seviye, baglam):
         if len(soru.get('senaryo', '')) < 30:
             print(f"      ⚠️ Senaryo çok kısa (Deneme {deneme+1})")
             geri_bildirim = "Senaryo çok kısa, en az 80 kelime olmalı"
+            llm_cache.discard_attempt()
             continue
         
         dogrulama = soru_dogrula(soru)
         puan = dogrulama.get('puan', 75)
         
         if dogrulama.get('gecerli', True) and puan >= 50:
+            # Kabul edilen denemenin yanıtları kayıt kesinleşene kadar önbellekte kalır
+            # (görsel/kayıt sırasında çökerse tekrar çalıştırma LLM'i yeniden faturalamaz)
+            
             # Görsel üret (eğer betimleme varsa)
             image_url = None
             if gorsel_gerekli and soru.get('gorsel_betimleme'):
@@ -718,6 +683,7 @@ def tek_soru_uret(curriculum_row, bloom_seviye, baglam):
         else:
             geri_bildirim = dogrulama.get('geri_bildirim')
             print(f"      ⚠️ Puan: {puan}/100 (Deneme {deneme+1})")
+            llm_cache.discard_attempt()
     
     return None, 0, None
 
@@ -768,11 +734,21 @@ def toplu_uret():
     print(f"   Görsel Üretim: {'✅ AKTİF' if GORSEL_URETIM_AKTIF else '❌ DEVRE DIŞI'}")
     print(f"{'='*70}\n")
     
-    basarili = 0
-    gorselli = 0
-    toplam_puan = 0
+    # Kayıt sonuçları flush sonrası gelir; sayaçlar on_resolved ile güncellenir
+    sayac = {'basarili': 0, 'gorselli': 0, 'toplam_puan': 0}
     baslangic = time.time()
     
+    def kayit_sonucu(kayit_id, puan, gorsel):
+        if kayit_id is None:
+            return
+        sayac['basarili'] += 1
+        sayac['toplam_puan'] += puan
+        if gorsel:
+            sayac['gorselli'] += 1
+    
+    # Önceki çalıştırmalarda yazılamayan kayıtları tekrar gönder
+    kayit_tamponu.replay_journal()
+    
     for idx, kaz in enumerate(secilen):
         sinif = kaz.get('grade_level', 8)
         topic = kaz.get('topic_name', '')
@@ -797,23 +773,27 @@ def toplu_uret():
             
             if soru:
                 soru_id = soru_kaydet(soru, kaz, puan, image_url)
-                if soru_id:
-                    basarili += 1
-                    toplam_puan += puan
+                if soru_id is not None:
+                    on_resolved(soru_id, lambda kayit_id, puan=puan, gorsel=bool(image_url): kayit_sonucu(kayit_id, puan, gorsel))
+                    on_resolved(soru_id, llm_cache.detach_attempt())
                     if image_url:
-                        gorselli += 1
-                        print(f"      ✅ Başarılı! ID: {soru_id} | Puan: {puan}/100 | 🖼️ GÖRSELLİ")
+                        print(f"      ✅ Başarılı! Kayda alındı | Puan: {puan}/100 | 🖼️ GÖRSELLİ")
                     else:
-                        print(f"      ✅ Başarılı! ID: {soru_id} | Puan: {puan}/100")
+                        print(f"      ✅ Başarılı! Kayda alındı | Puan: {puan}/100")
                 else:
                     print(f"      ❌ Kayıt başarısız")
             else:
                 print(f"      ❌ Üretim başarısız")
-            
-            time.sleep(BEKLEME)
         
         print()
     
+    # Tamponda kalan kayıtları yaz
+    tampon = kayit_tamponu.close()
+    if tampon['journaled'] or tampon['dead']:
+        print(f"   ⚠️ {tampon['journaled'] + tampon['dead']} soru kaydedilemedi "
+              f"({tampon['journaled']} journal'a, {tampon['dead']} dead-letter dosyasına yazıldı)")
+    
+    basarili, gorselli, toplam_puan = sayac['basarili'], sayac['gorselli'], sayac['toplam_puan']
     sure = time.time() - baslangic
     ort_puan = toplam_puan / basarili if basarili > 0 else 0
     
@@ -0,0 +1,319 @@
+"""
+Kalici Tekrar Kontrol Deposu
+============================
+Botlarin urettigi sorularin imzalarini calistirmalar arasinda saklar;
+her GitHub Actions calistirmasi bos bir set ile baslamaz.
+
+- Kesin tekrar: soru metni + cevabin MD5 hash'i (Bloom filtresi onde,
+  set ile dogrulama)
+- Yakin tekrar: normalize edilmis soru metninin 64 bit SimHash imzasi;
+  imza 4 banda bolunur, ayni bandi paylasan adaylar Hamming mesafesiyle
+  karsilastirilir (<= 3 bit fark = tekrar)
+- Aday basina kontrol O(1): bellekte Bloom + set + band sozlugu
+- Imzalar Supabase tablosunda (soru_imzalari) saklanir; tablo yoksa yerel
+  JSONL dosyasina dusulur
+
+Tablo:
+  create table soru_imzalari (
+    kaynak text not null,
+    hash text not null,
+    simhash bigint not null,
+    created_at timestamptz default now(),
+    primary key (kaynak, hash)
+  );
+
+Kullanim:
+  store = DedupStore("pisa", SupabaseSignatureBackend(supabase))
+  store.load()
+  if store.check(metin, cevap) is None:
+      ...
+      store.add(metin, cevap)
+  store.flush()
+
+  # Toplu (gecikmeli) kayitta: imza kabul aninda ayrilir, kayit sonucuyla
+  # onaylanir (id None ise geri alinir)
+  tekrar, confirm = store.check_and_reserve(metin, cevap)
+  if tekrar is None:
+      on_resolved(writer.add(row), confirm)
+"""
+
+import os
+import re
+import json
+import hashlib
+import logging
+import threading
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+SIMHASH_BITS = 64
+SIMHASH_BANDS = 4
+BAND_BITS = SIMHASH_BITS // SIMHASH_BANDS
+DEFAULT_MAX_DISTANCE = 3  # bant sayisindan kucuk olmali (guvercin yuvasi)
+DEFAULT_STORE_DIR = os.environ.get("DEDUP_STORE_DIR", ".dedup_store")
+
+
+# ============================================================================
+# IMZALAR
+# ============================================================================
+
+def exact_hash(text: str, answer: str = "") -> str:
+    """Bot'larin eski hash_olustur formatiyla uyumlu MD5"""
+    return hashlib.md5(f"{text}|{answer}".encode()).hexdigest()
+
+
+def normalize_text(text: str) -> List[str]:
+    """Kucuk harf, noktalama ve fazla bosluk temizligi; kelime listesi dondur"""
+    text = (text or "").lower()
+    text = re.sub(r"[^\w\s]", " ", text)
+    return text.split()
+
+
+def simhash(text: str) -> int:
+    """Kelime 3-gram'larindan 64 bit SimHash"""
+    words = normalize_text(text)
+    shingles = [" ".join(words[i:i + 3]) for i in range(max(1, len(words) - 2))]
+    weights = [0] * SIMHASH_BITS
+    for shingle in shingles:
+        h = int.from_bytes(hashlib.md5(shingle.encode()).digest()[:8], "big")
+        for bit in range(SIMHASH_BITS):
+            weights[bit] += 1 if (h >> bit) & 1 else -1
+    value = 0
+    for bit, weight in enumerate(weights):
+        if weight > 0:
+            value |= 1 << bit
+    return value
+
+
+def _to_signed(value: int) -> int:
+    """Postgres bigint icin 64 bit isaretsiz degeri isaretliye cevir"""
+    return value - (1 << 64) if value >= (1 << 63) else value
+
+
+def _to_unsigned(value: int) -> int:
+    return value + (1 << 64) if value < 0 else value
+
+
+# ============================================================================
+# BLOOM FILTRESI
+# ============================================================================
+
+class BloomFilter:
+    """Sabit boyutlu Bloom filtresi (yanlis pozitif orani ~%1)"""
+
+    def __init__(self, capacity: int = 200_000, error_rate: float = 0.01):
+        import math
+        self.size = max(1024, int(-capacity * math.log(error_rate) / (math.log(2) ** 2)))
+        self.hash_count = max(1, int(self.size / capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+
+    def _positions(self, key: str):
+        digest = hashlib.sha256(key.encode()).digest()
+        h1 = int.from_bytes(digest[:8], "big")
+        h2 = int.from_bytes(digest[8:16], "big") | 1
+        for i in range(self.hash_count):
+            yield (h1 + i * h2) % self.size
+
+    def add(self, key: str):
+        for pos in self._positions(key):
+            self.bits[pos >> 3] |= 1 << (pos & 7)
+
+    def __contains__(self, key: str) -> bool:
+        return all(self.bits[pos >> 3] & (1 << (pos & 7)) for pos in self._positions(key))
+
+
+# ============================================================================
+# KALICI DEPOLAMA
+# ============================================================================
+
+class SupabaseSignatureBackend:
+    """Imzalari supabase-py client ile soru_imzalari tablosunda tutar"""
+
+    def __init__(self, client, table: str = "soru_imzalari", page_size: int = 1000):
+        self.client = client
+        self.table = table
+        self.page_size = page_size
+
+    def load(self, kaynak: str) -> Iterable[Tuple[str, int]]:
+        last_hash = ""
+        while True:
+            result = self.client.table(self.table).select("hash, simhash") \
+                .eq("kaynak", kaynak).gt("hash", last_hash) \
+                .order("hash").limit(self.page_size).execute()
+            rows = result.data or []
+            for row in rows:
+                yield row["hash"], _to_unsigned(int(row["simhash"]))
+            if len(rows) < self.page_size:
+                return
+            last_hash = rows[-1]["hash"]
+
+    def save(self, kaynak: str, entries: List[Tuple[str, int]]):
+        rows = [{"kaynak": kaynak, "hash": h, "simhash": _to_signed(s)} for h, s in entries]
+        for i in range(0, len(rows), self.page_size):
+            self.client.table(self.table).upsert(rows[i:i + self.page_size], on_conflict="kaynak,hash").execute()
+
+
+class FileSignatureBackend:
+    """Imzalari yerel JSONL dosyasinda tutar (tablo yoksa yedek)"""
+
+    def __init__(self, directory: str = None):
+        self.directory = directory or DEFAULT_STORE_DIR
+
+    def _path(self, kaynak: str) -> str:
+        return os.path.join(self.directory, f"{kaynak}.jsonl")
+
+    def load(self, kaynak: str) -> Iterable[Tuple[str, int]]:
+        path = self._path(kaynak)
+        if not os.path.exists(path):
+            return
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                if line.strip():
+                    row = json.loads(line)
+                    yield row["hash"], int(row["simhash"])
+
+    def save(self, kaynak: str, entries: List[Tuple[str, int]]):
+        os.makedirs(self.directory, exist_ok=True)
+        with open(self._path(kaynak), "a", encoding="utf-8") as f:
+            for h, s in entries:
+                f.write(json.dumps({"hash": h, "simhash": s}) + "\n")
+
+
+# ============================================================================
+# DEPO
+# ============================================================================
+
+class DedupStore:
+    """Kesin (MD5) ve yakin (SimHash) tekrar kontrolu - calistirmalar arasi kalici"""
+
+    def __init__(self, kaynak: str, backend=None, max_distance: int = DEFAULT_MAX_DISTANCE,
+                 capacity: int = 200_000, flush_every: int = 10):
+        self.kaynak = kaynak
+        self.flush_every = flush_every
+        self.backend = backend or FileSignatureBackend()
+        self.fallback = FileSignatureBackend()
+        self.max_distance = min(max_distance, SIMHASH_BANDS - 1)
+        self.bloom = BloomFilter(capacity)
+        self.hashes = set()
+        self.bands: Dict[Tuple[int, int], List[int]] = {}
+        self.pending: List[Tuple[str, int]] = []
+        self.loaded = False
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.hashes)
+
+    def _index(self, h: str, sig: int):
+        if h in self.hashes:
+            return
+        self.hashes.add(h)
+        self.bloom.add(h)
+        for band in range(SIMHASH_BANDS):
+            key = (band, (sig >> (band * BAND_BITS)) & ((1 << BAND_BITS) - 1))
+            self.bands.setdefault(key, []).append(sig)
+
+    def _unindex(self, h: str, sig: int):
+        # Bloom'dan silinemez; set dogrulamasi yanlis pozitifi eler
+        self.hashes.discard(h)
+        for band in range(SIMHASH_BANDS):
+            key = (band, (sig >> (band * BAND_BITS)) & ((1 << BAND_BITS) - 1))
+            others = self.bands.get(key)
+            if others and sig in others:
+                others.remove(sig)
+
+    def load(self, backfill: Callable[[], Iterable[Tuple[str, str]]] = None) -> int:
+        """Imzalari depodan yukle; depo bossa backfill ile mevcut sorulardan doldur"""
+        with self._lock:
+            if self.loaded:
+                return len(self.hashes)
+            try:
+                for h, sig in self.backend.load(self.kaynak):
+                    self._index(h, sig)
+            except Exception as e:
+                logger.warning(f"Imza deposu okunamadi ({self.kaynak}), yerel dosyaya geciliyor: {e}")
+                self.backend = self.fallback
+                for h, sig in self.backend.load(self.kaynak):
+                    self._index(h, sig)
+            self.loaded = True
+
+        if not self.hashes and backfill:
+            with self._lock:
+                for text, answer in backfill():
+                    h = exact_hash(text, answer)
+                    if h not in self.hashes:
+                        sig = simhash(text)
+                        self._index(h, sig)
+                        self.pending.append((h, sig))
+            if self.pending:
+                logger.info(f"Imza deposu mevcut {len(self.pending)} sorudan dolduruldu ({self.kaynak})")
+                self.flush()
+        return len(self.hashes)
+
+    def check(self, text: str, answer: str = "") -> Optional[str]:
+        """Tekrar ise 'kesin' veya 'yakin', degilse None dondur"""
+        return self._check(exact_hash(text, answer), simhash(text))
+
+    def _check(self, h: str, sig: int) -> Optional[str]:
+        if h in self.bloom and h in self.hashes:
+            return "kesin"
+        for band in range(SIMHASH_BANDS):
+            key = (band, (sig >> (band * BAND_BITS)) & ((1 << BAND_BITS) - 1))
+            for other in self.bands.get(key, ()):
+                if bin(sig ^ other).count("1") <= self.max_distance:
+                    return "yakin"
+        return None
+
+    def add(self, text: str, answer: str = ""):
+        """Imzayi bellege ekle ve kalici yazim icin kuyrukla"""
+        h = exact_hash(text, answer)
+        sig = simhash(text)
+        with self._lock:
+            if h in self.hashes:
+                return
+            self._index(h, sig)
+            self.pending.append((h, sig))
+            flush_now = self.loaded and len(self.pending) >= self.flush_every
+        if flush_now:
+            self.flush()
+
+    def check_and_reserve(self, text: str, answer: str = "") -> Tuple[Optional[str], Optional[Callable[[Any], None]]]:
+        """Kontrol ve ekleme tek adimda: (tekrar, confirm)
+
+        Tekrar degilse imza hemen bellege girer; henuz flush edilmemis
+        kayitlar da sonraki kontrollerde gorunur. confirm(id) kayit
+        kesinlesince cagrilir: id varsa imza kalici yazima kuyruklanir,
+        None ise ayrilan imza geri alinir.
+        """
+        h = exact_hash(text, answer)
+        sig = simhash(text)
+        with self._lock:
+            tekrar = self._check(h, sig)
+            if tekrar:
+                return tekrar, None
+            self._index(h, sig)
+
+        def confirm(saved_id: Any):
+            with self._lock:
+                if saved_id is None:
+                    self._unindex(h, sig)
+                    return
+                self.pending.append((h, sig))
+                flush_now = self.loaded and len(self.pending) >= self.flush_every
+            if flush_now:
+                self.flush()
+
+        return None, confirm
+
+    def flush(self):
+        """Bekleyen imzalari kalici depoya yaz"""
+        with self._lock:
+            entries, self.pending = self.pending, []
+        if not entries:
+            return
+        try:
+            self.backend.save(self.kaynak, entries)
+        except Exception as e:
+            logger.warning(f"Imzalar depoya yazilamadi ({self.kaynak}), yerel dosyaya yaziliyor: {e}")
+            self.backend = self.fallback
+            self.backend.save(self.kaynak, entries)
@@ -31,7 +31,6 @@ Tarih: Aralık 2025
 
 import os
 import requests
-import feedparser
 from datetime import datetime, timedelta
 from typing import List, Dict, Optional, Set
 from bs4 import BeautifulSoup
@@ -42,6 +41,9 @@ import hashlib
 import time
 from urllib.parse import quote_plus
 
+from feed_fetcher import FeedFetcher, FeedCache, ReportedSet, CACHE_DIR
+from json_extract import extract_json
+
 # Türkçe tarih formatı için
 try:
     locale.setlocale(locale.LC_TIME, 'tr_TR.UTF-8')
@@ -90,16 +92,36 @@ try:
 except ImportError:
     genai = None
 
+_gemini_client = None
+
+def get_gemini_client():
+    """Paylaşılan Gemini client (her çağrıda yeniden oluşturulmaz)"""
+    global _gemini_client
+    if _gemini_client is None and GEMINI_KEY and genai:
+        _gemini_client = genai.Client(api_key=GEMINI_KEY)
+    return _gemini_client
+
 # ══════════════════════════════════════════════════════════════════════════════
 # YİNELENEN HABER FİLTRELEME
 # ══════════════════════════════════════════════════════════════════════════════
 
 class NewsDeduplicator:
-    """Yinelenen haberleri filtrele"""
+    """Yinelenen haberleri filtrele (kelime ters indeksi ile)"""
     
-    def __init__(self):
+    def __init__(self, path: str = None, days: int = 7):
         self.seen_titles: Set[str] = set()
         self.seen_hashes: Set[str] = set()
+        # kelime -> o kelimeyi içeren başlık numaraları; benzerlik için sadece
+        # ortak kelimesi olan başlıklara bakılır, tüm liste taranmaz
+        self.index: Dict[str, List[int]] = {}
+        self.word_sets: List[frozenset] = []
+        # Kalıcı mod: path verilirse önceki çalıştırmaların başlıkları
+        # (son `days` gün) de tekrar sayılır
+        self.path = path
+        self.days = days
+        self.saved_at: Dict[str, float] = {}
+        if path:
+            self.load()
     
     def _normalize_title(self, title: str) -> str:
         """Başlığı normalize et"""
@@ -114,6 +136,44 @@ class NewsDeduplicator:
         normalized = self._normalize_title(title)
         return hashlib.md5(normalized.encode()).hexdigest()[:10]
     
+    def _add(self, normalized: str):
+        """Normalize başlığı kaydet ve indekse ekle"""
+        if normalized in self.seen_titles:
+            return
+        self.seen_hashes.add(hashlib.md5(normalized.encode()).hexdigest()[:10])
+        self.seen_titles.add(normalized)
+        words = frozenset(normalized.split())
+        if words:
+            title_id = len(self.word_sets)
+            self.word_sets.append(words)
+            for word in words:
+                self.index.setdefault(word, []).append(title_id)
+    
+    def _is_similar(self, words: Set[str], threshold: float) -> bool:
+        """Kelime örtüşmesi |A∩B| / max(|A|,|B|) > threshold olan başlık var mı"""
+        if not words:
+            return False
+        # Örtüşme > threshold * |A| olmalı; A'nın en az ortak sayısı kadar
+        # kelimesi dışarıda kalırsa benzer başlık yakalanamaz. En nadir
+        # (len(A) - gereken + 1) kelimenin listelerine bakmak yeterli.
+        needed = max(0, int(threshold * len(words) - 1e-9))
+        probes = len(words) - needed
+        if probes <= 0:
+            return False
+        rare = sorted(words, key=lambda w: len(self.index.get(w, ())))[:probes]
+        
+        checked = set()
+        for word in rare:
+            for title_id in self.index.get(word, ()):
+                if title_id in checked:
+                    continue
+                checked.add(title_id)
+                seen_words = self.word_sets[title_id]
+                overlap = len(words & seen_words) / max(len(words), len(seen_words))
+                if overlap > threshold:
+                    return True
+        return False
+    
     def is_duplicate(self, title: str, threshold: float = 0.7) -> bool:
         """Başlık tekrar mı kontrol et"""
         if not title:
@@ -127,27 +187,74 @@ class NewsDeduplicator:
         
         # Benzerlik kontrolü (basit kelime örtüşmesi)
         normalized = self._normalize_title(title)
-        words = set(normalized.split())
-        
-        for seen in self.seen_titles:
-            seen_words = set(seen.split())
-            if len(words) > 0 and len(seen_words) > 0:
-                overlap = len(words & seen_words) / max(len(words), len(seen_words))
-                if overlap > threshold:
-                    return True
+        if self._is_similar(set(normalized.split()), threshold):
+            return True
         
         # Yeni başlık - kaydet
-        self.seen_hashes.add(title_hash)
-        self.seen_titles.add(normalized)
+        self._add(normalized)
         return False
     
+    def load(self):
+        """Kalıcı moddaki başlıkları yükle (süresi dolanlar atlanır)"""
+        try:
+            with open(self.path, encoding='utf-8') as f:
+                saved = json.load(f)
+        except (OSError, ValueError):
+            saved = {}
+        cutoff = time.time() - self.days * 86400
+        self.saved_at = {t: ts for t, ts in saved.items() if ts >= cutoff}
+        for normalized in self.saved_at:
+            self._add(normalized)
+    
+    def save(self):
+        """Bu çalıştırmada görülen başlıkları kalıcı dosyaya ekle"""
+        if not self.path:
+            return
+        now = time.time()
+        for normalized in self.seen_titles:
+            self.saved_at.setdefault(normalized, now)
+        try:
+            os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+            tmp = self.path + '.tmp'
+            with open(tmp, 'w', encoding='utf-8') as f:
+                json.dump(self.saved_at, f, ensure_ascii=False)
+            os.replace(tmp, self.path)
+        except OSError as e:
+            print(f"   ⚠️ Başlık geçmişi yazılamadı: {e}")
+    
     def reset(self):
-        """Filtreyi sıfırla"""
+        """Filtreyi sıfırla (kalıcı moddaki eski başlıklar korunur)"""
         self.seen_titles.clear()
         self.seen_hashes.clear()
+        self.index.clear()
+        self.word_sets.clear()
+        for normalized in self.saved_at:
+            self._add(normalized)
+
+# Global deduplicator - NEWS_DEDUP_PATH verilirse önceki çalıştırmalarda
+# görülen başlıklar da (NEWS_DEDUP_DAYS gün) tekrar sayılır
+deduplicator = NewsDeduplicator(
+    path=os.environ.get('NEWS_DEDUP_PATH') or None,
+    days=int(os.environ.get('NEWS_DEDUP_DAYS', '7'))
+)
+
+# ══════════════════════════════════════════════════════════════════════════════
+# KAYNAK İNDİRME - PARALEL
+# ══════════════════════════════════════════════════════════════════════════════
 
-# Global deduplicator
-deduplicator = NewsDeduplicator()
+BROWSER_HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
+}
+
+# Tüm RSS/HTML kaynakları rapor başında paralel indirilir, bölümler hazır
+# sonuçları filtreler. arXiv'e aynı anda tek istek gider.
+# Değişmeyen kaynaklar 304 ile önbellekten gelir (ETag/Last-Modified);
+# önceki raporlarda gönderilmiş linkler tekrar listelenmez.
+fetcher = FeedFetcher(
+    host_limits={'export.arxiv.org': 1},
+    cache=FeedCache(),
+    reported=ReportedSet()
+)
 
 # ══════════════════════════════════════════════════════════════════════════════
 # TARİH FİLTRELEME - SON 48 SAAT
@@ -291,17 +398,15 @@ def get_exam_countdown() -> Dict:
 # MEB HABERLERİ
 # ══════════════════════════════════════════════════════════════════════════════
 
+MEB_URL = "https://www.meb.gov.tr"
+
 def get_meb_news() -> List[Dict]:
     """MEB'den son haberler"""
     news = []
     
     try:
-        url = "https://www.meb.gov.tr"
-        headers = {
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
-        }
-        
-        r = requests.get(url, headers=headers, timeout=15)
+        url = MEB_URL
+        r = fetcher.get(url, headers=BROWSER_HEADERS)
         if r.status_code == 200:
             soup = BeautifulSoup(r.text, 'html.parser')
             
@@ -330,19 +435,19 @@ def get_meb_news() -> List[Dict]:
     
     return news
 
+TURKEY_NEWS_SOURCES = [
+    ('https://www.hurriyet.com.tr/rss/egitim', 'Hürriyet'),
+    ('https://www.milliyet.com.tr/rss/rssNew/egitimRss.xml', 'Milliyet'),
+    ('https://www.sabah.com.tr/rss/egitim.xml', 'Sabah'),
+    ('https://www.cumhuriyet.com.tr/rss/egitim', 'Cumhuriyet'),
+    ('https://www.ntv.com.tr/egitim.rss', 'NTV'),
+    ('https://www.haberturk.com/rss/egitim.xml', 'Habertürk'),
+]
+
 def get_education_news_turkey() -> List[Dict]:
     """Türkiye eğitim haberleri - yinelenmesiz, güncel"""
     news = []
     
-    sources = [
-        ('https://www.hurriyet.com.tr/rss/egitim', 'Hürriyet'),
-        ('https://www.milliyet.com.tr/rss/rssNew/egitimRss.xml', 'Milliyet'),
-        ('https://www.sabah.com.tr/rss/egitim.xml', 'Sabah'),
-        ('https://www.cumhuriyet.com.tr/rss/egitim', 'Cumhuriyet'),
-        ('https://www.ntv.com.tr/egitim.rss', 'NTV'),
-        ('https://www.haberturk.com/rss/egitim.xml', 'Habertürk'),
-    ]
-    
     important_keywords = [
         'lgs', 'yks', 'tyt', 'ayt', 'ösym', 'meb', 'sınav', 'müfredat',
         'öğretmen', 'atama', 'maaş', 'tatil', 'okul', 'ders', 'not',
@@ -350,9 +455,9 @@ def get_education_news_turkey() -> List[Dict]:
         'beceri temelli', 'maarif modeli', 'pisa', 'timss'
     ]
     
-    for rss_url, source in sources:
+    for rss_url, source in TURKEY_NEWS_SOURCES:
         try:
-            feed = feedparser.parse(rss_url)
+            feed = fetcher.feed(rss_url)
             for entry in feed.entries[:8]:
                 title = entry.get('title', '')
                 summary = entry.get('summary', '')[:200] if entry.get('summary') else ''
@@ -390,22 +495,22 @@ def get_education_news_turkey() -> List[Dict]:
 # MATEMATİK HABERLERİ - GÜNCELLENMİŞ
 # ══════════════════════════════════════════════════════════════════════════════
 
+MATH_NEWS_SOURCES = [
+    ('https://www.quantamagazine.org/mathematics/feed/', 'Quanta Magazine'),
+    ('https://www.sciencedaily.com/rss/computers_math/mathematics.xml', 'Science Daily'),
+    ('https://phys.org/rss-feed/mathematics-news/', 'Phys.org'),
+    ('https://www.ams.org/rss/mathfeed.xml', 'AMS'),
+    ('https://www.maa.org/rss.xml', 'MAA'),
+    ('https://plus.maths.org/content/rss.xml', 'Plus Magazine'),
+]
+
 def get_math_news() -> List[Dict]:
     """Matematik alanındaki son gelişmeler - son 48 saat"""
     news = []
     
-    world_sources = [
-        ('https://www.quantamagazine.org/mathematics/feed/', 'Quanta Magazine'),
-        ('https://www.sciencedaily.com/rss/computers_math/mathematics.xml', 'Science Daily'),
-        ('https://phys.org/rss-feed/mathematics-news/', 'Phys.org'),
-        ('https://www.ams.org/rss/mathfeed.xml', 'AMS'),
-        ('https://www.maa.org/rss.xml', 'MAA'),
-        ('https://plus.maths.org/content/rss.xml', 'Plus Magazine'),
-    ]
-    
-    for rss_url, source in world_sources:
+    for rss_url, source in MATH_NEWS_SOURCES:
         try:
-            feed = feedparser.parse(rss_url)
+            feed = fetcher.feed(rss_url)
             for entry in feed.entries[:5]:
                 title = entry.get('title', '')
                 summary = entry.get('summary', '')[:300] if entry.get('summary') else ''
@@ -435,6 +540,39 @@ def get_math_news() -> List[Dict]:
 # YAPAY ZEKA VE EĞİTİM HABERLERİ - GENİŞLETİLMİŞ
 # ══════════════════════════════════════════════════════════════════════════════
 
+LLM_NEWS_SOURCES = [
+    # Ana AI şirket blogları
+    ('https://openai.com/blog/rss/', 'OpenAI', 'LLM'),
+    ('https://www.anthropic.com/rss.xml', 'Anthropic', 'LLM'),
+    ('https://blog.google/technology/ai/rss/', 'Google AI', 'LLM'),
+    ('https://ai.meta.com/blog/rss/', 'Meta AI', 'LLM'),
+    ('https://blogs.microsoft.com/ai/feed/', 'Microsoft AI', 'LLM'),
+
+    # AI Haber siteleri
+    ('https://www.artificialintelligence-news.com/feed/', 'AI News', 'AI Haber'),
+    ('https://venturebeat.com/category/ai/feed/', 'VentureBeat AI', 'AI Haber'),
+    ('https://www.technologyreview.com/feed/', 'MIT Tech Review', 'AI Haber'),
+    ('https://techcrunch.com/category/artificial-intelligence/feed/', 'TechCrunch AI', 'AI Haber'),
+    ('https://www.wired.com/feed/tag/ai/latest/rss', 'WIRED AI', 'AI Haber'),
+    ('https://www.theverge.com/rss/ai-artificial-intelligence/index.xml', 'The Verge AI', 'AI Haber'),
+    ('https://arstechnica.com/tag/artificial-intelligence/feed/', 'Ars Technica AI', 'AI Haber'),
+
+    # AI Araştırma
+    ('https://deepmind.google/blog/rss.xml', 'DeepMind', 'Araştırma'),
+    ('https://bair.berkeley.edu/blog/feed.xml', 'Berkeley AI', 'Araştırma'),
+    ('https://huggingface.co/blog/feed.xml', 'Hugging Face', 'Araştırma'),
+]
+
+EDTECH_NEWS_SOURCES = [
+    ('https://www.edsurge.com/articles_rss', 'EdSurge', 'EdTech'),
+    ('https://www.the74million.org/feed/', 'The 74', 'EdTech'),
+    ('https://www.eschoolnews.com/feed/', 'eSchool News', 'EdTech'),
+    ('https://edtechmagazine.com/k12/rss.xml', 'EdTech Magazine', 'EdTech'),
+    ('https://www.techlearning.com/rss.xml', 'Tech & Learning', 'EdTech'),
+    ('https://www.elearningindustry.com/feed', 'eLearning Industry', 'EdTech'),
+    ('https://www.insidehighered.com/rss.xml', 'Inside Higher Ed', 'Yükseköğretim'),
+]
+
 def get_ai_education_news() -> List[Dict]:
     """
     Yapay zeka, LLM gelişmeleri ve eğitim teknolojisi haberleri
@@ -446,29 +584,6 @@ def get_ai_education_news() -> List[Dict]:
     # 1. BÜYÜK DİL MODELLERİ (LLM) VE AI GELİŞMELERİ
     # ═══════════════════════════════════════════════════════════════
     
-    llm_sources = [
-        # Ana AI şirket blogları
-        ('https://openai.com/blog/rss/', 'OpenAI', 'LLM'),
-        ('https://www.anthropic.com/rss.xml', 'Anthropic', 'LLM'),
-        ('https://blog.google/technology/ai/rss/', 'Google AI', 'LLM'),
-        ('https://ai.meta.com/blog/rss/', 'Meta AI', 'LLM'),
-        ('https://blogs.microsoft.com/ai/feed/', 'Microsoft AI', 'LLM'),
-        
-        # AI Haber siteleri
-        ('https://www.artificialintelligence-news.com/feed/', 'AI News', 'AI Haber'),
-        ('https://venturebeat.com/category/ai/feed/', 'VentureBeat AI', 'AI Haber'),
-        ('https://www.technologyreview.com/feed/', 'MIT Tech Review', 'AI Haber'),
-        ('https://techcrunch.com/category/artificial-intelligence/feed/', 'TechCrunch AI', 'AI Haber'),
-        ('https://www.wired.com/feed/tag/ai/latest/rss', 'WIRED AI', 'AI Haber'),
-        ('https://www.theverge.com/rss/ai-artificial-intelligence/index.xml', 'The Verge AI', 'AI Haber'),
-        ('https://arstechnica.com/tag/artificial-intelligence/feed/', 'Ars Technica AI', 'AI Haber'),
-        
-        # AI Araştırma
-        ('https://deepmind.google/blog/rss.xml', 'DeepMind', 'Araştırma'),
-        ('https://bair.berkeley.edu/blog/feed.xml', 'Berkeley AI', 'Araştırma'),
-        ('https://huggingface.co/blog/feed.xml', 'Hugging Face', 'Araştırma'),
-    ]
-    
     # LLM ve AI anahtar kelimeleri
     llm_keywords = [
         # Model isimleri
@@ -488,9 +603,9 @@ def get_ai_education_news() -> List[Dict]:
         'deepmind', 'hugging face', 'stability ai', 'midjourney', 'perplexity'
     ]
     
-    for rss_url, source, category in llm_sources:
+    for rss_url, source, category in LLM_NEWS_SOURCES:
         try:
-            feed = feedparser.parse(rss_url)
+            feed = fetcher.feed(rss_url)
             for entry in feed.entries[:5]:
                 title = entry.get('title', '')
                 summary = entry.get('summary', '')[:300] if entry.get('summary') else ''
@@ -526,16 +641,6 @@ def get_ai_education_news() -> List[Dict]:
     # 2. EĞİTİM TEKNOLOJİSİ (EdTech) HABERLERİ
     # ═══════════════════════════════════════════════════════════════
     
-    edtech_sources = [
-        ('https://www.edsurge.com/articles_rss', 'EdSurge', 'EdTech'),
-        ('https://www.the74million.org/feed/', 'The 74', 'EdTech'),
-        ('https://www.eschoolnews.com/feed/', 'eSchool News', 'EdTech'),
-        ('https://edtechmagazine.com/k12/rss.xml', 'EdTech Magazine', 'EdTech'),
-        ('https://www.techlearning.com/rss.xml', 'Tech & Learning', 'EdTech'),
-        ('https://www.elearningindustry.com/feed', 'eLearning Industry', 'EdTech'),
-        ('https://www.insidehighered.com/rss.xml', 'Inside Higher Ed', 'Yükseköğretim'),
-    ]
-    
     edtech_keywords = [
         'ai tutor', 'ai teacher', 'ai classroom', 'ai education', 'ai learning',
         'chatgpt education', 'chatgpt school', 'chatgpt student', 'chatgpt teacher',
@@ -546,9 +651,9 @@ def get_ai_education_news() -> List[Dict]:
         'ai policy', 'ai ban', 'ai literacy'
     ]
     
-    for rss_url, source, category in edtech_sources:
+    for rss_url, source, category in EDTECH_NEWS_SOURCES:
         try:
-            feed = feedparser.parse(rss_url)
+            feed = fetcher.feed(rss_url)
             for entry in feed.entries[:4]:
                 title = entry.get('title', '')
                 summary = entry.get('summary', '')[:200] if entry.get('summary') else ''
@@ -605,6 +710,267 @@ def get_ai_education_news() -> List[Dict]:
 # 🎬 YOUTUBE AI VİDEOLARI - POPÜLER KANALLAR (TÜRKÇE ÇEVİRİLİ)
 # ══════════════════════════════════════════════════════════════════════════════
 
+YOUTUBE_FEED_URL = "https://www.youtube.com/feeds/videos.xml?channel_id={}"
+
+# 🇹🇷 Türk AI YouTube kanalları (öncelikli)
+TURKISH_AI_CHANNELS = [
+    {
+        'channel_id': 'UCWN3xxRkmTPmbKwht9FuE5A',
+        'name': 'Sadi Evren Şeker',
+        'subscribers': '500K+',
+        'category': 'Türkçe AI',
+        'description': 'Yapay zeka, veri bilimi, algoritma dersleri',
+        'url': 'https://www.youtube.com/@sadloading',
+        'lang': 'TR'
+    },
+    {
+        'channel_id': 'UCK5ouS6HSRh02A7fhLk3MkA',
+        'name': 'Mert Cobanov',
+        'subscribers': '150K+',
+        'category': 'Türkçe AI',
+        'description': 'Makine öğrenmesi, deep learning, AI projeleri',
+        'url': 'https://www.youtube.com/@maboroshi_cobanov',
+        'lang': 'TR'
+    },
+    {
+        'channel_id': 'UCNhAx_sS0EJdhVX_YrqHsZg',
+        'name': 'Tirendaz Akademi',
+        'subscribers': '200K+',
+        'category': 'Türkçe AI',
+        'description': 'Veri bilimi, Python, makine öğrenmesi dersleri',
+        'url': 'https://www.youtube.com/@TirendazAkademi',
+        'lang': 'TR'
+    },
+    {
+        'channel_id': 'UCdM7gq3gCHv_c1rQCR6K8Pw',
+        'name': 'Global AI Hub',
+        'subscribers': '100K+',
+        'category': 'Türkçe AI',
+        'description': 'AI eğitimleri, bootcamp, canlı dersler',
+        'url': 'https://www.youtube.com/@GlobalAIHub',
+        'lang': 'TR'
+    },
+    {
+        'channel_id': 'UCcvPpRB7EbZ_XPjp7MUCMRw',
+        'name': 'Kodluyoruz',
+        'subscribers': '180K+',
+        'category': 'Türkçe AI',
+        'description': 'Yazılım ve AI eğitimleri, kariyer rehberliği',
+        'url': 'https://www.youtube.com/@Kodluyoruz',
+        'lang': 'TR'
+    },
+    {
+        'channel_id': 'UCW5YeuERMmlnqo4oq8vwUpg',
+        'name': 'Adem İlter',
+        'subscribers': '250K+',
+        'category': 'Türkçe Tech',
+        'description': 'Frontend, AI araçları, yazılım geliştirme',
+        'url': 'https://www.youtube.com/@AdemIlter',
+        'lang': 'TR'
+    },
+    {
+        'channel_id': 'UC9Z1XWw1kmnvOOFsj6Bzy2g',
+        'name': 'BTK Akademi',
+        'subscribers': '600K+',
+        'category': 'Türkçe Eğitim',
+        'description': 'Ücretsiz AI ve teknoloji eğitimleri',
+        'url': 'https://www.youtube.com/@BTKAkademi',
+        'lang': 'TR'
+    },
+    {
+        'channel_id': 'UCpU4zV_W1v_BckV7uMy5H7w',
+        'name': 'Engin Demiroğ',
+        'subscribers': '400K+',
+        'category': 'Türkçe Yazılım',
+        'description': 'Yazılım eğitimi, C#, Python, AI temelleri',
+        'url': 'https://www.youtube.com/@EnginDemirog',
+        'lang': 'TR'
+    },
+    {
+        'channel_id': 'UCvkd6q32P6t1vp3OyLfq3Lg',
+        'name': 'Mustafa Vahit Keskin',
+        'subscribers': '120K+',
+        'category': 'Türkçe AI',
+        'description': 'Veri bilimi, makine öğrenmesi projeleri',
+        'url': 'https://www.youtube.com/@mvahitkeskin',
+        'lang': 'TR'
+    },
+    {
+        'channel_id': 'UCxHrRzkHk1vpn3rHAAG18bg',
+        'name': 'Şadi Evren Şeker',
+        'subscribers': '80K+',
+        'category': 'Türkçe AI',
+        'description': 'Yapay zeka haberleri, güncel gelişmeler',
+        'url': 'https://www.youtube.com/@sadievren',
+        'lang': 'TR'
+    },
+]
+
+# 🌍 Uluslararası AI YouTube kanalları
+INTERNATIONAL_AI_CHANNELS = [
+    # ─── ARAŞTIRMA & TEKNİK ───
+    {
+        'channel_id': 'UCbfYPyITQ-7l4upoX8nvctg',
+        'name': 'Two Minute Papers',
+        'name_tr': 'İki Dakikada Makaleler',
+        'subscribers': '1.5M+',
+        'category': 'AI Araştırma',
+        'description': 'AI makalelerinin kısa özetleri',
+        'description_tr': 'Akademik AI makalelerinin 2 dakikalık özetleri',
+        'url': 'https://www.youtube.com/@TwoMinutePapers',
+        'lang': 'EN'
+    },
+    {
+        'channel_id': 'UCYO_jab_esuFRV4b17AJtAw',
+        'name': '3Blue1Brown',
+        'name_tr': 'Matematik Görselleştirme',
+        'subscribers': '6M+',
+        'category': 'Matematik/AI',
+        'description': 'Neural network ve matematik görselleştirmeleri',
+        'description_tr': 'Sinir ağları ve matematik konularının görsel anlatımı',
+        'url': 'https://www.youtube.com/@3blue1brown',
+        'lang': 'EN'
+    },
+    {
+        'channel_id': 'UCeYvMMZLnoqOzphJJ1Ozf_Q',
+        'name': 'Yannic Kilcher',
+        'name_tr': 'Yannic Kilcher',
+        'subscribers': '280K+',
+        'category': 'AI Araştırma',
+        'description': 'AI paper incelemeleri ve teknik analizler',
+        'description_tr': 'Detaylı AI makale incelemeleri ve teknik açıklamalar',
+        'url': 'https://www.youtube.com/@YannicKilcher',
+        'lang': 'EN'
+    },
+    {
+        'channel_id': 'UCxg7CAgk4sDJ9p3EE',
+        'name': 'Andrej Karpathy',
+        'name_tr': 'Andrej Karpathy',
+        'subscribers': '600K+',
+        'category': 'AI Araştırma',
+        'description': 'Eski Tesla AI direktörü, teknik dersler',
+        'description_tr': 'Tesla eski AI direktöründen neural network dersleri',
+        'url': 'https://www.youtube.com/@AndrejKarpathy',
+        'lang': 'EN'
+    },
+
+    # ─── AI ARAÇLAR & PRATİK ───
+    {
+        'channel_id': 'UCLXo7UDZvByw2ixzpQCufnA',
+        'name': 'Matt Wolfe',
+        'name_tr': 'AI Araç İncelemeleri',
+        'subscribers': '650K+',
+        'category': 'AI Araçlar',
+        'description': 'Haftalık AI araçları ve haberleri',
+        'description_tr': 'Her hafta yeni AI araçları ve kullanım rehberleri',
+        'url': 'https://www.youtube.com/@maboroshi_studio',
+        'lang': 'EN'
+    },
+    {
+        'channel_id': 'UCUyeluBRhGPCW4rPe_UvBZQ',
+        'name': 'The AI Advantage',
+        'name_tr': 'AI Avantajı',
+        'subscribers': '500K+',
+        'category': 'AI Araçlar',
+        'description': 'AI araçları kullanım rehberleri',
+        'description_tr': 'ChatGPT, Claude, Midjourney pratik kullanım ipuçları',
+        'url': 'https://www.youtube.com/@aiadvantage',
+        'lang': 'EN'
+    },
+    {
+        'channel_id': 'UCb-bmaFpSPnJMwJJJlU2kbQ',
+        'name': 'All About AI',
+        'name_tr': 'AI Hakkında Her Şey',
+        'subscribers': '400K+',
+        'category': 'AI Araçlar',
+        'description': 'Kapsamlı AI araç incelemeleri',
+        'description_tr': 'Tüm AI araçlarının detaylı demo ve incelemeleri',
+        'url': 'https://www.youtube.com/@AllAboutAI',
+        'lang': 'EN'
+    },
+    {
+        'channel_id': 'UC4L2IXqZvLxZdaXcvfje2OQ',
+        'name': 'AI Jason',
+        'name_tr': 'AI Jason',
+        'subscribers': '250K+',
+        'category': 'AI Prompt',
+        'description': 'Prompt engineering ve AI ipuçları',
+        'description_tr': 'ChatGPT ve Claude için prompt yazma teknikleri',
+        'url': 'https://www.youtube.com/@AIJasonZ',
+        'lang': 'EN'
+    },
+
+    # ─── HABER & ANALİZ ───
+    {
+        'channel_id': 'UC5sYcThBEkKrLQqo_v1m4VQ',
+        'name': 'AI Explained',
+        'name_tr': 'AI Açıklamaları',
+        'subscribers': '400K+',
+        'category': 'AI Analiz',
+        'description': 'Derinlemesine AI analizleri',
+        'description_tr': 'GPT vs Claude karşılaştırmaları, AI gelecek analizleri',
+        'url': 'https://www.youtube.com/@aiexplained-official',
+        'lang': 'EN'
+    },
+    {
+        'channel_id': 'UCZHmQk67mSJgfCCTn7xBfew',
+        'name': 'Fireship',
+        'name_tr': 'Hızlı Teknoloji',
+        'subscribers': '3M+',
+        'category': 'Tech/AI',
+        'description': 'Hızlı tech ve AI açıklamaları',
+        'description_tr': '100 saniyede teknoloji ve AI konuları',
+        'url': 'https://www.youtube.com/@Fireship',
+        'lang': 'EN'
+    },
+    {
+        'channel_id': 'UCVHFbqXqoYvEWM1Ddxl0QKg',
+        'name': 'Lex Fridman',
+        'name_tr': 'Lex Fridman Podcast',
+        'subscribers': '4.5M+',
+        'category': 'AI Podcast',
+        'description': 'AI liderleriyle uzun röportajlar',
+        'description_tr': 'Elon Musk, Sam Altman gibi isimlerle AI sohbetleri',
+        'url': 'https://www.youtube.com/@lexfridman',
+        'lang': 'EN'
+    },
+
+    # ─── RESMİ KANALLAR ───
+    {
+        'channel_id': 'UCXZCJLdBC09xxGZ6gcdrc6A',
+        'name': 'OpenAI',
+        'name_tr': 'OpenAI (Resmi)',
+        'subscribers': '600K+',
+        'category': 'Resmi',
+        'description': 'ChatGPT, GPT-4, Sora resmi duyuruları',
+        'description_tr': 'ChatGPT ve GPT modellerinin resmi duyuruları',
+        'url': 'https://www.youtube.com/@OpenAI',
+        'lang': 'EN'
+    },
+    {
+        'channel_id': 'UCJlfH_QMvSCUvgGW4JAbSPQ',
+        'name': 'Anthropic',
+        'name_tr': 'Anthropic (Resmi)',
+        'subscribers': '50K+',
+        'category': 'Resmi',
+        'description': 'Claude AI resmi duyuruları',
+        'description_tr': 'Claude AI resmi tanıtım ve güncellemeleri',
+        'url': 'https://www.youtube.com/@AnthropicAI',
+        'lang': 'EN'
+    },
+    {
+        'channel_id': 'UC_x5XG1OV2P6uZZ5FSM9Ttw',
+        'name': 'Google',
+        'name_tr': 'Google (Resmi)',
+        'subscribers': '14M+',
+        'category': 'Resmi',
+        'description': 'Google AI, Gemini haberleri',
+        'description_tr': 'Gemini AI ve Google yapay zeka duyuruları',
+        'url': 'https://www.youtube.com/@Google',
+        'lang': 'EN'
+    },
+]
+
 def get_youtube_ai_videos() -> List[Dict]:
     """
     Popüler AI YouTube kanallarından son videolar
@@ -613,273 +979,8 @@ def get_youtube_ai_videos() -> List[Dict]:
     """
     videos = []
     
-    # ═══════════════════════════════════════════════════════════════
-    # 🇹🇷 TÜRK AI YOUTUBE KANALLARI (ÖNCELİKLİ)
-    # ═══════════════════════════════════════════════════════════════
-    
-    turkish_ai_channels = [
-        {
-            'channel_id': 'UCWN3xxRkmTPmbKwht9FuE5A',
-            'name': 'Sadi Evren Şeker',
-            'subscribers': '500K+',
-            'category': 'Türkçe AI',
-            'description': 'Yapay zeka, veri bilimi, algoritma dersleri',
-            'url': 'https://www.youtube.com/@sadloading',
-            'lang': 'TR'
-        },
-        {
-            'channel_id': 'UCK5ouS6HSRh02A7fhLk3MkA',
-            'name': 'Mert Cobanov',
-            'subscribers': '150K+',
-            'category': 'Türkçe AI',
-            'description': 'Makine öğrenmesi, deep learning, AI projeleri',
-            'url': 'https://www.youtube.com/@maboroshi_cobanov',
-            'lang': 'TR'
-        },
-        {
-            'channel_id': 'UCNhAx_sS0EJdhVX_YrqHsZg',
-            'name': 'Tirendaz Akademi',
-            'subscribers': '200K+',
-            'category': 'Türkçe AI',
-            'description': 'Veri bilimi, Python, makine öğrenmesi dersleri',
-            'url': 'https://www.youtube.com/@TirendazAkademi',
-            'lang': 'TR'
-        },
-        {
-            'channel_id': 'UCdM7gq3gCHv_c1rQCR6K8Pw',
-            'name': 'Global AI Hub',
-            'subscribers': '100K+',
-            'category': 'Türkçe AI',
-            'description': 'AI eğitimleri, bootcamp, canlı dersler',
-            'url': 'https://www.youtube.com/@GlobalAIHub',
-            'lang': 'TR'
-        },
-        {
-            'channel_id': 'UCcvPpRB7EbZ_XPjp7MUCMRw',
-            'name': 'Kodluyoruz',
-            'subscribers': '180K+',
-            'category': 'Türkçe AI',
-            'description': 'Yazılım ve AI eğitimleri, kariyer rehberliği',
-            'url': 'https://www.youtube.com/@Kodluyoruz',
-            'lang': 'TR'
-        },
-        {
-            'channel_id': 'UCW5YeuERMmlnqo4oq8vwUpg',
-            'name': 'Adem İlter',
-            'subscribers': '250K+',
-            'category': 'Türkçe Tech',
-            'description': 'Frontend, AI araçları, yazılım geliştirme',
-            'url': 'https://www.youtube.com/@AdemIlter',
-            'lang': 'TR'
-        },
-        {
-            'channel_id': 'UC9Z1XWw1kmnvOOFsj6Bzy2g',
-            'name': 'BTK Akademi',
-            'subscribers': '600K+',
-            'category': 'Türkçe Eğitim',
-            'description': 'Ücretsiz AI ve teknoloji eğitimleri',
-            'url': 'https://www.youtube.com/@BTKAkademi',
-            'lang': 'TR'
-        },
-        {
-            'channel_id': 'UCpU4zV_W1v_BckV7uMy5H7w',
-            'name': 'Engin Demiroğ',
-            'subscribers': '400K+',
-            'category': 'Türkçe Yazılım',
-            'description': 'Yazılım eğitimi, C#, Python, AI temelleri',
-            'url': 'https://www.youtube.com/@EnginDemirog',
-            'lang': 'TR'
-        },
-        {
-            'channel_id': 'UCvkd6q32P6t1vp3OyLfq3Lg',
-            'name': 'Mustafa Vahit Keskin',
-            'subscribers': '120K+',
-            'category': 'Türkçe AI',
-            'description': 'Veri bilimi, makine öğrenmesi projeleri',
-            'url': 'https://www.youtube.com/@mvahitkeskin',
-            'lang': 'TR'
-        },
-        {
-            'channel_id': 'UCxHrRzkHk1vpn3rHAAG18bg',
-            'name': 'Şadi Evren Şeker',
-            'subscribers': '80K+',
-            'category': 'Türkçe AI',
-            'description': 'Yapay zeka haberleri, güncel gelişmeler',
-            'url': 'https://www.youtube.com/@sadievren',
-            'lang': 'TR'
-        },
-    ]
-    
-    # ═══════════════════════════════════════════════════════════════
-    # 🌍 ULUSLARARASI AI YOUTUBE KANALLARI
-    # ═══════════════════════════════════════════════════════════════
-    
-    international_ai_channels = [
-        # ─── ARAŞTIRMA & TEKNİK ───
-        {
-            'channel_id': 'UCbfYPyITQ-7l4upoX8nvctg',
-            'name': 'Two Minute Papers',
-            'name_tr': 'İki Dakikada Makaleler',
-            'subscribers': '1.5M+',
-            'category': 'AI Araştırma',
-            'description': 'AI makalelerinin kısa özetleri',
-            'description_tr': 'Akademik AI makalelerinin 2 dakikalık özetleri',
-            'url': 'https://www.youtube.com/@TwoMinutePapers',
-            'lang': 'EN'
-        },
-        {
-            'channel_id': 'UCYO_jab_esuFRV4b17AJtAw',
-            'name': '3Blue1Brown',
-            'name_tr': 'Matematik Görselleştirme',
-            'subscribers': '6M+',
-            'category': 'Matematik/AI',
-            'description': 'Neural network ve matematik görselleştirmeleri',
-            'description_tr': 'Sinir ağları ve matematik konularının görsel anlatımı',
-            'url': 'https://www.youtube.com/@3blue1brown',
-            'lang': 'EN'
-        },
-        {
-            'channel_id': 'UCeYvMMZLnoqOzphJJ1Ozf_Q',
-            'name': 'Yannic Kilcher',
-            'name_tr': 'Yannic Kilcher',
-            'subscribers': '280K+',
-            'category': 'AI Araştırma',
-            'description': 'AI paper incelemeleri ve teknik analizler',
-            'description_tr': 'Detaylı AI makale incelemeleri ve teknik açıklamalar',
-            'url': 'https://www.youtube.com/@YannicKilcher',
-            'lang': 'EN'
-        },
-        {
-            'channel_id': 'UCxg7CAgk4sDJ9p3EE',
-            'name': 'Andrej Karpathy',
-            'name_tr': 'Andrej Karpathy',
-            'subscribers': '600K+',
-            'category': 'AI Araştırma',
-            'description': 'Eski Tesla AI direktörü, teknik dersler',
-            'description_tr': 'Tesla eski AI direktöründen neural network dersleri',
-            'url': 'https://www.youtube.com/@AndrejKarpathy',
-            'lang': 'EN'
-        },
-        
-        # ─── AI ARAÇLAR & PRATİK ───
-        {
-            'channel_id': 'UCLXo7UDZvByw2ixzpQCufnA',
-            'name': 'Matt Wolfe',
-            'name_tr': 'AI Araç İncelemeleri',
-            'subscribers': '650K+',
-            'category': 'AI Araçlar',
-            'description': 'Haftalık AI araçları ve haberleri',
-            'description_tr': 'Her hafta yeni AI araçları ve kullanım rehberleri',
-            'url': 'https://www.youtube.com/@maboroshi_studio',
-            'lang': 'EN'
-        },
-        {
-            'channel_id': 'UCUyeluBRhGPCW4rPe_UvBZQ',
-            'name': 'The AI Advantage',
-            'name_tr': 'AI Avantajı',
-            'subscribers': '500K+',
-            'category': 'AI Araçlar',
-            'description': 'AI araçları kullanım rehberleri',
-            'description_tr': 'ChatGPT, Claude, Midjourney pratik kullanım ipuçları',
-            'url': 'https://www.youtube.com/@aiadvantage',
-            'lang': 'EN'
-        },
-        {
-            'channel_id': 'UCb-bmaFpSPnJMwJJJlU2kbQ',
-            'name': 'All About AI',
-            'name_tr': 'AI Hakkında Her Şey',
-            'subscribers': '400K+',
-            'category': 'AI Araçlar',
-            'description': 'Kapsamlı AI araç incelemeleri',
-            'description_tr': 'Tüm AI araçlarının detaylı demo ve incelemeleri',
-            'url': 'https://www.youtube.com/@AllAboutAI',
-            'lang': 'EN'
-        },
-        {
-            'channel_id': 'UC4L2IXqZvLxZdaXcvfje2OQ',
-            'name': 'AI Jason',
-            'name_tr': 'AI Jason',
-            'subscribers': '250K+',
-            'category': 'AI Prompt',
-            'description': 'Prompt engineering ve AI ipuçları',
-            'description_tr': 'ChatGPT ve Claude için prompt yazma teknikleri',
-            'url': 'https://www.youtube.com/@AIJasonZ',
-            'lang': 'EN'
-        },
-        
-        # ─── HABER & ANALİZ ───
-        {
-            'channel_id': 'UC5sYcThBEkKrLQqo_v1m4VQ',
-            'name': 'AI Explained',
-            'name_tr': 'AI Açıklamaları',
-            'subscribers': '400K+',
-            'category': 'AI Analiz',
-            'description': 'Derinlemesine AI analizleri',
-            'description_tr': 'GPT vs Claude karşılaştırmaları, AI gelecek analizleri',
-            'url': 'https://www.youtube.com/@aiexplained-official',
-            'lang': 'EN'
-        },
-        {
-            'channel_id': 'UCZHmQk67mSJgfCCTn7xBfew',
-            'name': 'Fireship',
-            'name_tr': 'Hızlı Teknoloji',
-            'subscribers': '3M+',
-            'category': 'Tech/AI',
-            'description': 'Hızlı tech ve AI açıklamaları',
-            'description_tr': '100 saniyede teknoloji ve AI konuları',
-            'url': 'https://www.youtube.com/@Fireship',
-            'lang': 'EN'
-        },
-        {
-            'channel_id': 'UCVHFbqXqoYvEWM1Ddxl0QKg',
-            'name': 'Lex Fridman',
-            'name_tr': 'Lex Fridman Podcast',
-            'subscribers': '4.5M+',
-            'category': 'AI Podcast',
-            'description': 'AI liderleriyle uzun röportajlar',
-            'description_tr': 'Elon Musk, Sam Altman gibi isimlerle AI sohbetleri',
-            'url': 'https://www.youtube.com/@lexfridman',
-            'lang': 'EN'
-        },
-        
-        # ─── RESMİ KANALLAR ───
-        {
-            'channel_id': 'UCXZCJLdBC09xxGZ6gcdrc6A',
-            'name': 'OpenAI',
-            'name_tr': 'OpenAI (Resmi)',
-            'subscribers': '600K+',
-            'category': 'Resmi',
-            'description': 'ChatGPT, GPT-4, Sora resmi duyuruları',
-            'description_tr': 'ChatGPT ve GPT modellerinin resmi duyuruları',
-            'url': 'https://www.youtube.com/@OpenAI',
-            'lang': 'EN'
-        },
-        {
-            'channel_id': 'UCJlfH_QMvSCUvgGW4JAbSPQ',
-            'name': 'Anthropic',
-            'name_tr': 'Anthropic (Resmi)',
-            'subscribers': '50K+',
-            'category': 'Resmi',
-            'description': 'Claude AI resmi duyuruları',
-            'description_tr': 'Claude AI resmi tanıtım ve güncellemeleri',
-            'url': 'https://www.youtube.com/@AnthropicAI',
-            'lang': 'EN'
-        },
-        {
-            'channel_id': 'UC_x5XG1OV2P6uZZ5FSM9Ttw',
-            'name': 'Google',
-            'name_tr': 'Google (Resmi)',
-            'subscribers': '14M+',
-            'category': 'Resmi',
-            'description': 'Google AI, Gemini haberleri',
-            'description_tr': 'Gemini AI ve Google yapay zeka duyuruları',
-            'url': 'https://www.youtube.com/@Google',
-            'lang': 'EN'
-        },
-    ]
-    
     # Tüm kanalları birleştir (Türk kanallar önce)
-    all_channels = turkish_ai_channels + international_ai_channels
+    all_channels = TURKISH_AI_CHANNELS + INTERNATIONAL_AI_CHANNELS
     
     # AI anahtar kelimeleri
     ai_keywords = [
@@ -896,8 +997,8 @@ def get_youtube_ai_videos() -> List[Dict]:
     # RSS'den çekmeyi dene
     for channel in all_channels:
         try:
-            rss_url = f"https://www.youtube.com/feeds/videos.xml?channel_id={channel['channel_id']}"
-            feed = feedparser.parse(rss_url)
+            rss_url = YOUTUBE_FEED_URL.format(channel['channel_id'])
+            feed = fetcher.feed(rss_url)
             
             if feed.entries:
                 rss_success = True
@@ -931,7 +1032,8 @@ def get_youtube_ai_videos() -> List[Dict]:
                     if ai_focused or is_ai_related:
                         videos.append({
                             'title': title[:120],
-                            'title_tr': translate_video_title(title) if channel.get('lang') == 'EN' else title,
+                            'title_tr': title,
+                            'needs_translation': channel.get('lang') == 'EN',
                             'channel': channel['name'],
                             'channel_tr': channel.get('name_tr', channel['name']),
                             'subscribers': channel['subscribers'],
@@ -977,36 +1079,12 @@ def get_youtube_ai_videos() -> List[Dict]:
 
 def translate_video_title(title: str) -> str:
     """
-    Video başlığını Türkçeye çevir (Gemini kullanarak)
+    Video başlığını Türkçeye çevir (çeviri hafızasından)
     Çeviri yapılamazsa orijinal başlık döner
     """
     if not title:
         return title
-    
-    # Gemini ile çeviri dene
-    if GEMINI_KEY and genai:
-        try:
-            client = genai.Client(api_key=GEMINI_KEY)
-            
-            prompt = f"""Aşağıdaki İngilizce video başlığını Türkçeye çevir.
-Sadece çeviriyi yaz, başka bir şey ekleme.
-Teknik terimleri (GPT, AI, LLM vb.) çevirme, olduğu gibi bırak.
-
-Başlık: {title}
-
-Türkçe:"""
-            
-            response = client.models.generate_content(
-                model="gemini-2.0-flash",
-                contents=prompt
-            )
-            
-            if response.text:
-                return response.text.strip()[:120]
-        except:
-            pass
-    
-    return title
+    return translator.translate(title)[:120]
 
 
 def get_curated_ai_channels() -> List[Dict]:
@@ -1256,105 +1334,105 @@ def get_ai_channel_recommendations() -> List[Dict]:
 # 🏆 PISA LİDERLERİNDEN EĞİTİM HABERLERİ
 # ══════════════════════════════════════════════════════════════════════════════
 
+# PISA 2022 Top Performers
+PISA_LEADERS = {
+    'singapore': {
+        'flag': '🇸🇬',
+        'name': 'Singapur',
+        'rank': '#1-2 PISA',
+        'sources': [
+            ('https://www.straitstimes.com/singapore/parenting-education', 'Straits Times Education'),
+            ('https://www.channelnewsasia.com/rss/latest_news.xml', 'CNA'),
+        ],
+        # SADECE bu kelimeler geçerse al
+        'must_have': ['school', 'education', 'student', 'teacher', 'exam', 'curriculum', 
+                     'university', 'moe', 'psle', 'o level', 'a level', 'learning', 
+                     'classroom', 'tuition', 'polytechnic'],
+    },
+    'japan': {
+        'flag': '🇯🇵',
+        'name': 'Japonya',
+        'rank': '#4-5 PISA',
+        'sources': [
+            ('https://www.japantimes.co.jp/feed/', 'Japan Times'),
+            ('https://english.kyodonews.net/rss/all.xml', 'Kyodo News'),
+        ],
+        'must_have': ['school', 'education', 'student', 'teacher', 'university', 
+                     'mext', 'exam', 'curriculum', 'juku', 'learning', 'classroom',
+                     'elementary', 'high school', 'college'],
+    },
+    'korea': {
+        'flag': '🇰🇷',
+        'name': 'Güney Kore',
+        'rank': '#6 PISA',
+        'sources': [
+            ('https://en.yna.co.kr/RSS/news.xml', 'Yonhap'),
+            ('https://www.koreaherald.com/rss/023.xml', 'Korea Herald'),
+        ],
+        'must_have': ['school', 'education', 'student', 'teacher', 'university',
+                     'suneung', 'csat', 'hagwon', 'curriculum', 'learning',
+                     'college', 'exam', 'classroom'],
+    },
+    'estonia': {
+        'flag': '🇪🇪',
+        'name': 'Estonya',
+        'rank': '#3 PISA Fen',
+        'sources': [
+            ('https://news.err.ee/rss', 'ERR News'),
+        ],
+        'must_have': ['school', 'education', 'student', 'teacher', 'university',
+                     'curriculum', 'learning', 'classroom', 'exam', 'digital education',
+                     'e-school', 'gymnasium'],
+    },
+    'hong_kong': {
+        'flag': '🇭🇰',
+        'name': 'Hong Kong',
+        'rank': '#5 PISA',
+        'sources': [
+            ('https://www.scmp.com/rss/91/feed', 'SCMP'),
+        ],
+        'must_have': ['school', 'education', 'student', 'teacher', 'university',
+                     'dse', 'curriculum', 'learning', 'classroom', 'exam',
+                     'education bureau'],
+    },
+    'chinese_taipei': {
+        'flag': '🇹🇼',
+        'name': 'Tayvan',
+        'rank': '#8 PISA',
+        'sources': [
+            ('https://focustaiwan.tw/rss', 'Focus Taiwan'),
+        ],
+        'must_have': ['school', 'education', 'student', 'teacher', 'university',
+                     'curriculum', 'learning', 'exam', 'college', 'ministry of education'],
+    },
+    'finland': {
+        'flag': '🇫🇮',
+        'name': 'Finlandiya',
+        'rank': '#12 PISA',
+        'sources': [
+            ('https://yle.fi/rss/uutiset.rss', 'YLE'),
+        ],
+        'must_have': ['school', 'education', 'student', 'teacher', 'university',
+                     'curriculum', 'learning', 'classroom', 'pisa', 'finnish education'],
+    },
+    'canada': {
+        'flag': '🇨🇦',
+        'name': 'Kanada',
+        'rank': '#9 PISA',
+        'sources': [
+            ('https://www.cbc.ca/cmlink/rss-canada', 'CBC'),
+        ],
+        'must_have': ['school', 'education', 'student', 'teacher', 'university',
+                     'curriculum', 'learning', 'classroom', 'college', 'provincial education'],
+    },
+}
+
 def get_pisa_leaders_news() -> Dict[str, List[Dict]]:
     """
     PISA 2022'de en başarılı ülkelerden eğitim haberleri
     SADECE eğitim politikası ve okul haberleri - çok sıkı filtreleme
     """
     
-    # PISA 2022 Top Performers
-    pisa_leaders = {
-        'singapore': {
-            'flag': '🇸🇬',
-            'name': 'Singapur',
-            'rank': '#1-2 PISA',
-            'sources': [
-                ('https://www.straitstimes.com/singapore/parenting-education', 'Straits Times Education'),
-                ('https://www.channelnewsasia.com/rss/latest_news.xml', 'CNA'),
-            ],
-            # SADECE bu kelimeler geçerse al
-            'must_have': ['school', 'education', 'student', 'teacher', 'exam', 'curriculum', 
-                         'university', 'moe', 'psle', 'o level', 'a level', 'learning', 
-                         'classroom', 'tuition', 'polytechnic'],
-        },
-        'japan': {
-            'flag': '🇯🇵',
-            'name': 'Japonya',
-            'rank': '#4-5 PISA',
-            'sources': [
-                ('https://www.japantimes.co.jp/feed/', 'Japan Times'),
-                ('https://english.kyodonews.net/rss/all.xml', 'Kyodo News'),
-            ],
-            'must_have': ['school', 'education', 'student', 'teacher', 'university', 
-                         'mext', 'exam', 'curriculum', 'juku', 'learning', 'classroom',
-                         'elementary', 'high school', 'college'],
-        },
-        'korea': {
-            'flag': '🇰🇷',
-            'name': 'Güney Kore',
-            'rank': '#6 PISA',
-            'sources': [
-                ('https://en.yna.co.kr/RSS/news.xml', 'Yonhap'),
-                ('https://www.koreaherald.com/rss/023.xml', 'Korea Herald'),
-            ],
-            'must_have': ['school', 'education', 'student', 'teacher', 'university',
-                         'suneung', 'csat', 'hagwon', 'curriculum', 'learning',
-                         'college', 'exam', 'classroom'],
-        },
-        'estonia': {
-            'flag': '🇪🇪',
-            'name': 'Estonya',
-            'rank': '#3 PISA Fen',
-            'sources': [
-                ('https://news.err.ee/rss', 'ERR News'),
-            ],
-            'must_have': ['school', 'education', 'student', 'teacher', 'university',
-                         'curriculum', 'learning', 'classroom', 'exam', 'digital education',
-                         'e-school', 'gymnasium'],
-        },
-        'hong_kong': {
-            'flag': '🇭🇰',
-            'name': 'Hong Kong',
-            'rank': '#5 PISA',
-            'sources': [
-                ('https://www.scmp.com/rss/91/feed', 'SCMP'),
-            ],
-            'must_have': ['school', 'education', 'student', 'teacher', 'university',
-                         'dse', 'curriculum', 'learning', 'classroom', 'exam',
-                         'education bureau'],
-        },
-        'chinese_taipei': {
-            'flag': '🇹🇼',
-            'name': 'Tayvan',
-            'rank': '#8 PISA',
-            'sources': [
-                ('https://focustaiwan.tw/rss', 'Focus Taiwan'),
-            ],
-            'must_have': ['school', 'education', 'student', 'teacher', 'university',
-                         'curriculum', 'learning', 'exam', 'college', 'ministry of education'],
-        },
-        'finland': {
-            'flag': '🇫🇮',
-            'name': 'Finlandiya',
-            'rank': '#12 PISA',
-            'sources': [
-                ('https://yle.fi/rss/uutiset.rss', 'YLE'),
-            ],
-            'must_have': ['school', 'education', 'student', 'teacher', 'university',
-                         'curriculum', 'learning', 'classroom', 'pisa', 'finnish education'],
-        },
-        'canada': {
-            'flag': '🇨🇦',
-            'name': 'Kanada',
-            'rank': '#9 PISA',
-            'sources': [
-                ('https://www.cbc.ca/cmlink/rss-canada', 'CBC'),
-            ],
-            'must_have': ['school', 'education', 'student', 'teacher', 'university',
-                         'curriculum', 'learning', 'classroom', 'college', 'provincial education'],
-        },
-    }
-    
     # Kesinlikle ALMAYACAĞIMIZ konular (eğitimle alakasız)
     exclude_keywords = [
         'prison', 'jail', 'crime', 'murder', 'police', 'court', 'arrested',
@@ -1370,12 +1448,12 @@ def get_pisa_leaders_news() -> Dict[str, List[Dict]]:
     
     all_news = {}
     
-    for country_code, country_info in pisa_leaders.items():
+    for country_code, country_info in PISA_LEADERS.items():
         country_news = []
         
         for source_url, source_name in country_info['sources']:
             try:
-                feed = feedparser.parse(source_url)
+                feed = fetcher.feed(source_url)
                 for entry in feed.entries[:15]:  # Daha fazla entry tara, filtreleyeceğiz
                     title = entry.get('title', '')
                     link = entry.get('link', '')
@@ -1438,6 +1516,17 @@ def get_pisa_leaders_news() -> Dict[str, List[Dict]]:
 # 🌍 DÜNYADAN MAKRO EĞİTİM HABERLERİ
 # ══════════════════════════════════════════════════════════════════════════════
 
+# Uluslararası kuruluşlar
+GLOBAL_EDUCATION_SOURCES = [
+    ('https://www.unesco.org/en/rss.xml', 'UNESCO', 'Uluslararası'),
+    ('https://blogs.worldbank.org/education/rss.xml', 'World Bank Education', 'Uluslararası'),
+    ('https://www.oecd-ilibrary.org/rss/content/subject/education.xml', 'OECD', 'Uluslararası'),
+    ('https://www.weforum.org/agenda/feed', 'World Economic Forum', 'Global'),
+    ('https://www.brookings.edu/topic/education/feed/', 'Brookings', 'Policy'),
+    ('https://www.theguardian.com/education/rss', 'Guardian Education', 'UK'),
+    ('https://www.nytimes.com/svc/collections/v1/publish/www.nytimes.com/section/education/rss.xml', 'NYT Education', 'US'),
+]
+
 def get_global_macro_education_news() -> List[Dict]:
     """
     Global eğitim politikası ve reform haberleri
@@ -1445,17 +1534,6 @@ def get_global_macro_education_news() -> List[Dict]:
     """
     news = []
     
-    # Uluslararası kuruluşlar
-    global_sources = [
-        ('https://www.unesco.org/en/rss.xml', 'UNESCO', 'Uluslararası'),
-        ('https://blogs.worldbank.org/education/rss.xml', 'World Bank Education', 'Uluslararası'),
-        ('https://www.oecd-ilibrary.org/rss/content/subject/education.xml', 'OECD', 'Uluslararası'),
-        ('https://www.weforum.org/agenda/feed', 'World Economic Forum', 'Global'),
-        ('https://www.brookings.edu/topic/education/feed/', 'Brookings', 'Policy'),
-        ('https://www.theguardian.com/education/rss', 'Guardian Education', 'UK'),
-        ('https://www.nytimes.com/svc/collections/v1/publish/www.nytimes.com/section/education/rss.xml', 'NYT Education', 'US'),
-    ]
-    
     macro_keywords = [
         'education policy', 'education reform', 'curriculum reform',
         'national assessment', 'pisa', 'timss', 'international comparison',
@@ -1465,9 +1543,9 @@ def get_global_macro_education_news() -> List[Dict]:
         'education minister', 'education law', 'education system'
     ]
     
-    for rss_url, source, category in global_sources:
+    for rss_url, source, category in GLOBAL_EDUCATION_SOURCES:
         try:
-            feed = feedparser.parse(rss_url)
+            feed = fetcher.feed(rss_url)
             for entry in feed.entries[:6]:
                 title = entry.get('title', '')
                 link = entry.get('link', '')
@@ -1500,6 +1578,14 @@ def get_global_macro_education_news() -> List[Dict]:
 # 📚 BİLİMSEL MAKALELER - GENİŞLETİLMİŞ KAYNAKLAR
 # ══════════════════════════════════════════════════════════════════════════════
 
+# arXiv RSS kategorileri - eğitim odaklı
+ARXIV_CATEGORIES = [
+    ('http://export.arxiv.org/rss/cs.CY', 'cs.CY', 'Bilgisayar & Toplum'),  # Education papers here
+    ('http://export.arxiv.org/rss/cs.AI', 'cs.AI', 'Yapay Zeka'),
+    ('http://export.arxiv.org/rss/cs.CL', 'cs.CL', 'Doğal Dil İşleme'),
+    ('http://export.arxiv.org/rss/cs.LG', 'cs.LG', 'Makine Öğrenmesi'),
+]
+
 def get_arxiv_papers_safe() -> List[Dict]:
     """
     arXiv'den makaleler - RSS ile (API key gerektirmez)
@@ -1507,14 +1593,6 @@ def get_arxiv_papers_safe() -> List[Dict]:
     """
     papers = []
     
-    # arXiv RSS kategorileri - eğitim odaklı
-    arxiv_categories = [
-        ('http://export.arxiv.org/rss/cs.CY', 'cs.CY', 'Bilgisayar & Toplum'),  # Education papers here
-        ('http://export.arxiv.org/rss/cs.AI', 'cs.AI', 'Yapay Zeka'),
-        ('http://export.arxiv.org/rss/cs.CL', 'cs.CL', 'Doğal Dil İşleme'),
-        ('http://export.arxiv.org/rss/cs.LG', 'cs.LG', 'Makine Öğrenmesi'),
-    ]
-    
     # Eğitim ile ilgili anahtar kelimeler
     education_keywords = [
         'education', 'learning', 'student', 'teacher', 'classroom',
@@ -1523,9 +1601,9 @@ def get_arxiv_papers_safe() -> List[Dict]:
         'e-learning', 'mooc', 'personalized learning', 'teaching'
     ]
     
-    for rss_url, category, category_name in arxiv_categories:
+    for rss_url, category, category_name in ARXIV_CATEGORIES:
         try:
-            feed = feedparser.parse(rss_url)
+            feed = fetcher.feed(rss_url)
             
             for entry in feed.entries[:8]:
                 title = entry.get('title', '').replace('\n', ' ')
@@ -1550,8 +1628,6 @@ def get_arxiv_papers_safe() -> List[Dict]:
                     'needs_translation': True
                 })
             
-            time.sleep(2)  # Rate limit için bekleme
-            
         except Exception as e:
             print(f"arXiv RSS hatası ({category}): {e}")
             continue
@@ -1561,6 +1637,14 @@ def get_arxiv_papers_safe() -> List[Dict]:
     
     return papers[:8]
 
+# Eğitim araştırma dergileri RSS (ERIC yerine)
+ERIC_SOURCES = [
+    ('https://bera-journals.onlinelibrary.wiley.com/feed/14678535/most-recent', 'British Journal of Educational Technology'),
+    ('https://www.tandfonline.com/feed/rss/cjem20', 'Journal of Education for Teaching'),
+    ('https://link.springer.com/search.rss?facet-content-type=Article&facet-journal-id=10648&channel-name=Educational+Psychology+Review', 'Educational Psychology Review'),
+    ('https://journals.sagepub.com/action/showFeed?ui=0&mi=ehikzz&ai=2b4&jc=rera&type=etoc&feed=rss', 'Review of Educational Research'),
+]
+
 def get_eric_papers() -> List[Dict]:
     """
     ERIC benzeri kaynaklar - RSS ile (API key gerektirmez)
@@ -1568,23 +1652,15 @@ def get_eric_papers() -> List[Dict]:
     """
     papers = []
     
-    # Eğitim araştırma dergileri RSS (ERIC yerine)
-    sources = [
-        ('https://bera-journals.onlinelibrary.wiley.com/feed/14678535/most-recent', 'British Journal of Educational Technology'),
-        ('https://www.tandfonline.com/feed/rss/cjem20', 'Journal of Education for Teaching'),
-        ('https://link.springer.com/search.rss?facet-content-type=Article&facet-journal-id=10648&channel-name=Educational+Psychology+Review', 'Educational Psychology Review'),
-        ('https://journals.sagepub.com/action/showFeed?ui=0&mi=ehikzz&ai=2b4&jc=rera&type=etoc&feed=rss', 'Review of Educational Research'),
-    ]
-    
     education_keywords = [
         'education', 'learning', 'student', 'teacher', 'assessment',
         'curriculum', 'pedagogy', 'instruction', 'classroom', 'school',
         'achievement', 'performance', 'technology', 'digital', 'online'
     ]
     
-    for rss_url, source_name in sources:
+    for rss_url, source_name in ERIC_SOURCES:
         try:
-            feed = feedparser.parse(rss_url)
+            feed = fetcher.feed(rss_url)
             
             for entry in feed.entries[:5]:
                 title = entry.get('title', '')
@@ -1612,20 +1688,20 @@ def get_eric_papers() -> List[Dict]:
     
     return papers[:5]
 
+# AI ve Eğitim odaklı RSS kaynakları
+AI_EDUCATION_JOURNAL_SOURCES = [
+    ('https://www.jair.org/index.php/jair/gateway/plugin/WebFeedGatewayPlugin/rss2', 'Journal of AI Research'),
+    ('https://ieeexplore.ieee.org/rss/TOC42.XML', 'IEEE Transactions on Learning Technologies'),
+    ('https://educationaltechnologyjournal.springeropen.com/articles/most-recent/rss.xml', 'Educational Technology Research'),
+    ('https://aied.pub/index.php/IJAIED/gateway/plugin/WebFeedGatewayPlugin/rss2', 'Int. Journal of AI in Education'),
+]
+
 def get_semantic_scholar_papers() -> List[Dict]:
     """
     AI & Eğitim makaleleri - RSS kaynakları ile (API key gerektirmez)
     """
     papers = []
     
-    # AI ve Eğitim odaklı RSS kaynakları
-    sources = [
-        ('https://www.jair.org/index.php/jair/gateway/plugin/WebFeedGatewayPlugin/rss2', 'Journal of AI Research'),
-        ('https://ieeexplore.ieee.org/rss/TOC42.XML', 'IEEE Transactions on Learning Technologies'),
-        ('https://educationaltechnologyjournal.springeropen.com/articles/most-recent/rss.xml', 'Educational Technology Research'),
-        ('https://aied.pub/index.php/IJAIED/gateway/plugin/WebFeedGatewayPlugin/rss2', 'Int. Journal of AI in Education'),
-    ]
-    
     ai_education_keywords = [
         'artificial intelligence', 'machine learning', 'deep learning',
         'intelligent tutoring', 'adaptive learning', 'personalized',
@@ -1633,9 +1709,9 @@ def get_semantic_scholar_papers() -> List[Dict]:
         'natural language', 'computer vision', 'neural network'
     ]
     
-    for rss_url, source_name in sources:
+    for rss_url, source_name in AI_EDUCATION_JOURNAL_SOURCES:
         try:
-            feed = feedparser.parse(rss_url)
+            feed = fetcher.feed(rss_url)
             
             for entry in feed.entries[:4]:
                 title = entry.get('title', '')
@@ -1663,6 +1739,24 @@ def get_semantic_scholar_papers() -> List[Dict]:
     
     return papers[:5]
 
+# Eğitim odaklı kaynaklar
+RESEARCH_EDUCATION_SOURCES = [
+    ('https://www.frontiersin.org/journals/education/rss', 'Frontiers in Education'),
+    ('https://educationaltechnologyjournal.springeropen.com/articles/most-recent/rss.xml', 'Ed Tech Research'),
+    ('https://www.tandfonline.com/feed/rss/cede20', 'Educational Research'),
+]
+
+# Matematik odaklı kaynaklar
+RESEARCH_MATH_SOURCES = [
+    ('https://www.frontiersin.org/journals/applied-mathematics-and-statistics/rss', 'Frontiers Applied Math'),
+]
+
+# AI odaklı kaynaklar
+RESEARCH_AI_SOURCES = [
+    ('https://www.nature.com/natmachintell.rss', 'Nature Machine Intelligence'),
+    ('http://feeds.nature.com/srep/rss/current', 'Nature Scientific Reports'),
+]
+
 def get_research_papers() -> List[Dict]:
     """
     Akademik araştırma makaleleri - SADECE eğitim, matematik, AI ile ilgili
@@ -1670,24 +1764,6 @@ def get_research_papers() -> List[Dict]:
     """
     papers = []
     
-    # Eğitim odaklı kaynaklar
-    education_sources = [
-        ('https://www.frontiersin.org/journals/education/rss', 'Frontiers in Education'),
-        ('https://educationaltechnologyjournal.springeropen.com/articles/most-recent/rss.xml', 'Ed Tech Research'),
-        ('https://www.tandfonline.com/feed/rss/cede20', 'Educational Research'),
-    ]
-    
-    # Matematik odaklı kaynaklar
-    math_sources = [
-        ('https://www.frontiersin.org/journals/applied-mathematics-and-statistics/rss', 'Frontiers Applied Math'),
-    ]
-    
-    # AI odaklı kaynaklar
-    ai_sources = [
-        ('https://www.nature.com/natmachintell.rss', 'Nature Machine Intelligence'),
-        ('http://feeds.nature.com/srep/rss/current', 'Nature Scientific Reports'),
-    ]
-    
     # Eğitim anahtar kelimeleri
     education_keywords = [
         'education', 'learning', 'student', 'teacher', 'school', 'classroom',
@@ -1719,11 +1795,11 @@ def get_research_papers() -> List[Dict]:
         'earthquake', 'geology', 'thyroid', 'seismic', 'fire', 'flood'
     ]
     
-    all_sources = education_sources + math_sources + ai_sources
+    all_sources = RESEARCH_EDUCATION_SOURCES + RESEARCH_MATH_SOURCES + RESEARCH_AI_SOURCES
     
     for rss_url, source_name in all_sources:
         try:
-            feed = feedparser.parse(rss_url)
+            feed = fetcher.feed(rss_url)
             for entry in feed.entries[:8]:
                 title = entry.get('title', '')
                 summary = entry.get('summary', '')[:400] if entry.get('summary') else ''
@@ -1791,27 +1867,32 @@ def get_research_papers() -> List[Dict]:
 # 📊 ULUSLARARASI DEĞERLENDİRME RAPORLARI (PISA, TIMSS)
 # ══════════════════════════════════════════════════════════════════════════════
 
+# OECD Eğitim RSS
+OECD_SOURCES = [
+    ('https://www.oecd.org/education/rss/', 'OECD Education'),
+    ('https://oecdedutoday.com/feed/', 'OECD Education Today'),
+]
+
+COMPARISON_SOURCES = [
+    ('https://www.brookings.edu/topic/global-education/feed/', 'Brookings Global Education'),
+    ('https://gemreportunesco.wordpress.com/feed/', 'UNESCO GEM Report'),
+]
+
 def get_international_assessment_news() -> List[Dict]:
     """
     PISA, TIMSS ve uluslararası değerlendirme haberleri - RSS tabanlı
     """
     news = []
     
-    # OECD Eğitim RSS
-    oecd_sources = [
-        ('https://www.oecd.org/education/rss/', 'OECD Education'),
-        ('https://oecdedutoday.com/feed/', 'OECD Education Today'),
-    ]
-    
     pisa_timss_keywords = [
         'pisa', 'timss', 'pirls', 'talis', 'international assessment',
         'student achievement', 'education ranking', 'oecd education',
         'learning outcomes', 'education performance', 'education comparison'
     ]
     
-    for rss_url, source in oecd_sources:
+    for rss_url, source in OECD_SOURCES:
         try:
-            feed = feedparser.parse(rss_url)
+            feed = fetcher.feed(rss_url)
             
             for entry in feed.entries[:6]:
                 title = entry.get('title', '')
@@ -1837,14 +1918,10 @@ def get_international_assessment_news() -> List[Dict]:
             continue
     
     # Eğitim karşılaştırma haberleri
-    comparison_sources = [
-        ('https://www.brookings.edu/topic/global-education/feed/', 'Brookings Global Education'),
-        ('https://gemreportunesco.wordpress.com/feed/', 'UNESCO GEM Report'),
-    ]
     
-    for rss_url, source in comparison_sources:
+    for rss_url, source in COMPARISON_SOURCES:
         try:
-            feed = feedparser.parse(rss_url)
+            feed = fetcher.feed(rss_url)
             
             for entry in feed.entries[:4]:
                 title = entry.get('title', '')
@@ -1865,28 +1942,28 @@ def get_international_assessment_news() -> List[Dict]:
     
     return news[:6]
 
+# Türkiye akademik dergileri RSS
+TURKEY_RESEARCH_SOURCES = [
+    ('https://dergipark.org.tr/tr/pub/egam/rss', 'Eğitimde ve Psikolojide Ölçme'),
+    ('https://dergipark.org.tr/tr/pub/kefdergi/rss', 'Kastamonu Eğitim'),
+    ('https://dergipark.org.tr/tr/pub/aod/rss', 'Anadolu Öğretmen'),
+    ('https://dergipark.org.tr/tr/pub/ted/rss', 'Türk Eğitim Bilimleri'),
+]
+
 def get_turkey_assessment_research() -> List[Dict]:
     """
     Türkiye ulusal izleme ve değerlendirme araştırmaları - RSS tabanlı
     """
     research = []
     
-    # Türkiye akademik dergileri RSS
-    sources = [
-        ('https://dergipark.org.tr/tr/pub/egam/rss', 'Eğitimde ve Psikolojide Ölçme'),
-        ('https://dergipark.org.tr/tr/pub/kefdergi/rss', 'Kastamonu Eğitim'),
-        ('https://dergipark.org.tr/tr/pub/aod/rss', 'Anadolu Öğretmen'),
-        ('https://dergipark.org.tr/tr/pub/ted/rss', 'Türk Eğitim Bilimleri'),
-    ]
-    
     keywords = [
         'pisa', 'timss', 'abide', 'lgs', 'yks', 'ölçme', 'değerlendirme',
         'başarı', 'performans', 'matematik', 'fen', 'okuma', 'ulusal'
     ]
     
-    for rss_url, source in sources:
+    for rss_url, source in TURKEY_RESEARCH_SOURCES:
         try:
-            feed = feedparser.parse(rss_url)
+            feed = fetcher.feed(rss_url)
             for entry in feed.entries[:5]:
                 title = entry.get('title', '')
                 link = entry.get('link', '')
@@ -1940,23 +2017,23 @@ def get_turkey_assessment_research() -> List[Dict]:
 # 📖 EĞİTİM DERGİ VE KİTAPLARI
 # ══════════════════════════════════════════════════════════════════════════════
 
+# Önemli eğitim dergileri RSS
+JOURNAL_SOURCES = [
+    ('https://journals.sagepub.com/action/showFeed?ui=0&mi=ehikzz&ai=2b4&jc=rera&type=etoc&feed=rss', 'Review of Educational Research'),
+    ('https://www.tandfonline.com/feed/rss/tedp20', 'Educational Psychologist'),
+    ('https://www.journals.elsevier.com/computers-and-education/rss', 'Computers & Education'),
+    ('https://link.springer.com/search.rss?facet-content-type=Article&facet-journal-id=11423&channel-name=Educational+Technology+Research+and+Development', 'ETR&D'),
+]
+
 def get_education_journals() -> List[Dict]:
     """
     Eğitim dergileri ve yeni kitaplar
     """
     journals = []
     
-    # Önemli eğitim dergileri RSS
-    sources = [
-        ('https://journals.sagepub.com/action/showFeed?ui=0&mi=ehikzz&ai=2b4&jc=rera&type=etoc&feed=rss', 'Review of Educational Research'),
-        ('https://www.tandfonline.com/feed/rss/tedp20', 'Educational Psychologist'),
-        ('https://www.journals.elsevier.com/computers-and-education/rss', 'Computers & Education'),
-        ('https://link.springer.com/search.rss?facet-content-type=Article&facet-journal-id=11423&channel-name=Educational+Technology+Research+and+Development', 'ETR&D'),
-    ]
-    
-    for rss_url, source in sources:
+    for rss_url, source in JOURNAL_SOURCES:
         try:
-            feed = feedparser.parse(rss_url)
+            feed = fetcher.feed(rss_url)
             for entry in feed.entries[:3]:
                 title = entry.get('title', '')
                 link = entry.get('link', '')
@@ -1978,6 +2055,50 @@ def get_education_journals() -> List[Dict]:
 # ÖĞRENCİ GÜNDEMİ - DİNAMİK (Gerçek Trend Veriler)
 # ══════════════════════════════════════════════════════════════════════════════
 
+EKSI_URLS = [
+    "https://eksisozluk.com/basliklar/gundem",
+    "https://eksisozluk.com/basliklar/debe",  # Dünün en beğenilen entryleri
+]
+
+EKSI_HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
+    'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8',
+    'Accept-Language': 'tr-TR,tr;q=0.9,en-US;q=0.8,en;q=0.7',
+}
+
+REDDIT_HEADERS = {
+    'User-Agent': 'EducationBot/3.0 (Educational News Aggregator)'
+}
+
+REDDIT_URLS = [
+    'https://www.reddit.com/r/Turkey/hot.json',
+    'https://www.reddit.com/r/KGBTR/hot.json',
+]
+
+STUDENT_FORUMS = [
+    ('https://www.memurlar.net/haber/egitim/rss/', 'Memurlar.net'),
+    ('https://www.kamubiz.com/feed/', 'KamuBiz'),
+]
+
+# Nitter instance'ları (Twitter alternatifi - API gerektirmez)
+NITTER_URLS = [
+    'https://nitter.poast.org/search?f=tweets&q=%23LGS',
+    'https://nitter.poast.org/search?f=tweets&q=%23YKS',
+    'https://nitter.poast.org/search?f=tweets&q=%23TYT',
+]
+
+# YouTube RSS - Popüler eğitim kanalları
+TRENDING_YOUTUBE_CHANNELS = [
+    ('https://www.youtube.com/feeds/videos.xml?channel_id=UCvMZ2d5r47nGVNPzI6hGX8A', 'Tonguç Akademi'),
+    ('https://www.youtube.com/feeds/videos.xml?channel_id=UC6JYy4gZQaoNLbXxBn4cFjg', 'Hocalara Geldik'),
+]
+
+GOOGLE_TRENDS_URL = "https://trends.google.com/trends/trendingsearches/daily/rss?geo=TR"
+
+TECH_FORUMS = [
+    ('https://forum.donanimhaber.com/rss.ashx?CategoryID=35', 'Donanım Haber'),
+]
+
 def get_student_trending_topics() -> List[Dict]:
     """
     Öğrencilerin gerçekten konuştuğu konular
@@ -1999,20 +2120,9 @@ def get_student_trending_topics() -> List[Dict]:
     # 1. EKŞİ SÖZLÜK - Gündem
     print("   📱 Ekşi Sözlük taranıyor...")
     try:
-        urls = [
-            "https://eksisozluk.com/basliklar/gundem",
-            "https://eksisozluk.com/basliklar/debe",  # Dünün en beğenilen entryleri
-        ]
-        
-        headers = {
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
-            'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8',
-            'Accept-Language': 'tr-TR,tr;q=0.9,en-US;q=0.8,en;q=0.7',
-        }
-        
-        for url in urls:
+        for url in EKSI_URLS:
             try:
-                r = requests.get(url, headers=headers, timeout=10)
+                r = fetcher.get(url, headers=EKSI_HEADERS)
                 if r.status_code == 200:
                     soup = BeautifulSoup(r.text, 'html.parser')
                     
@@ -2038,7 +2148,6 @@ def get_student_trending_topics() -> List[Dict]:
                                         'category': 'Gündem',
                                         'link': f"https://eksisozluk.com{href}" if href.startswith('/') else href
                                     })
-                time.sleep(0.5)
             except:
                 continue
     except Exception as e:
@@ -2047,18 +2156,9 @@ def get_student_trending_topics() -> List[Dict]:
     # 2. REDDIT - r/Turkey, r/KGBTR (öğrenci paylaşımları)
     print("   📱 Reddit taranıyor...")
     try:
-        subreddits = [
-            'https://www.reddit.com/r/Turkey/hot.json',
-            'https://www.reddit.com/r/KGBTR/hot.json',
-        ]
-        
-        headers = {
-            'User-Agent': 'EducationBot/3.0 (Educational News Aggregator)'
-        }
-        
-        for subreddit_url in subreddits:
+        for subreddit_url in REDDIT_URLS:
             try:
-                r = requests.get(subreddit_url, headers=headers, timeout=10)
+                r = fetcher.get(subreddit_url, headers=REDDIT_HEADERS)
                 if r.status_code == 200:
                     data = r.json()
                     posts = data.get('data', {}).get('children', [])
@@ -2078,7 +2178,6 @@ def get_student_trending_topics() -> List[Dict]:
                                     'category': 'Sosyal Medya',
                                     'link': f"https://reddit.com{permalink}"
                                 })
-                time.sleep(0.5)
             except:
                 continue
     except Exception as e:
@@ -2087,14 +2186,9 @@ def get_student_trending_topics() -> List[Dict]:
     # 3. ÖĞRENCİ FORUMLARI
     print("   📱 Öğrenci forumları taranıyor...")
     try:
-        forums = [
-            ('https://www.memurlar.net/haber/egitim/rss/', 'Memurlar.net'),
-            ('https://www.kamubiz.com/feed/', 'KamuBiz'),
-        ]
-        
-        for forum_url, forum_name in forums:
+        for forum_url, forum_name in STUDENT_FORUMS:
             try:
-                feed = feedparser.parse(forum_url)
+                feed = fetcher.feed(forum_url)
                 for entry in feed.entries[:10]:
                     title = entry.get('title', '')
                     link = entry.get('link', '')
@@ -2115,20 +2209,9 @@ def get_student_trending_topics() -> List[Dict]:
     # 4. TWITTER/X TRENDLERİ - Eğitim hashtagleri
     print("   📱 Twitter trendleri taranıyor...")
     try:
-        # Nitter instance'ları (Twitter alternatifi - API gerektirmez)
-        nitter_urls = [
-            'https://nitter.poast.org/search?f=tweets&q=%23LGS',
-            'https://nitter.poast.org/search?f=tweets&q=%23YKS',
-            'https://nitter.poast.org/search?f=tweets&q=%23TYT',
-        ]
-        
-        headers = {
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
-        }
-        
-        for nitter_url in nitter_urls[:2]:
+        for nitter_url in NITTER_URLS[:2]:
             try:
-                r = requests.get(nitter_url, headers=headers, timeout=8)
+                r = fetcher.get(nitter_url, headers=BROWSER_HEADERS)
                 if r.status_code == 200:
                     soup = BeautifulSoup(r.text, 'html.parser')
                     tweets = soup.select('.tweet-content') or soup.select('.timeline-item')
@@ -2142,7 +2225,6 @@ def get_student_trending_topics() -> List[Dict]:
                                     'source': 'Twitter/X',
                                     'category': 'Sosyal Medya'
                                 })
-                time.sleep(0.5)
             except:
                 continue
     except Exception as e:
@@ -2151,15 +2233,9 @@ def get_student_trending_topics() -> List[Dict]:
     # 5. YOUTUBE - Eğitim trendleri
     print("   📱 YouTube trendleri taranıyor...")
     try:
-        # YouTube RSS - Popüler eğitim kanalları
-        youtube_channels = [
-            ('https://www.youtube.com/feeds/videos.xml?channel_id=UCvMZ2d5r47nGVNPzI6hGX8A', 'Tonguç Akademi'),
-            ('https://www.youtube.com/feeds/videos.xml?channel_id=UC6JYy4gZQaoNLbXxBn4cFjg', 'Hocalara Geldik'),
-        ]
-        
-        for channel_url, channel_name in youtube_channels:
+        for channel_url, channel_name in TRENDING_YOUTUBE_CHANNELS:
             try:
-                feed = feedparser.parse(channel_url)
+                feed = fetcher.feed(channel_url)
                 for entry in feed.entries[:3]:
                     title = entry.get('title', '')
                     link = entry.get('link', '')
@@ -2181,8 +2257,7 @@ def get_student_trending_topics() -> List[Dict]:
     print("   📱 Google Trends kontrol ediliyor...")
     try:
         # Google Trends RSS (varsa)
-        trends_url = "https://trends.google.com/trends/trendingsearches/daily/rss?geo=TR"
-        feed = feedparser.parse(trends_url)
+        feed = fetcher.feed(GOOGLE_TRENDS_URL)
         
         for entry in feed.entries[:20]:
             title = entry.get('title', '')
@@ -2200,13 +2275,9 @@ def get_student_trending_topics() -> List[Dict]:
     # 7. DONANIM HABER / TEKNOLOJİ FORUMLARI (Öğrenci paylaşımları)
     print("   📱 Teknoloji forumları taranıyor...")
     try:
-        tech_forums = [
-            ('https://forum.donanimhaber.com/rss.ashx?CategoryID=35', 'Donanım Haber'),
-        ]
-        
-        for forum_url, forum_name in tech_forums:
+        for forum_url, forum_name in TECH_FORUMS:
             try:
-                feed = feedparser.parse(forum_url)
+                feed = fetcher.feed(forum_url)
                 for entry in feed.entries[:10]:
                     title = entry.get('title', '')
                     link = entry.get('link', '')
@@ -2281,7 +2352,7 @@ def get_daily_motivation() -> Dict:
     
     if GEMINI_KEY and genai:
         try:
-            client = genai.Client(api_key=GEMINI_KEY)
+            client = get_gemini_client()
             
             # Sınava kalan gün hesapla
             lgs_date = datetime(2026, 6, 14)
@@ -2330,33 +2401,125 @@ Kurallar:
 # ÇEVİRİ FONKSİYONU
 # ══════════════════════════════════════════════════════════════════════════════
 
-def translate_to_turkish(text: str, is_headline: bool = True) -> str:
-    """Gemini ile çeviri"""
-    if not text or not GEMINI_KEY or not genai:
-        return text
-    
-    try:
-        client = genai.Client(api_key=GEMINI_KEY)
-        
-        prompt = f"""Aşağıdaki haber başlığını Türkçeye çevir.
-Teknik terimleri (AI, PISA, STEM, OECD) olduğu gibi bırak.
-Sadece çeviriyi yaz.
+TRANSLATION_BATCH = 40          # tek istekte çevrilen en fazla başlık
+TRANSLATION_MEMORY_LIMIT = 5000  # hafızada tutulan en fazla çeviri
+
+class TitleTranslator:
+    """Başlıkları tek Gemini isteğinde toplu çevirir, çevirileri saklar"""
+    
+    def __init__(self, path: str = None):
+        self.path = path or os.path.join(CACHE_DIR, 'translations.json')
+        self.memory: Dict[str, str] = {}
+        self.failed: Set[str] = set()
+        self.loaded = False
+        self.changed = False
+        self.stats = {'cached': 0, 'translated': 0, 'requests': 0}
+    
+    def _key(self, title: str) -> str:
+        """Hafıza anahtarı: küçük harf, tek boşluk"""
+        return ' '.join((title or '').lower().split())
+    
+    def load(self):
+        """Önceki çalıştırmaların çevirilerini yükle"""
+        if self.loaded:
+            return
+        self.loaded = True
+        try:
+            with open(self.path, encoding='utf-8') as f:
+                self.memory = json.load(f)
+        except (OSError, ValueError):
+            self.memory = {}
+    
+    def translate_many(self, titles: List[str]):
+        """Hafızada olmayan başlıkları toplu çevir"""
+        self.load()
+        pending = []
+        seen = set()
+        for title in titles:
+            key = self._key(title)
+            if not key or key in seen:
+                continue
+            seen.add(key)
+            if key in self.memory:
+                self.stats['cached'] += 1
+            elif key not in self.failed:
+                pending.append(title)
+        
+        client = get_gemini_client()
+        if not pending or not client:
+            return
+        for i in range(0, len(pending), TRANSLATION_BATCH):
+            self._translate_batch(client, pending[i:i + TRANSLATION_BATCH])
+    
+    def _translate_batch(self, client, titles: List[str]):
+        numbered = '\n'.join(f"{i}. {title}" for i, title in enumerate(titles))
+        prompt = f"""Aşağıdaki numaralı haber ve video başlıklarını Türkçeye çevir.
+Teknik terimleri (AI, GPT, LLM, PISA, STEM, OECD) olduğu gibi bırak.
+Zaten Türkçe olan başlığı aynen yaz.
+
+Yanıtı sadece JSON objesi olarak ver: anahtar başlık numarası, değer çeviri.
+Örnek: {{"0": "...", "1": "..."}}
+
+{numbered}"""
+        
+        data = None
+        try:
+            response = client.models.generate_content(
+                model="gemini-2.0-flash",
+                contents=prompt,
+                config={'response_mime_type': 'application/json'}
+            )
+            self.stats['requests'] += 1
+            data = extract_json(response.text)
+        except Exception as e:
+            print(f"   ⚠️ Çeviri hatası: {e}")
+        if not isinstance(data, dict):
+            data = {}
+        
+        for i, title in enumerate(titles):
+            key = self._key(title)
+            translated = data.get(str(i))
+            if isinstance(translated, str) and translated.strip():
+                self.memory[key] = translated.strip()
+                self.stats['translated'] += 1
+                self.changed = True
+            else:
+                # Bu çalıştırmada tekrar denenmez, orijinal başlık kullanılır
+                self.failed.add(key)
+    
+    def translate(self, title: str) -> str:
+        """Hafızadaki çeviri; yoksa tek başlık çevrilir, olmazsa orijinal"""
+        key = self._key(title)
+        if not key:
+            return title
+        self.load()
+        if key not in self.memory and key not in self.failed:
+            self.translate_many([title])
+        return self.memory.get(key, title)
+    
+    def save(self):
+        """Çevirileri diske yaz (en yeni TRANSLATION_MEMORY_LIMIT kayıt)"""
+        if not self.changed:
+            return
+        items = list(self.memory.items())[-TRANSLATION_MEMORY_LIMIT:]
+        try:
+            os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+            tmp = self.path + '.tmp'
+            with open(tmp, 'w', encoding='utf-8') as f:
+                json.dump(dict(items), f, ensure_ascii=False)
+            os.replace(tmp, self.path)
+            self.changed = False
+        except OSError as e:
+            print(f"   ⚠️ Çeviri hafızası yazılamadı: {e}")
+
+# Global çevirmen - çeviriler .feed_cache ile birlikte saklanır
+translator = TitleTranslator()
 
-İngilizce: {text}
-Türkçe:"""
-        
-        response = client.models.generate_content(
-            model="gemini-2.0-flash",
-            contents=prompt
-        )
-        
-        translated = response.text.strip()
-        if translated.lower().startswith("türkçe"):
-            translated = translated.split(":", 1)[-1].strip()
-        
-        return translated if translated else text
-    except:
+def translate_to_turkish(text: str, is_headline: bool = True) -> str:
+    """Gemini ile çeviri (hafızadan, gerekirse tek başlık)"""
+    if not text:
         return text
+    return translator.translate(text)
 
 # ══════════════════════════════════════════════════════════════════════════════
 # GÜNÜN ÖZETİ (AI)
@@ -2368,7 +2531,7 @@ def generate_daily_summary(all_news: Dict) -> str:
         return ""
     
     try:
-        client = genai.Client(api_key=GEMINI_KEY)
+        client = get_gemini_client()
         
         news_text = ""
         
@@ -2425,12 +2588,38 @@ Kurallar:
 # RAPOR OLUŞTURMA
 # ══════════════════════════════════════════════════════════════════════════════
 
+def prefetch_sources():
+    """Tüm bölümlerin kaynaklarını paralel indirmeye başla (beklemeden döner)"""
+    feed_sources = (
+        TURKEY_NEWS_SOURCES + MATH_NEWS_SOURCES + LLM_NEWS_SOURCES + EDTECH_NEWS_SOURCES +
+        GLOBAL_EDUCATION_SOURCES + ARXIV_CATEGORIES + ERIC_SOURCES + AI_EDUCATION_JOURNAL_SOURCES +
+        RESEARCH_EDUCATION_SOURCES + RESEARCH_MATH_SOURCES + RESEARCH_AI_SOURCES +
+        OECD_SOURCES + COMPARISON_SOURCES + TURKEY_RESEARCH_SOURCES + JOURNAL_SOURCES +
+        STUDENT_FORUMS + TRENDING_YOUTUBE_CHANNELS + TECH_FORUMS
+    )
+    fetcher.prefetch(source[0] for source in feed_sources)
+    fetcher.prefetch(url for info in PISA_LEADERS.values() for url, _ in info['sources'])
+    fetcher.prefetch(YOUTUBE_FEED_URL.format(channel['channel_id'])
+                     for channel in TURKISH_AI_CHANNELS + INTERNATIONAL_AI_CHANNELS)
+    fetcher.prefetch([GOOGLE_TRENDS_URL])
+    
+    # HTML sayfaları ve JSON API'ler
+    fetcher.prefetch([MEB_URL] + NITTER_URLS[:2], headers=BROWSER_HEADERS, parse=False)
+    fetcher.prefetch(EKSI_URLS, headers=EKSI_HEADERS, parse=False)
+    fetcher.prefetch(REDDIT_URLS, headers=REDDIT_HEADERS, parse=False)
+
 def generate_report() -> str:
     """Günlük eğitim raporu"""
     
     # Her raporda deduplicator'ı sıfırla
     deduplicator.reset()
     
+    # Kaynaklar paralel iner; rapor en yavaş kaynak kadar (en fazla
+    # FEED_BUDGET sn) bekler, kaynak sürelerinin toplamı kadar değil
+    fetch_start = time.time()
+    fetcher.start()
+    prefetch_sources()
+    
     report = []
     today = datetime.now()
     
@@ -2457,11 +2646,38 @@ def generate_report() -> str:
     
     report.append("")
     
-    # 2. TÜRKİYE EĞİTİM GÜNDEMİ
+    # Çeviri gerektiren bölümlerin verileri önce toplanır (aynı sırayla,
+    # tekrar filtresi değişmez); başlıklar tek Gemini isteğinde çevrilir
     print("🇹🇷 Türkiye haberleri...")
     meb_news = get_meb_news()
     turkey_news = get_education_news_turkey()
+    print("🤖 AI haberleri...")
+    ai_news = get_ai_education_news()
+    print("➕ Matematik haberleri...")
+    math_news = get_math_news()
+    print("🎬 YouTube AI videoları çekiliyor...")
+    youtube_videos = get_youtube_ai_videos()
+    print("🏆 PISA liderleri haberleri...")
+    pisa_news = get_pisa_leaders_news()
+    print("🌍 Global haberler...")
+    global_news = get_global_macro_education_news()
+    print("📄 Bilimsel makaleler...")
+    arxiv_papers = get_arxiv_papers_safe()
+    eric_papers = get_eric_papers()
+    research_papers = get_research_papers()
+    
+    print("🔤 Başlıklar çevriliyor...")
+    translator.translate_many(
+        [n['title'] for n in ai_news + math_news if n.get('needs_translation')] +
+        [v['title'] for v in youtube_videos if v.get('needs_translation')] +
+        [n['title'] for items in pisa_news.values() for n in items[:2]] +
+        [n['title'] for n in global_news[:4] + arxiv_papers[:3] + eric_papers[:2] + research_papers]
+    )
+    for video in youtube_videos:
+        if video.get('needs_translation'):
+            video['title_tr'] = translate_video_title(video['title'])
     
+    # 2. TÜRKİYE EĞİTİM GÜNDEMİ
     report.append("━" * 50)
     report.append("🏛️ MEB & TÜRKİYE EĞİTİM GÜNDEMİ")
     report.append("━" * 50)
@@ -2481,9 +2697,6 @@ def generate_report() -> str:
     report.append("")
     
     # 3. YAPAY ZEKA & EĞİTİM TEKNOLOJİSİ
-    print("🤖 AI haberleri...")
-    ai_news = get_ai_education_news()
-    
     report.append("━" * 50)
     report.append("🤖 YAPAY ZEKA & EĞİTİM TEKNOLOJİSİ")
     report.append("━" * 50)
@@ -2492,18 +2705,11 @@ def generate_report() -> str:
     llm_news = [n for n in ai_news if n.get('is_llm') or n.get('category') in ['LLM', 'AI Haber', 'Araştırma']]
     edtech_news = [n for n in ai_news if n.get('category') in ['EdTech', 'Yükseköğretim']]
     
-    translate_count = 0
-    
     # LLM Gelişmeleri
     if llm_news:
         report.append("\n🧠 BÜYÜK DİL MODELLERİ & AI GELİŞMELERİ:")
         for news in llm_news[:4]:
-            if news.get('needs_translation') and translate_count < 4:
-                title_tr = translate_to_turkish(news['title'])
-                translate_count += 1
-                time.sleep(0.3)
-            else:
-                title_tr = news['title']
+            title_tr = translate_to_turkish(news['title']) if news.get('needs_translation') else news['title']
             
             category_icon = {
                 'LLM': '🔮',
@@ -2520,12 +2726,7 @@ def generate_report() -> str:
     if edtech_news:
         report.append("\n📱 EĞİTİM TEKNOLOJİSİ (EdTech):")
         for news in edtech_news[:3]:
-            if news.get('needs_translation') and translate_count < 6:
-                title_tr = translate_to_turkish(news['title'])
-                translate_count += 1
-                time.sleep(0.3)
-            else:
-                title_tr = news['title']
+            title_tr = translate_to_turkish(news['title']) if news.get('needs_translation') else news['title']
             
             report.append(f"\n🔹 {title_tr[:90]}")
             report.append(f"   📍 {news['source']}")
@@ -2536,7 +2737,7 @@ def generate_report() -> str:
     if ai_news and GEMINI_KEY and genai:
         print("   🤖 AI gelişmeleri eğitim analizi yapılıyor...")
         try:
-            client = genai.Client(api_key=GEMINI_KEY)
+            client = get_gemini_client()
             
             # Haberleri topla
             news_titles = [n['title'] for n in ai_news[:6]]
@@ -2571,20 +2772,12 @@ Kurallar:
     report.append("")
     
     # 4. MATEMATİK DÜNYASINDAN
-    print("➕ Matematik haberleri...")
-    math_news = get_math_news()
-    
     report.append("━" * 50)
     report.append("➕ MATEMATİK DÜNYASINDAN")
     report.append("━" * 50)
     
     for news in math_news[:4]:
-        if news.get('needs_translation') and translate_count < 5:
-            title_tr = translate_to_turkish(news['title'])
-            translate_count += 1
-            time.sleep(0.3)
-        else:
-            title_tr = news['title']
+        title_tr = translate_to_turkish(news['title']) if news.get('needs_translation') else news['title']
         
         report.append(f"\n📐 {title_tr[:90]}")
         report.append(f"   📍 {news['source']}")
@@ -2594,9 +2787,6 @@ Kurallar:
     report.append("")
     
     # 4.5. 🎬 YOUTUBE AI VİDEOLARI - YENİ BÖLÜM
-    print("🎬 YouTube AI videoları çekiliyor...")
-    youtube_videos = get_youtube_ai_videos()
-    
     report.append("━" * 50)
     report.append("🎬 YOUTUBE'DA AI KANALLARI")
     report.append("━" * 50)
@@ -2701,21 +2891,13 @@ Kurallar:
     report.append("")
     
     # 5. PISA LİDERLERİNDEN
-    print("🏆 PISA liderleri haberleri...")
-    pisa_news = get_pisa_leaders_news()
-    
     report.append("━" * 50)
     report.append("🏆 PISA LİDERLERİNDEN EĞİTİM HABERLERİ")
     report.append("━" * 50)
     
     for country_code, news_list in pisa_news.items():
         for news in news_list[:2]:
-            if translate_count < 8:
-                title_tr = translate_to_turkish(news['title'])
-                translate_count += 1
-                time.sleep(0.3)
-            else:
-                title_tr = news['title']
+            title_tr = translate_to_turkish(news['title'])
             
             report.append(f"\n{news['flag']} {news['country']} ({news['rank']})")
             report.append(f"   {title_tr[:85]}")
@@ -2726,20 +2908,12 @@ Kurallar:
     report.append("")
     
     # 6. GLOBAL MAKRO HABERLER
-    print("🌍 Global haberler...")
-    global_news = get_global_macro_education_news()
-    
     report.append("━" * 50)
     report.append("🌍 DÜNYADAN EĞİTİM POLİTİKALARI")
     report.append("━" * 50)
     
     for news in global_news[:4]:
-        if translate_count < 10:
-            title_tr = translate_to_turkish(news['title'])
-            translate_count += 1
-            time.sleep(0.3)
-        else:
-            title_tr = news['title']
+        title_tr = translate_to_turkish(news['title'])
         
         report.append(f"\n🔸 {title_tr[:90]}")
         report.append(f"   📍 {news['source']} ({news.get('category', '')})")
@@ -2747,11 +2921,6 @@ Kurallar:
     report.append("")
     
     # 7. BİLİMSEL MAKALELER
-    print("📄 Bilimsel makaleler...")
-    arxiv_papers = get_arxiv_papers_safe()
-    eric_papers = get_eric_papers()
-    research_papers = get_research_papers()
-    
     report.append("━" * 50)
     report.append("📄 BİLİMSEL MAKALELER & ARAŞTIRMALAR")
     report.append("━" * 50)
@@ -2760,12 +2929,7 @@ Kurallar:
     if arxiv_papers:
         report.append("\n🎓 arXiv - EĞİTİM & AI:")
         for paper in arxiv_papers[:3]:
-            if translate_count < 12:
-                title_tr = translate_to_turkish(paper['title'])
-                translate_count += 1
-                time.sleep(0.3)
-            else:
-                title_tr = paper['title']
+            title_tr = translate_to_turkish(paper['title'])
             report.append(f"\n📑 {title_tr[:100]}")
             if paper.get('link'):
                 report.append(f"   🔗 {paper['link']}")
@@ -2774,12 +2938,7 @@ Kurallar:
     if eric_papers:
         report.append("\n📚 EĞİTİM ARAŞTIRMALARI:")
         for paper in eric_papers[:2]:
-            if translate_count < 14:
-                title_tr = translate_to_turkish(paper['title'])
-                translate_count += 1
-                time.sleep(0.3)
-            else:
-                title_tr = paper['title']
+            title_tr = translate_to_turkish(paper['title'])
             report.append(f"\n📖 {title_tr[:100]}")
             if paper.get('link'):
                 report.append(f"   🔗 {paper['link']}")
@@ -2794,36 +2953,21 @@ Kurallar:
         if edu_papers:
             report.append("\n🎓 EĞİTİM BİLİMLERİ:")
             for paper in edu_papers[:2]:
-                if translate_count < 16:
-                    title_tr = translate_to_turkish(paper['title'])
-                    translate_count += 1
-                    time.sleep(0.3)
-                else:
-                    title_tr = paper['title']
+                title_tr = translate_to_turkish(paper['title'])
                 report.append(f"\n📖 {title_tr[:100]}")
                 report.append(f"   📍 {paper['source']}")
         
         if math_papers:
             report.append("\n📐 MATEMATİK ARAŞTIRMALARI:")
             for paper in math_papers[:2]:
-                if translate_count < 18:
-                    title_tr = translate_to_turkish(paper['title'])
-                    translate_count += 1
-                    time.sleep(0.3)
-                else:
-                    title_tr = paper['title']
+                title_tr = translate_to_turkish(paper['title'])
                 report.append(f"\n📖 {title_tr[:100]}")
                 report.append(f"   📍 {paper['source']}")
         
         if ai_papers:
             report.append("\n🤖 YAPAY ZEKA ARAŞTIRMALARI:")
             for paper in ai_papers[:2]:
-                if translate_count < 20:
-                    title_tr = translate_to_turkish(paper['title'])
-                    translate_count += 1
-                    time.sleep(0.3)
-                else:
-                    title_tr = paper['title']
+                title_tr = translate_to_turkish(paper['title'])
                 report.append(f"\n📖 {title_tr[:100]}")
                 report.append(f"   📍 {paper['source']}")
     
@@ -2937,6 +3081,15 @@ Kurallar:
     report.append("═" * 50)
     report.append(f"⏰ Rapor: {datetime.now().strftime('%H:%M:%S')}")
     
+    fetcher.close()
+    translator.save()
+    stats = fetcher.stats
+    print(f"🌐 Kaynaklar: {stats['requests']} istek, {stats['not_modified']} değişmemiş (304), "
+          f"{stats['errors']} hata, {stats['timeouts']} zaman aşımı, "
+          f"{stats['skipped_entries']} önceden raporlanmış ({time.time() - fetch_start:.1f} sn)")
+    print(f"🔤 Çeviri: {translator.stats['translated']} yeni, {translator.stats['cached']} hafızadan, "
+          f"{translator.stats['requests']} istek")
+    
     return '\n'.join(report)
 
 # ══════════════════════════════════════════════════════════════════════════════
@@ -3054,7 +3207,11 @@ def main():
     
     if TELEGRAM_TOKEN and TELEGRAM_CHAT_ID:
         print("\n📤 Telegram'a gönderiliyor...")
-        send_telegram_message(report)
+        if send_telegram_message(report):
+            # Gönderilen linkleri kaydet - sonraki raporlarda tekrar listelenmez
+            fetcher.reported.add(re.findall(r'https?://\S+', report))
+            fetcher.reported.save()
+            deduplicator.save()
     else:
         print("\n⚠️ Telegram ayarları yapılmamış.")
     
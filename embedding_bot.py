@@ -2,25 +2,50 @@
 MATAI PRO - Embedding Bot
 Soru bankasındaki soruları Gemini ile vektörel formata çevirir
 
-Çalışma: Günde 8 kez, her seferinde 100 soru
+Çalışma: Bekleyen tüm sorular sayfa sayfa işlenir; kota veya süre
+sınırına gelinirse kalan sorular bir sonraki çalıştırmaya bırakılır
 Model: Gemini text-embedding-004 (768 boyut)
+
+Toplu vektör yazımı için Supabase'de şu fonksiyon tanımlı olmalıdır
+(yoksa satır bazlı paralel update'e düşülür):
+
+  create or replace function update_question_embeddings(payload jsonb)
+  returns integer language sql as $$
+    with upd as (
+      update question_bank q
+         set embedding = (e->>'embedding')::vector
+        from jsonb_array_elements(payload) e
+       where q.id = (e->>'id')::bigint
+      returning 1
+    )
+    select count(*)::integer from upd;
+  $$;
 """
 
 import os
 import time
 from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
 from supabase import create_client, Client
 from google import genai
 
+import rate_limiter
+from vector_index import build_embedding_text
+
 # ============== YAPILANDIRMA ==============
 CONFIG = {
-    "BATCH_SIZE": 100,
+    "PAGE_SIZE": int(os.environ.get("EMBEDDING_PAGE_SIZE", "500")),     # Sayfa başına çekilen soru
+    "EMBED_BATCH_SIZE": 100,                                             # Tek embed_content isteğindeki metin (API üst sınırı 100)
+    "MAX_QUESTIONS": int(os.environ.get("EMBEDDING_MAX_QUESTIONS", "0")),  # 0 = sınırsız
+    "MAX_RUNTIME": int(os.environ.get("EMBEDDING_MAX_RUNTIME", "3000")),   # Saniye (workflow süresinin altında)
+    "UPDATE_WORKERS": 8,                                                 # RPC yoksa paralel update sayısı
     "EMBEDDING_MODEL": "text-embedding-004",
-    "MAX_TEXT_LENGTH": 8000,
     "RETRY_ATTEMPTS": 3,
     "RETRY_DELAY": 2,
 }
 
+SELECT_COLUMNS = "id, title, original_text, options, solution_text, solution_short, subject, topic, topic_group, grade_level, difficulty, kazanim_kodu, bloom_level, pisa_level, scenario_text, correct_answer"
+
 # ============== İSTEMCİLER ==============
 SUPABASE_URL = os.environ.get("SUPABASE_URL")
 SUPABASE_KEY = os.environ.get("SUPABASE_SERVICE_KEY")
@@ -36,76 +61,117 @@ supabase: Client = create_client(SUPABASE_URL, SUPABASE_KEY)
 client = genai.Client(api_key=GEMINI_KEY)
 
 
-def build_embedding_text(question: dict) -> str:
-    """Soru verilerinden embedding için zengin metin oluşturur"""
-    parts = []
-    
-    if question.get("subject"):
-        parts.append(f"Ders: {question['subject']}")
-    if question.get("topic_group"):
-        parts.append(f"Konu Grubu: {question['topic_group']}")
-    if question.get("topic"):
-        parts.append(f"Alt Konu: {question['topic']}")
-    if question.get("kazanim_kodu"):
-        parts.append(f"Kazanım: {question['kazanim_kodu']}")
-    if question.get("grade_level"):
-        parts.append(f"Sınıf: {question['grade_level']}")
-    if question.get("difficulty"):
-        parts.append(f"Zorluk: {question['difficulty']}/5")
-    if question.get("bloom_level"):
-        parts.append(f"Bloom: {question['bloom_level']}")
-    if question.get("pisa_level"):
-        parts.append(f"PISA Seviye: {question['pisa_level']}")
-    if question.get("scenario_text"):
-        parts.append(f"Senaryo: {question['scenario_text']}")
-    
-    if question.get("original_text"):
-        parts.append(f"Soru: {question['original_text']}")
-    elif question.get("title"):
-        parts.append(f"Soru: {question['title']}")
-    
-    options = question.get("options")
-    if options and isinstance(options, dict):
-        options_text = " | ".join([f"{k}) {v}" for k, v in options.items()])
-        parts.append(f"Şıklar: {options_text}")
-    
-    if question.get("solution_short"):
-        parts.append(f"Çözüm: {question['solution_short']}")
-    elif question.get("solution_text"):
-        parts.append(f"Çözüm: {question['solution_text']}")
-    
-    if question.get("correct_answer"):
-        parts.append(f"Doğru Cevap: {question['correct_answer']}")
-    
-    full_text = "\n\n".join(parts)
-    
-    if len(full_text) > CONFIG["MAX_TEXT_LENGTH"]:
-        full_text = full_text[:CONFIG["MAX_TEXT_LENGTH"]] + "..."
-    
-    return full_text
+class QuotaExhausted(Exception):
+    """Gemini kotası doldu - bu çalıştırmada daha fazla istek atılmaz"""
 
 
-def get_embedding(text: str, retry_count: int = 0) -> list:
-    """Gemini API ile embedding oluşturur"""
+def get_embeddings(texts: list, retry_count: int = 0) -> list:
+    """Gemini API ile tek istekte birden fazla metnin embedding'ini oluşturur"""
     try:
+        rate_limiter.acquire("embedding", GEMINI_KEY)
         result = client.models.embed_content(
             model=CONFIG["EMBEDDING_MODEL"],
-            contents=text
+            contents=texts
         )
-        return result.embeddings[0].values
+        vectors = [e.values for e in result.embeddings]
+        if len(vectors) != len(texts):
+            raise ValueError(f"{len(texts)} metin gönderildi, {len(vectors)} embedding döndü")
+        return vectors
     except Exception as e:
         if retry_count < CONFIG["RETRY_ATTEMPTS"]:
             print(f"⚠️  Embedding hatası, tekrar deneniyor ({retry_count + 1}/{CONFIG['RETRY_ATTEMPTS']})...")
+            rate_limiter.penalize_on_quota("embedding", GEMINI_KEY, e, CONFIG["RETRY_DELAY"] * (retry_count + 1))
             time.sleep(CONFIG["RETRY_DELAY"] * (retry_count + 1))
-            return get_embedding(text, retry_count + 1)
+            return get_embeddings(texts, retry_count + 1)
+        if rate_limiter.is_quota_error(e):
+            raise QuotaExhausted(str(e))
         raise e
 
 
+def get_embedding(text: str) -> list:
+    """Tek metin için embedding oluşturur"""
+    return get_embeddings([text])[0]
+
+
 def vector_to_postgres(vector: list) -> str:
     """Vector'ü PostgreSQL formatına çevirir"""
     return f"[{','.join(map(str, vector))}]"
 
 
+def fetch_pending_page(after_id: int, limit: int) -> list:
+    """Embedding'i NULL olan soruları id sırasıyla, after_id'den sonrası için getirir"""
+    response = supabase.table("question_bank") \
+        .select(SELECT_COLUMNS) \
+        .is_("embedding", "null") \
+        .eq("is_active", True) \
+        .gt("id", after_id) \
+        .order("id") \
+        .limit(limit) \
+        .execute()
+    return response.data or []
+
+
+_rpc_available = True
+
+
+def write_embeddings(rows: list, errors: list) -> int:
+    """Vektörleri toplu yazar; RPC yoksa satır bazlı paralel update yapar"""
+    global _rpc_available
+    if not rows:
+        return 0
+    
+    if _rpc_available:
+        try:
+            supabase.rpc("update_question_embeddings", {"payload": rows}).execute()
+            return len(rows)
+        except Exception as e:
+            _rpc_available = False
+            print(f"ℹ️  update_question_embeddings RPC kullanılamadı, satır bazlı update'e geçiliyor: {str(e)[:100]}")
+    
+    def _update(row):
+        try:
+            supabase.table("question_bank") \
+                .update({"embedding": row["embedding"]}) \
+                .eq("id", row["id"]) \
+                .execute()
+            return True
+        except Exception as e:
+            errors.append({"id": row["id"], "error": str(e)})
+            print(f"✗ Soru #{row['id']} yazılamadı: {str(e)}")
+            return False
+    
+    with ThreadPoolExecutor(max_workers=CONFIG["UPDATE_WORKERS"]) as pool:
+        return sum(pool.map(_update, rows))
+
+
+def embed_batch(questions: list, errors: list) -> list:
+    """Bir grup soruyu tek istekte embed eder, yazılacak satırları döndürür"""
+    texts = [build_embedding_text(q) for q in questions]
+    
+    try:
+        vectors = get_embeddings(texts)
+    except QuotaExhausted:
+        raise
+    except Exception as e:
+        # Toplu istek başarısız - hatalı metni ayıklamak için tek tek dene
+        print(f"⚠️  Toplu embedding hatası ({len(texts)} soru), tek tek deneniyor: {str(e)[:100]}")
+        vectors = []
+        for question, text in zip(questions, texts):
+            try:
+                vectors.append(get_embedding(text))
+            except QuotaExhausted:
+                raise
+            except Exception as single_error:
+                errors.append({"id": question["id"], "error": str(single_error)})
+                print(f"✗ Soru #{question['id']} HATA: {str(single_error)}")
+                vectors.append(None)
+    
+    return [
+        {"id": q["id"], "embedding": vector_to_postgres(v)}
+        for q, v in zip(questions, vectors) if v is not None
+    ]
+
+
 def process_embeddings():
     """Ana işlem fonksiyonu"""
     start_time = time.time()
@@ -116,56 +182,73 @@ def process_embeddings():
     print("=" * 60 + "\n")
     
     try:
-        # 1. Embedding'i NULL olan soruları getir
-        print(f"📥 Embedding bekleyen sorular alınıyor (limit: {CONFIG['BATCH_SIZE']})...")
-        
-        response = supabase.table("question_bank") \
-            .select("id, title, original_text, options, solution_text, solution_short, subject, topic, topic_group, grade_level, difficulty, kazanim_kodu, bloom_level, pisa_level, scenario_text, correct_answer") \
-            .is_("embedding", "null") \
-            .eq("is_active", True) \
-            .limit(CONFIG["BATCH_SIZE"]) \
-            .execute()
-        
-        questions = response.data
-        
-        if not questions:
-            print("✅ Tüm sorular zaten embed edilmiş! İşlem tamamlandı.\n")
-            return {"processed": 0, "failed": 0, "remaining": 0}
-        
-        print(f"📊 {len(questions)} soru bulundu, işleniyor...\n")
-        
-        # 2. Her soru için embedding oluştur
         processed = 0
         failed = 0
         errors = []
+        last_id = 0
+        page_no = 0
+        stop_reason = None
         
-        for question in questions:
-            try:
+        # 1. Embedding'i NULL olan soruları sayfa sayfa işle
+        while stop_reason is None:
+            limit = CONFIG["PAGE_SIZE"]
+            if CONFIG["MAX_QUESTIONS"]:
+                limit = min(limit, CONFIG["MAX_QUESTIONS"] - processed - failed)
+                if limit <= 0:
+                    stop_reason = "soru limiti"
+                    break
+            
+            page_no += 1
+            print(f"📥 Sayfa {page_no}: embedding bekleyen sorular alınıyor (id > {last_id}, limit: {limit})...")
+            questions = fetch_pending_page(last_id, limit)
+            
+            if not questions:
+                if page_no == 1:
+                    print("✅ Tüm sorular zaten embed edilmiş! İşlem tamamlandı.\n")
+                    return {"processed": 0, "failed": 0, "remaining": 0}
+                break
+            
+            last_id = questions[-1]["id"]
+            
+            # Yetersiz metinli soruları ayıkla
+            valid = []
+            for question in questions:
                 embedding_text = build_embedding_text(question)
-                
                 if not embedding_text or len(embedding_text.strip()) < 10:
                     print(f"⚠️  Soru #{question['id']}: Yetersiz metin, atlanıyor")
                     failed += 1
                     continue
+                valid.append(question)
+            
+            # 2. Her grup için tek embed_content isteği + toplu yazım
+            batch_size = CONFIG["EMBED_BATCH_SIZE"]
+            for i in range(0, len(valid), batch_size):
+                if time.time() - start_time > CONFIG["MAX_RUNTIME"]:
+                    stop_reason = "süre sınırı"
+                    break
                 
-                embedding = get_embedding(embedding_text)
-                
-                supabase.table("question_bank") \
-                    .update({"embedding": vector_to_postgres(embedding)}) \
-                    .eq("id", question["id"]) \
-                    .execute()
-                
-                processed += 1
-                progress = round((processed / len(questions)) * 100)
-                topic = question.get("topic") or "Genel"
-                print(f"✓ Soru #{question['id']} embed edildi [{progress}%] - {topic}")
-                
-                time.sleep(0.1)
-                
-            except Exception as e:
-                failed += 1
-                errors.append({"id": question["id"], "error": str(e)})
-                print(f"✗ Soru #{question['id']} HATA: {str(e)}")
+                batch = valid[i:i + batch_size]
+                try:
+                    rows = embed_batch(batch, errors)
+                    written = write_embeddings(rows, errors)
+                    processed += written
+                    failed += len(batch) - written
+                    topic = batch[-1].get("topic") or "Genel"
+                    print(f"✓ {written}/{len(batch)} soru embed edildi (#{batch[0]['id']}-#{batch[-1]['id']}) - toplam {processed} - {topic}")
+                except QuotaExhausted as e:
+                    stop_reason = "Gemini kotası"
+                    print(f"⛔ Gemini kotası doldu, kalan sorular sonraki çalıştırmaya bırakıldı: {str(e)[:100]}")
+                    break
+                except Exception as e:
+                    failed += len(batch)
+                    errors.extend({"id": q["id"], "error": str(e)} for q in batch)
+                    print(f"✗ Sorular #{batch[0]['id']}-#{batch[-1]['id']} HATA: {str(e)}")
+            
+            if len(questions) < limit:
+                break
+        
+        if stop_reason:
+            print(f"\n⏸️  Durduruldu: {stop_reason}")
         
         # 3. Kalan soru sayısını kontrol et
         remaining_response = supabase.table("question_bank") \
@@ -0,0 +1,363 @@
+"""
+Eszamanli Kaynak Indirici (RSS/Atom + HTML)
+===========================================
+Haber botunun onlarca RSS kaynagini ve HTML sayfasini sirayla indirmesi
+yerine hepsini rapor basinda paralel indirir; bolum fonksiyonlari
+sonuclari hazir olarak alir ve kendi filtrelerini uygular.
+
+- Thread havuzu (FEED_MAX_WORKERS) ile eszamanli indirme
+- Host basina eszamanli istek siniri (FEED_PER_HOST, host bazli ozel
+  sinirlar verilebilir - orn. export.arxiv.org icin 1)
+- Istek basina toplam sure siniri (FEED_TIMEOUT sn): yavas gelen govde de
+  yarida kesilir
+- Rapor geneli zaman butcesi (FEED_BUDGET sn): butce dolunca bitmemis
+  kaynaklar bos kabul edilir, rapor beklemez
+- RSS govdesi indirme thread'inde feedparser ile parse edilir
+- Kosullu GET (FeedCache): ETag/Last-Modified ve parse edilmis entry'ler
+  (HTML sayfalarinda govde) diskte saklanir; 304 donen kaynak indirilmez
+  ve parse edilmez, onceki sonuc kullanilir
+- Raporlanan linkler (ReportedSet) calistirmalar arasi saklanir; feed()
+  daha once raporlanmis entry'leri dondurmez, bolumler sadece yenileri
+  isler
+
+Kullanim:
+  fetcher = FeedFetcher(cache=FeedCache(), reported=ReportedSet())
+  fetcher.start()
+  fetcher.prefetch([url1, url2, ...])
+  fetcher.prefetch([sayfa_url], headers=BROWSER_HEADERS)
+  feed = fetcher.feed(url1)          # feedparser sonucu (hata -> bos)
+  r = fetcher.get(sayfa_url)         # status_code / text / json()
+  ...
+  fetcher.reported.add(rapordaki_linkler)
+  fetcher.reported.save()
+
+Ayarlar: FEED_CACHE_DIR (.feed_cache), FEED_REPORTED_DAYS (7)
+"""
+
+import os
+import json
+import time
+import hashlib
+import logging
+import threading
+from urllib.parse import urlparse
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
+from typing import Dict, Iterable, Optional
+
+import requests
+import feedparser
+from requests.adapters import HTTPAdapter
+from requests.compat import chardet
+
+logger = logging.getLogger(__name__)
+
+MAX_WORKERS = int(os.environ.get("FEED_MAX_WORKERS", "16"))
+PER_HOST = int(os.environ.get("FEED_PER_HOST", "2"))
+REQUEST_TIMEOUT = float(os.environ.get("FEED_TIMEOUT", "15"))
+REPORT_BUDGET = float(os.environ.get("FEED_BUDGET", "90"))
+CHUNK_SIZE = 64 * 1024
+CACHE_DIR = os.environ.get("FEED_CACHE_DIR", ".feed_cache")
+REPORTED_DAYS = int(os.environ.get("FEED_REPORTED_DAYS", "7"))
+
+# Onbellege yazilan entry alanlari (bolum filtrelerinin kullandiklari)
+ENTRY_FIELDS = ("id", "title", "link", "summary", "published", "updated")
+SUMMARY_LIMIT = 1000
+
+
+class FetchResult:
+    """requests.Response'un botun kullandigi kismi: status_code, text, json()"""
+
+    def __init__(self, url: str, status_code: int = 0, content: bytes = b"",
+                 headers: Dict[str, str] = None, encoding: str = None, error: str = None):
+        self.url = url
+        self.status_code = status_code
+        self.content = content
+        self.headers = headers or {}
+        self.encoding = encoding or "utf-8"
+        self.error = error
+        self.feed = None
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None and 200 <= self.status_code < 300
+
+    @property
+    def text(self) -> str:
+        return self.content.decode(self.encoding, errors="replace")
+
+    def json(self):
+        return json.loads(self.text)
+
+
+def empty_feed():
+    """Hata/zaman asimi durumunda donen bos feedparser sonucu"""
+    return feedparser.FeedParserDict(entries=[], feed=feedparser.FeedParserDict(), bozo=1)
+
+
+def _write_json(path: str, data):
+    """Yarim dosya kalmamasi icin gecici dosyaya yazip yer degistir"""
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp = f"{path}.{threading.get_ident()}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False)
+    os.replace(tmp, path)
+
+
+class FeedCache:
+    """Kaynak basina ETag/Last-Modified ve son basarili sonucu diskte tutar"""
+
+    def __init__(self, directory: str = None):
+        self.directory = directory or CACHE_DIR
+
+    def _path(self, url: str) -> str:
+        return os.path.join(self.directory, hashlib.sha1(url.encode()).hexdigest() + ".json")
+
+    def load(self, url: str) -> Optional[Dict]:
+        try:
+            with open(self._path(url), encoding="utf-8") as f:
+                record = json.load(f)
+            return record if record.get("url") == url else None
+        except (OSError, ValueError):
+            return None
+
+    def save(self, url: str, result: "FetchResult"):
+        etag = result.headers.get("ETag")
+        last_modified = result.headers.get("Last-Modified")
+        if not etag and not last_modified:
+            return  # sunucu kosullu GET desteklemiyor
+        record = {"url": url, "etag": etag, "last_modified": last_modified,
+                  "encoding": result.encoding, "saved_at": time.time()}
+        if result.feed is not None:
+            record["entries"] = [self._entry(e) for e in result.feed.entries]
+        else:
+            record["content"] = result.text
+        try:
+            _write_json(self._path(url), record)
+        except OSError as e:
+            logger.debug(f"Feed onbellegi yazilamadi ({url}): {e}")
+
+    @staticmethod
+    def _entry(entry) -> Dict[str, str]:
+        data = {k: entry.get(k) for k in ENTRY_FIELDS if isinstance(entry.get(k), str)}
+        if "summary" in data:
+            data["summary"] = data["summary"][:SUMMARY_LIMIT]
+        return data
+
+    @staticmethod
+    def validators(record: Dict) -> Dict[str, str]:
+        headers = {}
+        if record.get("etag"):
+            headers["If-None-Match"] = record["etag"]
+        if record.get("last_modified"):
+            headers["If-Modified-Since"] = record["last_modified"]
+        return headers
+
+    @staticmethod
+    def restore(url: str, record: Dict) -> "FetchResult":
+        """304 yanitinda onceki sonucu yeniden olustur"""
+        encoding = record.get("encoding") or "utf-8"
+        result = FetchResult(url, 200, (record.get("content") or "").encode(encoding, errors="replace"),
+                             encoding=encoding)
+        if "entries" in record:
+            result.feed = feedparser.FeedParserDict(
+                entries=[feedparser.FeedParserDict(e) for e in record["entries"]],
+                feed=feedparser.FeedParserDict(), bozo=0)
+        return result
+
+
+class ReportedSet:
+    """Onceki raporlarda gosterilmis linkler - FEED_REPORTED_DAYS gun saklanir"""
+
+    def __init__(self, path: str = None, days: int = None):
+        self.path = path or os.path.join(CACHE_DIR, "reported.json")
+        self.ttl = (days if days is not None else REPORTED_DAYS) * 86400
+        self._links: Optional[Dict[str, float]] = None
+        self._lock = threading.Lock()
+
+    def _load(self) -> Dict[str, float]:
+        with self._lock:
+            if self._links is None:
+                try:
+                    with open(self.path, encoding="utf-8") as f:
+                        links = json.load(f)
+                except (OSError, ValueError):
+                    links = {}
+                cutoff = time.time() - self.ttl
+                self._links = {link: ts for link, ts in links.items() if ts >= cutoff}
+            return self._links
+
+    def __contains__(self, link: str) -> bool:
+        return bool(link) and link in self._load()
+
+    def __len__(self):
+        return len(self._load())
+
+    def add(self, links: Iterable[str]):
+        now = time.time()
+        entries = self._load()
+        for link in links:
+            if link:
+                entries[link] = now
+
+    def save(self):
+        try:
+            _write_json(self.path, self._load())
+        except OSError as e:
+            logger.warning(f"Raporlanan linkler kaydedilemedi: {e}")
+
+
+class FeedFetcher:
+    """Host siniri, istek suresi ve rapor butcesi olan paralel indirici"""
+
+    def __init__(self, max_workers: int = None, per_host: int = None,
+                 timeout: float = None, budget: float = None,
+                 host_limits: Dict[str, int] = None, cache: FeedCache = None,
+                 reported: ReportedSet = None):
+        self.max_workers = max_workers or MAX_WORKERS
+        self.per_host = per_host or PER_HOST
+        self.timeout = timeout or REQUEST_TIMEOUT
+        self.budget = budget or REPORT_BUDGET
+        self.host_limits = host_limits or {}
+        self.cache = cache
+        self.reported = reported
+        self.stats = {"requests": 0, "errors": 0, "timeouts": 0, "bytes": 0,
+                      "not_modified": 0, "skipped_entries": 0}
+
+        self._futures = {}
+        self._hosts: Dict[str, threading.Semaphore] = {}
+        self._lock = threading.Lock()
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._deadline = 0.0
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=self.max_workers, pool_maxsize=self.max_workers)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+    # ------------------------------------------------------------------
+    # Public API
+    # ------------------------------------------------------------------
+
+    def start(self, budget: float = None):
+        """Yeni rapor: butce sayacini baslat, onceki sonuclari unut"""
+        self.close()
+        self.budget = budget or self.budget
+        self._deadline = time.monotonic() + self.budget
+        with self._lock:
+            self._futures = {}
+            self._executor = ThreadPoolExecutor(max_workers=self.max_workers,
+                                                thread_name_prefix="feed")
+
+    def prefetch(self, urls: Iterable[str], headers: Dict[str, str] = None, parse: bool = True):
+        """URL'leri arka planda indirmeye basla (beklemeden doner)"""
+        for url in urls:
+            self._submit(url, headers, parse)
+
+    def feed(self, url: str):
+        """URL'nin feedparser sonucu (daha once raporlananlar haric); indirilemediyse bos feed"""
+        result = self._result(url, None, True)
+        if result.feed is None:
+            return empty_feed()
+        if not self.reported:
+            return result.feed
+        fresh = [e for e in result.feed.entries if e.get("link") not in self.reported]
+        self.stats["skipped_entries"] += len(result.feed.entries) - len(fresh)
+        feed = feedparser.FeedParserDict(result.feed)
+        feed["entries"] = fresh
+        return feed
+
+    def get(self, url: str, headers: Dict[str, str] = None) -> FetchResult:
+        """Ham HTTP sonucu (HTML sayfalari, JSON API'ler)"""
+        return self._result(url, headers, False)
+
+    def remaining(self) -> float:
+        return max(0.0, self._deadline - time.monotonic())
+
+    def close(self):
+        """Bekleyen indirmeleri iptal et, havuzu kapat"""
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    # ------------------------------------------------------------------
+    # Internal
+    # ------------------------------------------------------------------
+
+    def _submit(self, url: str, headers: Optional[Dict[str, str]], parse: bool):
+        with self._lock:
+            future = self._futures.get(url)
+            if future is None:
+                if self._executor is None:
+                    self._deadline = time.monotonic() + self.budget
+                    self._executor = ThreadPoolExecutor(max_workers=self.max_workers,
+                                                        thread_name_prefix="feed")
+                future = self._executor.submit(self._fetch, url, headers, parse)
+                self._futures[url] = future
+            return future
+
+    def _result(self, url: str, headers: Optional[Dict[str, str]], parse: bool) -> FetchResult:
+        future = self._submit(url, headers, parse)
+        try:
+            return future.result(timeout=self.remaining())
+        except FutureTimeout:
+            self.stats["timeouts"] += 1
+            logger.warning(f"Rapor butcesi doldu, kaynak atlandi: {url}")
+            return FetchResult(url, error="butce doldu")
+        except Exception as e:
+            return FetchResult(url, error=str(e))
+
+    def _host_slot(self, host: str) -> threading.Semaphore:
+        with self._lock:
+            slot = self._hosts.get(host)
+            if slot is None:
+                slot = threading.Semaphore(self.host_limits.get(host, self.per_host))
+                self._hosts[host] = slot
+            return slot
+
+    def _fetch(self, url: str, headers: Optional[Dict[str, str]], parse: bool) -> FetchResult:
+        slot = self._host_slot(urlparse(url).netloc)
+        if not slot.acquire(timeout=self.remaining()):
+            self.stats["timeouts"] += 1
+            return FetchResult(url, error="host sirasi zaman asimi")
+        record = self.cache.load(url) if self.cache else None
+        if record is not None and ("entries" in record) != parse:
+            record = None
+        request_headers = dict(headers or {"User-Agent": feedparser.USER_AGENT})
+        if record:
+            request_headers.update(FeedCache.validators(record))
+        try:
+            result = self._download(url, request_headers)
+        finally:
+            slot.release()
+
+        if record and result.status_code == 304:
+            self.stats["not_modified"] += 1
+            return FeedCache.restore(url, record)
+        if parse and result.ok:
+            result.feed = feedparser.parse(result.content, response_headers={
+                "content-type": result.headers.get("Content-Type", ""),
+                "content-location": url,
+            })
+        if self.cache and result.ok:
+            self.cache.save(url, result)
+        return result
+
+    def _download(self, url: str, headers: Dict[str, str]) -> FetchResult:
+        deadline = min(time.monotonic() + self.timeout, self._deadline)
+        self.stats["requests"] += 1
+        try:
+            wait = max(0.1, deadline - time.monotonic())
+            with self.session.get(url, headers=headers, timeout=wait, stream=True) as r:
+                chunks = []
+                for chunk in r.iter_content(CHUNK_SIZE):
+                    chunks.append(chunk)
+                    if time.monotonic() > deadline:
+                        raise TimeoutError(f"{self.timeout:.0f} sn icinde indirilemedi")
+                content = b"".join(chunks)
+                self.stats["bytes"] += len(content)
+                encoding = r.encoding or chardet.detect(content)["encoding"]
+                return FetchResult(url, r.status_code, content, r.headers, encoding)
+        except Exception as e:
+            self.stats["errors"] += 1
+            logger.debug(f"Kaynak indirilemedi ({url}): {e}")
+            return FetchResult(url, error=str(e))
@@ -24,11 +24,13 @@ import base64
 import random
 import logging
 import argparse
-import requests
 from datetime import datetime
 from typing import Optional, Dict, Any, List, Tuple
 from dataclasses import dataclass, asdict, field
 
+import rate_limiter
+from http_session import get_session
+
 # Google GenAI SDK
 try:
     from google import genai
@@ -861,13 +863,9 @@ class GeminiAPI:
             self.client = genai.Client(api_key=api_key)
         else:
             self.client = None
-        self.last_request_time = 0
 
-    def _rate_limit(self):
-        elapsed = time.time() - self.last_request_time
-        if elapsed < Config.RATE_LIMIT_DELAY:
-            time.sleep(Config.RATE_LIMIT_DELAY - elapsed)
-        self.last_request_time = time.time()
+    def _rate_limit(self, kind: str = "text"):
+        rate_limiter.acquire(kind, self.api_key)
 
     def generate_question(self, params: QuestionParams) -> Optional[Dict]:
         """Soru üret"""
@@ -1032,7 +1030,7 @@ ETİKETLER (görsele eklenebilir): {verilen_degerler}"""
             prompt = IMAGE_PROMPT_3D_SCENARIO.format(tip=tip, detay=detay_zengin)
             logger.info(f"  Görsel tipi: 3D SENARYO ({tip}) - Nesneler: {senaryo_nesneleri}")
 
-        self._rate_limit()
+        self._rate_limit("image")
 
         for attempt in range(Config.MAX_RETRIES):
             try:
@@ -1073,12 +1071,13 @@ class SupabaseClient:
             "Content-Type": "application/json",
             "Prefer": "return=representation"
         }
+        self.session = get_session()
 
     def upload_image(self, image_bytes: bytes, filename: str) -> Optional[str]:
         """Görsel yükle"""
         try:
             upload_url = f"{self.url}/storage/v1/object/{Config.STORAGE_BUCKET}/{filename}"
-            response = requests.post(
+            response = self.session.post(
                 upload_url,
                 headers={
                     "apikey": self.key,
@@ -1133,7 +1132,7 @@ class SupabaseClient:
                 "exam_type": "FIZIK10_SABIT_IVMELI_BOT"
             }
 
-            response = requests.post(
+            response = self.session.post(
                 f"{self.url}/rest/v1/question_bank",
                 headers=self.headers,
                 json=data,
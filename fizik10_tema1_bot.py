@@ -26,11 +26,17 @@ import base64
 import random
 import logging
 import argparse
-import requests
-from datetime import datetime
-from typing import Optional, Dict, Any, List, Tuple
+import threading
+from datetime import datetime, timedelta, timezone
+from typing import Optional, Dict, Any, List, Tuple, Union
 from dataclasses import dataclass, asdict, field
 
+import rate_limiter
+from image_pipeline import ImageWorkerPool
+from bulk_writer import BulkInsertBuffer, PendingInsert, on_resolved, resolve_id
+from http_session import get_session
+from vector_index import NearDuplicateIndex
+
 # Google GenAI SDK
 try:
     from google import genai
@@ -76,6 +82,13 @@ class Config:
     RETRY_DELAY = 5
     REQUEST_TIMEOUT = 90
     RATE_LIMIT_DELAY = 3
+    IMAGE_WORKERS = int(os.environ.get("FIZIK10_IMAGE_WORKERS", "2"))
+    BULK_INSERT_SIZE = int(os.environ.get("FIZIK10_BULK_INSERT_SIZE", "10"))
+    BULK_INSERT_WAIT = float(os.environ.get("FIZIK10_BULK_INSERT_WAIT", "5"))
+    # Görseli bekleyen (is_active=false) satır bu kadar dakika sonra hâlâ görselsizse
+    # görsel işi kaybolmuş sayılır ve açılışta yayınlanır; daha eski satırlara dokunulmaz
+    STALE_INACTIVE_MINUTES = int(os.environ.get("FIZIK10_STALE_INACTIVE_MINUTES", "60"))
+    STALE_INACTIVE_MAX_HOURS = int(os.environ.get("FIZIK10_STALE_INACTIVE_MAX_HOURS", "168"))
     DEFAULT_GRADE_LEVEL = 10
     DEFAULT_SUBJECT = "Fizik"
     DEFAULT_TOPIC_GROUP = "10. Sınıf Fizik"
@@ -1691,28 +1704,11 @@ class GeminiAPI:
         else:
             self.client = None
         self.text_url = f"{GEMINI_TEXT_URL}?key={api_key}"
-        self.request_count = 0
-        self.last_request_time = 0
-
-    def _rate_limit(self):
-        """API rate limiting"""
-        current_time = time.time()
-        if current_time - self.last_request_time > 60:
-            self.request_count = 0
-            self.last_request_time = current_time
-
-        if self.request_count >= 4:
-            wait_time = 65 - (current_time - self.last_request_time)
-            if wait_time > 0:
-                logger.info(f"Rate limit - {wait_time:.0f}s bekleniyor...")
-                time.sleep(wait_time)
-                self.request_count = 0
-                self.last_request_time = time.time()
+        self.session = get_session()
 
-        if self.request_count > 0:
-            time.sleep(3)
-
-        self.request_count += 1
+    def _rate_limit(self, kind: str = "text"):
+        """API rate limiting - paylaşılan token-bucket (rate_limiter.py)"""
+        rate_limiter.acquire(kind, self.api_key)
 
     def generate_question(self, params: QuestionParams) -> Dict[str, Any]:
         """Tek soru üret"""
@@ -1840,7 +1836,7 @@ III. Ciritin düşey hız bileşeni hareket boyunca değişir."
                         }
                     }
 
-                    response = requests.post(
+                    response = self.session.post(
                         self.text_url,
                         headers={"Content-Type": "application/json"},
                         json=payload,
@@ -1951,7 +1947,7 @@ III. Ciritin düşey hız bileşeni hareket boyunca değişir."
             prompt = IMAGE_PROMPT_TEMPLATE_3D.format(tip=tip, detay=full_detay)
             logger.info(f"  Görsel tipi: 3D GERÇEKÇİ ({tip})")
 
-        self._rate_limit()
+        self._rate_limit("image")
 
         for attempt in range(Config.MAX_RETRIES):
             try:
@@ -1999,6 +1995,9 @@ class SupabaseClient:
             "Prefer": "return=representation"
         }
         self._curriculum_cache = None
+        self.writer = None
+        self.dedup: Optional[NearDuplicateIndex] = None
+        self.session = get_session()
 
     def get_curriculum_for_grade(self, grade_level: int = 10, lesson_name: str = "Fizik") -> List[Dict]:
         """Müfredattan kazanımları çek"""
@@ -2008,7 +2007,7 @@ class SupabaseClient:
         query_url = f"{self.url}/rest/v1/curriculum?grade_level=eq.{grade_level}&lesson_name=eq.{lesson_name}&select=id,topic_code,topic_name,sub_topic,learning_outcome_code,learning_outcome_description,bloom_level"
 
         try:
-            response = requests.get(query_url, headers=self.headers, timeout=30)
+            response = self.session.get(query_url, headers=self.headers, timeout=30)
             response.raise_for_status()
             self._curriculum_cache = response.json()
             logger.info(f"  Curriculum'dan {len(self._curriculum_cache)} kazanım yüklendi")
@@ -2028,7 +2027,7 @@ class SupabaseClient:
             else:
                 image_bytes = image_data
 
-            response = requests.post(
+            response = self.session.post(
                 upload_url,
                 headers={
                     "apikey": self.key,
@@ -2048,7 +2047,7 @@ class SupabaseClient:
             logger.error(f"  Storage upload hatası: {e}")
             return None
 
-    def insert_question(self, question: 'GeneratedQuestion', kazanim_id: int = None) -> Optional[int]:
+    def insert_question(self, question: 'GeneratedQuestion', kazanim_id: int = None) -> Optional[Union[int, PendingInsert]]:
         """Soruyu veritabanına kaydet"""
         insert_url = f"{self.url}/rest/v1/question_bank"
 
@@ -2085,8 +2084,25 @@ class SupabaseClient:
             "exam_type": "FIZIK10_TEMA1_BOT"
         }
 
+        # Yerel vektör indeksinde çok benzer soru varsa kaydetme
+        confirm = None
+        if self.dedup:
+            match, confirm = self.dedup.check_and_reserve(data)
+            if match:
+                logger.warning(f"  Benzer soru zaten var (ID {match[0]}, benzerlik {match[1]:.3f}), kaydedilmedi")
+                return None
+
+        # Toplu yazma aktifse satır tampona eklenir, id flush sonrası gelir
+        question_id = self.writer.add(data) if self.writer else self._post_question(insert_url, data)
+        # Vektör indekse ancak kayıt kesinleşince girer; başarısız kayıt rezervasyonu siler
+        if confirm:
+            on_resolved(question_id, confirm)
+        return question_id
+
+    def _post_question(self, insert_url: str, data: Dict[str, Any]) -> Optional[int]:
+        """Satırı doğrudan kaydet (toplu yazma kapalıyken)"""
         try:
-            response = requests.post(insert_url, headers=self.headers, json=data, timeout=30)
+            response = self.session.post(insert_url, headers=self.headers, json=data, timeout=30)
             response.raise_for_status()
 
             result = response.json()
@@ -2101,6 +2117,67 @@ class SupabaseClient:
             logger.error(f"  Supabase insert hatası: {e}")
             return None
 
+    def update_question(self, question_id: int, fields: Dict[str, Any]) -> bool:
+        """Kaydedilmiş soruyu güncelle (arka plan görsel ekleme için)"""
+        update_url = f"{self.url}/rest/v1/question_bank?id=eq.{question_id}"
+
+        try:
+            response = self.session.patch(update_url, headers=self.headers, json=fields, timeout=30)
+            response.raise_for_status()
+            return True
+        except Exception as e:
+            logger.error(f"  Supabase update hatası (ID {question_id}): {e}")
+            return False
+
+    def activate_stale_questions(self) -> int:
+        """Görsel işi yarım kalmış (süreç öldü, update başarısız) eski satırları görselsiz yayınla"""
+        now = datetime.now(timezone.utc)
+        newer_than = (now - timedelta(hours=Config.STALE_INACTIVE_MAX_HOURS)).strftime("%Y-%m-%dT%H:%M:%SZ")
+        older_than = (now - timedelta(minutes=Config.STALE_INACTIVE_MINUTES)).strftime("%Y-%m-%dT%H:%M:%SZ")
+        params = {
+            "exam_type": "eq.FIZIK10_TEMA1_BOT",
+            "is_active": "eq.false",
+            "image_url": "is.null",
+            "and": f"(created_at.gt.{newer_than},created_at.lt.{older_than})",
+            "select": "id"
+        }
+        try:
+            response = self.session.patch(f"{self.url}/rest/v1/question_bank", params=params,
+                                          headers=self.headers, json={"is_active": True}, timeout=30)
+            response.raise_for_status()
+            activated = len(response.json())
+        except Exception as e:
+            logger.error(f"  Bekleyen görselsiz sorular yayınlanamadı: {e}")
+            return 0
+        if activated:
+            logger.warning(f"  Görsel işi yarım kalmış {activated} soru görselsiz yayınlandı")
+        return activated
+
+    def _insert_rows(self, rows: List[Dict]) -> List[Dict]:
+        """Çok satırlı insert - PostgREST satırları gönderim sırasıyla döndürür"""
+        response = self.session.post(f"{self.url}/rest/v1/question_bank", headers=self.headers, json=rows, timeout=60)
+        response.raise_for_status()
+        return response.json()
+
+    def start_bulk_insert(self):
+        """question_bank insert'lerini toplu yazma tamponuna yönlendir"""
+        if self.writer is None:
+            self.writer = BulkInsertBuffer(
+                "question_bank", self._insert_rows,
+                max_rows=Config.BULK_INSERT_SIZE, max_wait=Config.BULK_INSERT_WAIT
+            )
+            # Journal'dan gelen satırın görsel işi bu çalıştırmada yok: görselsiz yayınlanır
+            self.writer.replay_journal(prepare=lambda row: dict(row, is_active=True))
+            self.activate_stale_questions()
+
+    def finish_bulk_insert(self):
+        """Tampondaki satırları gönder ve tamponu kapat"""
+        if self.writer is None:
+            return
+        writer_stats = self.writer.close()
+        self.writer = None
+        logger.info(f"  Toplu kayıt: {writer_stats['inserted']}/{writer_stats['rows']} satır, {writer_stats['requests']} istek")
+
 
 # ============================================================================
 # QUALITY VALIDATOR
@@ -2169,6 +2246,7 @@ Hedeflenmesi gereken kavram yanılgıları:
 JSON formatında döndür:
 {{"is_physically_correct": true/false, "is_mathematically_correct": true/false, "bloom_match": true/false, "distractors_quality": 1-10, "in_scope": true/false, "overall_score": 1-10, "pass": true/false, "problems": ["problem1", "problem2"]}}"""
 
+            rate_limiter.acquire("text", self.api_key)
             response = self.client.models.generate_content(
                 model=GEMINI_TEXT_MODEL,
                 contents=prompt,
@@ -2194,6 +2272,7 @@ JSON formatında döndür:
             expected_elements = gorsel_betimleme.get("ogeler", []) if gorsel_betimleme else []
             expected_colors = gorsel_betimleme.get("renkler", {}) if gorsel_betimleme else {}
 
+            rate_limiter.acquire("vision", self.api_key)
             response = self.client.models.generate_content(
                 model=GEMINI_TEXT_MODEL,
                 contents=[
@@ -2279,6 +2358,11 @@ class Fizik10Tema1Generator:
             self.supabase = None
         else:
             self.supabase = SupabaseClient(SUPABASE_URL, SUPABASE_KEY)
+            self.supabase.dedup = NearDuplicateIndex(
+                SUPABASE_URL, SUPABASE_KEY, GEMINI_API_KEY,
+                filters={"subject": "eq.Fizik", "grade_level": "eq.10"},
+                name="fizik10_tema1"
+            )
 
         self.gemini = GeminiAPI(GEMINI_API_KEY)
         self.validator = QualityValidator(GEMINI_API_KEY)
@@ -2293,6 +2377,9 @@ class Fizik10Tema1Generator:
             "by_difficulty": {1: 0, 2: 0, 3: 0, 4: 0, 5: 0, 6: 0},
             "by_bloom": {}
         }
+        self._stats_lock = threading.Lock()
+        self.image_pool = None
+        self.image_workers = Config.IMAGE_WORKERS
 
     def _get_bloom_distribution(self, count: int) -> Dict[str, int]:
         """30 soru için Bloom dağılımını hesapla"""
@@ -2344,7 +2431,7 @@ class Fizik10Tema1Generator:
             soru_tipi=soru_tipi
         )
 
-    def generate_single_question(self, params: QuestionParams) -> Optional[int]:
+    def generate_single_question(self, params: QuestionParams) -> Optional[Union[int, PendingInsert]]:
         """Tek soru üret ve veritabanına kaydet"""
         self.stats["total_attempts"] += 1
         konu_data = TEMA1_MUFREDAT.get(params.konu, {})
@@ -2358,7 +2445,6 @@ class Fizik10Tema1Generator:
         logger.info(f"{'='*70}")
 
         max_question_retries = 3
-        max_image_retries = 3
 
         try:
             # ADIM 1: SORU ÜRETİMİ
@@ -2433,7 +2519,6 @@ class Fizik10Tema1Generator:
 
             # ADIM 2: GÖRSEL ÜRETİMİ
             image_url = None
-            image_bytes = None
             gorsel_betimleme = question_data.get("gorsel_betimleme", {})
 
             gorsel_uret = False
@@ -2453,30 +2538,16 @@ class Fizik10Tema1Generator:
                         "renkler": {"ana": "mavi", "vurgu": "kırmızı", "arka_plan": "beyaz"}
                     }
 
+            deferred_image = None
             if gorsel_uret and gorsel_betimleme:
-                logger.info(f"\n[2/5] Görsel üretiliyor (soruya özgü)...")
                 soru_metni_for_image = question_data.get("soru_metni", "")
-
-                for img_attempt in range(max_image_retries):
-                    image_bytes = self.gemini.generate_image(gorsel_betimleme, params.konu, soru_metni_for_image)
-
-                    if image_bytes:
-                        logger.info("  Görsel kalite kontrolü yapılıyor...")
-                        img_validation = self.validator.validate_image(image_bytes, gorsel_betimleme)
-
-                        if img_validation.get("pass", False):
-                            logger.info("  ✓ Görsel kalite kontrolünü geçti")
-                            break
-                        else:
-                            self.stats["images_rejected"] += 1
-                            logger.warning(f"  Görsel reddedildi: {img_validation.get('problems', [])}")
-                            image_bytes = None
-
-                if image_bytes and self.supabase:
-                    filename = f"fizik10_tema1_{uuid.uuid4().hex[:12]}.png"
-                    image_url = self.supabase.upload_image(image_bytes, filename)
-                    if image_url:
-                        self.stats["with_image"] += 1
+                if self.image_pool:
+                    # Soru hemen kaydedilir, görsel arka planda üretilip satıra eklenir
+                    logger.info(f"\n[2/5] Görsel arka plan kuyruğuna bırakılıyor...")
+                    deferred_image = (gorsel_betimleme, soru_metni_for_image)
+                else:
+                    logger.info(f"\n[2/5] Görsel üretiliyor (soruya özgü)...")
+                    image_url = self._produce_image(gorsel_betimleme, params.konu, soru_metni_for_image)
             else:
                 logger.info("\n[2/5] Görsel gerekli değil, atlanıyor...")
 
@@ -2504,7 +2575,9 @@ class Fizik10Tema1Generator:
                 pisa_context=question_data.get("pisa_baglam", "Bilimsel"),
                 scenario_text=soru_metni,
                 distractor_explanations=question_data.get("celdirici_analizi", {}),
-                image_url=image_url
+                image_url=image_url,
+                # Görseli bekleyen soru, görsel eklenene kadar yayınlanmaz
+                is_active=deferred_image is None
             )
 
             # ADIM 4: ÖZET
@@ -2517,16 +2590,22 @@ class Fizik10Tema1Generator:
                 logger.info("\n[5/5] Veritabanına kaydediliyor...")
                 question_id = self.supabase.insert_question(generated)
 
-                if question_id:
-                    self.stats["successful"] += 1
-                    self.stats["by_difficulty"][params.zorluk] += 1
-                    self.stats["by_bloom"][params.bloom_seviyesi] = self.stats["by_bloom"].get(params.bloom_seviyesi, 0) + 1
-                    logger.info(f"\n✓ BAŞARILI! Soru ID: {question_id}")
-                    return question_id
-                else:
+                if question_id is None:
                     self.stats["failed"] += 1
                     logger.error("\nVeritabanı kaydı başarısız")
                     return None
+
+                # Toplu yazmada id flush sonrası gelir; başarı sayaçları kayıt kesinleşince artar
+                on_resolved(question_id, lambda saved_id: self._count_saved(saved_id, params))
+                if deferred_image:
+                    self.image_pool.submit({
+                        "question_id": question_id,
+                        "gorsel_betimleme": deferred_image[0],
+                        "soru_metni": deferred_image[1],
+                        "konu": params.konu
+                    })
+                logger.info(f"\n✓ BAŞARILI! Soru kayda alındı (ID: {question_id})")
+                return question_id
             else:
                 # Supabase yoksa JSON olarak döndür
                 self.stats["successful"] += 1
@@ -2542,6 +2621,92 @@ class Fizik10Tema1Generator:
             logger.debug(traceback.format_exc())
             return None
 
+    def _count_saved(self, saved_id: Optional[int], params: QuestionParams):
+        """Kayıt sonucu kesinleşince istatistikleri güncelle (flush thread'inde çalışır)"""
+        with self._stats_lock:
+            if saved_id is None:
+                self.stats["failed"] += 1
+                logger.error("  Veritabanı kaydı başarısız (journal'a alındı)")
+                return
+            self.stats["successful"] += 1
+            self.stats["by_difficulty"][params.zorluk] += 1
+            self.stats["by_bloom"][params.bloom_seviyesi] = self.stats["by_bloom"].get(params.bloom_seviyesi, 0) + 1
+
+    def _produce_image(self, gorsel_betimleme: Dict, konu: str, soru_metni: str, max_image_retries: int = 3) -> Optional[str]:
+        """Görsel üret, kalite kontrolünden geçir ve Storage'a yükle"""
+        image_bytes = None
+        for img_attempt in range(max_image_retries):
+            image_bytes = self.gemini.generate_image(gorsel_betimleme, konu, soru_metni)
+
+            if image_bytes:
+                logger.info("  Görsel kalite kontrolü yapılıyor...")
+                img_validation = self.validator.validate_image(image_bytes, gorsel_betimleme)
+
+                if img_validation.get("pass", False):
+                    logger.info("  ✓ Görsel kalite kontrolünü geçti")
+                    break
+                else:
+                    with self._stats_lock:
+                        self.stats["images_rejected"] += 1
+                    logger.warning(f"  Görsel reddedildi: {img_validation.get('problems', [])}")
+                    image_bytes = None
+
+        if not image_bytes or not self.supabase:
+            return None
+
+        filename = f"fizik10_tema1_{uuid.uuid4().hex[:12]}.png"
+        image_url = self.supabase.upload_image(image_bytes, filename)
+        if image_url:
+            with self._stats_lock:
+                self.stats["with_image"] += 1
+        return image_url
+
+    def _fill_image(self, job: Dict) -> bool:
+        """Görsel worker'ı: kaydedilmiş sorunun görselini üret ve satırı güncelle"""
+        question_id = resolve_id(job["question_id"])
+        if question_id is None:
+            logger.error("  [Görsel] Soru kaydedilemediği için görsel atlandı")
+            return False
+        logger.info(f"  [Görsel] Soru {question_id} için görsel üretiliyor...")
+        try:
+            image_url = self._produce_image(job["gorsel_betimleme"], job["konu"], job["soru_metni"])
+        except Exception as e:
+            logger.error(f"  [Görsel] Soru {question_id} görsel hatası: {e}")
+            image_url = None
+
+        # Görsel üretilemese de soru (eski davranışta olduğu gibi) görselsiz yayınlanır;
+        # update de başarısız olursa satırı sonraki açılışta activate_stale_questions yayınlar
+        fields = {"is_active": True}
+        if image_url:
+            fields["image_url"] = image_url
+        updated = self.supabase.update_question(question_id, fields)
+        if updated and image_url:
+            logger.info(f"  [Görsel] Soru {question_id} görseli eklendi")
+        return updated and bool(image_url)
+
+    def _resolve_ids(self, ids: List) -> List[int]:
+        """Toplu kayıt sonrası bekleyen id'leri gerçek id'lere çevir"""
+        resolved = [resolve_id(i) for i in ids]
+        lost = resolved.count(None)
+        if lost:
+            logger.warning(f"  {lost} soru veritabanına yazılamadı (journal'a alındı)")
+        return [i for i in resolved if i is not None]
+
+    def start_image_pool(self, workers: int = None):
+        """Arka plan görsel worker havuzunu başlat (0 = görseller satır içi üretilir)"""
+        workers = self.image_workers if workers is None else workers
+        # Veritabanı yoksa satır güncellenemez, görseller satır içi üretilir
+        if workers > 0 and self.supabase and self.image_pool is None:
+            self.image_pool = ImageWorkerPool(self._fill_image, workers=workers, name="fizik10-image")
+
+    def finish_image_pool(self):
+        """Kuyruktaki görsel işleri bitene kadar bekle"""
+        if self.image_pool is None:
+            return
+        pool_stats = self.image_pool.close()
+        self.image_pool = None
+        logger.info(f"  Görsel kuyruğu tamamlandı: {pool_stats['completed']}/{pool_stats['submitted']} görsel eklendi")
+
     def generate_batch(self, count: int = 30, konu: Optional[str] = None) -> Dict[str, Any]:
         """Toplu soru üret (Bloom dağılımına göre)"""
 
@@ -2559,21 +2724,30 @@ class Fizik10Tema1Generator:
 
         results = {"generated_ids": [], "failed_topics": [], "stats": {}}
 
-        for bloom_seviyesi, soru_sayisi in distribution.items():
-            logger.info(f"\n[{bloom_seviyesi.upper()}] - {soru_sayisi} soru üretiliyor...")
+        if self.supabase:
+            self.supabase.start_bulk_insert()
+        self.start_image_pool()
+        try:
+            for bloom_seviyesi, soru_sayisi in distribution.items():
+                logger.info(f"\n[{bloom_seviyesi.upper()}] - {soru_sayisi} soru üretiliyor...")
 
-            for i in range(soru_sayisi):
-                params = self._select_random_params(bloom_seviyesi, konu)
-                logger.info(f"  Soru {i+1}/{soru_sayisi}: {params.alt_konu} - {params.soru_tipi}")
+                for i in range(soru_sayisi):
+                    params = self._select_random_params(bloom_seviyesi, konu)
+                    logger.info(f"  Soru {i+1}/{soru_sayisi}: {params.alt_konu} - {params.soru_tipi}")
 
-                question_id = self.generate_single_question(params)
-                if question_id:
-                    results["generated_ids"].append(question_id)
-                else:
-                    results["failed_topics"].append(f"{params.konu}_{bloom_seviyesi}_{i+1}")
+                    question_id = self.generate_single_question(params)
+                    if question_id:
+                        results["generated_ids"].append(question_id)
+                    else:
+                        results["failed_topics"].append(f"{params.konu}_{bloom_seviyesi}_{i+1}")
 
-                time.sleep(Config.RATE_LIMIT_DELAY)
+                    time.sleep(Config.RATE_LIMIT_DELAY)
+        finally:
+            self.finish_image_pool()
+            if self.supabase:
+                self.supabase.finish_bulk_insert()
 
+        results["generated_ids"] = self._resolve_ids(results["generated_ids"])
         results["stats"] = self.stats
         return results
 
@@ -2647,6 +2821,8 @@ Bloom Seviyeleri:
                         help="Zorluk seviyesi 1-6 (single modu için)")
     parser.add_argument("--output", "-o", type=str, default=None,
                         help="Çıktı dosya adı")
+    parser.add_argument("--image-workers", type=int, default=Config.IMAGE_WORKERS,
+                        help="Arka plan görsel worker sayısı (0 = görsel soruyla birlikte üretilir)")
 
     args = parser.parse_args()
 
@@ -2670,6 +2846,7 @@ Bloom Seviyeleri:
 
     try:
         generator = Fizik10Tema1Generator()
+        generator.image_workers = args.image_workers
 
         if args.mode == "batch":
             logger.info(f"Batch modu - {args.count} soru üretilecek")
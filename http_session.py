@@ -0,0 +1,98 @@
+"""
+Ortak HTTP Oturumu (Connection Pooling)
+=======================================
+Botlarin REST cagrilari (Supabase REST/Storage, Gemini REST fallback)
+her istekte yeni TCP+TLS baglantisi acmak yerine ayni keep-alive
+baglanti havuzunu kullanir.
+
+- Process basina tek requests.Session (thread'ler arasi paylasilir)
+- Host basina en fazla HTTP_POOL_SIZE acik baglanti
+- Baglanti kurulamayan istekler tum metodlarda tekrar denenir
+  (istek sunucuya hic ulasmadigi icin cift kayit riski yoktur)
+- 429/5xx yanitlari sadece idempotent metodlarda (GET, PATCH, PUT,
+  DELETE, HEAD) ustel bekleme ile tekrar denenir; POST insert'ler
+  cift kayit olusmasin diye yanit durumuna gore tekrar edilmez
+- Kendi rate limiter'i olan istemciler get_session(retry_429=False) ile
+  429'u tekrar denemeyen ayri bir oturum alir; bekleme limiter'a kalir
+
+Kullanim:
+  from http_session import get_session
+  response = get_session().post(url, json=data, timeout=30)
+
+Ayarlar ortam degiskenleriyle degistirilebilir:
+  HTTP_POOL_SIZE=10 HTTP_MAX_RETRIES=3 HTTP_BACKOFF=0.5
+"""
+
+import os
+import logging
+import threading
+from typing import Dict
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+logger = logging.getLogger(__name__)
+
+POOL_SIZE = int(os.environ.get("HTTP_POOL_SIZE", "10"))
+MAX_RETRIES = int(os.environ.get("HTTP_MAX_RETRIES", "3"))
+BACKOFF_FACTOR = float(os.environ.get("HTTP_BACKOFF", "0.5"))
+
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+SERVER_ERROR_STATUSES = tuple(s for s in RETRY_STATUSES if s != 429)
+IDEMPOTENT_METHODS = frozenset(["GET", "HEAD", "OPTIONS", "PUT", "PATCH", "DELETE"])
+
+_sessions: Dict[bool, requests.Session] = {}
+_session_lock = threading.Lock()
+
+
+def _build_retry(retry_429: bool = True) -> Retry:
+    return Retry(
+        total=MAX_RETRIES,
+        connect=MAX_RETRIES,
+        read=MAX_RETRIES,
+        status=MAX_RETRIES,
+        backoff_factor=BACKOFF_FACTOR,
+        status_forcelist=RETRY_STATUSES if retry_429 else SERVER_ERROR_STATUSES,
+        allowed_methods=IDEMPOTENT_METHODS,
+        respect_retry_after_header=True,
+        raise_on_status=False
+    )
+
+
+def create_session(pool_size: int = None, retry_429: bool = True) -> requests.Session:
+    """Keep-alive havuzlu ve retry adapter'li yeni bir Session olustur"""
+    pool_size = pool_size or POOL_SIZE
+    session = requests.Session()
+    adapter = HTTPAdapter(
+        pool_connections=pool_size,
+        pool_maxsize=pool_size,
+        max_retries=_build_retry(retry_429)
+    )
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+def get_session(retry_429: bool = True) -> requests.Session:
+    """Process genelinde paylasilan Session'i getir, yoksa olustur
+
+    retry_429=False: 429 yaniti tekrar denenmeden cagirana doner (kendi
+    token-bucket'ini cezalandiran istemciler icin)
+    """
+    session = _sessions.get(retry_429)
+    if session is None:
+        with _session_lock:
+            session = _sessions.get(retry_429)
+            if session is None:
+                session = _sessions[retry_429] = create_session(retry_429=retry_429)
+                logger.debug(f"HTTP oturumu olusturuldu (havuz: {POOL_SIZE}, 429 retry: {retry_429})")
+    return session
+
+
+def close_session():
+    """Paylasilan Session'lari kapat (acik baglantilari birak)"""
+    with _session_lock:
+        for session in _sessions.values():
+            session.close()
+        _sessions.clear()
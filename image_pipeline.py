@@ -0,0 +1,78 @@
+"""
+Arka Plan Gorsel Uretim Havuzu
+==============================
+Soru metni uretimi ile gorsel uretimini birbirinden ayiran basit
+producer/consumer kuyrugu.
+
+- Uretici (soru botu) kabul edilen soruyu image_url=None ile hemen kaydeder
+  ve gorsel isini kuyruga birakir
+- Worker thread'ler gorseli uretir, dogrular, yukler ve satiri gunceller
+- Boylece text modeli yavas gorsel uretim/dogrulama dongusunu beklemez
+
+Kullanim:
+  pool = ImageWorkerPool(handler=generator._fill_image, workers=2)
+  pool.submit(job)
+  ...
+  pool.close()   # kuyruk bosalana kadar bekler
+"""
+
+import queue
+import logging
+import threading
+from typing import Any, Callable, Dict, List
+
+logger = logging.getLogger(__name__)
+
+_STOP = object()
+
+
+class ImageWorkerPool:
+    """Kuyruktaki gorsel islerini handler ile isleyen thread havuzu"""
+
+    def __init__(self, handler: Callable[[Any], bool], workers: int = 2, name: str = "image"):
+        self.handler = handler
+        self.name = name
+        self.queue: "queue.Queue[Any]" = queue.Queue()
+        self.stats = {"submitted": 0, "completed": 0, "failed": 0}
+        self._stats_lock = threading.Lock()
+        self._threads: List[threading.Thread] = []
+        for i in range(max(1, workers)):
+            t = threading.Thread(target=self._worker, name=f"{name}-worker-{i + 1}", daemon=True)
+            t.start()
+            self._threads.append(t)
+
+    def _count(self, key: str):
+        with self._stats_lock:
+            self.stats[key] += 1
+
+    def _worker(self):
+        while True:
+            job = self.queue.get()
+            try:
+                if job is _STOP:
+                    return
+                ok = self.handler(job)
+                self._count("completed" if ok else "failed")
+            except Exception as e:
+                logger.error(f"  Gorsel worker hatasi ({self.name}): {e}")
+                self._count("failed")
+            finally:
+                self.queue.task_done()
+
+    def submit(self, job: Any):
+        """Gorsel isini kuyruga ekle"""
+        self._count("submitted")
+        self.queue.put(job)
+
+    def pending(self) -> int:
+        return self.queue.qsize()
+
+    def close(self) -> Dict[str, int]:
+        """Kuyruktaki tum isler bitene kadar bekle ve worker'lari durdur"""
+        if self.pending():
+            logger.info(f"  {self.pending()} gorsel isi kuyrukta, tamamlanmasi bekleniyor...")
+        for _ in self._threads:
+            self.queue.put(_STOP)
+        for t in self._threads:
+            t.join()
+        return dict(self.stats)
@@ -0,0 +1,212 @@
+"""
+Tek Gecisli JSON Cikarici (LLM Yanitlari)
+=========================================
+Gemini/DeepSeek yanitlarindaki JSON objesini, metni bir kez tarayarak
+cikarir ve tipik model hatalarini ayni geciste onarir; ardindan tek bir
+json.loads yapilir. Eski "regex temizle + json.loads dene" zincirlerinin
+yerine kullanilir.
+
+Tek geciste duzeltilenler:
+- Markdown ```json bloklari ve JSON oncesi/sonrasi aciklama metni
+- String icindeki ham satir sonu, tab ve kontrol karakterleri
+- LaTeX backslash'lari: \\frac, \\sqrt, \\{ ... (gecerli JSON escape'ine
+  benzeyen \\frac, \\times, \\to, \\ne, \\boxed, \\textdegree dahil)
+- Kapanmamis string/parantezler (kesilmis yanit), fazla virgul,
+  string icindeki kacirilmamis tirnaklar, satir arasi eksik virgul
+
+Kullanim:
+  from json_extract import extract_json
+  soru = extract_json(response.text)   # dict veya None
+
+Olcum: python bench_json_extract.py
+"""
+
+import re
+import json
+from typing import Any, List, Optional
+
+# Gecerli JSON escape harfiyle (b f n r t) baslayan bu kelimeler LaTeX komutu
+# sayilir (\frac -> \\frac, \to -> \\to); listede olmayan harf dizisi escape
+# olarak kalir (\nkelime -> satir sonu + "kelime"). Eski fix_latex_escapes
+# listesinin b/f/n/r/t ile baslayan tum komutlari dahildir.
+LATEX_COMMANDS = frozenset([
+    # b
+    'backslash', 'bar', 'barwedge', 'because', 'begin', 'beta', 'beth', 'between',
+    'bf', 'big', 'bigcap', 'bigcirc', 'bigcup', 'bigg', 'biggl', 'biggm', 'biggr',
+    'bigl', 'bigm', 'bigodot', 'bigoplus', 'bigotimes', 'bigr', 'bigsqcup',
+    'bigstar', 'bigtriangledown', 'bigtriangleup', 'biguplus', 'bigvee', 'bigwedge',
+    'binom', 'blacklozenge', 'blacksquare', 'blacktriangle', 'blacktriangledown',
+    'bm', 'bmod', 'boldsymbol', 'bot', 'bowtie', 'boxdot', 'boxed', 'boxminus',
+    'boxplus', 'boxtimes', 'breve', 'bullet', 'bumpeq',
+    # f
+    'fallingdotseq', 'fbox', 'flat', 'footnotesize', 'forall', 'frac', 'frak', 'frown',
+    # n
+    'nabla', 'natural', 'ncong', 'ne', 'nearrow', 'neg', 'negthinspace', 'neq',
+    'newline', 'nexists', 'ngeq', 'ngeqslant', 'ngtr', 'ni', 'nleftarrow', 'nleq',
+    'nleqslant', 'nless', 'nmid', 'nolimits', 'normalsize', 'not', 'notin',
+    'nparallel', 'nprec', 'nrightarrow', 'nsim', 'nsubseteq', 'nsucc', 'nsupseteq',
+    'ntriangleleft', 'ntriangleright', 'nu', 'nvdash', 'nwarrow',
+    # r
+    'rVert', 'rangle', 'rbrace', 'rbrack', 'rceil', 'rfloor', 'rho', 'right',
+    'rightarrow', 'rightharpoondown', 'rightharpoonup', 'rightleftarrows',
+    'rightleftharpoons', 'rightrightarrows', 'rightsquigarrow', 'rightthreetimes',
+    'risingdotseq', 'rm', 'root', 'rvert',
+    # t
+    'tan', 'tanh', 'tau', 'tbinom', 'text', 'textasciitilde', 'textbf', 'textcircled',
+    'textdegree', 'textit', 'textmu', 'textnormal', 'textrm', 'textsc', 'textsf',
+    'textstyle', 'textsubscript', 'textsuperscript', 'texttt', 'textup', 'tfrac',
+    'therefore', 'theta', 'thickapprox', 'thicksim', 'thinspace', 'tilde', 'times',
+    'tiny', 'to', 'top', 'triangle', 'triangledown', 'triangleleft', 'trianglelefteq',
+    'triangleq', 'triangleright', 'trianglerighteq', 'twoheadleftarrow',
+    'twoheadrightarrow',
+])
+
+_STRING_RUN = re.compile(r'[^"\\\x00-\x1f]+')
+_OUTSIDE_RUN = re.compile(r'[^"{}\[\],]+')
+_WORD = re.compile(r'[A-Za-z]+')
+_HEX4 = re.compile(r'[0-9a-fA-F]{4}')
+_CONTROL = {'\n': '\\n', '\r': '\\r', '\t': '\\t'}
+_CLOSERS = {'{': '}', '[': ']'}
+
+
+def _find_start(text: str) -> int:
+    """```json blogu varsa icindeki, yoksa ilk '{' konumu"""
+    fence = text.find('```json')
+    if fence >= 0:
+        start = text.find('{', fence)
+        if start >= 0:
+            return start
+    return text.find('{')
+
+
+def _closes_string(text: str, j: int) -> bool:
+    """Tirnaktan sonra gelen ilk anlamli karakter string'in bittigini gosteriyor mu"""
+    n = len(text)
+    newline = False
+    while j < n and text[j] in ' \t\r\n':
+        newline = newline or text[j] == '\n'
+        j += 1
+    if j >= n or text[j] in ',:}]':
+        return True
+    # Satir sonundan sonra yeni anahtar: eksik virgul, string yine de bitti
+    return newline and text[j] == '"'
+
+
+def _drop_trailing_comma(out: List[str]):
+    k = len(out) - 1
+    while k >= 0 and out[k].isspace():
+        k -= 1
+    if k >= 0 and out[k] == ',':
+        del out[k]
+
+
+def repair_json(text: str) -> Optional[str]:
+    """Metindeki ilk JSON objesini tek geciste onarilmis string olarak dondur"""
+    if not text:
+        return None
+    start = _find_start(text)
+    if start < 0:
+        return None
+
+    out: List[str] = []
+    stack: List[str] = []
+    in_string = False
+    last = ''  # string disindaki son anlamli karakter
+    i, n = start, len(text)
+
+    while i < n:
+        if in_string:
+            m = _STRING_RUN.match(text, i)
+            if m:
+                out.append(m.group())
+                i = m.end()
+                continue
+            c = text[i]
+            if c == '"':
+                if _closes_string(text, i + 1):
+                    in_string = False
+                    last = '"'
+                    out.append('"')
+                else:
+                    out.append('\\"')
+                i += 1
+            elif c == '\\':
+                nxt = text[i + 1] if i + 1 < n else ''
+                if nxt and nxt in '"\\/':
+                    out.append('\\' + nxt)
+                    i += 2
+                elif nxt == 'u' and _HEX4.match(text, i + 2):
+                    out.append(text[i:i + 6])
+                    i += 6
+                elif nxt and nxt in 'bfnrt':
+                    word = _WORD.match(text, i + 1).group()
+                    if word in LATEX_COMMANDS:
+                        out.append('\\\\')
+                        i += 1
+                    else:
+                        out.append('\\' + nxt)
+                        i += 2
+                elif nxt == "'":
+                    out.append("'")
+                    i += 2
+                else:
+                    # \sqrt, \alpha, \{, \( ... -> duz backslash
+                    out.append('\\\\')
+                    i += 1
+            else:
+                out.append(_CONTROL.get(c, ' '))
+                i += 1
+            continue
+
+        m = _OUTSIDE_RUN.match(text, i)
+        if m:
+            run = m.group()
+            out.append(run)
+            stripped = run.rstrip()
+            if stripped:
+                last = stripped[-1]
+            i = m.end()
+            continue
+        c = text[i]
+        i += 1
+        if c == '"':
+            if last and last not in ',:{[':
+                out.append(',')
+            in_string = True
+            out.append(c)
+        elif c in _CLOSERS:
+            if last and last not in ',:{[':
+                out.append(',')
+            stack.append(_CLOSERS[c])
+            out.append(c)
+            last = c
+        elif c in '}]':
+            if not stack:
+                break
+            _drop_trailing_comma(out)
+            out.append(stack.pop())
+            last = c
+            if not stack:
+                break
+        else:
+            out.append(c)
+            last = c
+
+    # Kesilmis yanit: acik string ve parantezleri kapat
+    if in_string:
+        out.append('"')
+    while stack:
+        _drop_trailing_comma(out)
+        out.append(stack.pop())
+    return ''.join(out)
+
+
+def extract_json(text: str) -> Optional[Any]:
+    """LLM yanitindan JSON objesini cikar ve parse et; basarisizsa None"""
+    repaired = repair_json(text)
+    if repaired is None:
+        return None
+    try:
+        return json.loads(repaired)
+    except ValueError:
+        return None
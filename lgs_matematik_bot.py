@@ -20,10 +20,17 @@ import random
 import logging
 import argparse
 import requests
-from datetime import datetime
-from typing import Optional, Dict, Any, List, Tuple
+import threading
+from datetime import datetime, timedelta, timezone
+from typing import Optional, Dict, Any, List, Tuple, Union
 from dataclasses import dataclass, asdict, field
 
+import rate_limiter
+from image_pipeline import ImageWorkerPool
+from bulk_writer import BulkInsertBuffer, PendingInsert, on_resolved, resolve_id
+from http_session import get_session
+from vector_index import NearDuplicateIndex
+
 # Google GenAI SDK
 try:
     from google import genai
@@ -72,6 +79,13 @@ class Config:
     RETRY_DELAY = 5
     REQUEST_TIMEOUT = 90
     RATE_LIMIT_DELAY = 3
+    IMAGE_WORKERS = int(os.environ.get("LGS_IMAGE_WORKERS", "2"))
+    BULK_INSERT_SIZE = int(os.environ.get("LGS_BULK_INSERT_SIZE", "10"))
+    BULK_INSERT_WAIT = float(os.environ.get("LGS_BULK_INSERT_WAIT", "5"))
+    # Görseli bekleyen (is_active=false) satır bu kadar dakika sonra hâlâ görselsizse
+    # görsel işi kaybolmuş sayılır ve açılışta yayınlanır; daha eski satırlara dokunulmaz
+    STALE_INACTIVE_MINUTES = int(os.environ.get("LGS_STALE_INACTIVE_MINUTES", "60"))
+    STALE_INACTIVE_MAX_HOURS = int(os.environ.get("LGS_STALE_INACTIVE_MAX_HOURS", "168"))
     DEFAULT_GRADE_LEVEL = 8
     DEFAULT_SUBJECT = "Matematik"
     DEFAULT_TOPIC_GROUP = "LGS"
@@ -810,28 +824,11 @@ class GeminiAPI:
         
         self.text_url = f"{GEMINI_TEXT_URL}?key={api_key}"
         self.image_url = f"{GEMINI_IMAGE_URL}?key={api_key}"
-        self.request_count = 0
-        self.last_request_time = 0
+        self.session = get_session()
     
-    def _rate_limit(self):
-        """Rate limiting"""
-        current_time = time.time()
-        if current_time - self.last_request_time > 60:
-            self.request_count = 0
-            self.last_request_time = current_time
-        
-        if self.request_count >= 4:
-            wait_time = 65 - (current_time - self.last_request_time)
-            if wait_time > 0:
-                logger.info(f"⏳ Rate limit - {wait_time:.0f}s bekleniyor...")
-                time.sleep(wait_time)
-                self.request_count = 0
-                self.last_request_time = time.time()
-        
-        if self.request_count > 0:
-            time.sleep(3)
-        
-        self.request_count += 1
+    def _rate_limit(self, kind: str = "text"):
+        """Rate limiting - paylaşılan token-bucket (rate_limiter.py)"""
+        rate_limiter.acquire(kind, self.api_key)
     
     def _get_gorsel_ozel_talimat(self, konu: str, gorsel_tipi: str) -> str:
         """Konuya özel görsel talimatı döndür"""
@@ -935,7 +932,7 @@ Matematiksel olarak %100 DOĞRU olmalı. Tek bir doğru cevap olmalı.
                         }
                     }
                     
-                    response = requests.post(
+                    response = self.session.post(
                         self.text_url,
                         headers={"Content-Type": "application/json"},
                         json=payload,
@@ -1084,7 +1081,7 @@ SEÇİLEN GÖRSEL TİPİ: {tip}
         full_detay = f"{detay}\n\nGörselde görünecek değerler: {gorunen_veriler}{renk_talimat}{konu_ozel_talimat}"
         prompt = IMAGE_PROMPT_TEMPLATE.format(tip=tip, detay=full_detay)
         
-        self._rate_limit()
+        self._rate_limit("image")
         
         for attempt in range(Config.MAX_RETRIES):
             try:
@@ -1137,6 +1134,9 @@ class SupabaseClient:
             "Prefer": "return=representation"
         }
         self._curriculum_cache = None
+        self.writer = None
+        self.dedup: Optional[NearDuplicateIndex] = None
+        self.session = get_session()
     
     def get_curriculum_for_grade(self, grade_level: int = 8, lesson_name: str = "Matematik") -> List[Dict]:
         """Curriculum tablosundan kazanımları çek"""
@@ -1147,7 +1147,7 @@ class SupabaseClient:
         query_url = f"{self.url}/rest/v1/curriculum?grade_level=eq.{grade_level}&lesson_name=eq.{lesson_name}&select=id,topic_code,topic_name,sub_topic,learning_outcome_code,learning_outcome_description,bloom_level"
         
         try:
-            response = requests.get(
+            response = self.session.get(
                 query_url,
                 headers=self.headers,
                 timeout=30
@@ -1189,7 +1189,7 @@ class SupabaseClient:
             else:
                 image_bytes = image_data
             
-            response = requests.post(
+            response = self.session.post(
                 upload_url,
                 headers={
                     "apikey": self.key,
@@ -1209,7 +1209,7 @@ class SupabaseClient:
             logger.error(f"  Storage upload hatası: {e}")
             return None
     
-    def insert_question(self, question: GeneratedQuestion, kazanim_id: int = None) -> Optional[int]:
+    def insert_question(self, question: GeneratedQuestion, kazanim_id: int = None) -> Optional[Union[int, PendingInsert]]:
         """question_bank tablosuna soru ekle"""
         
         insert_url = f"{self.url}/rest/v1/question_bank"
@@ -1247,8 +1247,25 @@ class SupabaseClient:
             "exam_type": "LGS_AI_BOT"
         }
         
+        # Yerel vektör indeksinde çok benzer soru varsa kaydetme
+        confirm = None
+        if self.dedup:
+            match, confirm = self.dedup.check_and_reserve(data)
+            if match:
+                logger.warning(f"  Benzer soru zaten var (ID {match[0]}, benzerlik {match[1]:.3f}), kaydedilmedi")
+                return None
+        
+        # Toplu yazma aktifse satır tampona eklenir, id flush sonrası gelir
+        question_id = self.writer.add(data) if self.writer else self._post_question(insert_url, data)
+        # Vektör indekse ancak kayıt kesinleşince girer; başarısız kayıt rezervasyonu siler
+        if confirm:
+            on_resolved(question_id, confirm)
+        return question_id
+    
+    def _post_question(self, insert_url: str, data: Dict[str, Any]) -> Optional[int]:
+        """Satırı doğrudan kaydet (toplu yazma kapalıyken)"""
         try:
-            response = requests.post(
+            response = self.session.post(
                 insert_url,
                 headers=self.headers,
                 json=data,
@@ -1269,6 +1286,74 @@ class SupabaseClient:
             if hasattr(e, 'response') and e.response is not None:
                 logger.error(f"  Response: {e.response.text[:500]}")
             return None
+    
+    def update_question(self, question_id: int, fields: Dict[str, Any]) -> bool:
+        """question_bank satırını güncelle (arka plan görsel ekleme için)"""
+        
+        update_url = f"{self.url}/rest/v1/question_bank?id=eq.{question_id}"
+        
+        try:
+            response = self.session.patch(
+                update_url,
+                headers=self.headers,
+                json=fields,
+                timeout=30
+            )
+            response.raise_for_status()
+            return True
+            
+        except requests.exceptions.RequestException as e:
+            logger.error(f"  Supabase update hatası (ID {question_id}): {e}")
+            return False
+    
+    def activate_stale_questions(self) -> int:
+        """Görsel işi yarım kalmış (süreç öldü, update başarısız) eski satırları görselsiz yayınla"""
+        now = datetime.now(timezone.utc)
+        newer_than = (now - timedelta(hours=Config.STALE_INACTIVE_MAX_HOURS)).strftime("%Y-%m-%dT%H:%M:%SZ")
+        older_than = (now - timedelta(minutes=Config.STALE_INACTIVE_MINUTES)).strftime("%Y-%m-%dT%H:%M:%SZ")
+        params = {
+            "exam_type": "eq.LGS_AI_BOT",
+            "is_active": "eq.false",
+            "image_url": "is.null",
+            "and": f"(created_at.gt.{newer_than},created_at.lt.{older_than})",
+            "select": "id"
+        }
+        try:
+            response = self.session.patch(f"{self.url}/rest/v1/question_bank", params=params,
+                                          headers=self.headers, json={"is_active": True}, timeout=30)
+            response.raise_for_status()
+            activated = len(response.json())
+        except Exception as e:
+            logger.error(f"  Bekleyen görselsiz sorular yayınlanamadı: {e}")
+            return 0
+        if activated:
+            logger.warning(f"  Görsel işi yarım kalmış {activated} soru görselsiz yayınlandı")
+        return activated
+    
+    def _insert_rows(self, rows: List[Dict]) -> List[Dict]:
+        """Çok satırlı insert - PostgREST satırları gönderim sırasıyla döndürür"""
+        response = self.session.post(f"{self.url}/rest/v1/question_bank", headers=self.headers, json=rows, timeout=60)
+        response.raise_for_status()
+        return response.json()
+    
+    def start_bulk_insert(self):
+        """question_bank insert'lerini toplu yazma tamponuna yönlendir"""
+        if self.writer is None:
+            self.writer = BulkInsertBuffer(
+                "question_bank", self._insert_rows,
+                max_rows=Config.BULK_INSERT_SIZE, max_wait=Config.BULK_INSERT_WAIT
+            )
+            # Journal'dan gelen satırın görsel işi bu çalıştırmada yok: görselsiz yayınlanır
+            self.writer.replay_journal(prepare=lambda row: dict(row, is_active=True))
+            self.activate_stale_questions()
+    
+    def finish_bulk_insert(self):
+        """Tampondaki satırları gönder ve tamponu kapat"""
+        if self.writer is None:
+            return
+        writer_stats = self.writer.close()
+        self.writer = None
+        logger.info(f"  Toplu kayıt: {writer_stats['inserted']}/{writer_stats['rows']} satır, {writer_stats['requests']} istek")
 
 # ============================================================================
 # QUALITY VALIDATOR CLASS - Soru ve Görsel Kalite Kontrolü
@@ -1418,6 +1503,7 @@ SADECE JSON döndür!"""
                 solution=question_data.get("cozum_adim_adim", "")
             )
             
+            rate_limiter.acquire("text", self.api_key)
             response = self.client.models.generate_content(
                 model=GEMINI_TEXT_MODEL,
                 contents=prompt,
@@ -1441,6 +1527,7 @@ SADECE JSON döndür!"""
         try:
             image_b64 = base64.b64encode(image_bytes).decode('utf-8')
             
+            rate_limiter.acquire("vision", self.api_key)
             response = self.client.models.generate_content(
                 model=GEMINI_TEXT_MODEL,
                 contents=[
@@ -1493,6 +1580,11 @@ class LGSQuestionGenerator:
         
         self.gemini = GeminiAPI(GEMINI_API_KEY)
         self.supabase = SupabaseClient(SUPABASE_URL, SUPABASE_KEY)
+        self.supabase.dedup = NearDuplicateIndex(
+            SUPABASE_URL, SUPABASE_KEY, GEMINI_API_KEY,
+            filters={"subject": f"eq.{Config.DEFAULT_SUBJECT}", "grade_level": f"eq.{Config.DEFAULT_GRADE_LEVEL}"},
+            name="lgs_matematik"
+        )
         self.validator = QualityValidator(GEMINI_API_KEY)
         self.stats = {
             "total_attempts": 0,
@@ -1503,11 +1595,27 @@ class LGSQuestionGenerator:
             "images_rejected": 0,
             "quality_retries": 0
         }
+        self._stats_lock = threading.Lock()
+        self.image_pool = None
+        self.image_workers = Config.IMAGE_WORKERS
+    
+    def _inc_stat(self, key: str):
+        """Thread-safe istatistik sayacı (görsel worker'ları için)"""
+        with self._stats_lock:
+            self.stats[key] += 1
+    
+    def _count_saved(self, saved_id: Optional[int]):
+        """Kayıt sonucu kesinleşince istatistiği güncelle"""
+        if saved_id is None:
+            self._inc_stat("failed")
+            logger.error("  ❌ Veritabanı kaydı başarısız (journal'a alındı)")
+        else:
+            self._inc_stat("successful")
     
-    def generate_single_question(self, params: QuestionParams, kazanim_from_db: Dict = None) -> Optional[int]:
+    def generate_single_question(self, params: QuestionParams, kazanim_from_db: Dict = None) -> Optional[Union[int, PendingInsert]]:
         """Tek bir soru üret ve kaydet - KALİTE KONTROL ile"""
         
-        self.stats["total_attempts"] += 1
+        self._inc_stat("total_attempts")
         konu_display = LGS_KONULAR.get(params.konu, {}).get("display_name", params.konu)
         
         # Curriculum'dan kazanım bilgisi
@@ -1526,9 +1634,7 @@ class LGSQuestionGenerator:
         logger.info(f"{'='*70}")
         
         previous_question_problems = []  # Önceki soru denemelerindeki sorunlar
-        previous_image_problems = []     # Önceki görsel denemelerindeki sorunlar
         max_question_retries = 3
-        max_image_retries = 3
         
         try:
             # ═══════════════════════════════════════════════════════════════
@@ -1565,7 +1671,7 @@ class LGSQuestionGenerator:
                 missing = [f for f in required_fields if f not in question_data]
                 if missing:
                     previous_question_problems.append(f"Eksik alanlar: {missing}")
-                    self.stats["quality_retries"] += 1
+                    self._inc_stat("quality_retries")
                     continue
                 
                 # SORU KALİTE KONTROLÜ
@@ -1590,8 +1696,8 @@ class LGSQuestionGenerator:
                         if s not in previous_question_problems:
                             previous_question_problems.append(f"Öneri: {s}")
                     
-                    self.stats["questions_rejected"] += 1
-                    self.stats["quality_retries"] += 1
+                    self._inc_stat("questions_rejected")
+                    self._inc_stat("quality_retries")
                     logger.warning(f"  ❌ Soru REDDEDİLDİ - Sorunlar: {problems}")
                     
                     if q_attempt < max_question_retries - 1:
@@ -1608,76 +1714,24 @@ class LGSQuestionGenerator:
             # ═══════════════════════════════════════════════════════════════
             
             image_url = None
-            image_bytes = None
             image_quality_score = 0
+            image_attempts = 0
+            gorsel_betimleme = {}
+            deferred_image = None
             
             if question_data.get("gorsel_gerekli", False):
                 gorsel_betimleme = question_data.get("gorsel_betimleme", {})
                 
                 if gorsel_betimleme and gorsel_betimleme.get("detay"):
-                    
-                    for img_attempt in range(max_image_retries):
-                        logger.info(f"\n[2/5] Görsel üretiliyor (Deneme {img_attempt + 1}/{max_image_retries})...")
-                        
-                        # Feedback varsa görsel prompt'una ekle
-                        if previous_image_problems:
-                            gorsel_betimleme_with_feedback = gorsel_betimleme.copy()
-                            feedback = "\n\n⚠️ ÖNCEKİ GÖRSEL SORUNLARI (TEKRARLAMA!):\n"
-                            feedback += "\n".join([f"❌ {p}" for p in previous_image_problems])
-                            gorsel_betimleme_with_feedback["detay"] = gorsel_betimleme["detay"] + feedback
-                        else:
-                            gorsel_betimleme_with_feedback = gorsel_betimleme
-                        
-                        image_bytes = self.gemini.generate_image(gorsel_betimleme_with_feedback, konu=params.konu)
-                        
-                        if not image_bytes:
-                            previous_image_problems.append("Görsel üretilemedi")
-                            self.stats["quality_retries"] += 1
-                            continue
-                        
-                        # GÖRSEL KALİTE KONTROLÜ
-                        logger.info("  📊 Görsel kalite kontrolü yapılıyor...")
-                        soru_metni = question_data.get("soru_metni", "")
-                        img_validation = self.validator.validate_image(image_bytes, soru_metni)
-                        image_quality_score = img_validation.get("overall_score", 5)
-                        
-                        logger.info(f"  📈 Görsel Kalite Puanı: {image_quality_score}/10")
-                        
-                        if img_validation.get("pass", False):
-                            logger.info(f"  ✅ Görsel KABUL EDİLDİ")
-                            break
-                        else:
-                            # Sorunları kaydet ve bir sonraki denemeye feedback olarak gönder
-                            problems = img_validation.get("problems", [])
-                            spelling_errors = img_validation.get("spelling_errors_found", [])
-                            
-                            for p in problems:
-                                if p not in previous_image_problems:
-                                    previous_image_problems.append(p)
-                            
-                            if spelling_errors:
-                                previous_image_problems.append(f"Yazım hataları: {spelling_errors}")
-                            
-                            self.stats["images_rejected"] += 1
-                            self.stats["quality_retries"] += 1
-                            logger.warning(f"  ❌ Görsel REDDEDİLDİ - Sorunlar: {problems}")
-                            
-                            if img_attempt < max_image_retries - 1:
-                                logger.info(f"  🔄 Feedback ile yeniden denenecek...")
-                                time.sleep(3)
-                    
-                    # Görsel yükle (en iyi sonuçla)
-                    if image_bytes:
-                        filename = f"lgs_{params.konu}_{uuid.uuid4().hex[:8]}_{int(time.time())}.png"
-                        image_url = self.supabase.upload_image(image_bytes, filename)
-                        
-                        if image_url:
-                            self.stats["with_image"] += 1
-                            logger.info(f"  ✓ Görsel yüklendi (Kalite: {image_quality_score}/10)")
-                        else:
-                            logger.warning("  ⚠ Görsel yüklenemedi")
+                    soru_metni = question_data.get("soru_metni", "")
+                    if self.image_pool:
+                        # Soru hemen kaydedilir, görsel arka planda üretilip satıra eklenir
+                        logger.info("\n[2/5] Görsel arka plan kuyruğuna bırakılıyor...")
+                        deferred_image = (gorsel_betimleme, soru_metni)
                     else:
-                        logger.warning("  ⚠ Tüm görsel denemeleri başarısız")
+                        image_url, image_quality_score, image_attempts = self._produce_image(
+                            gorsel_betimleme, params.konu, soru_metni
+                        )
                 else:
                     logger.warning("  ⚠ Görsel betimleme eksik")
             else:
@@ -1710,7 +1764,9 @@ class LGSQuestionGenerator:
                 pisa_context=question_data.get("pisa_baglam", "Kişisel"),
                 scenario_text=soru_metni,
                 distractor_explanations=question_data.get("celdirici_analizi", {}),
-                image_url=image_url
+                image_url=image_url,
+                # Görseli bekleyen soru, görsel eklenene kadar yayınlanmaz
+                is_active=deferred_image is None
             )
             logger.info("  ✓ Veri yapısı hazır")
             
@@ -1720,9 +1776,9 @@ class LGSQuestionGenerator:
             
             logger.info(f"\n[4/5] 📊 KALİTE ÖZETİ:")
             logger.info(f"   Soru Puanı: {question_quality_score}/10")
-            if image_bytes:
+            if image_url:
                 logger.info(f"   Görsel Puanı: {image_quality_score}/10")
-            logger.info(f"   Toplam Deneme: Soru={len(previous_question_problems) + 1}, Görsel={len(previous_image_problems) + 1 if gorsel_betimleme else 0}")
+            logger.info(f"   Toplam Deneme: Soru={len(previous_question_problems) + 1}, Görsel={image_attempts}")
             
             # ═══════════════════════════════════════════════════════════════
             # ADIM 5: VERİTABANINA KAYDET
@@ -1731,22 +1787,151 @@ class LGSQuestionGenerator:
             logger.info("\n[5/5] Veritabanına kaydediliyor...")
             question_id = self.supabase.insert_question(generated, kazanim_id=kazanim_id)
             
-            if question_id:
-                self.stats["successful"] += 1
-                logger.info(f"\n✅ BAŞARILI! Soru ID: {question_id}")
-                return question_id
-            else:
-                self.stats["failed"] += 1
+            if question_id is None:
+                self._inc_stat("failed")
                 logger.error("\n❌ Veritabanı kaydı başarısız")
                 return None
+            
+            # Toplu yazmada id flush sonrası gelir; başarı sayacı kayıt kesinleşince artar
+            on_resolved(question_id, self._count_saved)
+            if deferred_image:
+                self.image_pool.submit({
+                    "question_id": question_id,
+                    "gorsel_betimleme": deferred_image[0],
+                    "soru_metni": deferred_image[1],
+                    "konu": params.konu
+                })
+            logger.info(f"\n✅ BAŞARILI! Soru kayda alındı (ID: {question_id})")
+            return question_id
                 
         except Exception as e:
-            self.stats["failed"] += 1
+            self._inc_stat("failed")
             logger.error(f"\n❌ HATA: {str(e)}")
             import traceback
             logger.debug(traceback.format_exc())
             return None
     
+    def _produce_image(self, gorsel_betimleme: Dict, konu: str, soru_metni: str,
+                       max_image_retries: int = 3) -> Tuple[Optional[str], int, int]:
+        """Görsel üret, feedback döngüsüyle kalite kontrolünden geçir ve yükle
+        
+        Returns: (image_url, görsel kalite puanı, deneme sayısı)
+        """
+        previous_image_problems = []     # Önceki görsel denemelerindeki sorunlar
+        image_bytes = None
+        image_quality_score = 0
+        attempts = 0
+        
+        for img_attempt in range(max_image_retries):
+            attempts = img_attempt + 1
+            logger.info(f"\n[2/5] Görsel üretiliyor (Deneme {img_attempt + 1}/{max_image_retries})...")
+            
+            # Feedback varsa görsel prompt'una ekle
+            if previous_image_problems:
+                gorsel_betimleme_with_feedback = gorsel_betimleme.copy()
+                feedback = "\n\n⚠️ ÖNCEKİ GÖRSEL SORUNLARI (TEKRARLAMA!):\n"
+                feedback += "\n".join([f"❌ {p}" for p in previous_image_problems])
+                gorsel_betimleme_with_feedback["detay"] = gorsel_betimleme["detay"] + feedback
+            else:
+                gorsel_betimleme_with_feedback = gorsel_betimleme
+            
+            image_bytes = self.gemini.generate_image(gorsel_betimleme_with_feedback, konu=konu)
+            
+            if not image_bytes:
+                previous_image_problems.append("Görsel üretilemedi")
+                self._inc_stat("quality_retries")
+                continue
+            
+            # GÖRSEL KALİTE KONTROLÜ
+            logger.info("  📊 Görsel kalite kontrolü yapılıyor...")
+            img_validation = self.validator.validate_image(image_bytes, soru_metni)
+            image_quality_score = img_validation.get("overall_score", 5)
+            
+            logger.info(f"  📈 Görsel Kalite Puanı: {image_quality_score}/10")
+            
+            if img_validation.get("pass", False):
+                logger.info(f"  ✅ Görsel KABUL EDİLDİ")
+                break
+            else:
+                # Sorunları kaydet ve bir sonraki denemeye feedback olarak gönder
+                problems = img_validation.get("problems", [])
+                spelling_errors = img_validation.get("spelling_errors_found", [])
+                
+                for p in problems:
+                    if p not in previous_image_problems:
+                        previous_image_problems.append(p)
+                
+                if spelling_errors:
+                    previous_image_problems.append(f"Yazım hataları: {spelling_errors}")
+                
+                self._inc_stat("images_rejected")
+                self._inc_stat("quality_retries")
+                logger.warning(f"  ❌ Görsel REDDEDİLDİ - Sorunlar: {problems}")
+                
+                if img_attempt < max_image_retries - 1:
+                    logger.info(f"  🔄 Feedback ile yeniden denenecek...")
+                    time.sleep(3)
+        
+        # Görsel yükle (en iyi sonuçla)
+        if not image_bytes:
+            logger.warning("  ⚠ Tüm görsel denemeleri başarısız")
+            return None, image_quality_score, attempts
+        
+        filename = f"lgs_{konu}_{uuid.uuid4().hex[:8]}_{int(time.time())}.png"
+        image_url = self.supabase.upload_image(image_bytes, filename)
+        
+        if image_url:
+            self._inc_stat("with_image")
+            logger.info(f"  ✓ Görsel yüklendi (Kalite: {image_quality_score}/10)")
+        else:
+            logger.warning("  ⚠ Görsel yüklenemedi")
+        return image_url, image_quality_score, attempts
+    
+    def _fill_image(self, job: Dict) -> bool:
+        """Görsel worker'ı: kaydedilmiş sorunun görselini üret ve satırı güncelle"""
+        question_id = resolve_id(job["question_id"])
+        if question_id is None:
+            logger.error("  [Görsel] Soru kaydedilemediği için görsel atlandı")
+            return False
+        logger.info(f"  [Görsel] Soru {question_id} için görsel üretiliyor...")
+        try:
+            image_url, _, _ = self._produce_image(job["gorsel_betimleme"], job["konu"], job["soru_metni"])
+        except Exception as e:
+            logger.error(f"  [Görsel] Soru {question_id} görsel hatası: {e}")
+            image_url = None
+        
+        # Görsel üretilemese de soru (eski davranışta olduğu gibi) görselsiz yayınlanır;
+        # update de başarısız olursa satırı sonraki açılışta activate_stale_questions yayınlar
+        fields = {"is_active": True}
+        if image_url:
+            fields["image_url"] = image_url
+        updated = self.supabase.update_question(question_id, fields)
+        if updated and image_url:
+            logger.info(f"  [Görsel] ✓ Soru {question_id} görseli eklendi")
+        return updated and bool(image_url)
+    
+    def _resolve_ids(self, ids: List) -> List[int]:
+        """Toplu kayıt sonrası bekleyen id'leri gerçek id'lere çevir"""
+        resolved = [resolve_id(i) for i in ids]
+        lost = resolved.count(None)
+        if lost:
+            logger.warning(f"  ⚠ {lost} soru veritabanına yazılamadı (journal'a alındı)")
+        return [i for i in resolved if i is not None]
+    
+    def start_image_pool(self, workers: int = None):
+        """Arka plan görsel worker havuzunu başlat (0 = görseller satır içi üretilir)"""
+        workers = self.image_workers if workers is None else workers
+        if workers > 0 and self.image_pool is None:
+            self.image_pool = ImageWorkerPool(self._fill_image, workers=workers, name="lgs-image")
+    
+    def finish_image_pool(self):
+        """Kuyruktaki görsel işleri bitene kadar bekle"""
+        if self.image_pool is None:
+            return
+        pool_stats = self.image_pool.close()
+        self.image_pool = None
+        logger.info(f"  🖼️ Görsel kuyruğu tamamlandı: {pool_stats['completed']}/{pool_stats['submitted']} görsel eklendi")
+    
     def generate_batch(self, count_per_topic: int = 1) -> Dict[str, Any]:
         """Tüm konular için toplu soru üret - Curriculum tablosundan kazanım çeker"""
         
@@ -1771,47 +1956,54 @@ class LGSQuestionGenerator:
             "stats": {}
         }
         
-        # Her konu için belirlenen sayıda soru üret
-        for i in range(count_per_topic * len(LGS_KONULAR)):
-            # Rastgele bir kazanım seç
-            kazanim = random.choice(curriculum)
-            
-            topic_name = kazanim.get("topic_name", "Genel")
-            sub_topic = kazanim.get("sub_topic", "")
-            learning_code = kazanim.get("learning_outcome_code", "")
-            bloom = kazanim.get("bloom_level") or random.choice(list(BLOOM_SEVIYELERI.keys()))
-            
-            # LGS_KONULAR'dan en uygun konuyu bul
-            konu_key = self._find_matching_konu(topic_name)
-            konu_data = LGS_KONULAR.get(konu_key, {})
-            
-            logger.info(f"\n📚 Konu: {topic_name} (Kazanım ID: {kazanim.get('id')})")
-            
-            # Parametreleri oluştur
-            zorluk = random.randint(3, 5)
-            baglam = random.choice(konu_data.get("ornek_baglamlar", ["genel"]))
-            gorsel_tipi = random.choice(konu_data.get("gorsel_tipleri", ["geometrik_sekil"]))
-            
-            params = QuestionParams(
-                konu=konu_key,
-                alt_konu=sub_topic or konu_data.get("alt_konular", ["genel"])[0],
-                kazanim_kodu=learning_code or "M.8.1.1.1",
-                bloom_seviyesi=bloom if bloom in BLOOM_SEVIYELERI else "Analiz",
-                zorluk=zorluk,
-                baglam=baglam,
-                gorsel_tipi=gorsel_tipi
-            )
-            
-            question_id = self.generate_single_question(params, kazanim_from_db=kazanim)
-            
-            if question_id:
-                results["generated_ids"].append(question_id)
-            else:
-                results["failed_topics"].append(f"{topic_name}_{kazanim.get('id')}")
-            
-            # Rate limiting
-            time.sleep(Config.RATE_LIMIT_DELAY)
+        self.supabase.start_bulk_insert()
+        self.start_image_pool()
+        try:
+            # Her konu için belirlenen sayıda soru üret
+            for i in range(count_per_topic * len(LGS_KONULAR)):
+                # Rastgele bir kazanım seç
+                kazanim = random.choice(curriculum)
+                
+                topic_name = kazanim.get("topic_name", "Genel")
+                sub_topic = kazanim.get("sub_topic", "")
+                learning_code = kazanim.get("learning_outcome_code", "")
+                bloom = kazanim.get("bloom_level") or random.choice(list(BLOOM_SEVIYELERI.keys()))
+                
+                # LGS_KONULAR'dan en uygun konuyu bul
+                konu_key = self._find_matching_konu(topic_name)
+                konu_data = LGS_KONULAR.get(konu_key, {})
+                
+                logger.info(f"\n📚 Konu: {topic_name} (Kazanım ID: {kazanim.get('id')})")
+                
+                # Parametreleri oluştur
+                zorluk = random.randint(3, 5)
+                baglam = random.choice(konu_data.get("ornek_baglamlar", ["genel"]))
+                gorsel_tipi = random.choice(konu_data.get("gorsel_tipleri", ["geometrik_sekil"]))
+                
+                params = QuestionParams(
+                    konu=konu_key,
+                    alt_konu=sub_topic or konu_data.get("alt_konular", ["genel"])[0],
+                    kazanim_kodu=learning_code or "M.8.1.1.1",
+                    bloom_seviyesi=bloom if bloom in BLOOM_SEVIYELERI else "Analiz",
+                    zorluk=zorluk,
+                    baglam=baglam,
+                    gorsel_tipi=gorsel_tipi
+                )
+                
+                question_id = self.generate_single_question(params, kazanim_from_db=kazanim)
+                
+                if question_id:
+                    results["generated_ids"].append(question_id)
+                else:
+                    results["failed_topics"].append(f"{topic_name}_{kazanim.get('id')}")
+                
+                # Rate limiting
+                time.sleep(Config.RATE_LIMIT_DELAY)
+        finally:
+            self.finish_image_pool()
+            self.supabase.finish_bulk_insert()
         
+        results["generated_ids"] = self._resolve_ids(results["generated_ids"])
         results["stats"] = self.stats
         return results
     
@@ -1882,34 +2074,40 @@ class LGSQuestionGenerator:
         logger.info(f"\n📚 {konu_data['display_name']} için {count} soru üretilecek")
         logger.info(f"   Uygun kazanım sayısı: {len(filtered_curriculum)}")
         
-        for i in range(count):
-            # Rastgele kazanım seç
-            kazanim = random.choice(filtered_curriculum) if filtered_curriculum else None
-            
-            alt_konu = kazanim.get("sub_topic") if kazanim else random.choice(konu_data["alt_konular"])
-            kazanim_kodu = kazanim.get("learning_outcome_code") if kazanim else konu_data["kazanimlar"][0]
-            bloom = kazanim.get("bloom_level") if kazanim and kazanim.get("bloom_level") in BLOOM_SEVIYELERI else random.choice(list(BLOOM_SEVIYELERI.keys()))
-            zorluk = random.randint(3, 5)
-            baglam = random.choice(konu_data["ornek_baglamlar"])
-            gorsel_tipi = random.choice(konu_data.get("gorsel_tipleri", ["geometrik_sekil"]))
-            
-            params = QuestionParams(
-                konu=konu,
-                alt_konu=alt_konu or konu_data["alt_konular"][0],
-                kazanim_kodu=kazanim_kodu or "M.8.1.1.1",
-                bloom_seviyesi=bloom,
-                zorluk=zorluk,
-                baglam=baglam,
-                gorsel_tipi=gorsel_tipi
-            )
-            
-            question_id = self.generate_single_question(params, kazanim_from_db=kazanim)
-            if question_id:
-                generated_ids.append(question_id)
-            
-            time.sleep(Config.RATE_LIMIT_DELAY)
+        self.supabase.start_bulk_insert()
+        self.start_image_pool()
+        try:
+            for i in range(count):
+                # Rastgele kazanım seç
+                kazanim = random.choice(filtered_curriculum) if filtered_curriculum else None
+                
+                alt_konu = kazanim.get("sub_topic") if kazanim else random.choice(konu_data["alt_konular"])
+                kazanim_kodu = kazanim.get("learning_outcome_code") if kazanim else konu_data["kazanimlar"][0]
+                bloom = kazanim.get("bloom_level") if kazanim and kazanim.get("bloom_level") in BLOOM_SEVIYELERI else random.choice(list(BLOOM_SEVIYELERI.keys()))
+                zorluk = random.randint(3, 5)
+                baglam = random.choice(konu_data["ornek_baglamlar"])
+                gorsel_tipi = random.choice(konu_data.get("gorsel_tipleri", ["geometrik_sekil"]))
+                
+                params = QuestionParams(
+                    konu=konu,
+                    alt_konu=alt_konu or konu_data["alt_konular"][0],
+                    kazanim_kodu=kazanim_kodu or "M.8.1.1.1",
+                    bloom_seviyesi=bloom,
+                    zorluk=zorluk,
+                    baglam=baglam,
+                    gorsel_tipi=gorsel_tipi
+                )
+                
+                question_id = self.generate_single_question(params, kazanim_from_db=kazanim)
+                if question_id:
+                    generated_ids.append(question_id)
+                
+                time.sleep(Config.RATE_LIMIT_DELAY)
+        finally:
+            self.finish_image_pool()
+            self.supabase.finish_bulk_insert()
         
-        return generated_ids
+        return self._resolve_ids(generated_ids)
     
     def print_stats(self):
         """İstatistikleri yazdır"""
@@ -1974,6 +2172,9 @@ Geçerli Konular:
                        choices=[1, 2, 3, 4, 5],
                        help='Zorluk seviyesi (1-5)')
     
+    parser.add_argument('--image-workers', type=int, default=Config.IMAGE_WORKERS,
+                       help='Arka plan görsel worker sayısı (0 = görsel soruyla birlikte üretilir)')
+    
     args = parser.parse_args()
     
     # Banner
@@ -1989,6 +2190,7 @@ Geçerli Konular:
     
     try:
         generator = LGSQuestionGenerator()
+        generator.image_workers = args.image_workers
         
         if args.mode == 'batch':
             logger.info(f"📦 Batch modu - Her konu için {args.count} soru")
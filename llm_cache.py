@@ -0,0 +1,201 @@
+"""
+LLM Yanit Onbellegi (SQLite)
+============================
+Ayni adimin tekrar denemelerinde (DB hatasi, zaman asimi, cokme sonrasi
+yeniden calistirma) byte-byte ayni prompt'u tekrar Gemini/DeepSeek'e
+gondermek yerine yaniti yerel SQLite dosyasindan verir.
+
+- Anahtar: model + normalize edilmis prompt + uretim ayarlari (SHA-256)
+- TTL: suresi dolan kayitlar okunmaz ve temizlenir
+- LRU: kayit sayisi sinirin uzerine cikinca en eski kullanilanlar silinir
+- Sadece parse edilebilen yanitlar saklanir
+- Deneme takibi: begin_attempt() ile baslayan denemede kullanilan yanitlar,
+  icerik reddedildiginde veya soru kaydedildiginde discard_attempt() ile
+  silinir; boylece reddedilen/tuketilen yanit tekrar donmez, sadece
+  altyapi hatasiyla yarim kalan adimlar onbellekten devam eder
+
+Kullanim:
+  import llm_cache
+  llm_cache.begin_attempt()
+  soru = llm_cache.cached_call("gemini-2.0-flash", prompt, {"temperature": 0.7},
+                               lambda: client.models.generate_content(...).text,
+                               parse=json_temizle)
+  ...
+  llm_cache.discard_attempt()   # reddedildi
+  on_resolved(writer.add(row), llm_cache.detach_attempt())   # kayit kesinlesince sil
+
+Ayarlar: LLM_CACHE_PATH, LLM_CACHE_TTL (sn), LLM_CACHE_MAX_ENTRIES,
+LLM_CACHE_DISABLED=1
+"""
+
+import os
+import re
+import json
+import time
+import sqlite3
+import hashlib
+import logging
+import threading
+from typing import Any, Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_PATH = os.environ.get("LLM_CACHE_PATH", os.path.join(".llm_cache", "responses.sqlite3"))
+DEFAULT_TTL = int(os.environ.get("LLM_CACHE_TTL", str(24 * 3600)))
+DEFAULT_MAX_ENTRIES = int(os.environ.get("LLM_CACHE_MAX_ENTRIES", "2000"))
+DISABLED = os.environ.get("LLM_CACHE_DISABLED", "") == "1"
+
+
+def normalize_prompt(prompt: str) -> str:
+    """Satir sonu ve bosluk farklarini yok say"""
+    return re.sub(r"\s+", " ", prompt or "").strip()
+
+
+def make_key(model: str, prompt: str, config: Dict[str, Any] = None) -> str:
+    payload = json.dumps(
+        {"model": model, "prompt": normalize_prompt(prompt), "config": config or {}},
+        sort_keys=True, ensure_ascii=False, default=str
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class LLMCache:
+    """TTL ve LRU tahliyeli, thread-safe SQLite yanit onbellegi"""
+
+    def __init__(self, path: str = None, ttl: int = None, max_entries: int = None):
+        self.path = path or DEFAULT_PATH
+        self.ttl = ttl if ttl is not None else DEFAULT_TTL
+        self.max_entries = max_entries or DEFAULT_MAX_ENTRIES
+        self.stats = {"hits": 0, "misses": 0}
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS responses ("
+            " key TEXT PRIMARY KEY, model TEXT, response TEXT,"
+            " created_at REAL, last_used REAL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_last_used ON responses(last_used)")
+        self._conn.commit()
+        self.evict()
+
+    def get(self, key: str) -> Optional[str]:
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT response, created_at FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None or now - row[1] > self.ttl:
+                self.stats["misses"] += 1
+                return None
+            self._conn.execute("UPDATE responses SET last_used = ? WHERE key = ?", (now, key))
+            self._conn.commit()
+            self.stats["hits"] += 1
+            return row[0]
+
+    def put(self, key: str, model: str, response: str):
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses (key, model, response, created_at, last_used)"
+                " VALUES (?, ?, ?, ?, ?)", (key, model, response, now, now)
+            )
+            self._conn.commit()
+            count = self._conn.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+        if count > self.max_entries:
+            self.evict()
+
+    def discard(self, keys: List[str]):
+        if not keys:
+            return
+        with self._lock:
+            self._conn.executemany("DELETE FROM responses WHERE key = ?", [(k,) for k in keys])
+            self._conn.commit()
+
+    def evict(self):
+        """Suresi dolanlari ve LRU sinirini asanlari sil"""
+        with self._lock:
+            self._conn.execute("DELETE FROM responses WHERE created_at < ?", (time.time() - self.ttl,))
+            self._conn.execute(
+                "DELETE FROM responses WHERE key IN ("
+                " SELECT key FROM responses ORDER BY last_used DESC LIMIT -1 OFFSET ?)",
+                (self.max_entries,)
+            )
+            self._conn.commit()
+
+
+# ============================================================================
+# MODUL SEVIYESI API
+# ============================================================================
+
+_cache: Optional[LLMCache] = None
+_cache_lock = threading.Lock()
+_attempt = threading.local()
+
+
+def get_cache() -> Optional[LLMCache]:
+    """Paylasilan onbellegi getir; acilamazsa None (onbelleksiz devam)"""
+    global _cache, DISABLED
+    if DISABLED:
+        return None
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                try:
+                    _cache = LLMCache()
+                except (sqlite3.Error, OSError) as e:
+                    logger.warning(f"LLM onbellegi acilamadi, devre disi: {e}")
+                    DISABLED = True
+                    return None
+    return _cache
+
+
+def begin_attempt():
+    """Yeni deneme baslat - bu denemede kullanilan anahtarlar takip edilir"""
+    _attempt.keys = []
+
+
+def discard_attempt():
+    """Bu denemede kullanilan yanitlari sil (icerik reddedildi veya kaydedildi)"""
+    detach_attempt()()
+
+
+def detach_attempt() -> Callable[..., None]:
+    """Denemenin anahtarlarini thread'den ayir; donen fonksiyon onlari sonra siler
+
+    Toplu kayitta yanitlar ancak kayit kesinlesince silinmeli; fonksiyon
+    on_resolved callback'i olarak (flush thread'inde) cagrilabilir.
+    """
+    keys = getattr(_attempt, "keys", [])
+    _attempt.keys = []
+
+    def discard(*_):
+        cache = get_cache()
+        if cache and keys:
+            cache.discard(keys)
+    return discard
+
+
+def cached_call(model: str, prompt: str, config: Dict[str, Any], call: Callable[[], str],
+                parse: Callable[[str], Any] = None) -> Any:
+    """Yanit onbellekte varsa onu, yoksa call() sonucunu (parse edilmis olarak) dondur"""
+    parse = parse or (lambda text: text)
+    cache = get_cache()
+    key = make_key(model, prompt, config)
+
+    if cache:
+        cached = cache.get(key)
+        if cached is not None:
+            result = parse(cached)
+            if result:
+                getattr(_attempt, "keys", []).append(key)
+                return result
+            cache.discard([key])
+
+    text = call()
+    result = parse(text) if text else None
+    if cache and result:
+        cache.put(key, model, text)
+        if hasattr(_attempt, "keys"):
+            _attempt.keys.append(key)
+    return result
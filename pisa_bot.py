@@ -21,8 +21,6 @@ import os
 import json
 import random
 import time
-import hashlib
-import re
 from datetime import datetime
 from openai import OpenAI
 
@@ -30,6 +28,12 @@ from google import genai
 from google.genai import types
 from supabase import create_client
 
+import rate_limiter
+from bulk_writer import BulkInsertBuffer, on_resolved
+from dedup_store import DedupStore, SupabaseSignatureBackend
+from json_extract import extract_json
+import llm_cache
+
 # ═══════════════════════════════════════════════════════════════════════════════
 # YAPILANDIRMA
 # ═══════════════════════════════════════════════════════════════════════════════
@@ -43,10 +47,11 @@ SORU_ADEDI = int(os.environ.get('SORU_ADEDI', '50'))
 # Ayarlar
 DEEPSEEK_DOGRULAMA = bool(DEEPSEEK_API_KEY)
 COT_AKTIF = True
-BEKLEME = 1.0
 MAX_DENEME = 4
 MIN_DEEPSEEK_PUAN = 65
 API_TIMEOUT = 30
+BULK_INSERT_SIZE = int(os.environ.get('BULK_INSERT_SIZE', '10'))
+BULK_INSERT_WAIT = float(os.environ.get('BULK_INSERT_WAIT', '5'))
 
 # ═══════════════════════════════════════════════════════════════════════════════
 # API BAĞLANTILARI
@@ -60,6 +65,14 @@ if not all([SUPABASE_URL, SUPABASE_KEY, GEMINI_API_KEY]):
 
 supabase = create_client(SUPABASE_URL, SUPABASE_KEY)
 
+# Sorular tek tek değil, tamponlanıp çok satırlı insert ile yazılır
+kayit_tamponu = BulkInsertBuffer(
+    'pisa_soru_havuzu',
+    lambda rows: supabase.table('pisa_soru_havuzu').insert(rows).execute().data,
+    max_rows=BULK_INSERT_SIZE,
+    max_wait=BULK_INSERT_WAIT
+)
+
 # Yeni Google GenAI client
 gemini_client = genai.Client(api_key=GEMINI_API_KEY)
 
@@ -477,18 +490,42 @@ def rastgele_isim_sec(cinsiyet=None):
 # TEKRAR ÖNLEYİCİ
 # ═══════════════════════════════════════════════════════════════════════════════
 
-kullanilan_hashler = set()
 kullanilan_baglamlar = set()
 
-def hash_olustur(soru):
-    icerik = f"{soru.get('soru_metni', '')}|{soru.get('beklenen_cevap', soru.get('dogru_cevap', ''))}"
-    return hashlib.md5(icerik.encode()).hexdigest()
+# Çalıştırmalar arası kalıcı imza deposu (MD5 tam tekrar + SimHash yakın tekrar)
+imza_deposu = DedupStore('pisa', SupabaseSignatureBackend(supabase))
+
+def soru_cevabi(soru):
+    return soru.get('beklenen_cevap', soru.get('dogru_cevap', ''))
+
+def mevcut_soru_imzalari():
+    """İmza deposu boşsa pisa_soru_havuzu'ndaki mevcut soruları sayfa sayfa getir"""
+    son_id = None
+    while True:
+        sorgu = supabase.table('pisa_soru_havuzu').select('id, soru_metni, beklenen_cevap, dogru_cevap')
+        if son_id is not None:
+            sorgu = sorgu.gt('id', son_id)
+        satirlar = sorgu.order('id').limit(1000).execute().data or []
+        for satir in satirlar:
+            satir = {k: v for k, v in satir.items() if v is not None}
+            yield satir.get('soru_metni', ''), soru_cevabi(satir)
+        if len(satirlar) < 1000:
+            return
+        son_id = satirlar[-1]['id']
 
 def benzersiz_mi(soru):
-    return hash_olustur(soru) not in kullanilan_hashler
-
-def hash_kaydet(soru):
-    kullanilan_hashler.add(hash_olustur(soru))
+    tekrar = imza_deposu.check(soru.get('soru_metni', ''), soru_cevabi(soru))
+    if tekrar:
+        print(f"   🔁 {'Aynı' if tekrar == 'kesin' else 'Çok benzer'} soru daha önce üretilmiş")
+        return False
+    return True
+
+def imza_ayir(soru):
+    """Kabul edilen sorunun imzasını hemen ayır; onay fonksiyonu kayıt sonucuyla çağrılır"""
+    tekrar, onayla = imza_deposu.check_and_reserve(soru.get('soru_metni', ''), soru_cevabi(soru))
+    if tekrar:
+        print(f"   🔁 {'Aynı' if tekrar == 'kesin' else 'Çok benzer'} soru daha önce üretilmiş")
+    return onayla
 
 def rastgele_baglam_sec(sinif, icerik_kategorisi):
     """Sınıf ve içerik kategorisine uygun rastgele bağlam seçer"""
@@ -873,92 +910,28 @@ SADECE JSON döndür.
 # ═══════════════════════════════════════════════════════════════════════════════
 
 def json_temizle(text):
-    """AI'dan gelen JSON'u temizle ve parse et - Geliştirilmiş versiyon"""
-    if not text:
-        return None
-    
-    original_text = text  # Debug için sakla
-    
-    # 1. Markdown code block temizliği
-    if '```json' in text:
-        try:
-            text = text.split('```json')[1].split('```')[0]
-        except:
-            pass
-    elif '```' in text:
-        parts = text.split('```')
-        for part in parts:
-            if '{' in part and '}' in part:
-                text = part
-                break
-    
-    # 2. "json" prefix temizliği
-    text = text.strip()
-    if text.lower().startswith('json'):
-        text = text[4:].strip()
-    
-    # 3. JSON başlangıç ve bitiş bul
-    start = text.find('{')
-    end = text.rfind('}')
-    
-    if start < 0 or end < 0 or end <= start:
-        print(f"   ⚠️ JSON bulunamadı: {text[:100]}...")
-        return None
-    
-    text = text[start:end+1]
-    
-    # 4. String içindeki sorunlu karakterleri düzelt
-    # Önce tüm escape edilmemiş newline'ları temizle
-    # JSON string içinde \n olmalı, raw newline değil
-    
-    # Kontrol karakterlerini temizle (tab, newline vb.)
-    text = text.replace('\t', ' ')
-    text = text.replace('\r\n', ' ')
-    text = text.replace('\r', ' ')
-    text = text.replace('\n', ' ')
-    
-    # Çoklu boşlukları tek boşluğa indir
-    text = re.sub(r'\s+', ' ', text)
-    
-    # 5. Trailing comma temizliği
-    text = re.sub(r',\s*}', '}', text)
-    text = re.sub(r',\s*\]', ']', text)
-    
-    # 6. İlk deneme
-    try:
-        return json.loads(text)
-    except json.JSONDecodeError as e1:
-        pass
-    
-    # 7. Daha agresif temizleme - kontrol karakterleri
-    try:
-        # ASCII olmayan kontrol karakterlerini temizle
-        text = re.sub(r'[\x00-\x1f\x7f-\x9f]', ' ', text)
-        text = re.sub(r'\s+', ' ', text)
-        return json.loads(text)
-    except json.JSONDecodeError as e2:
-        pass
-    
-    # 8. Son çare - string değerleri düzelt
+    """AI'dan gelen JSON'u tek geçişte onar ve parse et (json_extract)"""
+    sonuc = extract_json(text)
+    if sonuc is None and text:
+        print(f"   ⚠️ JSON parse hatası: {text[:80]}...")
+    return sonuc
+
+# ═══════════════════════════════════════════════════════════════════════════════
+# GEMINI ÇAĞRISI (PAYLAŞILAN KOTA)
+# ═══════════════════════════════════════════════════════════════════════════════
+
+def gemini_uret(prompt, **ayarlar):
+    """Paylaşılan token-bucket kovasından (rate_limiter) izin alıp Gemini'ye sor"""
+    rate_limiter.acquire('text', GEMINI_API_KEY)
     try:
-        # String içindeki escape edilmemiş tırnakları düzelt
-        # Bu riskli ama bazen çalışıyor
-        def fix_strings(match):
-            s = match.group(1)
-            # İç tırnakları escape et
-            s = s.replace('\\"', '@@QUOTE@@')
-            s = s.replace('"', '\\"')
-            s = s.replace('@@QUOTE@@', '\\"')
-            return '"' + s + '"'
-        
-        # Çift tırnak içindeki stringleri bul ve düzelt
-        fixed = re.sub(r'"([^"]*)"', fix_strings, text)
-        return json.loads(fixed)
-    except:
-        pass
-    
-    print(f"   ⚠️ JSON parse hatası: {text[:80]}...")
-    return None
+        return gemini_client.models.generate_content(
+            model='gemini-2.0-flash',
+            contents=prompt,
+            config=types.GenerateContentConfig(**ayarlar)
+        ).text.strip()
+    except Exception as e:
+        rate_limiter.penalize_on_quota('text', GEMINI_API_KEY, e)
+        raise
 
 # ═══════════════════════════════════════════════════════════════════════════════
 # COT ÇÖZÜM OLUŞTUR
@@ -1043,16 +1016,13 @@ Problem tanımında şunlar MUTLAKA yer almalı:
     "kontrol": "[Doğrulama işlemi]"
 }}'''
 
-        response = gemini_client.models.generate_content(
-            model='gemini-2.0-flash',
-            contents=prompt,
-            config=types.GenerateContentConfig(
-                temperature=0.7,
-                max_output_tokens=3000,
-                response_mime_type="application/json"
-            )
+        return llm_cache.cached_call(
+            'gemini-2.0-flash', prompt,
+            {'temperature': 0.7, 'max_output_tokens': 3000, 'response_mime_type': 'application/json'},
+            lambda: gemini_uret(prompt, temperature=0.7, max_output_tokens=3000,
+                                response_mime_type="application/json"),
+            parse=json_temizle
         )
-        return json_temizle(response.text.strip())
         
     except Exception as e:
         print(f"   ⚠️ CoT Hata: {str(e)[:50]}")
@@ -1111,18 +1081,14 @@ Bu hazır çözümü kullanarak {'ÇOKTAN SEÇMELİ' if soru_tipi == 'coktan_sec
 - String değerlerde satır sonu kullanma, tek satırda yaz
 - Markdown code block kullanma'''
 
-        response = gemini_client.models.generate_content(
-            model='gemini-2.0-flash',
-            contents=prompt,
-            config=types.GenerateContentConfig(
-                temperature=0.7,
-                max_output_tokens=3500,
-                response_mime_type="application/json"
-            )
+        soru = llm_cache.cached_call(
+            'gemini-2.0-flash', prompt,
+            {'temperature': 0.7, 'max_output_tokens': 3500, 'response_mime_type': 'application/json'},
+            lambda: gemini_uret(prompt, temperature=0.7, max_output_tokens=3500,
+                                response_mime_type="application/json"),
+            parse=json_temizle
         )
         
-        soru = json_temizle(response.text.strip())
-        
         if not soru:
             return None
         
@@ -1148,18 +1114,21 @@ def deepseek_dogrula(soru):
         return {'gecerli': True, 'puan': 75, 'aciklama': 'DeepSeek devre dışı'}
     
     try:
-        response = deepseek.chat.completions.create(
-            model='deepseek-chat',
-            messages=[
-                {'role': 'system', 'content': DEEPSEEK_DOGRULAMA_PROMPT},
-                {'role': 'user', 'content': f'Bu PISA sorusunu değerlendir:\n\n{json.dumps(soru, ensure_ascii=False, indent=2)}'}
-            ],
-            max_tokens=1500,
-            timeout=API_TIMEOUT
+        kullanici_mesaji = f'Bu PISA sorusunu değerlendir:\n\n{json.dumps(soru, ensure_ascii=False, indent=2)}'
+        result = llm_cache.cached_call(
+            'deepseek-chat', DEEPSEEK_DOGRULAMA_PROMPT + '\n' + kullanici_mesaji, {'max_tokens': 1500},
+            lambda: deepseek.chat.completions.create(
+                model='deepseek-chat',
+                messages=[
+                    {'role': 'system', 'content': DEEPSEEK_DOGRULAMA_PROMPT},
+                    {'role': 'user', 'content': kullanici_mesaji}
+                ],
+                max_tokens=1500,
+                timeout=API_TIMEOUT
+            ).choices[0].message.content,
+            parse=json_temizle
         )
         
-        result = json_temizle(response.choices[0].message.content)
-        
         if result:
             return result
         return {'gecerli': False, 'puan': 0, 'aciklama': 'Parse hatası'}
@@ -1205,11 +1174,8 @@ def supabase_kaydet(soru, cot_kullanildi=True):
         # Boş değerleri temizle
         kayit = {k: v for k, v in kayit.items() if v is not None and v != ''}
         
-        result = supabase.table('pisa_soru_havuzu').insert(kayit).execute()
-        
-        if result.data:
-            return result.data[0].get('id')
-        return None
+        # Tampona ekle - id flush sonrası PendingInsert üzerinden çözülür
+        return kayit_tamponu.add(kayit)
         
     except Exception as e:
         print(f"   ⚠️ Supabase hatası: {str(e)[:50]}")
@@ -1265,6 +1231,9 @@ def tek_soru_uret(params):
     """Tek bir PISA sorusu üret"""
     
     for deneme in range(MAX_DENEME):
+        # Altyapı hatasıyla yarım kalan deneme LLM yanıtlarını önbellekten alır;
+        # içerik reddedilirse veya soru kaydedilirse yanıtlar silinir
+        llm_cache.begin_attempt()
         try:
             # Adım 1: CoT ile çözüm oluştur
             if COT_AKTIF:
@@ -1285,11 +1254,13 @@ def tek_soru_uret(params):
             tamlik_ok, tamlik_mesaj = senaryo_veri_tamligini_dogrula(soru)
             if not tamlik_ok:
                 print(f"   ⚠️ Veri eksikliği: {tamlik_mesaj} (deneme {deneme+1})")
+                llm_cache.discard_attempt()
                 continue
             
             # Adım 4: Benzersizlik kontrolü
             if not benzersiz_mi(soru):
                 print(f"   ⚠️ Tekrar soru (deneme {deneme+1})")
+                llm_cache.discard_attempt()
                 continue
             
             # Adım 5: DeepSeek doğrulama
@@ -1297,13 +1268,22 @@ def tek_soru_uret(params):
             
             if DEEPSEEK_DOGRULAMA and dogrulama.get('puan', 0) < MIN_DEEPSEEK_PUAN:
                 print(f"   ⚠️ Düşük puan: {dogrulama.get('puan', 0)} (deneme {deneme+1})")
+                llm_cache.discard_attempt()
                 continue
             
-            # Adım 6: Kaydet
+            # Adım 6: Kaydet - imza kabul anında ayrılır, böylece tamponda bekleyen
+            # sorular da benzersiz_mi'de görünür; başarısız insert imzayı geri alır
+            imza_onayla = imza_ayir(soru)
+            if imza_onayla is None:
+                print(f"   ⚠️ Tekrar soru (deneme {deneme+1})")
+                llm_cache.discard_attempt()
+                continue
             soru_id = supabase_kaydet(soru, cot_kullanildi=COT_AKTIF)
+            on_resolved(soru_id, imza_onayla)
             
-            if soru_id:
-                hash_kaydet(soru)
+            if soru_id is not None:
+                # Denemenin LLM yanıtları kayıt kesinleşince (flush sonrası) silinir
+                on_resolved(soru_id, llm_cache.detach_attempt())
                 return {
                     'success': True,
                     'id': soru_id,
@@ -1372,17 +1352,34 @@ def toplu_uret(adet):
     print(f"   DeepSeek: {'✅ AKTİF (Min: ' + str(MIN_DEEPSEEK_PUAN) + ')' if DEEPSEEK_DOGRULAMA else '❌ DEVRE DIŞI'}")
     print(f"{'='*70}\n")
     
-    basarili = 0
-    dogrulanan = 0
-    toplam_puan = 0
+    uretilen = 0
+    # Kayıt sonuçları flush sonrası gelir; sayaçlar on_resolved ile güncellenir
+    sayac = {'basarili': 0, 'dogrulanan': 0, 'toplam_puan': 0}
     baslangic = time.time()
     
+    def kayit_sonucu(kayit_id, puan):
+        if kayit_id is None:
+            return
+        sayac['basarili'] += 1
+        if puan:
+            sayac['dogrulanan'] += 1
+            sayac['toplam_puan'] += puan
+    
     # Kombinasyonları oluştur ve karıştır
     kombinasyonlar = kombinasyonlar_olustur()
     random.shuffle(kombinasyonlar)
     
+    # Önceki çalıştırmalarda yazılamayan kayıtları tekrar gönder
+    kayit_tamponu.replay_journal()
+    
+    # Önceki çalıştırmaların soru imzalarını yükle
+    try:
+        print(f"   🔐 İmza deposu: {imza_deposu.load(backfill=mevcut_soru_imzalari)} soru")
+    except Exception as e:
+        print(f"   ⚠️ İmza deposu yüklenemedi: {str(e)[:50]}")
+    
     for params in kombinasyonlar:
-        if basarili >= adet:
+        if uretilen >= adet:
             break
         
         # Bağlam seç
@@ -1391,7 +1388,7 @@ def toplu_uret(adet):
         icerik_ad = params['icerik_kategorisi']['ad'].split('(')[0].strip()
         baglam_tema = params['baglam']['tema'].replace('_', ' ')
         
-        print(f"\n[{basarili+1}/{adet}] {icerik_ad} > {params['alt_konu']}")
+        print(f"\n[{uretilen+1}/{adet}] {icerik_ad} > {params['alt_konu']}")
         print(f"   📚 {params['sinif_ad']} | PISA {params['pisa_seviye']} | {params['soru_tipi']}")
         print(f"   🌍 {params['baglam']['kategori_ad']} > {baglam_tema}")
         
@@ -1399,13 +1396,11 @@ def toplu_uret(adet):
             sonuc = tek_soru_uret(params)
             
             if sonuc['success']:
-                basarili += 1
+                uretilen += 1
                 puan = sonuc.get('puan')
-                if puan:
-                    dogrulanan += 1
-                    toplam_puan += puan
+                on_resolved(sonuc['id'], lambda kayit_id, puan=puan: kayit_sonucu(kayit_id, puan))
                 
-                print(f"   ✅ Başarılı! ID: {sonuc['id'][:8]}...")
+                print(f"   ✅ Başarılı! Kayıt tamponuna alındı")
                 if puan:
                     print(f"      📊 Kalite Puanı: {puan}/100")
             else:
@@ -1413,9 +1408,15 @@ def toplu_uret(adet):
                 
         except Exception as e:
             print(f"   ❌ Hata: {str(e)[:50]}")
-        
-        time.sleep(BEKLEME)
     
+    # Tamponda kalan kayıtları ve imzaları yaz
+    tampon = kayit_tamponu.close()
+    imza_deposu.flush()
+    if tampon['journaled'] or tampon['dead']:
+        print(f"   ⚠️ {tampon['journaled'] + tampon['dead']} soru kaydedilemedi "
+              f"({tampon['journaled']} journal'a, {tampon['dead']} dead-letter dosyasına yazıldı)")
+    
+    basarili, dogrulanan, toplam_puan = sayac['basarili'], sayac['dogrulanan'], sayac['toplam_puan']
     sure = time.time() - baslangic
     ort_puan = toplam_puan / dogrulanan if dogrulanan > 0 else 0
     
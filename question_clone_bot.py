@@ -21,12 +21,20 @@ import math
 import time
 import base64
 import random
+import hashlib
 import logging
+import threading
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor, wait
 from datetime import datetime
 from typing import Optional, Dict, List, Tuple, Any
 
 from supabase import create_client, Client
 
+import rate_limiter
+from bulk_writer import BulkInsertBuffer, PendingInsert, on_resolved, resolve_id
+from json_extract import extract_json
+
 try:
     from google import genai
     from google.genai import types
@@ -55,6 +63,18 @@ class Config:
     
     BATCH_SIZE = int(os.environ.get('BATCH_SIZE', '5'))
     VARIATIONS_PER_TEMPLATE = int(os.environ.get('VARIATIONS', '3'))  # Her şablondan kaç varyasyon
+    BULK_INSERT_SIZE = int(os.environ.get('BULK_INSERT_SIZE', '10'))  # Tek istekte yazılacak soru sayısı
+    BULK_INSERT_WAIT = float(os.environ.get('BULK_INSERT_WAIT', '5'))  # Tamponun en uzun bekleme süresi (sn)
+    
+    # Eşzamanlılık - tüm worker'lar rate_limiter'daki aynı kota kovalarını paylaşır
+    TEMPLATE_WORKERS = int(os.environ.get('CLONE_TEMPLATE_WORKERS', '2'))  # Önden indirilip analiz edilen şablon
+    VARIATION_WORKERS = int(os.environ.get('CLONE_VARIATION_WORKERS', '3'))  # Aynı anda üretilen varyasyon
+    
+    # Şablon görselleri ve Vision analizleri için yerel önbellek
+    CACHE_DIR = os.environ.get('CLONE_CACHE_DIR', '.clone_cache')
+    CACHE_TTL_HOURS = float(os.environ.get('CLONE_CACHE_TTL_HOURS', '24'))  # Bu süreden sonra URL ETag/Last-Modified ile doğrulanır
+    CACHE_MAX_AGE_DAYS = float(os.environ.get('CLONE_CACHE_MAX_AGE_DAYS', '30'))  # Bu kadar kullanılmayan kayıt silinir
+    CACHE_MAX_MB = float(os.environ.get('CLONE_CACHE_MAX_MB', '500'))  # images/ üst sınırı (en eski kullanılan silinir)
     
     # Kalite kontrol ayarları
     QUALITY_THRESHOLD = int(os.environ.get('QUALITY_THRESHOLD', '7'))  # Minimum kabul puanı (1-10)
@@ -74,6 +94,12 @@ class SupabaseManager:
         if not Config.SUPABASE_URL or not Config.SUPABASE_KEY:
             raise ValueError("Supabase credentials eksik!")
         self.client = create_client(Config.SUPABASE_URL, Config.SUPABASE_KEY)
+        self.writer = BulkInsertBuffer(
+            'question_bank',
+            lambda rows: self.client.table('question_bank').insert(rows).execute().data,
+            max_rows=Config.BULK_INSERT_SIZE,
+            max_wait=Config.BULK_INSERT_WAIT
+        )
         logger.info("Supabase bağlantısı kuruldu")
     
     def get_template_questions(self, limit: int = 10) -> List[Dict]:
@@ -152,7 +178,7 @@ class SupabaseManager:
         except Exception as e:
             logger.error(f"Template güncelleme hatası: {e}")
     
-    def save_generated_question(self, question_data: Dict) -> Optional[str]:
+    def save_generated_question(self, question_data: Dict) -> Optional[PendingInsert]:
         """Üretilen soruyu kaydet - question_bank tablosuna"""
         try:
             # Senin question_bank yapın:
@@ -196,17 +222,20 @@ class SupabaseManager:
             # None değerleri temizle
             insert_data = {k: v for k, v in insert_data.items() if v is not None}
             
-            result = self.client.table('question_bank').insert(insert_data).execute()
-            
-            if result.data:
-                return result.data[0].get('id')
-            return None
+            # Tampona ekle - id flush sonrası PendingInsert üzerinden çözülür
+            return self.writer.add(insert_data)
         except Exception as e:
             logger.error(f"Soru kaydetme hatası: {e}")
             import traceback
             logger.error(traceback.format_exc())
             return None
     
+    def finish_bulk_insert(self) -> Dict[str, int]:
+        """Tamponda kalan soruları yaz"""
+        stats = self.writer.close()
+        logger.info(f"Toplu kayıt: {stats['inserted']} soru, {stats['requests']} istek")
+        return stats
+    
     def _convert_difficulty(self, difficulty: str) -> int:
         """Zorluk seviyesini string'den integer'a çevir (1-5)"""
         mapping = {
@@ -241,15 +270,33 @@ class SupabaseManager:
             logger.error(f"Upload hatası: {e}")
             return None
     
-    def download_image(self, image_url: str) -> Optional[bytes]:
-        """URL'den görsel indir"""
+    def download_image(self, image_url: str, validators: Dict = None) -> Tuple[Optional[bytes], Dict]:
+        """URL'den görsel indir - (görsel, {'etag', 'last_modified'})
+
+        validators (önbellekteki ETag/Last-Modified) verilirse koşullu istek
+        atılır; görsel değişmediyse (304) görsel None ve not_modified=True döner.
+        """
+        import urllib.error
+        import urllib.request
+        request = urllib.request.Request(image_url)
+        if validators and validators.get('etag'):
+            request.add_header('If-None-Match', validators['etag'])
+        if validators and validators.get('last_modified'):
+            request.add_header('If-Modified-Since', validators['last_modified'])
         try:
-            import urllib.request
-            with urllib.request.urlopen(image_url) as response:
-                return response.read()
+            with urllib.request.urlopen(request) as response:
+                return response.read(), {
+                    'etag': response.headers.get('ETag'),
+                    'last_modified': response.headers.get('Last-Modified'),
+                }
+        except urllib.error.HTTPError as e:
+            if e.code == 304:
+                return None, {'not_modified': True}
+            logger.error(f"Görsel indirme hatası: {e}")
+            return None, {}
         except Exception as e:
             logger.error(f"Görsel indirme hatası: {e}")
-            return None
+            return None, {}
 
 
 class VisionAnalyzer:
@@ -335,29 +382,15 @@ SADECE JSON döndür!"""
             self.client = genai.Client(api_key=api_key)
         else:
             genai.configure(api_key=api_key)
-        self.request_count = 0
-        self.last_request_time = 0
         logger.info("VisionAnalyzer başlatıldı")
     
     def _rate_limit(self):
-        """Rate limiting"""
-        current_time = time.time()
-        if current_time - self.last_request_time > 60:
-            self.request_count = 0
-            self.last_request_time = current_time
-        
-        if self.request_count >= 5:
-            wait_time = 65 - (current_time - self.last_request_time)
-            if wait_time > 0:
-                logger.info(f"⏳ Vision rate limit - {wait_time:.0f}s bekleniyor...")
-                time.sleep(wait_time)
-                self.request_count = 0
-                self.last_request_time = time.time()
-        
-        if self.request_count > 0:
-            time.sleep(4)
-        
-        self.request_count += 1
+        """Rate limiting - paylaşılan token-bucket (vision bütçesi)"""
+        rate_limiter.acquire("vision", self.api_key)
+    
+    def cache_version(self) -> str:
+        """Model veya prompt değişince önbellekteki analizler geçersiz olsun"""
+        return hashlib.sha256(f"{Config.GEMINI_VISION}\n{self.ANALYSIS_PROMPT}".encode('utf-8')).hexdigest()[:16]
     
     def analyze_image(self, image_bytes: bytes) -> Optional[Dict]:
         """Fotoğrafı analiz et"""
@@ -397,21 +430,198 @@ SADECE JSON döndür!"""
                 ])
                 text = response.text
             
-            # JSON parse
-            text = text.strip()
-            if text.startswith('```'):
-                lines = text.split('\n')
-                text = '\n'.join(lines[1:-1])
-                if text.startswith('json'):
-                    text = text[4:].strip()
-            
-            return json.loads(text)
+            result = extract_json(text)
+            if result is None:
+                logger.error(f"Vision yanıtı JSON değil: {text[:100]}")
+            return result
             
         except Exception as e:
             logger.error(f"Vision analiz hatası: {e}")
             return None
 
 
+class TemplateCache:
+    """
+    Şablon görselleri ve Vision analizleri için yerel önbellek.
+
+    - urls.json: görsel URL'si -> içerik SHA-256'sı + ETag/Last-Modified,
+      son doğrulama ve son kullanım zamanı
+    - images/<sha>.bin: indirilen görsel
+    - analysis/<sha>.json: analiz + model/prompt sürümü (değişince geçersiz)
+
+    URL kaydı CACHE_TTL_HOURS boyunca doğrudan kullanılır; sonra koşullu
+    istekle doğrulanır (aynı URL'de değişen görsel yeniden indirilir).
+    CACHE_MAX_AGE_DAYS kullanılmayan kayıtlar ve images/ CACHE_MAX_MB'ı
+    aşınca en eski kullanılan görseller (analizleriyle) silinir.
+    Yarıda kalan veya tekrar kuyruğa giren şablonlarda indirme ve Vision
+    çağrısı tamamen atlanır.
+    """
+
+    def __init__(self, analysis_version: str, directory: str = None):
+        self.directory = directory or Config.CACHE_DIR
+        self.analysis_version = analysis_version
+        self.ttl = Config.CACHE_TTL_HOURS * 3600
+        self.max_age = Config.CACHE_MAX_AGE_DAYS * 86400
+        self.max_bytes = Config.CACHE_MAX_MB * 1024 * 1024
+        self._index_path = os.path.join(self.directory, 'urls.json')
+        self._lock = threading.Lock()
+        self.urls = {}
+        self.stats = {'image_hits': 0, 'analysis_hits': 0, 'evicted': 0}
+        if os.path.exists(self._index_path):
+            try:
+                with open(self._index_path, encoding='utf-8') as f:
+                    self.urls = json.load(f)
+            except (OSError, ValueError) as e:
+                logger.warning(f"Şablon önbellek indeksi okunamadı: {e}")
+        # Eski biçim (URL -> sha) kayıtları ilk kullanımda doğrulanır
+        now = time.time()
+        for url, entry in list(self.urls.items()):
+            if isinstance(entry, str):
+                self.urls[url] = {'sha': entry, 'checked_at': 0, 'used_at': now}
+        try:
+            with self._lock:
+                self._evict()
+        except OSError as e:
+            logger.warning(f"Şablon önbelleği temizlenemedi: {e}")
+
+    def _path(self, kind: str, image_hash: str, ext: str) -> str:
+        return os.path.join(self.directory, kind, f"{image_hash}.{ext}")
+
+    @staticmethod
+    def _write(path: str, data: bytes):
+        """Geçici dosya + yer değiştirme (paralel worker'lar için thread'e özel tmp)"""
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp = f"{path}.{threading.get_ident()}.tmp"
+        with open(tmp, 'wb') as f:
+            f.write(data)
+        os.replace(tmp, path)
+
+    def _save_index(self):
+        self._write(self._index_path, json.dumps(self.urls, ensure_ascii=False).encode('utf-8'))
+
+    def _read_image(self, image_url: str, fresh_only: bool) -> Tuple[Optional[bytes], Optional[str]]:
+        entry = self.urls.get(image_url)
+        if not entry:
+            return None, None
+        now = time.time()
+        if fresh_only and now - entry.get('checked_at', 0) > self.ttl:
+            return None, None
+        image_hash = entry['sha']
+        try:
+            with open(self._path('images', image_hash, 'bin'), 'rb') as f:
+                image_bytes = f.read()
+        except OSError:
+            return None, None
+        if hashlib.sha256(image_bytes).hexdigest() != image_hash:
+            return None, None
+        with self._lock:
+            entry['used_at'] = now
+            if not fresh_only:
+                entry['checked_at'] = now
+            self.stats['image_hits'] += 1
+            try:
+                self._save_index()
+            except OSError as e:
+                logger.warning(f"Şablon önbellek indeksi yazılamadı: {e}")
+        return image_bytes, image_hash
+
+    def get_image(self, image_url: str) -> Tuple[Optional[bytes], Optional[str]]:
+        """URL son CACHE_TTL_HOURS içinde doğrulandıysa (görsel, sha256), yoksa (None, None)"""
+        return self._read_image(image_url, fresh_only=True)
+
+    def validators(self, image_url: str) -> Optional[Dict]:
+        """Süresi dolmuş kayıt için koşullu istek başlıkları (ETag/Last-Modified)"""
+        entry = self.urls.get(image_url)
+        if not entry or not (entry.get('etag') or entry.get('last_modified')):
+            return None
+        return {'etag': entry.get('etag'), 'last_modified': entry.get('last_modified')}
+
+    def revalidated(self, image_url: str) -> Tuple[Optional[bytes], Optional[str]]:
+        """Sunucu 304 döndü: önbellekteki görseli tazelenmiş olarak döndür"""
+        return self._read_image(image_url, fresh_only=False)
+
+    def put_image(self, image_url: str, image_bytes: bytes, validators: Dict = None) -> str:
+        """Görseli içerik hash'iyle sakla, URL indeksini güncelle; sha256 döndür"""
+        image_hash = hashlib.sha256(image_bytes).hexdigest()
+        validators = validators or {}
+        now = time.time()
+        try:
+            path = self._path('images', image_hash, 'bin')
+            if not os.path.exists(path):
+                self._write(path, image_bytes)
+            with self._lock:
+                self.urls[image_url] = {
+                    'sha': image_hash,
+                    'etag': validators.get('etag'),
+                    'last_modified': validators.get('last_modified'),
+                    'checked_at': now,
+                    'used_at': now,
+                }
+                self._evict()
+        except OSError as e:
+            logger.warning(f"Şablon görseli önbelleğe yazılamadı: {e}")
+        return image_hash
+
+    def _evict(self):
+        """Yaşlı URL kayıtlarını ve boyut sınırını aşan en eski görselleri sil (kilit altında)"""
+        now = time.time()
+        for url, entry in list(self.urls.items()):
+            if now - entry.get('used_at', 0) > self.max_age:
+                del self.urls[url]
+        
+        last_used: Dict[str, float] = {}
+        for entry in self.urls.values():
+            last_used[entry['sha']] = max(last_used.get(entry['sha'], 0), entry.get('used_at', 0))
+        
+        sizes: Dict[str, int] = {}
+        images_dir = os.path.join(self.directory, 'images')
+        if os.path.isdir(images_dir):
+            for name in os.listdir(images_dir):
+                if name.endswith('.bin'):
+                    sizes[name[:-4]] = os.path.getsize(os.path.join(images_dir, name))
+        
+        # Hiçbir URL'nin göstermediği görseller önce, sonra en eski kullanılanlar
+        evicted = {image_hash for image_hash in sizes if image_hash not in last_used}
+        total = sum(size for image_hash, size in sizes.items() if image_hash not in evicted)
+        for image_hash in sorted(last_used, key=last_used.get):
+            if total <= self.max_bytes:
+                break
+            if image_hash in sizes:
+                evicted.add(image_hash)
+                total -= sizes[image_hash]
+        
+        for image_hash in evicted:
+            for kind, ext in (('images', 'bin'), ('analysis', 'json')):
+                try:
+                    os.remove(self._path(kind, image_hash, ext))
+                except OSError:
+                    pass
+        if evicted:
+            self.urls = {url: entry for url, entry in self.urls.items() if entry['sha'] not in evicted}
+            self.stats['evicted'] += len(evicted)
+        self._save_index()
+
+    def get_analysis(self, image_hash: str) -> Optional[Dict]:
+        """Aynı içerik + aynı model/prompt için kayıtlı analiz"""
+        try:
+            with open(self._path('analysis', image_hash, 'json'), encoding='utf-8') as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if entry.get('version') != self.analysis_version:
+            return None
+        with self._lock:
+            self.stats['analysis_hits'] += 1
+        return entry.get('analysis')
+
+    def put_analysis(self, image_hash: str, analysis: Dict):
+        try:
+            data = json.dumps({'version': self.analysis_version, 'analysis': analysis}, ensure_ascii=False)
+            self._write(self._path('analysis', image_hash, 'json'), data.encode('utf-8'))
+        except (OSError, TypeError) as e:
+            logger.warning(f"Vision analizi önbelleğe yazılamadı: {e}")
+
+
 class QuestionGenerator:
     """Benzer soru üretici - Kazanım bazlı"""
     
@@ -580,29 +790,11 @@ SADECE JSON döndür!"""
             self.client = genai.Client(api_key=api_key)
         else:
             genai.configure(api_key=api_key)
-        self.request_count = 0
-        self.last_request_time = 0
         logger.info("QuestionGenerator başlatıldı")
     
     def _rate_limit(self):
-        """Rate limiting"""
-        current_time = time.time()
-        if current_time - self.last_request_time > 60:
-            self.request_count = 0
-            self.last_request_time = current_time
-        
-        if self.request_count >= 5:
-            wait_time = 65 - (current_time - self.last_request_time)
-            if wait_time > 0:
-                logger.info(f"⏳ Generator rate limit - {wait_time:.0f}s bekleniyor...")
-                time.sleep(wait_time)
-                self.request_count = 0
-                self.last_request_time = time.time()
-        
-        if self.request_count > 0:
-            time.sleep(4)
-        
-        self.request_count += 1
+        """Rate limiting - paylaşılan token-bucket (text bütçesi)"""
+        rate_limiter.acquire("text", self.api_key)
     
     def generate_variation(self, analysis: Dict, kazanim_info: Dict, difficulty: str = None) -> Optional[Dict]:
         """Analiz ve kazanım bilgisine dayanarak yeni soru üret - BLOOM SEVİYESİNİ KORU"""
@@ -671,15 +863,9 @@ SADECE JSON döndür!"""
                 response = model.generate_content(prompt)
                 text = response.text
             
-            # JSON parse
-            text = text.strip()
-            if text.startswith('```'):
-                lines = text.split('\n')
-                text = '\n'.join(lines[1:-1])
-                if text.startswith('json'):
-                    text = text[4:].strip()
-            
-            result = json.loads(text)
+            result = extract_json(text)
+            if result is None:
+                raise ValueError(f"Soru üretim yanıtı JSON değil: {text[:100]}")
             
             # Kazanım bilgilerini sonuca ekle
             result['kazanim_id'] = kazanim_info.get('id')
@@ -874,29 +1060,11 @@ class ImageGenerator:
         self.api_key = api_key
         if NEW_GENAI:
             self.client = genai.Client(api_key=api_key)
-        self.request_count = 0
-        self.last_request_time = 0
         logger.info("ImageGenerator başlatıldı")
     
     def _rate_limit(self):
-        """Rate limiting - Image gen için daha yavaş"""
-        current_time = time.time()
-        if current_time - self.last_request_time > 60:
-            self.request_count = 0
-            self.last_request_time = current_time
-        
-        if self.request_count >= 4:
-            wait_time = 65 - (current_time - self.last_request_time)
-            if wait_time > 0:
-                logger.info(f"⏳ ImageGen rate limit - {wait_time:.0f}s bekleniyor...")
-                time.sleep(wait_time)
-                self.request_count = 0
-                self.last_request_time = time.time()
-        
-        if self.request_count > 0:
-            time.sleep(6)
-        
-        self.request_count += 1
+        """Rate limiting - paylaşılan token-bucket (image bütçesi)"""
+        rate_limiter.acquire("image", self.api_key)
     
     def _build_prompt(self, visual_data: Dict, visual_style: Dict) -> str:
         """Görsel üretim prompt'u oluştur"""
@@ -1391,6 +1559,7 @@ SADECE JSON döndür!"""
             # Base64 encode
             image_b64 = base64.b64encode(image_bytes).decode('utf-8')
             
+            rate_limiter.acquire("vision", self.api_key)
             prompt = self.VALIDATION_PROMPT
             
             if NEW_GENAI:
@@ -1422,15 +1591,9 @@ SADECE JSON döndür!"""
                 ])
                 content = response.text
             
-            # JSON parse
-            content = content.strip()
-            if content.startswith('```'):
-                lines = content.split('\n')
-                content = '\n'.join(lines[1:-1])
-                if content.startswith('json'):
-                    content = content[4:].strip()
-            
-            validation = json.loads(content)
+            validation = extract_json(content)
+            if validation is None:
+                raise ValueError(f"Doğrulama yanıtı JSON değil: {content[:100]}")
             
             # Sorun tespiti
             problems = []
@@ -1536,6 +1699,7 @@ class QuestionCloneBot:
         
         self.supabase = SupabaseManager()
         self.vision = VisionAnalyzer(Config.GEMINI_API_KEY)
+        self.cache = TemplateCache(self.vision.cache_version())
         self.generator = QuestionGenerator(Config.GEMINI_API_KEY)
         self.image_gen = ImageGenerator(Config.GEMINI_API_KEY)
         self.quality_validator = QualityValidator(Config.GEMINI_API_KEY)
@@ -1551,6 +1715,12 @@ class QuestionCloneBot:
             'errors': 0,
             'start_time': datetime.now()
         }
+        self._stats_lock = threading.Lock()
+    
+    def _inc_stat(self, key: str, amount: int = 1):
+        """Thread-safe istatistik sayacı (paralel varyasyon üretimi için)"""
+        with self._stats_lock:
+            self.stats[key] += amount
     
     def run(self):
         """Ana çalışma döngüsü"""
@@ -1565,17 +1735,13 @@ class QuestionCloneBot:
         
         logger.info(f"{len(templates)} şablon soru işlenecek")
         
-        for i, template in enumerate(templates, 1):
-            logger.info(f"\n{'='*40}")
-            logger.info(f"Şablon {i}/{len(templates)}: {template.get('id')}")
-            logger.info(f"{'='*40}")
-            
-            self._process_template(template)
-            
-            # Şablonlar arası bekleme
-            if i < len(templates):
-                logger.info("⏳ Sonraki şablon için 10s bekleniyor...")
-                time.sleep(10)
+        # Önceki çalıştırmalarda yazılamayan soruları tekrar gönder
+        self.supabase.writer.replay_journal()
+        
+        try:
+            self._process_templates(templates)
+        finally:
+            self.supabase.finish_bulk_insert()
         
         # Sonuç raporu
         elapsed = datetime.now() - self.stats['start_time']
@@ -1588,10 +1754,89 @@ class QuestionCloneBot:
         logger.info(f"Reddedilen Görseller: {self.stats['images_rejected']}")
         logger.info(f"Kalite Yeniden Denemeleri: {self.stats['quality_retries']}")
         logger.info(f"Hatalar: {self.stats['errors']}")
+        logger.info(f"Önbellek: {self.cache.stats['image_hits']} görsel, {self.cache.stats['analysis_hits']} analiz")
         logger.info("=" * 60)
     
-    def _process_template(self, template: Dict):
-        """Tek bir şablonu işle - kazanım bazlı"""
+    def _process_templates(self, templates: List[Dict]):
+        """
+        Şablonları boru hattında işle: sonraki şablonlar indirilip analiz
+        edilirken öncekilerin varyasyonları üretilir. Önden hazırlanan ve
+        varyasyonu süren şablon sayısı TEMPLATE_WORKERS ile sınırlıdır; her
+        şablon kendi kayıtları kesinleşir kesinleşmez işaretlenir.
+        Beklemeler sabit sleep yerine paylaşılan rate_limiter kovalarıyla yapılır.
+        """
+        window = max(1, Config.TEMPLATE_WORKERS)
+        queue = iter(enumerate(templates, 1))
+        prepared = deque()
+        in_flight = deque()
+        marked: List[Future] = []
+        
+        with ThreadPoolExecutor(max_workers=window, thread_name_prefix="clone-prep") as prep_pool, \
+                ThreadPoolExecutor(max_workers=Config.VARIATION_WORKERS, thread_name_prefix="clone-var") as var_pool, \
+                ThreadPoolExecutor(max_workers=1, thread_name_prefix="clone-mark") as mark_pool:
+            
+            def fill():
+                # Önden en fazla `window` şablon hazırlanır
+                while len(prepared) < window:
+                    item = next(queue, None)
+                    if item is None:
+                        return
+                    prepared.append((*item, prep_pool.submit(self._prepare_template, item[1])))
+            
+            fill()
+            while prepared:
+                i, template, prep_future = prepared.popleft()
+                fill()
+                
+                # Varyasyonu süren şablonlar da pencereyle sınırlı (görseller bellekte birikmesin)
+                while len(in_flight) >= window:
+                    wait(in_flight.popleft())
+                
+                logger.info(f"\n{'='*40}")
+                logger.info(f"Şablon {i}/{len(templates)}: {template.get('id')}")
+                logger.info(f"{'='*40}")
+                
+                prep = prep_future.result()
+                if not prep:
+                    continue
+                image_bytes, analysis = prep
+                futures = [
+                    var_pool.submit(self._create_variation, template, image_bytes, analysis, v)
+                    for v in range(Config.VARIATIONS_PER_TEMPLATE)
+                ]
+                in_flight.append(futures)
+                self._finish_when_resolved(template, futures, mark_pool, marked)
+            
+            # Son varyasyonlar bitince tampondakileri hemen yaz; şablonlar max_wait beklemesin
+            var_pool.shutdown(wait=True)
+            self.supabase.writer.flush()
+        
+        for future in marked:
+            future.result()
+    
+    def _finish_when_resolved(self, template: Dict, futures: List[Future],
+                              mark_pool: ThreadPoolExecutor, marked: List[Future]):
+        """Varyasyonlar ve kayıtları kesinleşince şablonu diğerlerini beklemeden işaretle"""
+        remaining = len(futures)
+        lock = threading.Lock()
+        
+        def resolved(_):
+            nonlocal remaining
+            with lock:
+                remaining -= 1
+                if remaining:
+                    return
+            marked.append(mark_pool.submit(self._finish_template, template, futures))
+        
+        def variation_done(future: Future):
+            result = future.result() if future.exception() is None else None
+            on_resolved(result, resolved)
+        
+        for future in futures:
+            future.add_done_callback(variation_done)
+    
+    def _prepare_template(self, template: Dict) -> Optional[Tuple[bytes, Dict]]:
+        """Şablon görselini indir ve analiz et - (görsel, analiz) veya None"""
         template_id = template.get('id')
         image_url = template.get('image_url')
         kazanim_id = template.get('kazanim_id')
@@ -1599,119 +1844,167 @@ class QuestionCloneBot:
         
         if not image_url:
             logger.warning(f"[{template_id}] Görsel URL'si yok")
-            return
+            return None
         
         if not kazanim_info:
             logger.warning(f"[{template_id}] Kazanım bilgisi bulunamadı (kazanim_id: {kazanim_id})")
-            return
+            return None
         
         logger.info(f"[{template_id}] 📚 Kazanım: {kazanim_info.get('code')} - {kazanim_info.get('description', '')[:50]}...")
         
         try:
-            # 1. Görseli indir
-            logger.info(f"[{template_id}] 📥 Görsel indiriliyor...")
-            image_bytes = self.supabase.download_image(image_url)
-            
-            if not image_bytes:
-                logger.error(f"[{template_id}] Görsel indirilemedi")
-                self.stats['errors'] += 1
-                return
-            
-            # 2. Görseli analiz et
-            logger.info(f"[{template_id}] 🔍 Görsel analiz ediliyor...")
-            analysis = self.vision.analyze_image(image_bytes)
-            
-            if not analysis:
-                logger.error(f"[{template_id}] Analiz başarısız")
-                self.stats['errors'] += 1
-                return
-            
-            logger.info(f"[{template_id}] ✅ Analiz: tip={analysis.get('question_type')}")
-            
-            # 3. Varyasyonlar üret
-            variations_created = 0
-            
-            for v in range(Config.VARIATIONS_PER_TEMPLATE):
-                logger.info(f"[{template_id}] 📝 Varyasyon {v+1}/{Config.VARIATIONS_PER_TEMPLATE} üretiliyor...")
-                
-                # Zorluk seviyesi varyasyonu
-                difficulty = Config.DIFFICULTY_LEVELS[v % len(Config.DIFFICULTY_LEVELS)]
-                
-                # Yeni soru üret (kazanım bilgisiyle)
-                new_question = self.generator.generate_variation(
-                    analysis=analysis,
-                    kazanim_info=kazanim_info,
-                    difficulty=difficulty
-                )
-                
-                if not new_question:
-                    logger.warning(f"[{template_id}] Varyasyon {v+1} üretilemedi")
-                    continue
-                
-                logger.info(f"[{template_id}] ✅ Soru üretildi: {new_question.get('question_text', '')[:50]}...")
-                
-                # 4. Görsel üret - KALİTE KONTROLÜ İLE
-                visual_data = new_question.get('visual_data', {})
-                visual_style = analysis.get('visual_style', {})
-                question_text = new_question.get('question_text', '')
-                
-                # Kalite kontrollü görsel üretimi
-                image_bytes_new = self._generate_image_with_quality_check(
-                    original_image_bytes=image_bytes,
-                    question_text=question_text,
-                    visual_data=visual_data,
-                    visual_style=visual_style,
-                    original_analysis=analysis,
-                    template_id=template_id
-                )
-                
-                image_url_new = None
-                if image_bytes_new:
-                    filename = f"cloned_{kazanim_info.get('code', 'unknown')}_{template_id}_{v+1}_{int(time.time())}.png"
-                    image_url_new = self.supabase.upload_image(image_bytes_new, filename)
-                    if image_url_new:
-                        self.stats['images_created'] += 1
-                        logger.info(f"[{template_id}] 🖼️ Görsel yüklendi")
-                
-                # 5. Veritabanına kaydet (question_bank yapısına uygun)
-                question_data = {
-                    'question_text': new_question.get('question_text', ''),
-                    'kazanim_id': kazanim_info.get('id'),  # INTEGER
-                    'topic': kazanim_info.get('topic'),  # topic_name
-                    'topic_group': kazanim_info.get('topic'),  # topic_name
-                    'grade_level': kazanim_info.get('grade_level', 8),
-                    'difficulty': difficulty,  # easy/medium/hard -> 1-5'e çevrilecek
-                    'question_type': 'çoktan_seçmeli',
-                    'image_url': image_url_new,
-                    'answer': new_question.get('answer'),  # correct_answer olacak
-                    'options': new_question.get('options', {}),  # JSONB
-                    'solution': new_question.get('solution'),  # solution_text + solution_detailed
-                    'template_id': template_id
-                }
-                
-                saved_id = self.supabase.save_generated_question(question_data)
+            # 1. Görseli indir (daha önce indirildiyse önbellekten)
+            image_bytes, image_hash = self.cache.get_image(image_url)
+            if image_bytes:
+                logger.info(f"[{template_id}] 📦 Görsel önbellekten alındı")
+            else:
+                # Süresi dolmuş kayıt koşullu istekle doğrulanır; değiştiyse yeniden indirilir
+                validators = self.cache.validators(image_url)
+                logger.info(f"[{template_id}] 📥 Görsel {'doğrulanıyor' if validators else 'indiriliyor'}...")
+                image_bytes, response_meta = self.supabase.download_image(image_url, validators)
+                if response_meta.get('not_modified'):
+                    image_bytes, image_hash = self.cache.revalidated(image_url)
+                    if image_bytes:
+                        logger.info(f"[{template_id}] 📦 Görsel değişmemiş, önbellekten alındı")
+                    else:
+                        image_bytes, response_meta = self.supabase.download_image(image_url)
                 
-                if saved_id:
-                    variations_created += 1
-                    self.stats['questions_generated'] += 1
-                    logger.info(f"[{template_id}] 💾 Soru kaydedildi: {saved_id}")
-                    logger.info(f"    📚 Kazanım: {kazanim_info.get('code')}")
-                    logger.info(f"    📖 Konu: {kazanim_info.get('topic')} > {kazanim_info.get('subtopic')}")
+                if not image_bytes:
+                    logger.error(f"[{template_id}] Görsel indirilemedi")
+                    self._inc_stat('errors')
+                    return None
+                if not image_hash:
+                    image_hash = self.cache.put_image(image_url, image_bytes, response_meta)
+            
+            # 2. Görseli analiz et (aynı içerik daha önce analiz edildiyse önbellekten)
+            analysis = self.cache.get_analysis(image_hash)
+            if analysis:
+                logger.info(f"[{template_id}] 📦 Analiz önbellekten alındı")
+            else:
+                logger.info(f"[{template_id}] 🔍 Görsel analiz ediliyor...")
+                analysis = self.vision.analyze_image(image_bytes)
                 
-                # Varyasyonlar arası bekleme
-                time.sleep(5)
-            
-            # Şablonu işlendi olarak işaretle
-            self.supabase.mark_template_processed(template_id, variations_created)
-            self.stats['templates_processed'] += 1
+                if not analysis:
+                    logger.error(f"[{template_id}] Analiz başarısız")
+                    self._inc_stat('errors')
+                    return None
+                self.cache.put_analysis(image_hash, analysis)
             
-            logger.info(f"[{template_id}] ✅ Tamamlandı: {variations_created} varyasyon üretildi")
+            logger.info(f"[{template_id}] ✅ Analiz: tip={analysis.get('question_type')}")
+            return image_bytes, analysis
             
         except Exception as e:
             logger.error(f"[{template_id}] Hata: {e}")
             import traceback
             logger.error(traceback.format_exc())
-            self.stats['errors'] += 1
+            self._inc_stat('errors')
+            return None
+    
+    def _finish_template(self, template: Dict, futures: List[Future]):
+        """Şablonun varyasyon sonuçlarını topla ve şablonu işlendi olarak işaretle"""
+        template_id = template.get('id')
+        variations_created = 0
+        failed = False
+        for future in futures:
+            try:
+                # Sadece veritabanına gerçekten yazılan varyasyonlar sayılır
+                if resolve_id(future.result()) is not None:
+                    variations_created += 1
+            except Exception as e:
+                logger.error(f"[{template_id}] Hata: {e}")
+                failed = True
+        
+        # Beklenmeyen hata: şablon sonraki çalıştırmada tekrar denenir
+        if failed:
+            self._inc_stat('errors')
+            return
+        
+        self.supabase.mark_template_processed(template_id, variations_created)
+        self._inc_stat('templates_processed')
+        
+        logger.info(f"[{template_id}] ✅ Tamamlandı: {variations_created} varyasyon üretildi")
+    
+    def _create_variation(self, template: Dict, image_bytes: bytes, analysis: Dict, v: int) -> Optional[PendingInsert]:
+        """Tek varyasyon üret: soru, kalite kontrollü görsel, kayıt - bekleyen kayıt veya None"""
+        template_id = template.get('id')
+        kazanim_info = template.get('kazanim_info', {})
+        
+        logger.info(f"[{template_id}] 📝 Varyasyon {v+1}/{Config.VARIATIONS_PER_TEMPLATE} üretiliyor...")
+        
+        # Zorluk seviyesi varyasyonu
+        difficulty = Config.DIFFICULTY_LEVELS[v % len(Config.DIFFICULTY_LEVELS)]
+        
+        # Yeni soru üret (kazanım bilgisiyle)
+        new_question = self.generator.generate_variation(
+            analysis=analysis,
+            kazanim_info=kazanim_info,
+            difficulty=difficulty
+        )
+        
+        if not new_question:
+            logger.warning(f"[{template_id}] Varyasyon {v+1} üretilemedi")
+            return None
+        
+        logger.info(f"[{template_id}] ✅ Soru üretildi: {new_question.get('question_text', '')[:50]}...")
+        
+        # 4. Görsel üret - KALİTE KONTROLÜ İLE
+        visual_data = new_question.get('visual_data', {})
+        visual_style = analysis.get('visual_style', {})
+        question_text = new_question.get('question_text', '')
+        
+        # Kalite kontrollü görsel üretimi
+        image_bytes_new = self._generate_image_with_quality_check(
+            original_image_bytes=image_bytes,
+            question_text=question_text,
+            visual_data=visual_data,
+            visual_style=visual_style,
+            original_analysis=analysis,
+            template_id=template_id
+        )
+        
+        image_url_new = None
+        if image_bytes_new:
+            filename = f"cloned_{kazanim_info.get('code', 'unknown')}_{template_id}_{v+1}_{int(time.time())}.png"
+            image_url_new = self.supabase.upload_image(image_bytes_new, filename)
+            if image_url_new:
+                self._inc_stat('images_created')
+                logger.info(f"[{template_id}] 🖼️ Görsel yüklendi")
+        
+        # 5. Veritabanına kaydet (question_bank yapısına uygun)
+        question_data = {
+            'question_text': new_question.get('question_text', ''),
+            'kazanim_id': kazanim_info.get('id'),  # INTEGER
+            'topic': kazanim_info.get('topic'),  # topic_name
+            'topic_group': kazanim_info.get('topic'),  # topic_name
+            'grade_level': kazanim_info.get('grade_level', 8),
+            'difficulty': difficulty,  # easy/medium/hard -> 1-5'e çevrilecek
+            'question_type': 'çoktan_seçmeli',
+            'image_url': image_url_new,
+            'answer': new_question.get('answer'),  # correct_answer olacak
+            'options': new_question.get('options', {}),  # JSONB
+            'solution': new_question.get('solution'),  # solution_text + solution_detailed
+            'template_id': template_id
+        }
+        
+        pending = self.supabase.save_generated_question(question_data)
+        
+        if pending is None:
+            return None
+        
+        # Soru tampona alındı; sayaç ve log kayıt kesinleşince (flush sonrası)
+        on_resolved(pending, lambda saved_id: self._count_saved(template_id, kazanim_info, saved_id))
+        return pending
+    
+    def _count_saved(self, template_id: Any, kazanim_info: Dict, saved_id: Optional[int]):
+        """Toplu kayıt sonucu kesinleşince istatistiği güncelle"""
+        if saved_id is None:
+            self._inc_stat('errors')
+            logger.error(f"[{template_id}] Soru kaydedilemedi (journal'a alındı)")
+            return
+        self._inc_stat('questions_generated')
+        logger.info(f"[{template_id}] 💾 Soru kaydedildi: {saved_id}")
+        logger.info(f"    📚 Kazanım: {kazanim_info.get('code')}")
+        logger.info(f"    📖 Konu: {kazanim_info.get('topic')} > {kazanim_info.get('subtopic')}")
     
     def _generate_image_with_quality_check(self, original_image_bytes: bytes, question_text: str,
                                            visual_data: Dict, visual_style: Dict, 
@@ -1743,7 +2036,7 @@ class QuestionCloneBot:
             
             if not image_bytes_new:
                 logger.warning(f"[{template_id}] Görsel üretilemedi, deneme {attempt + 1}")
-                self.stats['quality_retries'] += 1
+                self._inc_stat('quality_retries')
                 continue
             
             # 2. Kalite kontrolü
@@ -1768,7 +2061,7 @@ class QuestionCloneBot:
                 logger.info(f"[{template_id}] ✅ Görsel KABUL EDİLDİ (Puan: {score}/10)")
                 return image_bytes_new
             else:
-                self.stats['images_rejected'] += 1
+                self._inc_stat('images_rejected')
                 
                 # Sorunları topla - bir sonraki deneme için FEEDBACK
                 problems = validation.get('problems', [])
@@ -1785,7 +2078,7 @@ class QuestionCloneBot:
                 
                 # Son deneme değilse bekle ve tekrar dene
                 if attempt < Config.MAX_RETRY_ATTEMPTS - 1:
-                    self.stats['quality_retries'] += 1
+                    self._inc_stat('quality_retries')
                     logger.info(f"[{template_id}] 🔄 Feedback ile yeniden denenecek: {previous_problems}")
                     time.sleep(3)
         
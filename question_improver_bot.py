@@ -21,6 +21,42 @@ V5: Maarif Modeli tam uyum + Bağlam temelli soru dönüşümü
 ✅ Dinamik END_ID + kaldığı yerden devam
 ✅ İlk/tekrar geçiş mantığı
 
+📦 İŞ KUYRUĞU (Supabase'de tanımlı olmalı; yoksa istemci taraflı
+parça taramasına düşülür):
+
+  create unique index if not exists question_improver_progress_qid
+      on question_improver_progress (question_id);
+
+  create or replace function question_improver_next_batch(
+      p_after_id bigint, p_end_id bigint, p_subjects text[], p_limit integer)
+  returns table (id bigint) language sql stable as $$
+    select q.id from question_bank q
+     where q.id > p_after_id and q.id <= p_end_id
+       and q.subject = any(p_subjects)
+       and not exists (select 1 from question_improver_progress p
+                        where p.question_id = q.id)
+     order by q.id
+     limit p_limit;
+  $$;
+
+  create or replace function question_improver_status(
+      p_start_id bigint, p_end_id bigint, p_subjects text[])
+  returns table (status text, adet bigint) language sql stable as $$
+    select coalesce(p.status, 'islenmemis'), count(*)
+      from question_bank q
+      left join question_improver_progress p on p.question_id = q.id
+     where q.id between p_start_id and p_end_id
+       and q.subject = any(p_subjects)
+     group by 1;
+  $$;
+
+👷 PARALEL ÇALIŞMA: Sorular işlenmeden önce progress tablosuna
+'in_progress' olarak kiralanır (unique index sayesinde aynı soruyu iki
+iş/worker alamaz). Aynı anda birden fazla workflow çalışabilir; her
+çalışma içinde WORKER_COUNT thread, GEMINI_API_KEY/GEMINI_API_KEY2
+anahtarlarına sırayla dağıtılır. Yarıda kalan kiralar LEASE_HOURS sonra
+tekrar kuyruğa (pending_retry) döner.
+
 @version 5.0.0
 @author MATAİ PRO
 """
@@ -29,7 +65,10 @@ import os
 import json
 import re
 import time
-from datetime import datetime
+import itertools
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
 from openai import OpenAI
 
 from google import genai
@@ -42,6 +81,10 @@ except ImportError:
     from supabase._sync.client import SyncClient as Client
     from supabase import create_client
 
+import llm_cache
+import rate_limiter
+from json_extract import extract_json
+
 # ═══════════════════════════════════════════════════════════════════════════════
 # YAPILANDIRMA
 # ═══════════════════════════════════════════════════════════════════════════════
@@ -64,6 +107,9 @@ else:
     GEMINI_API_KEY = GEMINI_API_KEY_1
     GEMINI_KEY_LABEL = "GEMINI_API_KEY (Ana)"
 
+# Worker'lara sırayla dağıtılacak anahtarlar (seçilen anahtar önce)
+GEMINI_ANAHTARLARI = [k for k in dict.fromkeys([GEMINI_API_KEY, GEMINI_API_KEY_1, GEMINI_API_KEY_2]) if k]
+
 # İşlenecek ID aralığı
 START_ID = int(os.environ.get('START_ID', '7255'))
 # END_ID: Boş bırakılırsa veritabanından max ID alınır
@@ -76,6 +122,12 @@ BEKLEME = 1.0
 MAX_DENEME = 3
 API_TIMEOUT = 45
 
+# Paralel işleme: varsayılan anahtar başına 2 worker - biri DeepSeek
+# kontrolündeyken diğeri aynı anahtarla Gemini'yi kullanır
+WORKER_SAYISI = int(os.environ.get('WORKER_COUNT', '0') or 0) or 2 * max(1, len(GEMINI_ANAHTARLARI))
+# Bu süreden eski 'in_progress' kiraları yarıda kalmış sayılır
+KIRA_SURESI_SAAT = float(os.environ.get('LEASE_HOURS', '4'))
+
 # Progress tablosu
 PROGRESS_TABLE = 'question_improver_progress'
 
@@ -90,6 +142,7 @@ print(f"   SUPABASE_KEY: {'✅' if SUPABASE_KEY else '❌ EKSİK'}")
 print(f"   GEMINI_API_KEY: {'✅' if GEMINI_API_KEY_1 else '❌ EKSİK'}")
 print(f"   GEMINI_API_KEY2: {'✅' if GEMINI_API_KEY_2 else '⚠️ Yok'}")
 print(f"   🔑 Kullanılan: {GEMINI_KEY_LABEL}")
+print(f"   👷 Worker: {WORKER_SAYISI} ({len(GEMINI_ANAHTARLARI)} anahtar)")
 print(f"   DEEPSEEK_API_KEY: {'✅' if DEEPSEEK_API_KEY else '⚠️ Opsiyonel'}")
 
 if not all([SUPABASE_URL, SUPABASE_KEY, GEMINI_API_KEY]):
@@ -132,7 +185,11 @@ print(f"   📚 Hedef dersler: {', '.join(HEDEF_DERSLER)}")
 print("🔗 Gemini bağlantısı kuruluyor...")
 try:
     gemini_client = genai.Client(api_key=GEMINI_API_KEY)
-    print(f"✅ Gemini client oluşturuldu")
+    gemini_istemcileri = {GEMINI_API_KEY: gemini_client}
+    for anahtar in GEMINI_ANAHTARLARI:
+        if anahtar not in gemini_istemcileri:
+            gemini_istemcileri[anahtar] = genai.Client(api_key=anahtar)
+    print(f"✅ Gemini client oluşturuldu ({len(gemini_istemcileri)} anahtar)")
 except Exception as e:
     print(f"❌ Gemini client hatası: {e}")
     exit(1)
@@ -259,13 +316,17 @@ def progress_getir(question_id):
     except:
         return None
 
+# Progress yazımları tamponlanır ve question_id üzerinden tek upsert ile yazılır
+PROGRESS_TAMPON_BOYUTU = 10
+_progress_tamponu = {}
+_progress_kilidi = threading.Lock()
+
 def progress_kaydet(question_id, status, attempt=1, deepseek_puan=None, hata=None):
-    """Progress kaydet veya güncelle"""
+    """Progress kaydını tampona ekle; tampon dolunca toplu yaz"""
     if not PROGRESS_TABLE_EXISTS:
         return True
-    try:
-        mevcut = progress_getir(question_id)
-        data = {
+    with _progress_kilidi:
+        _progress_tamponu[question_id] = {
             'question_id': question_id,
             'status': status,
             'attempt_count': attempt,
@@ -273,15 +334,34 @@ def progress_kaydet(question_id, status, attempt=1, deepseek_puan=None, hata=Non
             'last_error': hata,
             'updated_at': datetime.utcnow().isoformat()
         }
-        if mevcut:
-            supabase.table(PROGRESS_TABLE).update(data).eq('question_id', question_id).execute()
-        else:
-            data['created_at'] = datetime.utcnow().isoformat()
-            supabase.table(PROGRESS_TABLE).insert(data).execute()
+        dolu = len(_progress_tamponu) >= PROGRESS_TAMPON_BOYUTU
+    return progress_yaz() if dolu else True
+
+def progress_yaz():
+    """Tampondaki progress kayıtlarını tek upsert ile yaz"""
+    with _progress_kilidi:
+        satirlar = list(_progress_tamponu.values())
+        _progress_tamponu.clear()
+    if not satirlar:
+        return True
+    try:
+        supabase.table(PROGRESS_TABLE).upsert(satirlar, on_conflict='question_id').execute()
         return True
     except Exception as e:
-        print(f"   ⚠️ Progress kayıt hatası: {str(e)[:50]}")
-        return False
+        print(f"   ⚠️ Progress toplu kayıt hatası, tek tek yazılıyor: {str(e)[:50]}")
+
+    # Yedek: question_id unique index yoksa eski SELECT + UPDATE/INSERT yolu
+    basarili = True
+    for data in satirlar:
+        try:
+            if progress_getir(data['question_id']):
+                supabase.table(PROGRESS_TABLE).update(data).eq('question_id', data['question_id']).execute()
+            else:
+                supabase.table(PROGRESS_TABLE).insert({**data, 'created_at': data['updated_at']}).execute()
+        except Exception as e:
+            print(f"   ⚠️ Progress kayıt hatası: {str(e)[:50]}")
+            basarili = False
+    return basarili
 
 def son_islenen_id_getir():
     """Progress tablosundan son başarıyla işlenen ID'yi getir"""
@@ -305,6 +385,132 @@ def son_islenen_id_getir():
 
 # Not: HEDEF_DERSLER yukarıda tanımlı ['Matematik', 'Geometri']
 
+# İyileştirmede kullanılan kolonlar (embedding vb. büyük kolonlar çekilmez)
+SORU_KOLONLARI = 'id, subject, topic, grade_level, original_text, options, correct_answer, solution_text, image_url'
+
+_kuyruk_rpc_var = True
+
+def sorulari_getir(ids):
+    """ID listesindeki soruları sadece gereken kolonlarla getir"""
+    if not ids:
+        return []
+    result = supabase.table('question_bank')\
+        .select(SORU_KOLONLARI)\
+        .in_('id', ids)\
+        .order('id')\
+        .execute()
+    return result.data if result.data else []
+
+def islenmemis_id_getir(after_id, limit):
+    """after_id'den sonraki, progress kaydı olmayan ilk `limit` soru ID'si (keyset)"""
+    global _kuyruk_rpc_var
+    if _kuyruk_rpc_var:
+        try:
+            result = supabase.rpc('question_improver_next_batch', {
+                'p_after_id': after_id,
+                'p_end_id': END_ID,
+                'p_subjects': HEDEF_DERSLER,
+                'p_limit': limit
+            }).execute()
+            return [row['id'] for row in result.data or []]
+        except Exception as e:
+            _kuyruk_rpc_var = False
+            print(f"   ℹ️ question_improver_next_batch RPC kullanılamadı, parça taramasına geçiliyor: {str(e)[:80]}")
+
+    # Yedek: ID'leri parça parça tara, sadece o parçanın progress kayıtlarına bak
+    ids = []
+    chunk_size = 200
+    while len(ids) < limit and after_id < END_ID:
+        chunk = supabase.table('question_bank')\
+            .select('id')\
+            .gt('id', after_id)\
+            .lte('id', END_ID)\
+            .in_('subject', HEDEF_DERSLER)\
+            .order('id')\
+            .limit(chunk_size)\
+            .execute()
+        chunk_ids = [row['id'] for row in chunk.data or []]
+        if not chunk_ids:
+            break
+
+        islenmis = supabase.table(PROGRESS_TABLE)\
+            .select('question_id')\
+            .in_('question_id', chunk_ids)\
+            .execute()
+        islenmis_ids = {p['question_id'] for p in islenmis.data or []}
+        ids.extend(i for i in chunk_ids if i not in islenmis_ids)
+        after_id = chunk_ids[-1]
+    return ids[:limit]
+
+_kira_var = True
+
+def sorulari_kirala(ids):
+    """ID'leri progress'e 'in_progress' yazarak kirala; bu işin aldıklarını döndür"""
+    global _kira_var
+    if not ids or not _kira_var:
+        return ids
+    simdi = datetime.utcnow().isoformat()
+    satirlar = [{'question_id': i, 'status': 'in_progress', 'attempt_count': 0,
+                 'created_at': simdi, 'updated_at': simdi} for i in ids]
+    try:
+        # ON CONFLICT DO NOTHING: başka iş aynı anda aldıysa o satır dönmez
+        result = supabase.table(PROGRESS_TABLE)\
+            .upsert(satirlar, on_conflict='question_id', ignore_duplicates=True)\
+            .execute()
+        return sorted(p['question_id'] for p in result.data or [])
+    except Exception as e:
+        _kira_var = False
+        print(f"   ℹ️ Kiralama yapılamadı (question_id unique index yok mu?), kirasız devam: {str(e)[:80]}")
+        return ids
+
+def tekrar_kirala(ids):
+    """failed/pending_retry soruları koşullu update ile kirala (başka iş aldıysa dönmez)"""
+    if not ids or not _kira_var:
+        return ids
+    try:
+        result = supabase.table(PROGRESS_TABLE)\
+            .update({'status': 'in_progress', 'updated_at': datetime.utcnow().isoformat()})\
+            .in_('question_id', ids)\
+            .in_('status', ['failed', 'pending_retry'])\
+            .execute()
+        return sorted(p['question_id'] for p in result.data or [])
+    except Exception as e:
+        print(f"   ⚠️ Tekrar kiralama hatası, kirasız devam: {str(e)[:80]}")
+        return ids
+
+def islenmemis_kirala(after_id, limit):
+    """İşlenmemiş ID'leri bul ve kirala; yarışta kaçanların yerine sonrakileri dene"""
+    kiralanan = []
+    for _ in range(3):
+        adaylar = islenmemis_id_getir(after_id, limit - len(kiralanan))
+        if not adaylar:
+            break
+        kiralanan.extend(sorulari_kirala(adaylar))
+        if len(kiralanan) >= limit:
+            break
+        after_id = adaylar[-1]
+    return sorted(kiralanan)
+
+def suresi_dolan_kiralari_birak():
+    """Yarıda kalmış (LEASE_HOURS'tan eski) kiraları tekrar kuyruğuna al"""
+    if not PROGRESS_TABLE_EXISTS:
+        return 0
+    sinir = (datetime.utcnow() - timedelta(hours=KIRA_SURESI_SAAT)).isoformat()
+    try:
+        result = supabase.table(PROGRESS_TABLE)\
+            .update({'status': 'pending_retry', 'last_error': 'Kira süresi doldu',
+                     'updated_at': datetime.utcnow().isoformat()})\
+            .eq('status', 'in_progress')\
+            .lt('updated_at', sinir)\
+            .execute()
+        birakilan = len(result.data or [])
+        if birakilan:
+            print(f"♻️ {birakilan} yarıda kalmış kira tekrar kuyruğa alındı")
+        return birakilan
+    except Exception as e:
+        print(f"   ⚠️ Kira temizleme hatası: {str(e)[:50]}")
+        return 0
+
 def islenmemis_sorulari_getir(limit, retry_mode=False):
     """
     İşlenmemiş veya tekrar işlenecek soruları getir - V5 MAARİF MODELİ
@@ -317,7 +523,7 @@ def islenmemis_sorulari_getir(limit, retry_mode=False):
             print(f"   📋 Progress tablosu yok, direkt sorgulama...")
             print(f"   📚 Hedef dersler: {', '.join(HEDEF_DERSLER)}")
             result = supabase.table('question_bank')\
-                .select('*')\
+                .select(SORU_KOLONLARI)\
                 .gte('id', START_ID)\
                 .lte('id', END_ID)\
                 .in_('subject', HEDEF_DERSLER)\
@@ -338,9 +544,11 @@ def islenmemis_sorulari_getir(limit, retry_mode=False):
             if not progress_result.data:
                 return []
 
-            retry_ids = [p['question_id'] for p in progress_result.data]
+            retry_ids = tekrar_kirala([p['question_id'] for p in progress_result.data])
+            if not retry_ids:
+                return []
             result = supabase.table('question_bank')\
-                .select('*')\
+                .select(SORU_KOLONLARI)\
                 .in_('id', retry_ids)\
                 .in_('subject', HEDEF_DERSLER)\
                 .order('id')\
@@ -348,55 +556,14 @@ def islenmemis_sorulari_getir(limit, retry_mode=False):
             return result.data if result.data else []
         
         else:
-            # V3 DEĞİŞİKLİK: Son işlenen ID'den devam et
-            # Tüm işlenmiş ID'leri çek (success, failed, pending_retry)
-            progress_result = supabase.table(PROGRESS_TABLE)\
-                .select('question_id')\
-                .execute()
-            
-            islenmis_ids = set()
-            if progress_result.data:
-                islenmis_ids = set([p['question_id'] for p in progress_result.data])
-            
-            print(f"   📊 Progress'te {len(islenmis_ids)} kayıt var")
-            
-            # Son başarılı ID'yi bul ve oradan devam et
+            # Son başarılı ID'den devam et; işlenmemiş ID'ler sunucu tarafında
+            # (progress ile anti-join) bulunur ve bu iş için kiralanır
             son_id = son_islenen_id_getir()
-            
-            # Sorguyu başlat - son ID'den sonrasını çek
-            # Ama aynı zamanda arada atlanmış olabilecekleri de kontrol et
-            
-            # Strateji: Son işlenen ID'den devam et
-            # V4 DÜZELTMESİ: baslangic_id artık son_id + 1
-            
             baslangic_id = max(son_id + 1, START_ID)
             print(f"   📍 Son işlenen ID: {son_id}, Başlangıç: {baslangic_id}")
             print(f"   📚 Hedef dersler: {', '.join(HEDEF_DERSLER)}")
-            sorular = []
-
-            # Chunk'lar halinde tara
-            chunk_size = 200  # Her seferinde 200 soru kontrol et
-            current_start = baslangic_id
-
-            while len(sorular) < limit and current_start <= END_ID:
-                # Bu chunk'taki soruları çek - SADECE Matematik ve Geometri
-                result = supabase.table('question_bank')\
-                    .select('*')\
-                    .gte('id', current_start)\
-                    .lte('id', min(current_start + chunk_size - 1, END_ID))\
-                    .in_('subject', HEDEF_DERSLER)\
-                    .order('id')\
-                    .execute()
-
-                if result.data:
-                    # İşlenmemiş olanları filtrele
-                    for soru in result.data:
-                        if soru['id'] not in islenmis_ids:
-                            sorular.append(soru)
-                            if len(sorular) >= limit:
-                                break
-
-                current_start += chunk_size
+
+            sorular = sorulari_getir(islenmemis_kirala(baslangic_id - 1, limit))
 
             # Görsel durumu istatistiği
             gorselli = sum(1 for s in sorular if s.get('image_url'))
@@ -410,37 +577,59 @@ def islenmemis_sorulari_getir(limit, retry_mode=False):
         traceback.print_exc()
         return []
 
+_durum_rpc_var = True
+
+def durum_sayilari():
+    """(total, success, pending) - tek gruplu sorgu, RPC yoksa üç count sorgusu"""
+    global _durum_rpc_var
+    if _durum_rpc_var:
+        try:
+            result = supabase.rpc('question_improver_status', {
+                'p_start_id': START_ID,
+                'p_end_id': END_ID,
+                'p_subjects': HEDEF_DERSLER
+            }).execute()
+            adetler = {row['status']: row['adet'] for row in result.data or []}
+            return (
+                sum(adetler.values()),
+                adetler.get('success', 0),
+                adetler.get('failed', 0) + adetler.get('pending_retry', 0)
+            )
+        except Exception as e:
+            _durum_rpc_var = False
+            print(f"   ℹ️ question_improver_status RPC kullanılamadı, count sorgularına geçiliyor: {str(e)[:80]}")
+
+    # SADECE Matematik ve Geometri sorularını say
+    total = supabase.table('question_bank')\
+        .select('id', count='exact')\
+        .gte('id', START_ID)\
+        .lte('id', END_ID)\
+        .in_('subject', HEDEF_DERSLER)\
+        .execute()
+
+    # Progress tablosundan başarılı olanları say
+    # Ama sadece START_ID-END_ID aralığındakileri
+    success = supabase.table(PROGRESS_TABLE)\
+        .select('question_id', count='exact')\
+        .eq('status', 'success')\
+        .gte('question_id', START_ID)\
+        .lte('question_id', END_ID)\
+        .execute()
+
+    pending = supabase.table(PROGRESS_TABLE)\
+        .select('question_id', count='exact')\
+        .in_('status', ['failed', 'pending_retry'])\
+        .gte('question_id', START_ID)\
+        .lte('question_id', END_ID)\
+        .execute()
+    return total.count or 0, success.count or 0, pending.count or 0
+
 def tum_isler_bitti_mi():
     """Tüm işlerin bitip bitmediğini kontrol et - SADECE Matematik/Geometri"""
     if not PROGRESS_TABLE_EXISTS:
         return {'total': END_ID - START_ID + 1, 'success': 0, 'pending': 0, 'completed': False}
     try:
-        # SADECE Matematik ve Geometri sorularını say
-        total = supabase.table('question_bank')\
-            .select('id', count='exact')\
-            .gte('id', START_ID)\
-            .lte('id', END_ID)\
-            .in_('subject', HEDEF_DERSLER)\
-            .execute()
-        total_count = total.count if total.count else 0
-
-        # Progress tablosundan başarılı olanları say
-        # Ama sadece START_ID-END_ID aralığındakileri
-        success = supabase.table(PROGRESS_TABLE)\
-            .select('question_id', count='exact')\
-            .eq('status', 'success')\
-            .gte('question_id', START_ID)\
-            .lte('question_id', END_ID)\
-            .execute()
-        success_count = success.count if success.count else 0
-
-        pending = supabase.table(PROGRESS_TABLE)\
-            .select('question_id', count='exact')\
-            .in_('status', ['failed', 'pending_retry'])\
-            .gte('question_id', START_ID)\
-            .lte('question_id', END_ID)\
-            .execute()
-        pending_count = pending.count if pending.count else 0
+        total_count, success_count, pending_count = durum_sayilari()
 
         # İşlenmemiş soru sayısı
         islenmemis = total_count - success_count - pending_count
@@ -554,219 +743,21 @@ def soru_kalite_analizi(soru):
 # ROBUST JSON TEMİZLEME (LaTeX UYUMLU)
 # ═══════════════════════════════════════════════════════════════════════════════
 
-def fix_latex_escapes(text):
-    """
-    LaTeX backslash'larını JSON-safe hale getir.
-    Bu fonksiyon JSON parse'dan ÖNCE çağrılmalı.
-    """
-    if not text:
-        return text
-    
-    # Bilinen LaTeX komutları - bunları double backslash yapacağız
-    latex_commands = [
-        # Matematik sembolleri
-        'pmod', 'bmod', 'mod', 'equiv', 'approx', 'sim', 'cong', 'neq', 'ne',
-        'leq', 'geq', 'le', 'ge', 'lt', 'gt', 'll', 'gg',
-        'pm', 'mp', 'times', 'div', 'cdot', 'cdots', 'ldots', 'dots', 'vdots', 'ddots',
-        'infty', 'partial', 'nabla', 'forall', 'exists', 'nexists',
-        'in', 'notin', 'ni', 'subset', 'supset', 'subseteq', 'supseteq',
-        'cup', 'cap', 'setminus', 'emptyset', 'varnothing',
-        'land', 'lor', 'lnot', 'neg', 'implies', 'iff', 'therefore', 'because',
-        # Yunan harfleri
-        'alpha', 'beta', 'gamma', 'delta', 'epsilon', 'varepsilon', 'zeta', 'eta',
-        'theta', 'vartheta', 'iota', 'kappa', 'lambda', 'mu', 'nu', 'xi',
-        'pi', 'varpi', 'rho', 'varrho', 'sigma', 'varsigma', 'tau', 'upsilon',
-        'phi', 'varphi', 'chi', 'psi', 'omega',
-        'Gamma', 'Delta', 'Theta', 'Lambda', 'Xi', 'Pi', 'Sigma', 'Upsilon',
-        'Phi', 'Psi', 'Omega',
-        # Fonksiyonlar
-        'sin', 'cos', 'tan', 'cot', 'sec', 'csc',
-        'arcsin', 'arccos', 'arctan', 'arccot',
-        'sinh', 'cosh', 'tanh', 'coth',
-        'log', 'ln', 'lg', 'exp',
-        'lim', 'limsup', 'liminf', 'sup', 'inf', 'max', 'min',
-        'det', 'dim', 'ker', 'hom', 'arg', 'deg', 'gcd', 'lcm',
-        # Yapısal
-        'frac', 'dfrac', 'tfrac', 'cfrac',
-        'sqrt', 'root', 'binom', 'choose',
-        'sum', 'prod', 'coprod', 'int', 'iint', 'iiint', 'oint',
-        'bigcup', 'bigcap', 'bigsqcup', 'bigvee', 'bigwedge', 'bigoplus', 'bigotimes',
-        # Formatlar
-        'text', 'textrm', 'textbf', 'textit', 'textsf', 'texttt',
-        'mathrm', 'mathbf', 'mathit', 'mathsf', 'mathtt', 'mathbb', 'mathcal', 'mathfrak',
-        'boldsymbol', 'bm',
-        'overline', 'underline', 'widehat', 'widetilde', 'overrightarrow', 'overleftarrow',
-        'overbrace', 'underbrace',
-        # Parantezler
-        'left', 'right', 'bigl', 'bigr', 'Bigl', 'Bigr', 'biggl', 'biggr', 'Biggl', 'Biggr',
-        'langle', 'rangle', 'lfloor', 'rfloor', 'lceil', 'rceil', 'lvert', 'rvert',
-        # Oklar
-        'to', 'gets', 'leftarrow', 'rightarrow', 'leftrightarrow',
-        'Leftarrow', 'Rightarrow', 'Leftrightarrow',
-        'longleftarrow', 'longrightarrow', 'longleftrightarrow',
-        'uparrow', 'downarrow', 'updownarrow',
-        'mapsto', 'longmapsto', 'hookrightarrow', 'hookleftarrow',
-        # Aksanlar
-        'hat', 'check', 'breve', 'acute', 'grave', 'tilde', 'bar', 'vec', 'dot', 'ddot',
-        # Boşluklar
-        'quad', 'qquad', 'enspace', 'thinspace', 'negthinspace',
-        # Diğer
-        'circ', 'bullet', 'star', 'dagger', 'ddagger', 'ell', 'hbar', 'imath', 'jmath',
-        'Re', 'Im', 'wp', 'prime', 'backslash', 'angle', 'measuredangle',
-        'triangle', 'square', 'diamond', 'clubsuit', 'diamondsuit', 'heartsuit', 'spadesuit',
-        # Ortam
-        'begin', 'end', 'item', 'newline', 'displaystyle', 'textstyle', 'scriptstyle',
-        # Derece ve ölçüler
-        'degree', 'circ',
-        # Özel
-        'mathbb', 'mathcal', 'mathfrak', 'mathscr',
-        # Setler
-        'N', 'Z', 'Q', 'R', 'C',
-        # Diğer önemli komutlar
-        'mid', 'nmid', 'parallel', 'nparallel', 'perp', 'not',
-        'propto', 'asymp', 'bowtie', 'models', 'vdash', 'dashv',
-        'top', 'bot', 'vee', 'wedge', 'oplus', 'ominus', 'otimes', 'oslash', 'odot',
-    ]
-    
-    # Önce tüm bilinen LaTeX komutlarını \\komut şeklinde düzelt
-    for cmd in latex_commands:
-        # \komut -> \\komut (JSON'da escape)
-        # Ama dikkat: zaten \\ olanları tekrar değiştirme
-        # Regex: tek backslash + komut, ama önünde başka backslash olmasın
-        pattern = r'(?<!\\)\\' + cmd + r'(?![a-zA-Z])'
-        replacement = '\\\\' + cmd
-        text = re.sub(pattern, replacement, text)
-    
-    # Özel durumlar: \{ \} \[ \] \( \) - bunlar da escape edilmeli
-    special_chars = ['{', '}', '[', ']', '(', ')', '_', '^', '&', '%', '$', '#']
-    for char in special_chars:
-        # \{ -> \\{ şeklinde
-        text = re.sub(r'(?<!\\)\\' + re.escape(char), '\\\\' + char, text)
-    
-    return text
-
-def extract_json_from_text(text):
-    """
-    Metinden JSON objesini çıkar.
-    Markdown code block'ları, açıklamalar vs. temizler.
-    """
-    if not text:
-        return None
-    
-    text = text.strip()
-    
-    # 1. Markdown code block'u temizle
-    if '```json' in text:
-        start = text.find('```json') + 7
-        end = text.find('```', start)
-        if end > start:
-            text = text[start:end].strip()
-    elif '```' in text:
-        start = text.find('```') + 3
-        end = text.find('```', start)
-        if end > start:
-            text = text[start:end].strip()
-    
-    # 2. JSON sınırlarını bul
-    brace_start = text.find('{')
-    if brace_start < 0:
-        return None
-    
-    # Doğru kapanış parantezini bul (nested JSON'lar için)
-    depth = 0
-    brace_end = -1
-    in_string = False
-    escape_next = False
-    
-    for i in range(brace_start, len(text)):
-        char = text[i]
-        
-        if escape_next:
-            escape_next = False
-            continue
-        
-        if char == '\\':
-            escape_next = True
-            continue
-        
-        if char == '"' and not escape_next:
-            in_string = not in_string
-            continue
-        
-        if not in_string:
-            if char == '{':
-                depth += 1
-            elif char == '}':
-                depth -= 1
-                if depth == 0:
-                    brace_end = i
-                    break
-    
-    if brace_end < 0:
-        # Fallback: son } karakterini kullan
-        brace_end = text.rfind('}')
-    
-    if brace_end <= brace_start:
-        return None
-    
-    return text[brace_start:brace_end + 1]
-
 def json_temizle(text):
     """
-    JSON'u temizle ve parse et - LaTeX escape'leri düzelten robust versiyon.
+    JSON'u tek geçişte onar ve parse et (json_extract - LaTeX uyumlu).
+    Onarılamazsa son çare olarak regex ile ana field'ları çıkarır.
     """
     if not text:
         print(f"      ⚠️ json_temizle: text boş")
         return None
     
-    original_text = text
-    
-    # 1. JSON kısmını çıkar
-    json_text = extract_json_from_text(text)
-    if not json_text:
-        print(f"      ⚠️ json_temizle: JSON bulunamadı")
-        return None
-    
-    # 2. Denemeler listesi
-    attempts = []
-    
-    # Deneme 1: Direkt parse
-    attempts.append(('direkt', json_text))
-    
-    # Deneme 2: LaTeX escape'leri düzelt
-    latex_fixed = fix_latex_escapes(json_text)
-    attempts.append(('latex_fixed', latex_fixed))
-    
-    # Deneme 3: Newline'ları temizle
-    newline_fixed = latex_fixed.replace('\n', ' ').replace('\r', ' ')
-    newline_fixed = re.sub(r'\s+', ' ', newline_fixed)
-    attempts.append(('newline_fixed', newline_fixed))
-    
-    # Deneme 4: Trailing comma temizle
-    comma_fixed = re.sub(r',\s*}', '}', newline_fixed)
-    comma_fixed = re.sub(r',\s*\]', ']', comma_fixed)
-    attempts.append(('comma_fixed', comma_fixed))
-    
-    # Deneme 5: Tüm tek backslash'ları double yap (agresif)
-    aggressive_fix = re.sub(r'(?<!\\)\\(?![\\"])', r'\\\\', comma_fixed)
-    attempts.append(('aggressive_fix', aggressive_fix))
-    
-    # Deneme 6: Control karakterlerini temizle
-    control_fixed = ''.join(char for char in aggressive_fix if ord(char) >= 32 or char in '\n\r\t')
-    attempts.append(('control_fixed', control_fixed))
-    
-    # Tüm denemeleri yap
-    for attempt_name, attempt_text in attempts:
-        try:
-            result = json.loads(attempt_text)
-            # print(f"      ✅ JSON parse başarılı: {attempt_name}")
-            return result
-        except json.JSONDecodeError as e:
-            continue
+    result = extract_json(text)
+    if result is not None:
+        return result
     
-    # Hiçbiri çalışmadıysa, son çare: regex ile field'ları çıkar
-    print(f"      ⚠️ Tüm JSON parse denemeleri başarısız, regex fallback deneniyor...")
-    return regex_json_fallback(original_text)
+    print(f"      ⚠️ JSON parse başarısız, regex fallback deneniyor...")
+    return regex_json_fallback(text)
 
 def regex_json_fallback(text):
     """
@@ -1196,44 +1187,58 @@ def gemini_ile_iyilestir(soru, analiz):
 
 SADECE JSON döndür, başka bir şey yazma."""
 
-        response = gemini_client.models.generate_content(
-            model='gemini-3-flash-preview',
-            contents=prompt,
-            config=types.GenerateContentConfig(
-                temperature=0.3,  # Daha deterministik çıktı için düşürüldü
-                max_output_tokens=20000
+        anahtar = aktif_anahtar()
+
+        def gemini_cagir():
+            rate_limiter.acquire('text', anahtar)
+            response = gemini_istemcileri[anahtar].models.generate_content(
+                model='gemini-3-flash-preview',
+                contents=prompt,
+                config=types.GenerateContentConfig(
+                    temperature=0.3,  # Daha deterministik çıktı için düşürüldü
+                    max_output_tokens=20000
+                )
             )
-        )
-        
-        if not response:
-            print(f"      ⚠️ Gemini response None")
-            return None
-        
-        # Response text kontrolü
-        response_text = None
-        if hasattr(response, 'text'):
-            response_text = response.text
-        elif hasattr(response, 'candidates') and response.candidates:
-            if hasattr(response.candidates[0], 'content'):
-                if hasattr(response.candidates[0].content, 'parts'):
-                    response_text = response.candidates[0].content.parts[0].text
-        
-        if not response_text:
-            print(f"      ⚠️ Gemini response.text boş")
-            return None
+            
+            if not response:
+                print(f"      ⚠️ Gemini response None")
+                return None
+            
+            # Response text kontrolü
+            response_text = None
+            if hasattr(response, 'text'):
+                response_text = response.text
+            elif hasattr(response, 'candidates') and response.candidates:
+                if hasattr(response.candidates[0], 'content'):
+                    if hasattr(response.candidates[0].content, 'parts'):
+                        response_text = response.candidates[0].content.parts[0].text
+            
+            if not response_text:
+                print(f"      ⚠️ Gemini response.text boş")
+                return None
+            
+            print(f"      📝 Gemini yanıt: {len(response_text)} karakter")
+            return response_text.strip()
         
-        print(f"      📝 Gemini yanıt: {len(response_text)} karakter")
+        def parse_et(response_text):
+            result = json_temizle(response_text)
+            if not result:
+                print(f"      ⚠️ JSON parse başarısız, yanıt: {response_text[:100]}...")
+            return result
         
-        result = json_temizle(response_text.strip())
+        result = llm_cache.cached_call(
+            'gemini-3-flash-preview', prompt, {'temperature': 0.3, 'max_output_tokens': 20000},
+            gemini_cagir, parse=parse_et
+        )
         
         if not result:
-            print(f"      ⚠️ JSON parse başarısız, yanıt: {response_text[:100]}...")
             return None
         
         return result
         
     except Exception as e:
         print(f"      ⚠️ Gemini exception: {type(e).__name__}: {str(e)[:100]}")
+        rate_limiter.penalize_on_quota('text', aktif_anahtar(), e)
         return None
 
 # ═══════════════════════════════════════════════════════════════════════════════
@@ -1326,18 +1331,21 @@ def deepseek_kontrol(iyilestirilmis, orijinal):
 {cozum}
 """
         
-        response = deepseek.chat.completions.create(
-            model='deepseek-chat',
-            messages=[
-                {'role': 'system', 'content': DEEPSEEK_KONTROL_PROMPT},
-                {'role': 'user', 'content': f'Bu soruyu değerlendir:\n{kontrol_metni}'}
-            ],
-            max_tokens=800,
-            timeout=API_TIMEOUT
+        kullanici_mesaji = f'Bu soruyu değerlendir:\n{kontrol_metni}'
+        result = llm_cache.cached_call(
+            'deepseek-chat', DEEPSEEK_KONTROL_PROMPT + '\n' + kullanici_mesaji, {'max_tokens': 800},
+            lambda: deepseek.chat.completions.create(
+                model='deepseek-chat',
+                messages=[
+                    {'role': 'system', 'content': DEEPSEEK_KONTROL_PROMPT},
+                    {'role': 'user', 'content': kullanici_mesaji}
+                ],
+                max_tokens=800,
+                timeout=API_TIMEOUT
+            ).choices[0].message.content,
+            parse=json_temizle
         )
         
-        result = json_temizle(response.choices[0].message.content)
-        
         if result:
             return result
         else:
@@ -1405,6 +1413,9 @@ def tek_soru_isle(soru):
     analiz = soru_kalite_analizi(soru)
     
     for deneme in range(MAX_DENEME):
+        # DB hatası veya çökme sonrası aynı prompt önbellekten yanıtlanır;
+        # içerik reddedilirse ya da soru güncellenirse yanıtlar silinir
+        llm_cache.begin_attempt()
         try:
             # Gemini ile iyileştir
             print(f"      🔄 Gemini çağrılıyor (deneme {deneme+1})...")
@@ -1424,6 +1435,7 @@ def tek_soru_isle(soru):
             
             if puan < MIN_DEEPSEEK_PUAN:
                 print(f"   ⚠️ Düşük puan: {puan} (deneme {deneme+1})")
+                llm_cache.discard_attempt()
                 if deneme < MAX_DENEME - 1:
                     time.sleep(2)
                     continue
@@ -1434,6 +1446,7 @@ def tek_soru_isle(soru):
             # Matematik doğru mu?
             if not kontrol.get('matematik_dogru', True) or not kontrol.get('cevap_dogru', True):
                 print(f"   ⚠️ Matematik hatası (deneme {deneme+1})")
+                llm_cache.discard_attempt()
                 if deneme < MAX_DENEME - 1:
                     time.sleep(2)
                     continue
@@ -1444,6 +1457,7 @@ def tek_soru_isle(soru):
             # Question Bank'ı güncelle
             print(f"      🔄 Veritabanı güncelleniyor...")
             if question_bank_guncelle(question_id, iyilestirilmis, puan):
+                llm_cache.discard_attempt()
                 progress_kaydet(question_id, 'success', deneme+1, puan)
                 return {
                     'success': True,
@@ -1467,12 +1481,59 @@ def tek_soru_isle(soru):
 # ANA İŞLEM DÖNGÜSÜ
 # ═══════════════════════════════════════════════════════════════════════════════
 
+_worker = threading.local()
+_worker_sayaci = itertools.count()
+
+def worker_baslat():
+    """Worker thread'ine sıradaki Gemini anahtarını ata"""
+    _worker.anahtar = GEMINI_ANAHTARLARI[next(_worker_sayaci) % len(GEMINI_ANAHTARLARI)]
+
+def aktif_anahtar():
+    """Bu thread'in Gemini anahtarı (worker dışında seçili anahtar)"""
+    return getattr(_worker, 'anahtar', GEMINI_API_KEY)
+
+def soru_isle_ve_raporla(idx, toplam, soru):
+    """Tek soruyu işle ve sonucunu yazdır (worker thread'lerinde çalışır)"""
+    question_id = soru.get('id')
+    topic = soru.get('topic', 'Bilinmeyen')[:30]
+    grade = soru.get('grade_level', '?')
+
+    # Sınıf seviyesi kategorisi
+    seviye_kat = "İlkokul" if int(grade or 8) <= 4 else "Ortaokul" if int(grade or 8) <= 8 else "Lise"
+
+    # Görsel durumu
+    image_url = soru.get('image_url')
+    gorsel_durumu = "🖼️ Görselli" if image_url else "📝 Görselsiz"
+    islem_modu = "KORU" if image_url else "YENİDEN YAZ"
+
+    print(f"\n[{idx+1}/{toplam}] ID: {question_id} | {grade}. Sınıf ({seviye_kat}) | {topic}")
+    print(f"   {gorsel_durumu} → Mod: {islem_modu}")
+
+    # Kalite analizi
+    analiz = soru_kalite_analizi(soru)
+    if analiz['sorunlar']:
+        print(f"   📋 Maarif Sorunları: {', '.join(analiz['sorunlar'])}")
+    if analiz.get('gereksiz_detaylar'):
+        print(f"   🧹 Temizlenecek: {len(analiz['gereksiz_detaylar'])} gereksiz detay")
+
+    # İşle
+    sonuc = tek_soru_isle(soru)
+
+    if sonuc['success']:
+        iyilestirme = "✨ Maarif'e dönüştürüldü" if sonuc.get('iyilestirme') else "✅ Maarif uyumlu"
+        print(f"   ID {question_id}: {iyilestirme} | Kalite: {sonuc.get('puan', 0)}/100")
+    else:
+        print(f"   ID {question_id}: ❌ Başarısız: {sonuc.get('reason', 'unknown')}")
+
+    time.sleep(BEKLEME)
+    return sonuc
+
 def batch_isle(retry_mode=False):
     """Bir batch soruyu Maarif Modeli'ne uygun hale getir"""
 
     mode_str = "TEKRAR GEÇİŞ" if retry_mode else "İLK GEÇİŞ"
 
-    # İşlenecek soruları getir
+    # İşlenecek soruları getir (bu iş için kiralanır)
     sorular = islenmemis_sorulari_getir(BATCH_SIZE, retry_mode)
 
     if not sorular:
@@ -1485,51 +1546,28 @@ def batch_isle(retry_mode=False):
     print(f"   ID Aralığı: {START_ID} - {END_ID}")
     if sorular:
         print(f"   Bu batch ID'leri: {sorular[0]['id']} - {sorular[-1]['id']}")
+    print(f"   Worker: {WORKER_SAYISI} ({len(GEMINI_ANAHTARLARI)} Gemini anahtarı)")
     print(f"{'='*70}")
     print(f"   📖 Hedef: Bağlam temelli, gereksiz detaylardan arındırılmış sorular")
     print(f"{'='*70}\n")
     
-    basarili = 0
-    toplam_puan = 0
     baslangic = time.time()
-    
-    for idx, soru in enumerate(sorular):
-        question_id = soru.get('id')
-        topic = soru.get('topic', 'Bilinmeyen')[:30]
-        grade = soru.get('grade_level', '?')
-
-        # Sınıf seviyesi kategorisi
-        seviye_kat = "İlkokul" if int(grade or 8) <= 4 else "Ortaokul" if int(grade or 8) <= 8 else "Lise"
-
-        # Görsel durumu
-        image_url = soru.get('image_url')
-        gorsel_durumu = "🖼️ Görselli" if image_url else "📝 Görselsiz"
-        islem_modu = "KORU" if image_url else "YENİDEN YAZ"
-
-        print(f"\n[{idx+1}/{len(sorular)}] ID: {question_id} | {grade}. Sınıf ({seviye_kat}) | {topic}")
-        print(f"   {gorsel_durumu} → Mod: {islem_modu}")
-
-        # Kalite analizi
-        analiz = soru_kalite_analizi(soru)
-        if analiz['sorunlar']:
-            print(f"   📋 Maarif Sorunları: {', '.join(analiz['sorunlar'])}")
-        if analiz.get('gereksiz_detaylar'):
-            print(f"   🧹 Temizlenecek: {len(analiz['gereksiz_detaylar'])} gereksiz detay")
-        
-        # İşle
-        sonuc = tek_soru_isle(soru)
-        
-        if sonuc['success']:
-            basarili += 1
-            puan = sonuc.get('puan', 0)
-            toplam_puan += puan
-            iyilestirme = "✨ Maarif'e dönüştürüldü" if sonuc.get('iyilestirme') else "✅ Maarif uyumlu"
-            print(f"   {iyilestirme} | Kalite: {puan}/100")
-        else:
-            reason = sonuc.get('reason', 'unknown')
-            print(f"   ❌ Başarısız: {reason}")
-        
-        time.sleep(BEKLEME)
+
+    # Her worker bir anahtara bağlı; bir worker DeepSeek kontrolündeyken
+    # diğerleri Gemini çağrısı yapar. Kota rate_limiter ile anahtar başına tutulur.
+    try:
+        with ThreadPoolExecutor(max_workers=min(WORKER_SAYISI, len(sorular)),
+                                initializer=worker_baslat) as executor:
+            sonuclar = list(executor.map(
+                lambda args: soru_isle_ve_raporla(args[0], len(sorular), args[1]),
+                enumerate(sorular)
+            ))
+    finally:
+        # Tamponda kalan progress kayıtlarını yaz
+        progress_yaz()
+
+    basarili = sum(1 for sonuc in sonuclar if sonuc['success'])
+    toplam_puan = sum(sonuc.get('puan', 0) for sonuc in sonuclar if sonuc['success'])
     
     sure = time.time() - baslangic
     ort_puan = toplam_puan / basarili if basarili > 0 else 0
@@ -1582,6 +1620,7 @@ def main():
     
     # Progress tablosu kontrolü
     progress_tablo_kontrol()
+    suresi_dolan_kiralari_birak()
     
     # API testleri
     print("\n🔍 Gemini API test ediliyor...")
@@ -0,0 +1,166 @@
+"""
+Ortak Rate Limiter (Token Bucket)
+=================================
+Tum botlarin Gemini cagrilarini ayni kota butcesinden harcamasi icin
+paylasilan token-bucket limiter.
+
+- Her (API anahtari, model turu) cifti icin ayri kova tutulur
+- Model turleri: text, image, vision, embedding
+- Kova dolu oldugu surece istekler beklemeden gecer (burst)
+- Kova bosaldiginda sadece bir sonraki token icin gereken kadar beklenir
+- Thread-safe: ayni process icindeki tum worker'lar ayni kovayi paylasir
+
+Kullanim:
+  from rate_limiter import acquire
+  acquire("text", api_key)      # gerekirse bekler, sonra doner
+  ...
+  except Exception as e:
+      penalize_on_quota("text", api_key, e)   # 429 ise kovayi bosalt
+
+Kota ayarlari ortam degiskenleriyle degistirilebilir:
+  GEMINI_TEXT_RPM=10 GEMINI_TEXT_BURST=5
+  GEMINI_IMAGE_RPM, GEMINI_VISION_RPM, GEMINI_EMBEDDING_RPM (ve *_BURST)
+"""
+
+import os
+import time
+import hashlib
+import logging
+import threading
+from typing import Dict, Tuple
+
+logger = logging.getLogger(__name__)
+
+QUOTA_PENALTY_SECONDS = 30
+
+# ============================================================================
+# VARSAYILAN KOTALAR (dakikadaki istek sayisi, burst kapasitesi)
+# ============================================================================
+
+DEFAULT_BUDGETS = {
+    "text": (10, 5),
+    "image": (10, 3),
+    "vision": (10, 5),
+    "embedding": (100, 20),
+}
+
+
+def _budget_for(kind: str) -> Tuple[float, float]:
+    """Model turu icin (rpm, burst) degerini ortam degiskenlerinden oku"""
+    default_rpm, default_burst = DEFAULT_BUDGETS.get(kind, DEFAULT_BUDGETS["text"])
+    prefix = f"GEMINI_{kind.upper()}"
+    try:
+        rpm = float(os.environ.get(f"{prefix}_RPM", default_rpm))
+    except ValueError:
+        rpm = default_rpm
+    try:
+        burst = float(os.environ.get(f"{prefix}_BURST", default_burst))
+    except ValueError:
+        burst = default_burst
+    return max(rpm, 0.1), max(burst, 1.0)
+
+
+# ============================================================================
+# TOKEN BUCKET
+# ============================================================================
+
+class TokenBucket:
+    """Klasik token bucket - rate token/sn hizinda dolar, en fazla capacity token tutar"""
+
+    def __init__(self, rate_per_minute: float, capacity: float, name: str = ""):
+        self.rate = rate_per_minute / 60.0
+        self.capacity = capacity
+        self.name = name
+        self.tokens = capacity
+        self.updated_at = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self, now: float):
+        elapsed = now - self.updated_at
+        if elapsed > 0:
+            self.tokens = min(self.capacity, self.tokens + elapsed * self.rate)
+            self.updated_at = now
+
+    def try_acquire(self, tokens: float = 1.0) -> float:
+        """Token almayi dene. Basariliysa 0, degilse beklenmesi gereken sureyi dondur"""
+        with self._lock:
+            now = time.monotonic()
+            self._refill(now)
+            if self.tokens >= tokens:
+                self.tokens -= tokens
+                return 0.0
+            return (tokens - self.tokens) / self.rate
+
+    def acquire(self, tokens: float = 1.0) -> float:
+        """Token alinana kadar bekle, toplam bekleme suresini dondur"""
+        waited = 0.0
+        while True:
+            wait_time = self.try_acquire(tokens)
+            if wait_time <= 0:
+                return waited
+            if wait_time >= 5:
+                logger.info(f"Rate limit ({self.name}) - {wait_time:.0f}s bekleniyor...")
+            time.sleep(wait_time)
+            waited += wait_time
+
+    def penalize(self, seconds: float = None):
+        """429 / kota hatasi alindiginda kovayi bosalt (gerekirse ek ceza suresi ekle)"""
+        with self._lock:
+            now = time.monotonic()
+            self._refill(now)
+            self.tokens = 0.0
+            if seconds:
+                # Negatif token = ceza suresi kadar yeni istek gecmez
+                self.tokens = -seconds * self.rate
+
+
+# ============================================================================
+# PAYLASILAN KOVA KAYDI
+# ============================================================================
+
+_buckets: Dict[Tuple[str, str], TokenBucket] = {}
+_registry_lock = threading.Lock()
+
+
+def _key_id(api_key: str) -> str:
+    """API anahtarini loglarda gorunmeyecek sekilde kisalt"""
+    if not api_key:
+        return "default"
+    return hashlib.sha256(api_key.encode("utf-8")).hexdigest()[:8]
+
+
+def get_limiter(kind: str, api_key: str = "") -> TokenBucket:
+    """(model turu, API anahtari) icin paylasilan kovayi getir, yoksa olustur"""
+    key = (_key_id(api_key), kind)
+    with _registry_lock:
+        bucket = _buckets.get(key)
+        if bucket is None:
+            rpm, burst = _budget_for(kind)
+            bucket = TokenBucket(rpm, burst, name=f"{kind}:{key[0]}")
+            _buckets[key] = bucket
+        return bucket
+
+
+def acquire(kind: str, api_key: str = "", tokens: float = 1.0) -> float:
+    """Ilgili kovadan token al (gerekirse bekle)"""
+    return get_limiter(kind, api_key).acquire(tokens)
+
+
+def penalize(kind: str, api_key: str = "", seconds: float = None):
+    """Kota hatasi sonrasi ilgili kovayi bosalt"""
+    get_limiter(kind, api_key).penalize(seconds)
+
+
+def is_quota_error(error: Exception) -> bool:
+    """Gemini 429 / RESOURCE_EXHAUSTED hatasi mi"""
+    text = str(error)
+    return "429" in text or "RESOURCE_EXHAUSTED" in text
+
+
+def penalize_on_quota(kind: str, api_key: str, error: Exception,
+                      seconds: float = QUOTA_PENALTY_SECONDS) -> bool:
+    """Hata kota hatasiysa ilgili kovayi cezalandir; kota hatasi olup olmadigini dondur"""
+    if not is_quota_error(error):
+        return False
+    penalize(kind, api_key, seconds)
+    return True
@@ -30,9 +30,12 @@ import logging
 import re
 import base64
 from datetime import datetime
-from typing import Optional, Dict, List, Tuple
+from itertools import islice
+from typing import Optional, Dict, Iterator, List, Tuple
 from enum import Enum
 
+import rate_limiter
+
 from supabase import create_client, Client
 
 try:
@@ -142,11 +145,12 @@ class Config:
     BATCH_SIZE = int(os.environ.get('BATCH_SIZE', '20'))
     TEST_MODE = os.environ.get('TEST_MODE', 'false').lower() == 'true'
     TEST_BATCH_SIZE = 3
+    PAGE_SIZE = int(os.environ.get('PAGE_SIZE', '100'))
+    MAX_SCAN_ROWS = int(os.environ.get('MAX_SCAN_ROWS', '2000'))  # Filtrelenenlerle birlikte en fazla taranacak soru
     
     # Ayarlar
     MAX_RETRIES = 3
     RETRY_DELAY = 5
-    RATE_LIMIT_DELAY = 3
     MIN_PNG_SIZE = 10000
     MIN_QUALITY_SCORE = 6
 
@@ -528,48 +532,84 @@ class LearningOutcomeFilter:
         'periyot': [r'periyodik\s*hareket', r'periyot\s*formül'],
     }
 
+    # re.IGNORECASE altında 'i' ile 'ı', 's' ile 'ſ' de eşleşir; ön-filtre
+    # literal'leri ve metin aynı şekilde katlanır ki hiçbir eşleşme kaçmasın
+    _FOLD = str.maketrans({'ı': 'i', 'ſ': 's'})
+
+    _rules = None
+
     @classmethod
-    def should_process(cls, question: Dict) -> Tuple[bool, str]:
-        """
-        Sorunun işlenip işlenmeyeceğini belirle.
+    def _rule(cls, pattern: str) -> Tuple[str, str, re.Pattern]:
+        """(kalıp, zorunlu literal, derlenmiş regex) - regex'ten önce literal 'in' ile aranır"""
+        literal = max(re.split(r'\\s\*|\.\*', pattern), key=len)
+        if re.escape(literal) != literal:
+            literal = ''  # Literal'e indirgenemeyen kalıp: doğrudan regex
+        return pattern, literal.translate(cls._FOLD), re.compile(pattern, re.IGNORECASE)
 
-        Returns:
-            (True, "OK") - İşlenecek
-            (False, reason) - Filtrelendi
-        """
+    @classmethod
+    def _compile(cls) -> Dict:
+        """Kalıpları bir kez derle (liste sırası korunur, gerekçe aynı kural olsun)"""
+        if cls._rules is None:
+            cls._rules = {
+                'math': [cls._rule(p) for p in cls.MATH_OVERRIDE_PATTERNS],
+                'physics': [cls._rule(p) for p in cls.STRICT_PHYSICS_PATTERNS],
+                'context': [(word, [cls._rule(p) for p in contexts])
+                            for word, contexts in cls.CONTEXT_DEPENDENT.items()],
+            }
+        return cls._rules
+
+    @staticmethod
+    def _first(rules: List, text: str, folded: str) -> Optional[str]:
+        """Liste sırasında ilk eşleşen kalıp"""
+        for pattern, literal, regex in rules:
+            if literal in folded and regex.search(text):
+                return pattern
+        return None
+
+    @classmethod
+    def _decide(cls, question: Dict, rules: Dict) -> Tuple[bool, str]:
         text = ' '.join([
             question.get('original_text') or '',
             question.get('scenario_text') or '',
             question.get('learning_outcome') or '',
             question.get('tags') or ''
         ]).lower()
+        folded = text.translate(cls._FOLD)
 
         # 1. Matematik override kontrolü - bu kelimeler varsa işle
-        for pattern in cls.MATH_OVERRIDE_PATTERNS:
-            if re.search(pattern, text, re.IGNORECASE):
-                return True, f"Matematik içerik tespit: {pattern}"
+        pattern = cls._first(rules['math'], text, folded)
+        if pattern:
+            return True, f"Matematik içerik tespit: {pattern}"
 
         # 2. Kesin fizik/kimya kontrolü
-        for pattern in cls.STRICT_PHYSICS_PATTERNS:
-            if re.search(pattern, text, re.IGNORECASE):
-                return False, f"Fizik/Kimya içerik (kesin): {pattern}"
-
-        # 3. Bağlam bağımlı kelime kontrolü
-        for word, physics_contexts in cls.CONTEXT_DEPENDENT.items():
-            if word in text:
-                # Fizik bağlamı var mı kontrol et
-                is_physics = False
-                for physics_pattern in physics_contexts:
-                    if re.search(physics_pattern, text, re.IGNORECASE):
-                        is_physics = True
-                        break
+        pattern = cls._first(rules['physics'], text, folded)
+        if pattern:
+            return False, f"Fizik/Kimya içerik (kesin): {pattern}"
 
-                if is_physics:
-                    return False, f"Fizik bağlamı tespit: {word}"
-                # Fizik bağlamı yoksa matematik problemi olarak işle
+        # 3. Bağlam bağımlı kelime kontrolü - fizik bağlamı yoksa matematik problemi olarak işle
+        for word, physics_contexts in rules['context']:
+            if word in text and cls._first(physics_contexts, text, folded):
+                return False, f"Fizik bağlamı tespit: {word}"
 
         return True, "OK"
 
+    @classmethod
+    def should_process(cls, question: Dict) -> Tuple[bool, str]:
+        """
+        Sorunun işlenip işlenmeyeceğini belirle.
+
+        Returns:
+            (True, "OK") - İşlenecek
+            (False, reason) - Filtrelendi
+        """
+        return cls._decide(question, cls._compile())
+
+    @classmethod
+    def should_process_many(cls, questions: List[Dict]) -> List[Tuple[bool, str]]:
+        """should_process'in toplu hali - Gemini çağrısından önce sayfa sayfa ön-filtre"""
+        rules = cls._compile()
+        return [cls._decide(question, rules) for question in questions]
+
 
 # ============== GEMİNİ API ==============
 
@@ -581,15 +621,11 @@ class GeminiAPI:
             raise ValueError("google-genai paketi gerekli!")
         
         self.client = genai.Client(api_key=Config.GEMINI_API_KEY)
-        self._last_request = 0
         logger.info("✅ Gemini API başlatıldı (Hybrid Mode)")
     
-    def _rate_limit(self):
-        """Rate limiting"""
-        elapsed = time.time() - self._last_request
-        if elapsed < Config.RATE_LIMIT_DELAY:
-            time.sleep(Config.RATE_LIMIT_DELAY - elapsed)
-        self._last_request = time.time()
+    def _rate_limit(self, kind: str = "text"):
+        """Paylaşılan token-bucket kovasından (rate_limiter) izin al"""
+        rate_limiter.acquire(kind, Config.GEMINI_API_KEY)
     
     def analyze_question(self, question_text: str, scenario_text: str = None) -> Optional[Dict]:
         """Soruyu analiz et ve gerçekçi 3D görsel bilgilerini çıkar - v6.0"""
@@ -827,6 +863,7 @@ SADECE JSON FORMATINDA CEVAP VER:
             logger.warning(f"  ⚠️ JSON parse hatası: {e}")
             return None
         except Exception as e:
+            rate_limiter.penalize_on_quota("text", Config.GEMINI_API_KEY, e)
             logger.error(f"  ❌ Analiz hatası: {e}")
             return None
     
@@ -876,9 +913,8 @@ GÖRSEL TALİMATI: {matematiksel_plan.get('gorsel_talimat', '')}
         logger.info(f"  🎨 Model: {model.value}")
         logger.info(f"  📐 Tip: {tip}")
 
-        self._rate_limit()
-
         for attempt in range(Config.MAX_RETRIES):
+            self._rate_limit("image")
             try:
                 # Tüm modeller Gemini Image API kullanıyor
                 response = self.client.models.generate_content(
@@ -904,6 +940,7 @@ GÖRSEL TALİMATI: {matematiksel_plan.get('gorsel_talimat', '')}
 
             except Exception as e:
                 logger.error(f"  ❌ Görsel üretim hatası (deneme {attempt + 1}): {e}")
+                rate_limiter.penalize_on_quota("image", Config.GEMINI_API_KEY, e)
                 if attempt < Config.MAX_RETRIES - 1:
                     time.sleep(Config.RETRY_DELAY)
 
@@ -935,33 +972,46 @@ GÖRSEL TALİMATI: {matematiksel_plan.get('gorsel_talimat', '')}
 
 class DatabaseManager:
     """Supabase işlemleri"""
+
+    # Botun kullandığı kolonlar (embedding, çözüm metinleri vb. çekilmez)
+    QUESTION_COLUMNS = 'id, original_text, scenario_text, learning_outcome, tags'
     
     def __init__(self):
         self.client = create_client(Config.SUPABASE_URL, Config.SUPABASE_KEY)
         logger.info("✅ Supabase bağlantısı kuruldu")
     
-    def get_questions(self, limit: int = 20) -> List[Dict]:
-        """Görsel bekleyen soruları getir - TÜM sorular (scenario_text olsun olmasın)"""
-        try:
-            # Önce scenario_text olan sorulara bak, yoksa tüm sorulara
+    def iter_pages(self, page_size: int = None) -> Iterator[List[Dict]]:
+        """Görsel bekleyen, metni olan soruları id sırasıyla sayfa sayfa getir (keyset)"""
+        page_size = page_size or Config.PAGE_SIZE
+        last_id = 0
+        while True:
             response = self.client.table('question_bank') \
-                .select('*') \
+                .select(self.QUESTION_COLUMNS) \
                 .is_('image_url', 'null') \
                 .eq('is_active', True) \
+                .neq('original_text', '') \
+                .gt('id', last_id) \
                 .order('id', desc=False) \
-                .limit(limit) \
+                .limit(page_size) \
                 .execute()
+            rows = response.data or []
+            if rows:
+                yield rows
+            if len(rows) < page_size:
+                return
+            last_id = rows[-1]['id']
 
-            questions = response.data or []
-
-            # Sadece original_text veya scenario_text olan soruları filtrele
-            valid_questions = [
-                q for q in questions
-                if q.get('original_text') or q.get('scenario_text')
-            ]
+    def iter_questions(self, page_size: int = None) -> Iterator[Dict]:
+        """iter_pages satırlarını tek tek ver"""
+        for page in self.iter_pages(page_size):
+            yield from page
 
-            logger.info(f"📋 {len(valid_questions)} soru bulundu (toplam çekilen: {len(questions)})")
-            return valid_questions
+    def get_questions(self, limit: int = 20) -> List[Dict]:
+        """Görsel bekleyen soruları getir (metni boş olanlar sunucuda elenir)"""
+        try:
+            questions = list(islice(self.iter_questions(min(limit, Config.PAGE_SIZE)), limit))
+            logger.info(f"📋 {len(questions)} soru bulundu")
+            return questions
         except Exception as e:
             logger.error(f"Soru çekme hatası: {e}")
             return []
@@ -1029,12 +1079,12 @@ class ScenarioImageBot:
             logger.info(f"⚙️ Mod: {'TEST' if Config.TEST_MODE else 'PRODUCTION'}")
             logger.info(f"📦 Batch: {batch_size}")
             
-            questions = self.db.get_questions(batch_size)
+            questions = self._select_questions(batch_size)
             if not questions:
                 logger.warning("⚠️ İşlenecek soru yok!")
                 return
             
-            self.stats['total'] = len(questions)
+            self.stats['total'] = len(questions) + self.stats['filtered']
             
             for i, q in enumerate(questions):
                 logger.info(f"\n{'─' * 60}")
@@ -1042,8 +1092,6 @@ class ScenarioImageBot:
                 logger.info(f"{'─' * 60}")
                 
                 self._process_question(q)
-                
-                time.sleep(Config.RATE_LIMIT_DELAY)
             
             self._print_report()
             
@@ -1053,6 +1101,32 @@ class ScenarioImageBot:
             traceback.print_exc()
             raise
     
+    def _select_questions(self, limit: int) -> List[Dict]:
+        """Kazanım filtresinden geçen ilk `limit` soruyu sayfalayarak topla"""
+        questions = []
+        scanned = 0
+        try:
+            for page in self.db.iter_pages():
+                decisions = LearningOutcomeFilter.should_process_many(page)
+                for question, (should_process, reason) in zip(page, decisions):
+                    scanned += 1
+                    if should_process:
+                        questions.append(question)
+                        if len(questions) >= limit:
+                            break
+                    else:
+                        logger.info(f"⏭️ #{question['id']} filtrelendi: {reason}")
+                        self.stats['filtered'] += 1
+                    if scanned >= Config.MAX_SCAN_ROWS:
+                        break
+                if len(questions) >= limit or scanned >= Config.MAX_SCAN_ROWS:
+                    break
+        except Exception as e:
+            logger.error(f"Soru çekme hatası: {e}")
+
+        logger.info(f"📋 {len(questions)} soru bulundu (taranan: {scanned})")
+        return questions
+
     def _process_question(self, question: Dict):
         """Tek soruyu işle"""
         qid = question['id']
@@ -1064,13 +1138,8 @@ class ScenarioImageBot:
             self.stats['filtered'] += 1
             return
         
-        # 1. Kazanım filtresi
-        should_process, reason = LearningOutcomeFilter.should_process(question)
-        if not should_process:
-            logger.info(f"⏭️ Filtrelendi: {reason}")
-            self.stats['filtered'] += 1
-            return
-        
+        # 1. Kazanım filtresi soru seçilirken uygulandı (_select_questions)
+
         # 2. Analiz
         logger.info("🔍 Analiz ediliyor...")
         analysis = self.gemini.analyze_question(text, scenario)
@@ -0,0 +1,472 @@
+"""
+Yerel Vektor Indeksi (Near-Duplicate Kontrolu)
+==============================================
+embedding_bot.py'nin question_bank.embedding kolonuna yazdigi 768 boyutlu
+vektorleri yerelde tutan yaklasik en yakin komsu (IVF) indeksi.
+
+- Baslangicta Supabase'den embedding'ler sayfa sayfa cekilir ve yerel
+  .npz dosyasina cache'lenir; sonraki calistirmalarda sadece yeni id'ler
+  cekilir (artimli yenileme)
+- Embedding'i henuz olmayan satirlar (pasif, metni kisa...) watermark'i
+  durdurmaz; id'leri saklanir ve sonraki yenilemelerde id ile tekrar sorulur
+- Aday soru Gemini text-embedding-004 ile embed edilir (embedding_bot ile
+  ayni metin sablonu), indekste aranir; kosinus benzerligi esigin
+  uzerindeyse soru tekrar sayilir
+- Arama veritabanina gitmez, bellekteki matris uzerinde milisaniyeler surer
+- Kabul edilen soru once rezerve edilir (paralel worker'larin aramalarinda
+  gorunur), kayit kesinlesince gercek id'siyle indekse girer; kayit
+  basarisizsa rezervasyon silinir
+
+Kullanim:
+  index = NearDuplicateIndex(SUPABASE_URL, SUPABASE_KEY, GEMINI_API_KEY,
+                             filters={"subject": "eq.Fizik"}, name="ayt_fizik")
+  match, confirm = index.check_and_reserve(row)   # match: None veya (soru_id, benzerlik)
+  ...
+  confirm(question_id)                            # kayit basarisizsa confirm(None)
+"""
+
+import os
+import json
+import time
+import logging
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    NUMPY_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+EMBEDDING_MODEL = "text-embedding-004"
+EMBEDDING_DIM = 768
+EMBEDDING_URL = f"https://generativelanguage.googleapis.com/v1beta/models/{EMBEDDING_MODEL}:embedContent"
+MAX_TEXT_LENGTH = 8000
+
+DEFAULT_THRESHOLD = float(os.environ.get("DEDUP_THRESHOLD", "0.95"))
+DEFAULT_CACHE_DIR = os.environ.get("VECTOR_INDEX_DIR", ".vector_index")
+
+# Bu boyutun altinda duz (brute-force) arama zaten milisaniyeler surer
+IVF_MIN_SIZE = 4096
+
+# Embedding bekleyen satir id'leri icin ust sinir (en yeniler tutulur)
+MAX_PENDING_IDS = 5000
+PENDING_CHUNK = 200
+
+
+# ============================================================================
+# EMBEDDING METNI (embedding_bot ile ortak)
+# ============================================================================
+
+def build_embedding_text(question: dict) -> str:
+    """Soru verilerinden embedding için zengin metin oluşturur"""
+    parts = []
+
+    if question.get("subject"):
+        parts.append(f"Ders: {question['subject']}")
+    if question.get("topic_group"):
+        parts.append(f"Konu Grubu: {question['topic_group']}")
+    if question.get("topic"):
+        parts.append(f"Alt Konu: {question['topic']}")
+    if question.get("kazanim_kodu"):
+        parts.append(f"Kazanım: {question['kazanim_kodu']}")
+    if question.get("grade_level"):
+        parts.append(f"Sınıf: {question['grade_level']}")
+    if question.get("difficulty"):
+        parts.append(f"Zorluk: {question['difficulty']}/5")
+    if question.get("bloom_level"):
+        parts.append(f"Bloom: {question['bloom_level']}")
+    if question.get("pisa_level"):
+        parts.append(f"PISA Seviye: {question['pisa_level']}")
+    if question.get("scenario_text"):
+        parts.append(f"Senaryo: {question['scenario_text']}")
+
+    if question.get("original_text"):
+        parts.append(f"Soru: {question['original_text']}")
+    elif question.get("title"):
+        parts.append(f"Soru: {question['title']}")
+
+    options = question.get("options")
+    if options and isinstance(options, dict):
+        options_text = " | ".join([f"{k}) {v}" for k, v in options.items()])
+        parts.append(f"Şıklar: {options_text}")
+
+    if question.get("solution_short"):
+        parts.append(f"Çözüm: {question['solution_short']}")
+    elif question.get("solution_text"):
+        parts.append(f"Çözüm: {question['solution_text']}")
+
+    if question.get("correct_answer"):
+        parts.append(f"Doğru Cevap: {question['correct_answer']}")
+
+    full_text = "\n\n".join(parts)
+
+    if len(full_text) > MAX_TEXT_LENGTH:
+        full_text = full_text[:MAX_TEXT_LENGTH] + "..."
+
+    return full_text
+
+
+# ============================================================================
+# IVF INDEKS
+# ============================================================================
+
+class VectorIndex:
+    """NumPy uzerinde IVF-flat kosinus indeksi (kucuk boyutta duz arama)"""
+
+    def __init__(self, dim: int = EMBEDDING_DIM, nprobe: int = 8):
+        self.dim = dim
+        self.nprobe = nprobe
+        self.ids: List[Any] = []
+        self._chunks: List["np.ndarray"] = []
+        self._matrix = np.zeros((0, dim), dtype=np.float32)
+        self._centroids: Optional["np.ndarray"] = None
+        self._lists: List[List[int]] = []
+
+    def __len__(self):
+        return len(self.ids)
+
+    @staticmethod
+    def _normalize(vectors: "np.ndarray") -> "np.ndarray":
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        return vectors / norms
+
+    def _compact(self):
+        if self._chunks:
+            self._matrix = np.vstack([self._matrix] + self._chunks)
+            self._chunks = []
+
+    def add(self, ids: List[Any], vectors: "np.ndarray"):
+        """Vektorleri ekle; IVF kuruluysa en yakin listeye ata"""
+        vectors = self._normalize(np.asarray(vectors, dtype=np.float32).reshape(-1, self.dim))
+        start = len(self.ids)
+        self.ids.extend(ids)
+        self._chunks.append(vectors)
+        if self._centroids is not None:
+            for offset, cluster in enumerate(np.argmax(vectors @ self._centroids.T, axis=1)):
+                self._lists[cluster].append(start + offset)
+
+    def build(self, iterations: int = 8):
+        """k-means ile IVF listelerini (yeniden) kur"""
+        self._compact()
+        n = len(self.ids)
+        if n < IVF_MIN_SIZE:
+            self._centroids = None
+            self._lists = []
+            return
+        nlist = int(np.sqrt(n))
+        rng = np.random.default_rng(0)
+        sample = self._matrix[rng.choice(n, size=min(n, nlist * 40), replace=False)]
+        centroids = sample[rng.choice(len(sample), size=nlist, replace=False)]
+        for _ in range(iterations):
+            assign = np.argmax(sample @ centroids.T, axis=1)
+            for c in range(nlist):
+                members = sample[assign == c]
+                if len(members):
+                    centroids[c] = members.mean(axis=0)
+            centroids = self._normalize(centroids)
+        assign = np.argmax(self._matrix @ centroids.T, axis=1)
+        self._centroids = centroids
+        self._lists = [np.flatnonzero(assign == c).tolist() for c in range(nlist)]
+
+    def search(self, vector: "np.ndarray", k: int = 1) -> List[Tuple[Any, float]]:
+        """En yakin k vektoru (id, kosinus benzerligi) olarak dondur"""
+        if not self.ids:
+            return []
+        self._compact()
+        query = self._normalize(np.asarray(vector, dtype=np.float32).reshape(1, self.dim))[0]
+        if self._centroids is None:
+            candidates = None
+            scores = self._matrix @ query
+        else:
+            probe = np.argsort(self._centroids @ query)[-self.nprobe:]
+            candidates = np.fromiter((i for c in probe for i in self._lists[c]), dtype=np.int64)
+            if not len(candidates):
+                return []
+            scores = self._matrix[candidates] @ query
+        top = np.argsort(scores)[-k:][::-1]
+        rows = top if candidates is None else candidates[top]
+        return [(self.ids[r], float(scores[t])) for r, t in zip(rows, top)]
+
+
+# ============================================================================
+# SUPABASE DESTEKLI NEAR-DUPLICATE KONTROLU
+# ============================================================================
+
+class NearDuplicateIndex:
+    """question_bank embedding'lerinden kurulan, artimli yenilenen tekrar kontrolu"""
+
+    def __init__(self, supabase_url: str, supabase_key: str, gemini_key: str,
+                 filters: Dict[str, str] = None, name: str = "question_bank",
+                 threshold: float = None, cache_dir: str = None):
+        self.supabase_url = (supabase_url or "").rstrip("/")
+        self.supabase_key = supabase_key
+        self.gemini_key = gemini_key
+        self.filters = filters or {}
+        self.name = name
+        self.threshold = threshold if threshold is not None else DEFAULT_THRESHOLD
+        self.cache_path = os.path.join(cache_dir or DEFAULT_CACHE_DIR, f"{name}.npz")
+        self.enabled = NUMPY_AVAILABLE and bool(supabase_url and supabase_key and gemini_key)
+        self.stats = {"checked": 0, "duplicates": 0, "embed_errors": 0}
+
+        self._index: Optional[VectorIndex] = None
+        self._known_ids = set()
+        self._pending_ids = set()
+        self._watermark = 0
+        self._lock = threading.RLock()
+        self._vectors: "OrderedDict[str, Any]" = OrderedDict()
+        self._reserved: Dict[object, Any] = {}
+
+        if not NUMPY_AVAILABLE:
+            logger.warning("numpy bulunamadi, vektor tabanli tekrar kontrolu devre disi")
+
+    # ------------------------------------------------------------------
+    # Yukleme / artimli yenileme
+    # ------------------------------------------------------------------
+
+    def load(self):
+        """Cache'i oku, sonra veritabanindaki yeni embedding'leri ekle"""
+        with self._lock:
+            if self._index is not None or not self.enabled:
+                return
+            started = time.time()
+            self._index = VectorIndex()
+            self._load_cache()
+            cached = len(self._index)
+            self.refresh()
+            self._index.build()
+            logger.info(
+                f"  Vektor indeksi hazir ({self.name}): {len(self._index)} soru "
+                f"(cache: {cached}), {time.time() - started:.1f}s"
+            )
+
+    def refresh(self, page_size: int = 1000):
+        """Bekleyen id'leri ve watermark'tan sonraki satirlari cek; embedding'i dolu olanlari indekse ekle"""
+        from http_session import get_session
+
+        session = get_session()
+        headers = {"apikey": self.supabase_key, "Authorization": f"Bearer {self.supabase_key}"}
+        state = (self._watermark, len(self._pending_ids))
+        added = self._recheck_pending(session, headers)
+        cursor = self._watermark
+
+        while True:
+            params = dict(self.filters)
+            params.update({
+                "select": "id,embedding",
+                "id": f"gt.{cursor}",
+                "order": "id.asc",
+                "limit": str(page_size),
+            })
+            rows = self._fetch(session, headers, params)
+            if rows is None:
+                break
+
+            for row in rows:
+                if row.get("embedding") is None:
+                    # Henuz embed edilmemis satir watermark'i durdurmaz;
+                    # sonraki yenilemelerde id ile tekrar bakilir
+                    self._pending_ids.add(row["id"])
+            added += self._add_rows(rows)
+            if rows:
+                self._watermark = max(self._watermark, rows[-1]["id"])
+
+            if len(rows) < page_size:
+                break
+            cursor = rows[-1]["id"]
+
+        if len(self._pending_ids) > MAX_PENDING_IDS:
+            self._pending_ids = set(sorted(self._pending_ids)[-MAX_PENDING_IDS:])
+        if added or state != (self._watermark, len(self._pending_ids)):
+            self._save_cache()
+        return added
+
+    def _recheck_pending(self, session, headers) -> int:
+        """Watermark'in gerisinde kalan, embedding bekleyen satirlari id ile tekrar sor"""
+        added = 0
+        pending = sorted(self._pending_ids)
+        for start in range(0, len(pending), PENDING_CHUNK):
+            chunk = pending[start:start + PENDING_CHUNK]
+            params = dict(self.filters)
+            params.update({
+                "select": "id,embedding",
+                "id": f"in.({','.join(str(i) for i in chunk)})",
+                "embedding": "not.is.null",
+            })
+            rows = self._fetch(session, headers, params)
+            if rows is None:
+                break
+            self._pending_ids.difference_update(row["id"] for row in rows)
+            added += self._add_rows(rows)
+        return added
+
+    def _fetch(self, session, headers, params) -> Optional[List[Dict]]:
+        try:
+            response = session.get(f"{self.supabase_url}/rest/v1/question_bank",
+                                   headers=headers, params=params, timeout=60)
+            response.raise_for_status()
+            return response.json()
+        except Exception as e:
+            logger.error(f"  Vektor indeksi yenilenemedi ({self.name}): {e}")
+            return None
+
+    def _add_rows(self, rows: List[Dict]) -> int:
+        ids, vectors = [], []
+        for row in rows:
+            embedding = row.get("embedding")
+            if embedding is None or row["id"] in self._known_ids:
+                continue
+            if isinstance(embedding, str):
+                embedding = json.loads(embedding)
+            ids.append(row["id"])
+            vectors.append(embedding)
+        if ids:
+            self._index.add(ids, np.asarray(vectors, dtype=np.float32))
+            self._known_ids.update(ids)
+        return len(ids)
+
+    def _load_cache(self):
+        if not os.path.exists(self.cache_path):
+            return
+        try:
+            data = np.load(self.cache_path, allow_pickle=False)
+            ids = data["ids"].tolist()
+            self._index.add(ids, data["vectors"])
+            self._known_ids.update(ids)
+            self._watermark = int(data["watermark"])
+            if "pending" in data.files:
+                self._pending_ids = set(data["pending"].tolist())
+        except Exception as e:
+            logger.warning(f"  Vektor cache okunamadi ({self.cache_path}): {e}")
+            self._index = VectorIndex()
+            self._known_ids = set()
+            self._pending_ids = set()
+            self._watermark = 0
+
+    def _save_cache(self):
+        # Sadece veritabanindan gelen (int id'li) vektorler cache'lenir
+        index = self._index
+        index._compact()
+        rows = [i for i, qid in enumerate(index.ids) if isinstance(qid, int)]
+        try:
+            os.makedirs(os.path.dirname(self.cache_path) or ".", exist_ok=True)
+            tmp_path = self.cache_path + ".tmp.npz"
+            np.savez(tmp_path, ids=np.asarray([index.ids[i] for i in rows], dtype=np.int64),
+                     vectors=index._matrix[rows], watermark=np.int64(self._watermark),
+                     pending=np.asarray(sorted(self._pending_ids), dtype=np.int64))
+            os.replace(tmp_path, self.cache_path)
+        except Exception as e:
+            logger.warning(f"  Vektor cache yazilamadi ({self.cache_path}): {e}")
+
+    # ------------------------------------------------------------------
+    # Sorgu
+    # ------------------------------------------------------------------
+
+    def _embed(self, row: Dict) -> Optional["np.ndarray"]:
+        """Aday soruyu embed et (ayni metin icin son sonuclar bellekte tutulur)"""
+        import rate_limiter
+        from http_session import get_session
+
+        text = build_embedding_text(row)
+        if len(text.strip()) < 10:
+            return None
+        with self._lock:
+            if text in self._vectors:
+                self._vectors.move_to_end(text)
+                return self._vectors[text]
+        try:
+            rate_limiter.acquire("embedding", self.gemini_key)
+            response = get_session().post(
+                f"{EMBEDDING_URL}?key={self.gemini_key}",
+                json={"model": f"models/{EMBEDDING_MODEL}", "content": {"parts": [{"text": text}]}},
+                timeout=30
+            )
+            response.raise_for_status()
+            vector = np.asarray(response.json()["embedding"]["values"], dtype=np.float32)
+        except Exception as e:
+            self.stats["embed_errors"] += 1
+            logger.warning(f"  Aday soru embed edilemedi, tekrar kontrolu atlandi: {e}")
+            return None
+        with self._lock:
+            self._vectors[text] = vector
+            while len(self._vectors) > 64:
+                self._vectors.popitem(last=False)
+        return vector
+
+    def _search(self, vector: "np.ndarray") -> Optional[Tuple[Any, float]]:
+        """Indeks + rezerve (kaydi bekleyen) vektorler icinde esigi gecen en iyi eslesme"""
+        matches = self._index.search(vector, k=1)
+        best = matches[0] if matches else None
+        if self._reserved:
+            query = vector / (np.linalg.norm(vector) or 1.0)
+            for reserved in self._reserved.values():
+                score = float(reserved @ query / (np.linalg.norm(reserved) or 1.0))
+                if best is None or score > best[1]:
+                    best = ("beklemede", score)
+        if best and best[1] >= self.threshold:
+            return best
+        return None
+
+    def find_duplicate(self, row: Dict) -> Optional[Tuple[Any, float]]:
+        """Esigin uzerinde benzer soru varsa (soru_id, benzerlik) dondur"""
+        if not self.enabled:
+            return None
+        self.load()
+        vector = self._embed(row)
+        if vector is None:
+            return None
+        with self._lock:
+            self.stats["checked"] += 1
+            match = self._search(vector)
+            if match:
+                self.stats["duplicates"] += 1
+            return match
+
+    def add(self, row: Dict, question_id: Any = None):
+        """Kaydedilmis soruyu indekse ekle (ayni calistirmadaki tekrarlar icin)"""
+        if not self.enabled:
+            return
+        self.load()
+        vector = self._embed(row)
+        if vector is None:
+            return
+        with self._lock:
+            self._index_vector(vector, question_id)
+
+    def check_and_reserve(self, row: Dict) -> Tuple[Optional[Tuple[Any, float]], Optional[Callable[[Any], None]]]:
+        """Tekrar degilse vektoru rezerve et (thread'ler arasi atomik) - (eslesme, onay) dondur"""
+        if not self.enabled:
+            return None, None
+        self.load()
+        vector = self._embed(row)
+        if vector is None:
+            return None, None
+        ticket = object()
+        with self._lock:
+            self.stats["checked"] += 1
+            match = self._search(vector)
+            if match:
+                self.stats["duplicates"] += 1
+                return match, None
+            self._reserved[ticket] = vector
+        return None, lambda question_id: self._confirm(ticket, question_id)
+
+    def _confirm(self, ticket: object, question_id: Any):
+        """Rezervasyonu kayit sonucuna gore indekse al (id) veya sil (None)"""
+        with self._lock:
+            vector = self._reserved.pop(ticket, None)
+            if vector is not None and question_id is not None:
+                self._index_vector(vector, question_id)
+
+    def _index_vector(self, vector: "np.ndarray", question_id: Any):
+        if question_id is None:
+            question_id = f"yeni-{len(self._index)}"
+        elif question_id in self._known_ids:
+            return
+        self._index.add([question_id], vector)
+        if isinstance(question_id, int):
+            self._known_ids.add(question_id)